@@ -0,0 +1,247 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import lightkube
+from lightkube import Client
+from lightkube.resources.core_v1 import Pod
+from prettytable import PrettyTable
+
+from dss.config import INTEL_GPU_RESOURCE, LIST_PAGE_SIZE, NOTEBOOK_LABEL, NVIDIA_GPU_RESOURCE
+from dss.logger import setup_logger
+from dss.nodes import NodeInfo
+from dss.resources import format_memory_quantity, parse_cpu_quantity, parse_memory_quantity
+
+# Set up logger
+logger = setup_logger()
+
+# Resources compared between the allocatable capacity of the nodes and the Pod requests. GPUs of
+# both vendors are counted together, since a node only has the device plugin of one of them.
+HEADROOM_RESOURCES = ("cpu", "memory", "ephemeral-storage", "gpu")
+GPU_RESOURCES = (NVIDIA_GPU_RESOURCE, INTEL_GPU_RESOURCE)
+RESOURCE_NAMES = {
+    "cpu": "CPU",
+    "memory": "memory",
+    "ephemeral-storage": "ephemeral storage",
+    "gpu": "GPU",
+}
+# Notebook profile used to count the notebooks that still fit, when none is given
+DEFAULT_PROFILE_CPU = "1"
+DEFAULT_PROFILE_MEMORY = "2Gi"
+# Pods in these phases no longer hold the resources they requested
+TERMINATED_POD_PHASES = ("Succeeded", "Failed")
+
+
+def _parse_quantity(resource: str, quantity: str) -> float:
+    """Parse a quantity of a resource into cores, bytes or a number of devices."""
+    if resource == "cpu":
+        return parse_cpu_quantity(quantity)
+    if resource in ("memory", "ephemeral-storage"):
+        return parse_memory_quantity(quantity)
+    return int(quantity)
+
+
+def _normalize(quantities: Optional[Dict[str, str]]) -> Dict[str, float]:
+    """Return the quantities of HEADROOM_RESOURCES, ignoring the ones that cannot be parsed."""
+    normalized = dict.fromkeys(HEADROOM_RESOURCES, 0.0)
+    for resource, quantity in (quantities or {}).items():
+        key = "gpu" if resource in GPU_RESOURCES else resource
+        if key not in normalized:
+            continue
+        try:
+            normalized[key] += _parse_quantity(key, quantity)
+        except ValueError:
+            logger.debug(f"Ignoring the {resource} quantity '{quantity}', it cannot be parsed.")
+    return normalized
+
+
+def get_pod_requests(pod: Pod) -> Dict[str, float]:
+    """
+    Return the resources requested by a Pod, as the scheduler computes them: the sum of the
+    requests of its containers, or the largest request of an init container if it is larger.
+    Containers without requests request their limits.
+    """
+
+    def container_requests(container) -> Dict[str, float]:
+        resources = container.resources
+        quantities = dict((resources.limits or {}) if resources else {})
+        quantities.update((resources.requests or {}) if resources else {})
+        return _normalize(quantities)
+
+    requests = dict.fromkeys(HEADROOM_RESOURCES, 0.0)
+    for container in pod.spec.containers or []:
+        for resource, quantity in container_requests(container).items():
+            requests[resource] += quantity
+    for container in pod.spec.initContainers or []:
+        for resource, quantity in container_requests(container).items():
+            requests[resource] = max(requests[resource], quantity)
+    return requests
+
+
+@dataclass
+class NotebookUsage:
+    """The resources requested by the Pod of a running notebook."""
+
+    name: str
+    namespace: str
+    node: str
+    requests: Dict[str, float]
+
+
+@dataclass
+class ClusterUsage:
+    """The resources requested on each node by the scheduled Pods, and by each notebook."""
+
+    requested: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    notebooks: List[NotebookUsage] = field(default_factory=list)
+
+
+def get_cluster_usage(lightkube_client: Client) -> ClusterUsage:
+    """
+    Sum the requests of the Pods scheduled on each node, with a single list of the Pods of all
+    namespaces. The Pods are listed in pages and only their requests are kept.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+    """
+    usage = ClusterUsage()
+    for pod in lightkube_client.list(Pod, namespace=lightkube.ALL_NS, chunk_size=LIST_PAGE_SIZE):
+        node = pod.spec.nodeName if pod.spec else None
+        if not node or (pod.status and pod.status.phase in TERMINATED_POD_PHASES):
+            continue
+        requests = get_pod_requests(pod)
+        node_requested = usage.requested.setdefault(node, dict.fromkeys(HEADROOM_RESOURCES, 0.0))
+        for resource, quantity in requests.items():
+            node_requested[resource] += quantity
+        notebook = (pod.metadata.labels or {}).get(NOTEBOOK_LABEL)
+        if notebook:
+            usage.notebooks.append(NotebookUsage(notebook, pod.metadata.namespace, node, requests))
+    return usage
+
+
+def get_profile(
+    cpu: Optional[str] = None, memory: Optional[str] = None, gpu: int = 0
+) -> Dict[str, float]:
+    """
+    Return the requests of a notebook profile, defaulting to DEFAULT_PROFILE_CPU and
+    DEFAULT_PROFILE_MEMORY.
+
+    Raises:
+        ValueError: If a quantity is invalid.
+    """
+    return {
+        "cpu": parse_cpu_quantity(cpu or DEFAULT_PROFILE_CPU),
+        "memory": parse_memory_quantity(memory or DEFAULT_PROFILE_MEMORY),
+        "gpu": gpu,
+    }
+
+
+@dataclass
+class NodeHeadroom:
+    """The allocatable and requested resources of a node."""
+
+    name: str
+    allocatable: Dict[str, float]
+    requested: Dict[str, float]
+
+    def get_free(self, resource: str) -> float:
+        """Return the allocatable quantity of a resource not requested by any Pod."""
+        return max(self.allocatable[resource] - self.requested[resource], 0)
+
+    def count_fitting(self, profile: Dict[str, float]) -> int:
+        """Return the number of notebooks of the profile that fit in the free resources."""
+        counts = [
+            math.floor(self.get_free(resource) / quantity)
+            for resource, quantity in profile.items()
+            if quantity
+        ]
+        return min(counts) if counts else 0
+
+
+def get_headroom(nodes: List[NodeInfo], usage: ClusterUsage) -> List[NodeHeadroom]:
+    """Return the headroom of each node, from the node inventory and the cluster usage."""
+    return [
+        NodeHeadroom(
+            name=node.name,
+            allocatable=_normalize(node.allocatable),
+            requested=usage.requested.get(node.name, dict.fromkeys(HEADROOM_RESOURCES, 0.0)),
+        )
+        for node in nodes
+    ]
+
+
+def get_shortfalls(headroom: List[NodeHeadroom], profile: Dict[str, float]) -> List[str]:
+    """Return why no node fits a notebook of the profile, for each resource that is short."""
+    shortfalls = []
+    for resource, quantity in profile.items():
+        if not quantity:
+            continue
+        most_free = max((node.get_free(resource) for node in headroom), default=0)
+        if most_free < quantity:
+            shortfalls.append(
+                f"requested {_format(resource, quantity)} {RESOURCE_NAMES[resource]}, "
+                f"at most {_format(resource, most_free)} free on a node"
+            )
+    if not shortfalls:
+        shortfalls.append("no node has enough free resources for all the requests at once")
+    return shortfalls
+
+
+def _format(resource: str, quantity: float) -> str:
+    """Format a quantity of a resource for display."""
+    if resource in ("memory", "ephemeral-storage"):
+        return format_memory_quantity(int(quantity))
+    if resource == "cpu":
+        return f"{quantity:g}"
+    return str(int(quantity))
+
+
+def get_headroom_table(headroom: Iterable[NodeHeadroom], profile: Dict[str, float]) -> PrettyTable:
+    """
+    Return a table with the requested and allocatable resources of each node, and the number of
+    notebooks of the profile that still fit.
+    """
+    table = PrettyTable()
+    table.field_names = ["Node", "CPU", "Memory", "Ephemeral storage", "GPU", "Notebooks that fit"]
+    table.align = "l"
+    for node in headroom:
+        table.add_row(
+            [
+                node.name,
+                *(
+                    f"{_format(resource, node.requested[resource])}"
+                    f"/{_format(resource, node.allocatable[resource])}"
+                    for resource in HEADROOM_RESOURCES
+                ),
+                node.count_fitting(profile),
+            ]
+        )
+    return table
+
+
+def get_notebooks_usage_table(notebooks: Iterable[NotebookUsage]) -> PrettyTable:
+    """Return a table with the resources requested by each running notebook."""
+    table = PrettyTable()
+    table.field_names = ["Notebook", "Namespace", "Node", "CPU", "Memory", "GPU"]
+    table.align = "l"
+    for notebook in sorted(notebooks, key=lambda notebook: (notebook.namespace, notebook.name)):
+        table.add_row(
+            [
+                notebook.name,
+                notebook.namespace,
+                notebook.node,
+                *(
+                    _format(resource, notebook.requests[resource])
+                    for resource in ("cpu", "memory", "gpu")
+                ),
+            ]
+        )
+    return table
+
+
+def format_profile(profile: Dict[str, float]) -> str:
+    """Format a notebook profile, e.g. `1 CPU, 2Gi memory`."""
+    text = f"{_format('cpu', profile['cpu'])} CPU, {_format('memory', profile['memory'])} memory"
+    if profile.get("gpu"):
+        text += f", {profile['gpu']} GPU"
+    return text
@@ -1,13 +1,30 @@
+import re
 from enum import Enum
+from typing import Optional
 
 # Labels applied to any Kubernetes objects managed by the DSS CLI
 DSS_CLI_MANAGER_LABELS = {"app.kubernetes.io/managed-by": "dss-cli"}
 
 FIELD_MANAGER = "dss-cli"
 DSS_NAMESPACE = "dss"
+# Environment variable with the default namespace of a user's notebooks
+NOTEBOOK_NAMESPACE_ENV_VAR = "DSS_NOTEBOOK_NAMESPACE"
+# Kubernetes namespace names are DNS labels
+NAMESPACE_REGEX = re.compile(r"^[a-z0-9]([-a-z0-9]{0,61}[a-z0-9])?$")
 MANIFEST_TEMPLATES_LOCATION = "./manifest_templates"
 MLFLOW_DEPLOYMENT_NAME = "mlflow"
 NOTEBOOK_PVC_NAME = "notebooks"
+# Name of the shared memory (`/dev/shm`) volume of the notebook Pods
+SHM_VOLUME_NAME = "dshm"
+# Environment variable selecting the format of the DSS log file, `text` or `json`
+LOG_FORMAT_ENV_VAR = "DSS_LOG_FORMAT"
+# Environment variable with the correlation ID of the dss invocation, generated if not set
+CORRELATION_ID_ENV_VAR = "DSS_CORRELATION_ID"
+# Format of the timestamps stored in the log archive and the operation history, which sort in
+# chronological order
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+# Number of objects retrieved per request when listing, so memory does not grow with the cluster
+LIST_PAGE_SIZE = 100
 NOTEBOOK_IMAGES_ALIASES = {
     "pytorch": "kubeflownotebookswg/jupyter-pytorch-full:v1.8.0",
     "pytorch-cuda": "kubeflownotebookswg/jupyter-pytorch-cuda-full:v1.8.0",
@@ -17,6 +34,35 @@ NOTEBOOK_IMAGES_ALIASES = {
     "tensorflow-intel": "intel/intel-extension-for-tensorflow:2.15.0-xpu-idp-jupyter",
 }
 NOTEBOOK_LABEL = "canonical.com/dss-notebook"
+# Labels of the pre-warmed notebook Pods waiting to be adopted by `dss create`
+WARM_POOL_LABEL = "canonical.com/dss-warm-pool"
+WARM_POOL_CONFIG_LABEL = "canonical.com/dss-warm-pool-config"
+# Name of the notebook container of the warm Pods, and of the notebooks that adopt them. Other
+# notebooks name their container after the notebook, and as container names cannot change once a
+# Pod is created, the notebook container is always looked up by position, never by name
+WARM_POOL_CONTAINER_NAME = "notebook"
+
+# Extended resources advertised by the GPU device plugins
+NVIDIA_GPU_RESOURCE = "nvidia.com/gpu"
+INTEL_GPU_RESOURCE = "gpu.intel.com/i915"
+
+# NVIDIA GPU operator objects used to configure GPU sharing
+NVIDIA_GPU_OPERATOR_NAMESPACE = "gpu-operator-resources"
+NVIDIA_CLUSTER_POLICY_NAME = "cluster-policy"
+GPU_SHARING_CONFIG_NAME = "dss-gpu-sharing"
+GPU_SHARING_CONFIG_KEY = "dss"
+
+# Interval between checks of a notebook being started or stopped, the precision of the durations
+# recorded for `dss stats`
+NOTEBOOK_POLL_INTERVAL_SECONDS = 1
+# Time after which `dss start` and `dss stop` stop waiting for the notebook
+NOTEBOOK_WAIT_TIMEOUT_SECONDS = 600
+
+# ConfigMap written by `dss initialize` with what was installed, read by the other commands
+INSTALL_STATE_CONFIGMAP_NAME = "dss-install-state"
+INSTALL_STATE_KEY = "state.json"
+# Version of the format of the install state, increased on incompatible changes
+INSTALL_STATE_SCHEMA_VERSION = 1
 
 
 def format_images_message(images_dict: dict) -> str:
@@ -26,6 +72,14 @@ def format_images_message(images_dict: dict) -> str:
     return formatted_string
 
 
+def get_image_alias(image: str) -> Optional[str]:
+    """Return the alias of a recommended image, or None for any other image."""
+    for alias, alias_image in NOTEBOOK_IMAGES_ALIASES.items():
+        if alias_image == image:
+            return alias
+    return None
+
+
 RECOMMENDED_IMAGES_MESSAGE = format_images_message(NOTEBOOK_IMAGES_ALIASES)
 DEFAULT_NOTEBOOK_IMAGE = "kubeflownotebookswg/jupyter-scipy:v1.8.0"
 
@@ -40,3 +94,7 @@ class DeploymentState(Enum):
     STOPPING = "Stopping"
     UNKNOWN = "Unknown"
     ERRIMAGE = "Image Pull Error"
+    ERRCONTAINER = "Container Error"
+    CRASHLOOP = "Crash Loop"
+    OOMKILLED = "Out of Memory"
+    UNSCHEDULABLE = "Unschedulable"
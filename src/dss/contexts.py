@@ -0,0 +1,141 @@
+import re
+import threading
+from concurrent.futures import Future, wait
+from pathlib import Path
+from typing import Callable, Dict, TypeVar, Union
+
+import yaml
+from lightkube import Client, KubeConfig
+
+from dss.logger import setup_logger
+from dss.utils import (
+    CONTEXTS_DIR,
+    CURRENT_CONTEXT_FILE,
+    DEFAULT_CONTEXT,
+    KUBECONFIG_DEFAULT,
+    get_context_kubeconfig_path,
+    get_current_context,
+)
+
+# Set up logger
+logger = setup_logger()
+
+# Context names are used as file names, so they are restricted to DNS-label-like names
+CONTEXT_NAME_REGEX = re.compile(r"^[a-z0-9]([-a-z0-9]*[a-z0-9])?$")
+# Deadline for the requests to each cluster when querying all contexts
+CONTEXT_TIMEOUT_SECONDS = 5
+
+T = TypeVar("T")
+
+
+def get_contexts() -> Dict[str, Path]:
+    """Returns the kubeconfig path of every cluster context, starting with the default one."""
+    contexts = {}
+    if KUBECONFIG_DEFAULT.exists():
+        contexts[DEFAULT_CONTEXT] = KUBECONFIG_DEFAULT
+    if CONTEXTS_DIR.is_dir():
+        for path in sorted(CONTEXTS_DIR.iterdir()):
+            contexts[path.name] = path
+    return contexts
+
+
+def add_context(name: str, kubeconfig: str) -> None:
+    """
+    Store the kubeconfig of a cluster under a context name.
+
+    Args:
+        name (str): The name of the context.
+        kubeconfig (str): The kubeconfig file contents.
+
+    Raises:
+        ValueError: If the name or the kubeconfig is invalid.
+    """
+    if name == DEFAULT_CONTEXT or not CONTEXT_NAME_REGEX.match(name):
+        raise ValueError(
+            f"invalid context name '{name}', expected lowercase letters, digits and '-' "
+            f"other than '{DEFAULT_CONTEXT}'"
+        )
+    try:
+        KubeConfig.from_dict(yaml.safe_load(kubeconfig))
+    except Exception as e:
+        raise ValueError(f"invalid kubeconfig: {e}")
+
+    path = get_context_kubeconfig_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(kubeconfig)
+    logger.info(f"Stored kubeconfig for context {name} to {path}")
+
+
+def use_context(name: str) -> None:
+    """
+    Select the cluster context used by the other `dss` commands.
+
+    Raises:
+        ValueError: If the context does not exist.
+    """
+    if name not in get_contexts():
+        raise ValueError(f"context '{name}' does not exist, add it with `dss context add`")
+    CURRENT_CONTEXT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    CURRENT_CONTEXT_FILE.write_text(name)
+    logger.info(f"Using context {name}.")
+
+
+def list_contexts() -> None:
+    """Log the cluster contexts, marking the current one."""
+    current = get_current_context()
+    contexts = get_contexts()
+    if not contexts:
+        logger.info("No contexts found. Add one with `dss context add`.")
+        return
+    for name, path in contexts.items():
+        marker = "*" if name == current else " "
+        logger.info(f"{marker} {name} ({path})")
+
+
+def run_on_contexts(
+    func: Callable[[Client], T], timeout_seconds: float = CONTEXT_TIMEOUT_SECONDS
+) -> Dict[str, Union[T, Exception]]:
+    """
+    Call `func` with a client for every cluster context concurrently.
+
+    All the requests `func` makes to a cluster share a single deadline, `timeout_seconds` after
+    the call. Clusters that have not answered by then are reported as timed out instead of
+    delaying the others, and their requests are left to a daemon thread so they do not delay
+    the exit of the command either.
+
+    Args:
+        func (Callable[[Client], T]): The function to call for each cluster.
+        timeout_seconds (float): The deadline for each cluster, in seconds.
+
+    Returns:
+        Dict[str, Union[T, Exception]]: The result of `func`, or the exception it raised, for
+                                        each context name.
+    """
+
+    def call(path: Path, future: Future) -> None:
+        future.set_running_or_notify_cancel()
+        try:
+            # The client timeout only bounds the requests still running after the deadline
+            client = Client(config=KubeConfig.from_file(path), timeout=timeout_seconds)
+            future.set_result(func(client))
+        except Exception as e:
+            future.set_exception(e)
+
+    contexts = get_contexts()
+    if not contexts:
+        return {}
+
+    futures = {name: Future() for name in contexts}
+    for name, path in contexts.items():
+        threading.Thread(target=call, args=(path, futures[name]), daemon=True).start()
+    wait(futures.values(), timeout=timeout_seconds)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            results[name] = TimeoutError(f"no response within {timeout_seconds} seconds")
+        elif future.exception():
+            results[name] = future.exception()
+        else:
+            results[name] = future.result()
+    return results
@@ -1,38 +1,80 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional
 
 from charmed_kubeflow_chisme.kubernetes import KubernetesResourceHandler
 from lightkube import Client
 from lightkube.core.exceptions import ApiError
 from lightkube.resources.apps_v1 import Deployment
-from lightkube.resources.core_v1 import Service
+from lightkube.resources.core_v1 import Event, Service
 
+from dss.capacity import format_profile, get_cluster_usage, get_headroom, get_shortfalls
 from dss.config import (
     DSS_CLI_MANAGER_LABELS,
     DSS_NAMESPACE,
     FIELD_MANAGER,
+    INTEL_GPU_RESOURCE,
+    LIST_PAGE_SIZE,
     MANIFEST_TEMPLATES_LOCATION,
     NOTEBOOK_IMAGES_ALIASES,
     NOTEBOOK_PVC_NAME,
+    NVIDIA_GPU_RESOURCE,
     RECOMMENDED_IMAGES_MESSAGE,
 )
+from dss.describe import get_startup_timeline
+from dss.history import estimate_startup_seconds, record_operation
+from dss.install_state import is_namespace_initialized, read_install_state, warn_on_version_skew
 from dss.logger import setup_logger
+from dss.nodes import NodeInfo, get_node_inventory, select_node
 from dss.remove_notebook import remove_notebook
+from dss.resources import (
+    get_resource_requirements,
+    get_shm_size,
+    parse_cpu_quantity,
+    parse_memory_quantity,
+)
 from dss.utils import (
     ImagePullBackOffError,
+    PodFailureError,
     does_dss_pvc_exist,
     does_mlflow_deployment_exist,
-    does_notebook_exist,
     get_mlflow_tracking_uri,
+    get_notebook_pod,
+    get_notebook_resources,
     get_service_url,
-    intel_is_present_in_node,
+    get_url_from_service,
     wait_for_deployment_ready,
 )
+from dss.warm_pool import (
+    adopt_warm_pod,
+    apply_warm_pool,
+    get_warm_pool_config_hash,
+    get_warm_pool_configs,
+)
 
 # Set up logger
 logger = setup_logger()
 
+# What to do when the notebook Pod fails, by failure reason
+POD_FAILURE_HINTS = {
+    "CrashLoopBackOff": "Check that the image starts a Jupyter server.",
+    "OOMKilled": "Request more memory for the notebook with --memory.",
+    "Unschedulable": "Run 'dss status' to check the capacity of the nodes.",
+}
+
 
-def create_notebook(name: str, image: str, lightkube_client: Client) -> None:
+def create_notebook(
+    name: str,
+    image: str,
+    lightkube_client: Client,
+    gpu: Optional[int] = None,
+    cpu: Optional[str] = None,
+    memory: Optional[str] = None,
+    guaranteed: bool = False,
+    shm_size: Optional[str] = None,
+    namespace: str = DSS_NAMESPACE,
+) -> None:
     """
     Creates a Notebook server on the Kubernetes cluster with optional GPU support.
 
@@ -40,13 +82,26 @@ def create_notebook(name: str, image: str, lightkube_client: Client) -> None:
         name (str): The name of the notebook server.
         image (str): The OCI image used for the notebook server.
         lightkube_client (Client): The Kubernetes client used for server creation.
+        gpu (Optional[int]): Number of GPUs to assign to the notebook server. If None, a GPU is
+                             assigned automatically when the cluster and image support it.
+                             Use 0 to create a notebook without GPUs.
+        cpu (Optional[str]): CPU quantity reserved for the notebook server, e.g. `2` or `500m`.
+        memory (Optional[str]): Memory quantity reserved for the notebook server, e.g. `8Gi`.
+        guaranteed (bool): Whether to set the limits equal to the requests to give the notebook
+                           server the Guaranteed QoS class.
+        shm_size (Optional[str]): Size of the shared memory volume, e.g. `2Gi`. Defaults to half
+                                  of `memory`, or unlimited if `memory` is not set.
+        namespace (str): The namespace of the notebook server. It must have been initialized
+                         with `dss initialize --namespace`.
 
     Raises:
         RuntimeError: If there is a failure in notebook creation or GPU label checking.
     """
-    if not does_dss_pvc_exist(lightkube_client) or not does_mlflow_deployment_exist(
-        lightkube_client
-    ):
+    # The install state and an existing notebook of the same name are looked up concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        install_state = executor.submit(read_install_state, lightkube_client)
+        existing = executor.submit(get_notebook_resources, name, namespace, lightkube_client)
+    if not _is_initialized(install_state.result(), lightkube_client, namespace):
         logger.debug("Failed to create notebook. DSS was not correctly initialized.")
         logger.error("Failed to create notebook. DSS was not correctly initialized.")
         logger.info("Note: You might want to run")
@@ -54,12 +109,13 @@ def create_notebook(name: str, image: str, lightkube_client: Client) -> None:
         logger.info("  dss logs --all  to view all logs")
         logger.info("  dss initialize  to install dss")
         raise RuntimeError()
-    if does_notebook_exist(name, DSS_NAMESPACE, lightkube_client):
+    existing = existing.result()
+    if existing.exists:
         # Assumes that the notebook server is exposed by a service of the same name.
         logger.debug(f"Failed to create Notebook. Notebook with name '{name}' already exists.")
         logger.error(f"Failed to create Notebook. Notebook with name '{name}' already exists.")
         logger.info("Please specify a different name.")
-        url = get_service_url("name", DSS_NAMESPACE, lightkube_client)
+        url = get_url_from_service(existing.service) if existing.service else None
         if url:
             logger.info(f"To connect to the existing notebook, go to {url}.")
         raise RuntimeError()
@@ -69,32 +125,60 @@ def create_notebook(name: str, image: str, lightkube_client: Client) -> None:
     )
 
     image_full_name = _get_notebook_image_name(image)
-    config = _get_notebook_config(image_full_name, name, lightkube_client)
-
-    k8s_resource_handler = KubernetesResourceHandler(
-        field_manager=FIELD_MANAGER,
-        labels=DSS_CLI_MANAGER_LABELS,
-        template_files=[manifests_file],
-        context=config,
-        resource_types={Deployment, Service},
-        lightkube_client=lightkube_client,
+    nodes = get_node_inventory(lightkube_client)
+    config = _get_notebook_config(
+        image_full_name,
+        name,
+        lightkube_client,
+        gpu,
+        cpu=cpu,
+        memory=memory,
+        guaranteed=guaranteed,
+        shm_size=shm_size,
+        namespace=namespace,
+        nodes=nodes,
     )
 
+    start = time.monotonic()
     try:
-        k8s_resource_handler.apply()
+        # Warm Pods are only looked up when a pool of the same config was recorded. They are
+        # adopted before the scheduling check, as a warm Pod already holds the notebook's
+        # resources and is counted as using them.
+        adopted = get_warm_pool_config_hash(config) in get_warm_pool_configs(
+            install_state.result()
+        ) and adopt_warm_pod(name, config, manifests_file, lightkube_client)
+        if not adopted:
+            _check_schedulable(config, nodes, lightkube_client)
+            _log_startup_estimate(image_full_name, config, nodes)
+            k8s_resource_handler = KubernetesResourceHandler(
+                field_manager=FIELD_MANAGER,
+                labels=DSS_CLI_MANAGER_LABELS,
+                template_files=[manifests_file],
+                context=config,
+                resource_types={Deployment, Service},
+                lightkube_client=lightkube_client,
+            )
+            # The startup of a notebook that is not adopted is timed from its creation
+            start = time.monotonic()
+            k8s_resource_handler.apply()
 
         wait_for_deployment_ready(
-            lightkube_client, namespace=DSS_NAMESPACE, deployment_name=name, timeout_seconds=None
+            lightkube_client, namespace=namespace, deployment_name=name, timeout_seconds=None
         )
 
         logger.info(f"Success: Notebook {name} created successfully.")
+        _record_create(
+            name, image_full_name, namespace, lightkube_client, time.monotonic() - start, adopted
+        )
     except ApiError as err:
+        record_operation("create", time.monotonic() - start, "ApiError", image=image_full_name)
         logger.debug(f"Failed to create Notebook {name}: {err}.", exc_info=True)
         logger.error(f"Failed to create Notebook with error code {err.status.code}.")
         logger.info(" Check the debug logs for more details.")
-        remove_notebook(name, lightkube_client)
+        remove_notebook(name, lightkube_client, namespace)
         raise RuntimeError()
     except ImagePullBackOffError as err:
+        record_operation("create", time.monotonic() - start, err.reason, image=image_full_name)
         logger.debug(f"Failed to create notebook {name}: {err}.", exc_info=True)
         logger.error(f"Failed to create notebook {name}.")
         logger.error(f"Image {image_full_name} does not exist or is not accessible.")
@@ -102,38 +186,305 @@ def create_notebook(name: str, image: str, lightkube_client: Client) -> None:
             "Note: You might want to use some of these recommended images:\n\n"
             f"{RECOMMENDED_IMAGES_MESSAGE}"
         )
-        remove_notebook(name, lightkube_client)
+        remove_notebook(name, lightkube_client, namespace)
+        raise RuntimeError()
+    except PodFailureError as err:
+        record_operation("create", time.monotonic() - start, err.reason, image=image_full_name)
+        logger.debug(f"Failed to create notebook {name}: {err}.", exc_info=True)
+        logger.error(f"Failed to create notebook {name}.")
+        logger.error(f"The notebook Pod failed with {err.reason}: {err.detail}.")
+        logger.info(POD_FAILURE_HINTS.get(err.reason, "Check the debug logs for more details."))
+        remove_notebook(name, lightkube_client, namespace)
         raise RuntimeError()
     # Assumes that the notebook server is exposed by a service of the same name.
-    url = get_service_url(name, DSS_NAMESPACE, lightkube_client)
+    url = get_service_url(name, namespace, lightkube_client)
     if url:
         logger.info(f"Access the notebook at {url}.")
 
 
-def _get_notebook_config(image: str, name: str, lightkube_client: Client) -> dict:
+def create_warm_pool(
+    image: str, count: int, lightkube_client: Client, namespace: str = DSS_NAMESPACE
+) -> dict:
+    """
+    Keep `count` ready notebook Pods of the given image that `dss create` can adopt.
+
+    Only notebooks created with the default resources for the image adopt warm Pods. The pool
+    is refilled by its Deployment as its Pods are adopted.
+
+    Args:
+        image (str): The image alias from `NOTEBOOK_IMAGES_ALIASES`.
+        count (int): The number of warm Pods.
+        lightkube_client (Client): The Kubernetes client.
+        namespace (str): The namespace of the notebooks that adopt the warm Pods.
+
+    Returns:
+        dict: The pool, to be recorded in the install state components.
+    """
+    manifests_file = Path(
+        Path(__file__).parent, MANIFEST_TEMPLATES_LOCATION, "notebook_deployment.yaml.j2"
+    )
+    config = _get_notebook_config(
+        _get_notebook_image_name(image), image, lightkube_client, namespace=namespace
+    )
+    pool = apply_warm_pool(lightkube_client, image, count, config, manifests_file)
+    logger.info(f"Warm pool for {image} keeps {count} notebook(s) ready.")
+    return pool
+
+
+def _get_notebook_config(
+    image: str,
+    name: str,
+    lightkube_client: Client,
+    gpu: Optional[int] = None,
+    cpu: Optional[str] = None,
+    memory: Optional[str] = None,
+    guaranteed: bool = False,
+    shm_size: Optional[str] = None,
+    namespace: str = DSS_NAMESPACE,
+    nodes: Optional[List[NodeInfo]] = None,
+) -> dict:
     """Return a dictionary with the context to render the notebooks Deployment.
 
     Args:
         image(str): the container image to use for the Server.
         name(str): name of the notebook Server.
         lightkube_client(Client): a Kubernetes Client to get information to expand the context.
+        gpu(Optional[int]): number of GPUs requested, or None to auto-detect.
+        cpu(Optional[str]): CPU quantity to request.
+        memory(Optional[str]): memory quantity to request.
+        guaranteed(bool): whether to set the limits equal to the requests.
+        shm_size(Optional[str]): size of the shared memory volume.
+        namespace(str): namespace of the notebook Server.
+        nodes(Optional[List[NodeInfo]]): the node inventory, fetched if not given.
     """
     mlflow_tracking_uri = get_mlflow_tracking_uri()
     context = {
         "mlflow_tracking_uri": mlflow_tracking_uri,
         "notebook_name": name,
-        "namespace": DSS_NAMESPACE,
+        "namespace": namespace,
         "notebook_image": image,
         "pvc_name": NOTEBOOK_PVC_NAME,
     }
 
-    # Add intel_enabled to context to render with Intel GPU resource limits
-    if intel_is_present_in_node(lightkube_client):
+    # Add intel_enabled or nvidia_enabled to context to render with GPU resource limits
+    if nodes is None:
+        nodes = get_node_inventory(lightkube_client)
+    gpu_resource = _get_gpu_resource(image, nodes, gpu)
+    if gpu_resource == INTEL_GPU_RESOURCE:
         context["intel_enabled"] = True
+    elif gpu_resource == NVIDIA_GPU_RESOURCE:
+        context["nvidia_enabled"] = True
+
+    if gpu_resource and gpu is not None:
+        _validate_gpu_request(gpu_resource, gpu, nodes)
+        context["gpu_count"] = gpu
+
+    # Prefer the node with the image cached, then the most allocatable GPUs and memory
+    if len(nodes) > 1:
+        node = select_node(nodes, image, gpu_resource, gpu or 1)
+        if node:
+            context["preferred_node"] = node.name
+
+    # Add CPU and memory requests and limits, if any
+    try:
+        requests, limits = get_resource_requirements(cpu, memory, guaranteed)
+        shm_size = get_shm_size(shm_size, memory)
+    except ValueError as e:
+        logger.debug(f"Failed to create notebook. Invalid resources: {e}.")
+        logger.error(f"Failed to create notebook: {e}.")
+        raise RuntimeError()
+    if requests:
+        context["resource_requests"] = requests
+    if limits:
+        context["resource_limits"] = limits
+    if shm_size:
+        context["shm_size"] = shm_size
 
     return context
 
 
+def _get_notebook_profile(config: dict) -> Dict[str, float]:
+    """Return the CPU, memory and GPUs the notebook rendered from the config requests."""
+    requests = config.get("resource_requests", {})
+    gpu_enabled = config.get("intel_enabled") or config.get("nvidia_enabled")
+    return {
+        "cpu": parse_cpu_quantity(requests["cpu"]) if "cpu" in requests else 0,
+        "memory": parse_memory_quantity(requests["memory"]) if "memory" in requests else 0,
+        "gpu": config.get("gpu_count", 1) if gpu_enabled else 0,
+    }
+
+
+def _check_schedulable(config: dict, nodes: List[NodeInfo], lightkube_client: Client) -> None:
+    """Check that a node has the free resources the notebook requests, before creating it.
+
+    The allocatable resources of each node are compared with the requests of the Pods already
+    scheduled on it. If the notebook fits on some nodes, the preferred node is chosen among them.
+
+    Raises:
+        RuntimeError: If the notebook does not fit on any node.
+    """
+    profile = _get_notebook_profile(config)
+    if not any(profile.values()):
+        return
+
+    try:
+        headroom = get_headroom(nodes, get_cluster_usage(lightkube_client))
+    except ApiError as e:
+        logger.debug(f"Skipping the scheduling check, failed to list Pods: {e}.", exc_info=True)
+        return
+    fitting = {node.name for node in headroom if node.count_fitting(profile)}
+    if not fitting:
+        logger.debug(f"Failed to create notebook. No node fits {profile}: {headroom}.")
+        logger.error(
+            f"Failed to create notebook. No node can schedule it ({format_profile(profile)}):"
+        )
+        for shortfall in get_shortfalls(headroom, profile):
+            logger.error(f"  {shortfall}")
+        logger.info("Run 'dss status' to check the capacity of the nodes.")
+        raise RuntimeError()
+
+    if len(nodes) > 1 and config.get("preferred_node") not in fitting:
+        gpu_resource = _get_config_gpu_resource(config)
+        node = select_node(
+            [node for node in nodes if node.name in fitting],
+            config["notebook_image"],
+            gpu_resource,
+            config.get("gpu_count", 1),
+        )
+        if node:
+            config["preferred_node"] = node.name
+
+
+def _get_config_gpu_resource(config: dict) -> Optional[str]:
+    """Return the GPU resource the notebook rendered from the config requests, if any."""
+    if config.get("intel_enabled"):
+        return INTEL_GPU_RESOURCE
+    if config.get("nvidia_enabled"):
+        return NVIDIA_GPU_RESOURCE
+    return None
+
+
+def _log_startup_estimate(image: str, config: dict, nodes: List[NodeInfo]) -> None:
+    """Log whether the image is cached on the node and how long the notebook should take to
+    start, from the past startups with the image."""
+    preferred = config.get("preferred_node")
+    node = next((node for node in nodes if node.name == preferred), None)
+    if node is None and len(nodes) == 1:
+        node = nodes[0]
+    cached = node is not None and node.has_image(image)
+
+    estimate = estimate_startup_seconds(image, cached)
+    if cached:
+        logger.info(f"Image {image} is already present on node {node.name}.")
+    else:
+        logger.info(f"Image {image} is not present on the node and will be pulled.")
+    if estimate is not None:
+        logger.info(f"Estimated start time: {estimate:.0f}s.")
+
+
+def _record_create(
+    name: str,
+    image: str,
+    namespace: str,
+    lightkube_client: Client,
+    seconds: float,
+    adopted: bool,
+) -> None:
+    """Record the create in the operation history, with the startup timeline of the notebook
+    Pod unless a warm Pod was adopted, to estimate the next startups.
+
+    This is best effort, the notebook was created even if the timeline cannot be recorded.
+    """
+    node, phases = None, None
+    try:
+        pod = get_notebook_pod(name, namespace, lightkube_client)
+        node = pod.spec.nodeName if pod and pod.spec else None
+        if pod and not adopted:
+            events = list(
+                lightkube_client.list(
+                    Event,
+                    namespace=namespace,
+                    fields={"involvedObject.name": pod.metadata.name},
+                    chunk_size=LIST_PAGE_SIZE,
+                )
+            )
+            phases = get_startup_timeline(pod, events)
+    except Exception as e:
+        logger.debug(f"Failed to get the startup timeline of notebook {name}: {e}.", exc_info=True)
+    record_operation("create", seconds, image=image, node=node, phases=phases)
+
+
+def _get_gpu_resource(image: str, nodes: List[NodeInfo], gpu: Optional[int]) -> Optional[str]:
+    """Return the GPU resource name the notebook should request, or None for no GPU.
+
+    When `gpu` is None, Intel GPUs are assigned to every notebook (they can be shared), while
+    NVIDIA GPUs are only assigned to CUDA images since they are held exclusively.
+
+    Raises:
+        RuntimeError: If GPUs are explicitly requested but none are available in the cluster.
+    """
+    if gpu == 0:
+        return None
+
+    intel_present = any(node.intel_enabled for node in nodes)
+    nvidia_present = any(node.nvidia_enabled for node in nodes)
+
+    if gpu is None:
+        if nvidia_present and "cuda" in image:
+            return NVIDIA_GPU_RESOURCE
+        if intel_present:
+            return INTEL_GPU_RESOURCE
+        return None
+
+    if nvidia_present and intel_present:
+        return INTEL_GPU_RESOURCE if "intel" in image else NVIDIA_GPU_RESOURCE
+    if nvidia_present:
+        return NVIDIA_GPU_RESOURCE
+    if intel_present:
+        return INTEL_GPU_RESOURCE
+
+    logger.debug(f"Failed to create notebook. {gpu} GPU(s) requested but none are present.")
+    logger.error("Failed to create notebook. GPU acceleration is not enabled in the cluster.")
+    logger.info("Run 'dss status' to check the GPU acceleration status.")
+    raise RuntimeError()
+
+
+def _validate_gpu_request(gpu_resource: str, gpu: int, nodes: List[NodeInfo]) -> None:
+    """Check that at least one node can allocate the requested number of GPUs.
+
+    Raises:
+        RuntimeError: If no node has enough allocatable GPUs.
+    """
+    available = max((node.get_allocatable_gpus(gpu_resource) for node in nodes), default=0)
+    if gpu > available:
+        logger.debug(
+            f"Failed to create notebook. Requested {gpu} {gpu_resource}, "
+            f"the largest node allocatable is {available}."
+        )
+        logger.error(
+            f"Failed to create notebook. Requested {gpu} GPU(s) but no node has more than "
+            f"{available} {gpu_resource} allocatable."
+        )
+        raise RuntimeError()
+
+
+def _is_initialized(
+    install_state: Optional[dict], lightkube_client: Client, namespace: str
+) -> bool:
+    """
+    Return True if DSS was initialized for the namespace, warning about version skew.
+
+    Installations that predate the install state are checked through the notebooks PVC and
+    the MLflow Deployment instead.
+    """
+    if install_state is None:
+        return does_dss_pvc_exist(lightkube_client, namespace) and does_mlflow_deployment_exist(
+            lightkube_client
+        )
+    warn_on_version_skew(install_state)
+    return is_namespace_initialized(install_state, namespace)
+
+
 def _get_notebook_image_name(image: str) -> str:
     """
     Returns the image's full name if the input is a key in `NOTEBOOK_IMAGES_ALIASES`
@@ -0,0 +1,146 @@
+import json
+import time
+import urllib.request
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import lightkube
+from lightkube import Client
+from lightkube.core.exceptions import ApiError
+from lightkube.resources.apps_v1 import Deployment
+
+from dss.config import DSS_NAMESPACE, LIST_PAGE_SIZE, NOTEBOOK_LABEL
+from dss.logger import setup_logger
+from dss.stop import stop_notebook
+from dss.utils import get_service_url
+
+# Set up logger
+logger = setup_logger()
+
+# Timeout for the requests to the Jupyter server API
+JUPYTER_API_TIMEOUT_SECONDS = 5
+
+
+def _parse_jupyter_timestamp(timestamp: str) -> datetime:
+    """Parse an ISO 8601 timestamp returned by the Jupyter server API, e.g. `...T10:00:00Z`."""
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+
+
+def _get_json(url: str):
+    """Return the decoded JSON body of a GET request to the given URL."""
+    with urllib.request.urlopen(url, timeout=JUPYTER_API_TIMEOUT_SECONDS) as response:
+        return json.load(response)
+
+
+def get_last_activity(url: str) -> Optional[datetime]:
+    """
+    Return the last time the Jupyter server at `url` saw activity.
+
+    The activity is read from the server's `/api/status` and the `last_activity` of its kernels.
+    A kernel that is currently busy counts as activity now.
+
+    Args:
+        url (str): The URL of the notebook server.
+
+    Returns:
+        Optional[datetime]: The time of the last activity, or None if it cannot be determined.
+    """
+    try:
+        status = _get_json(f"{url}/api/status")
+        kernels = _get_json(f"{url}/api/kernels")
+    except (OSError, ValueError) as e:
+        logger.debug(f"Failed to get the activity of the notebook server at {url}: {e}.")
+        return None
+
+    if any(kernel.get("execution_state") == "busy" for kernel in kernels):
+        return datetime.now(timezone.utc)
+
+    timestamps = [status.get("last_activity")]
+    timestamps += [kernel.get("last_activity") for kernel in kernels]
+    activity = [_parse_jupyter_timestamp(t) for t in timestamps if t]
+    return max(activity) if activity else None
+
+
+def cull_idle_notebooks(
+    lightkube_client: Client, idle_timeout_seconds: int, namespace: str = DSS_NAMESPACE
+) -> List[str]:
+    """
+    Stop the running notebooks that have been idle for longer than `idle_timeout_seconds`.
+
+    Notebooks are stopped by scaling their Deployment down to zero, like `dss stop`, which
+    releases their GPUs and memory while keeping their data.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        idle_timeout_seconds (int): Idle time after which a notebook is stopped.
+        namespace (str): The namespace of the notebooks.
+
+    Returns:
+        List[str]: The names of the notebooks that were stopped.
+    """
+    try:
+        deployments = lightkube_client.list(
+            Deployment,
+            namespace=namespace,
+            labels={NOTEBOOK_LABEL: lightkube.operators.exists()},
+            chunk_size=LIST_PAGE_SIZE,
+        )
+        running = [
+            deployment.metadata.name
+            for deployment in deployments
+            if deployment.spec.replicas
+            and deployment.status
+            and deployment.status.availableReplicas
+        ]
+    except ApiError as e:
+        logger.debug(f"Failed to list notebooks: {e}.", exc_info=True)
+        logger.error(f"Failed to list notebooks: {str(e)}.")
+        raise RuntimeError()
+
+    culled = []
+    now = datetime.now(timezone.utc)
+    for name in running:
+        url = get_service_url(name, namespace, lightkube_client)
+        last_activity = get_last_activity(url) if url else None
+        if last_activity is None:
+            logger.debug(f"Skipping notebook {name}, its activity could not be determined.")
+            continue
+
+        idle_seconds = (now - last_activity).total_seconds()
+        logger.debug(f"Notebook {name} has been idle for {int(idle_seconds)} seconds.")
+        if idle_seconds >= idle_timeout_seconds:
+            logger.info(f"Notebook {name} has been idle for {int(idle_seconds // 60)} minutes.")
+            try:
+                stop_notebook(name, lightkube_client, namespace, wait=False)
+            except RuntimeError:
+                continue
+            culled.append(name)
+
+    return culled
+
+
+def run_culler(
+    lightkube_client: Client,
+    idle_timeout_seconds: int,
+    interval_seconds: int = 300,
+    namespace: str = DSS_NAMESPACE,
+) -> None:
+    """
+    Periodically stop idle notebooks until interrupted.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        idle_timeout_seconds (int): Idle time after which a notebook is stopped.
+        interval_seconds (int): Interval between checks in seconds. Defaults to 300.
+        namespace (str): The namespace of the notebooks.
+    """
+    logger.info(
+        f"Stopping notebooks idle for more than {idle_timeout_seconds // 60} minutes."
+        " Press Ctrl+C to exit."
+    )
+    while True:
+        try:
+            cull_idle_notebooks(lightkube_client, idle_timeout_seconds, namespace)
+        except RuntimeError:
+            logger.warning("Failed to check for idle notebooks. Retrying in the next interval.")
+        time.sleep(interval_seconds)
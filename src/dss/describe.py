@@ -0,0 +1,222 @@
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional
+
+from lightkube import Client
+from lightkube.core.exceptions import ApiError
+from lightkube.resources.core_v1 import Event, Pod
+from prettytable import PrettyTable
+
+from dss.config import DSS_NAMESPACE, LIST_PAGE_SIZE, NOTEBOOK_LABEL, get_image_alias
+from dss.logger import setup_logger
+from dss.utils import get_deployment_state, get_notebook_resources, get_url_from_service
+
+# Set up logger
+logger = setup_logger()
+
+# Width of the bars of the timeline
+TIMELINE_WIDTH = 40
+# Line logged by Jupyter once it is ready to serve requests
+JUPYTER_READY_MESSAGE = "is running at"
+
+
+class TimelinePhase(NamedTuple):
+    """A phase of the startup of a notebook Pod, with its start and end."""
+
+    name: str
+    start: datetime
+    end: datetime
+
+    @property
+    def seconds(self) -> float:
+        return max(0.0, (self.end - self.start).total_seconds())
+
+
+def _get_condition_time(pod: Pod, condition_type: str) -> Optional[datetime]:
+    """Return the time a condition of the Pod became true, if it did."""
+    for condition in (pod.status.conditions if pod.status else None) or []:
+        if condition.type == condition_type and condition.status == "True":
+            return condition.lastTransitionTime
+    return None
+
+
+def _get_started_at(pod: Pod) -> Optional[datetime]:
+    """Return the time the notebook container was last started."""
+    for status in (pod.status.containerStatuses if pod.status else None) or []:
+        if status.state and status.state.running:
+            return status.state.running.startedAt
+    return None
+
+
+def _get_jupyter_ready_time(lightkube_client: Client, pod: Pod) -> Optional[datetime]:
+    """
+    Return the time Jupyter logged that it is running. The notebooks have no readiness probe,
+    so the Ready condition of the Pod does not tell when Jupyter can serve requests.
+    """
+    for line in lightkube_client.log(
+        pod.metadata.name, namespace=pod.metadata.namespace, timestamps=True, newlines=False
+    ):
+        timestamp, _, text = line.partition(" ")
+        if JUPYTER_READY_MESSAGE in text:
+            return datetime.strptime(timestamp[:19], "%Y-%m-%dT%H:%M:%S").replace(
+                tzinfo=timezone.utc
+            )
+    return None
+
+
+def _get_event_time(event: Event, first: bool = False) -> Optional[datetime]:
+    """
+    Return the time an event was last observed, or first observed with `first`.
+
+    Events written through events.k8s.io/v1 have no first and last timestamps, only an event
+    time, so the event time and then the creation time of the event are used instead.
+    """
+    return (
+        (event.firstTimestamp if first else None)
+        or event.lastTimestamp
+        or event.eventTime
+        or event.metadata.creationTimestamp
+    )
+
+
+def get_startup_timeline(
+    pod: Pod, events: List[Event], jupyter_ready: Optional[datetime] = None
+) -> List[TimelinePhase]:
+    """
+    Reconstruct the phases of the startup of a notebook Pod, in order.
+
+    The phases are derived from the conditions of the Pod, the start time of its container and
+    the image pull events. Phases that have not ended yet, or that did not happen, such as the
+    image pull of an image cached on the node, are left out.
+
+    Args:
+        pod (Pod): The notebook Pod.
+        events (List[Event]): The events of the Pod.
+        jupyter_ready (Optional[datetime]): The time Jupyter logged that it is running.
+    """
+    pulling = [event for event in events if event.reason == "Pulling"]
+    pulled = [event for event in events if event.reason == "Pulled"]
+    created = pod.metadata.creationTimestamp
+    scheduled = _get_condition_time(pod, "PodScheduled")
+    started = _get_started_at(pod)
+
+    if pulling:
+        pull_starts = [_get_event_time(event, first=True) for event in pulling]
+        pull_ends = [_get_event_time(event) for event in pulled]
+        pull_start = min((timestamp for timestamp in pull_starts if timestamp), default=None)
+        pull_end = max((timestamp for timestamp in pull_ends if timestamp), default=None)
+        boundaries = [
+            ("Scheduling", created, scheduled),
+            ("Volumes and sandbox", scheduled, pull_start),
+            ("Image pull", pull_start, pull_end),
+            ("Container start", pull_end, started),
+            ("Jupyter boot", started, jupyter_ready),
+        ]
+    else:
+        # The image was cached on the node, so the container starts right after the sandbox
+        boundaries = [
+            ("Scheduling", created, scheduled),
+            ("Volumes and sandbox", scheduled, started),
+            ("Jupyter boot", started, jupyter_ready),
+        ]
+    return [TimelinePhase(name, start, end) for name, start, end in boundaries if start and end]
+
+
+def _format_waterfall(phases: List[TimelinePhase]) -> str:
+    """Return a table with a bar per phase, positioned and sized relative to the whole startup."""
+    origin = phases[0].start
+    total = max((phase.end - origin).total_seconds() for phase in phases) or 1.0
+    table = PrettyTable()
+    table.field_names = ["Phase", "Start", "Duration", "Timeline"]
+    table.align = "l"
+    for phase in phases:
+        offset = (phase.start - origin).total_seconds()
+        bar_start = round(offset / total * TIMELINE_WIDTH)
+        bar_length = max(1, round(phase.seconds / total * TIMELINE_WIDTH))
+        table.add_row(
+            [
+                phase.name,
+                f"+{offset:.0f}s",
+                f"{phase.seconds:.0f}s",
+                " " * bar_start + "#" * min(bar_length, TIMELINE_WIDTH - bar_start),
+            ]
+        )
+    return table.get_string()
+
+
+def describe_notebook(
+    lightkube_client: Client, name: str, namespace: str = DSS_NAMESPACE, timeline: bool = False
+) -> None:
+    """
+    Log the details of a notebook and, with `timeline`, the duration of each phase of the
+    startup of its Pod.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        name (str): The name of the notebook.
+        namespace (str): The namespace of the notebook.
+        timeline (bool): Whether to log the startup timeline.
+
+    Raises:
+        RuntimeError: If the notebook does not exist or cannot be described.
+    """
+    try:
+        resources = get_notebook_resources(name, namespace, lightkube_client)
+        if resources.deployment is None:
+            logger.error(f"Failed to describe notebook. Notebook {name} does not exist.")
+            logger.info("Run 'dss list' to check all notebooks.")
+            raise RuntimeError()
+
+        pods = list(
+            lightkube_client.list(
+                Pod, namespace=namespace, labels={NOTEBOOK_LABEL: name}, chunk_size=LIST_PAGE_SIZE
+            )
+        )
+        deployment = resources.deployment
+        image = deployment.spec.template.spec.containers[0].image
+        alias = get_image_alias(image)
+        url = get_url_from_service(resources.service) if resources.service else None
+        pod = max(pods, key=lambda pod: pod.metadata.creationTimestamp) if pods else None
+
+        logger.info(f"Name: {name}")
+        logger.info(f"Namespace: {namespace}")
+        logger.info(f"Image: {image}{f' ({alias})' if alias else ''}")
+        logger.info(f"State: {get_deployment_state(deployment, lightkube_client, pods).value}")
+        logger.info(f"URL: {url or '-'}")
+        if pod:
+            logger.info(f"Pod: {pod.metadata.name}")
+            logger.info(f"Node: {(pod.spec.nodeName if pod.spec else None) or '-'}")
+
+        if not timeline:
+            return
+        if not pod:
+            logger.info("No timeline available. The notebook is stopped.")
+            return
+
+        events = list(
+            lightkube_client.list(
+                Event,
+                namespace=namespace,
+                fields={"involvedObject.name": pod.metadata.name},
+                chunk_size=LIST_PAGE_SIZE,
+            )
+        )
+        jupyter_ready = (
+            _get_jupyter_ready_time(lightkube_client, pod) if _get_started_at(pod) else None
+        )
+    except ApiError as e:
+        logger.debug(f"Failed to describe notebook {name}: {e}.", exc_info=True)
+        logger.error(f"Failed to describe notebook {name}: {str(e)}.")
+        raise RuntimeError()
+
+    phases = get_startup_timeline(pod, events, jupyter_ready)
+    if not phases:
+        logger.info("No timeline available yet. The Pod has not been scheduled.")
+        return
+    logger.info(f"Startup timeline:\n{_format_waterfall(phases)}")
+    if not jupyter_ready:
+        logger.info("Jupyter has not reported that it is running yet.")
+    if not any(event.reason in ("Pulling", "Pulled") for event in events):
+        # Events expire, after an hour by default
+        logger.info("No image pull events found. The image pull is included in the setup.")
+    elif not any(event.reason == "Pulling" for event in events):
+        logger.info("The image was already present on the node.")
@@ -0,0 +1,243 @@
+import io
+import json
+import os
+import tarfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from lightkube import Client
+from lightkube.resources.apps_v1 import Deployment
+from lightkube.resources.core_v1 import Event, Node, PersistentVolumeClaim, Pod, Service
+
+from dss.config import DSS_NAMESPACE, LIST_PAGE_SIZE
+from dss.logger import flush_logs, get_log_file_path, setup_logger
+from dss.utils import DaemonExecutor, get_previous_pod_logs
+
+# Set up logger
+logger = setup_logger()
+
+# Maximum number of concurrent requests to the cluster
+DIAGNOSE_MAX_WORKERS = 8
+# Time after which the bundle is written with what was collected so far
+DIAGNOSE_DEADLINE_SECONDS = 20
+# Number of lines collected from the end of the logs of each container
+DIAGNOSE_POD_LOG_TAIL_LINES = 5000
+# Number of bytes collected from the end of the DSS log file
+DIAGNOSE_DSS_LOG_TAIL_BYTES = 1024 * 1024
+# Namespaced resources collected in each namespace, by the name of their file in the bundle
+DIAGNOSE_RESOURCES = {
+    "deployments": Deployment,
+    "pods": Pod,
+    "services": Service,
+    "pvcs": PersistentVolumeClaim,
+    "events": Event,
+}
+
+
+def _list_objects(lightkube_client: Client, resource, namespace: str) -> List:
+    """List the objects of a resource in a namespace."""
+    return list(lightkube_client.list(resource, namespace=namespace, chunk_size=LIST_PAGE_SIZE))
+
+
+def _get_nodes(lightkube_client: Client) -> List[dict]:
+    """Return the labels, capacity and allocatable resources of every node."""
+    nodes = []
+    for node in lightkube_client.list(Node, chunk_size=LIST_PAGE_SIZE):
+        status = node.status
+        nodes.append(
+            {
+                "name": node.metadata.name,
+                "labels": node.metadata.labels or {},
+                "capacity": (status.capacity if status else None) or {},
+                "allocatable": (status.allocatable if status else None) or {},
+            }
+        )
+    return nodes
+
+
+def _get_pod_logs(
+    lightkube_client: Client, name: str, namespace: str, container: str, previous: bool
+) -> str:
+    """Return the end of the logs of a container, or of its previous instance."""
+    if not previous:
+        return "".join(
+            lightkube_client.log(
+                name,
+                namespace=namespace,
+                container=container,
+                tail_lines=DIAGNOSE_POD_LOG_TAIL_LINES,
+            )
+        )
+    return get_previous_pod_logs(
+        lightkube_client,
+        name,
+        namespace,
+        container=container,
+        tail_lines=DIAGNOSE_POD_LOG_TAIL_LINES,
+    )
+
+
+def _get_dss_log_tail() -> str:
+    """Return the end of the DSS log file, with the records of this command written to it."""
+    flush_logs(logger)
+    log_file_path = get_log_file_path(logger)
+    if not log_file_path or not os.path.exists(log_file_path):
+        return ""
+    with open(log_file_path, "rb") as log_file:
+        log_file.seek(max(0, os.path.getsize(log_file_path) - DIAGNOSE_DSS_LOG_TAIL_BYTES))
+        return log_file.read().decode(errors="replace")
+
+
+def _to_json(objects: Iterable) -> str:
+    """Serialize Kubernetes objects, or plain data, to JSON."""
+    return json.dumps(
+        [obj.to_dict() if hasattr(obj, "to_dict") else obj for obj in objects],
+        indent=2,
+        default=str,
+    )
+
+
+def _get_log_tasks(pod: Pod) -> List[Tuple[str, bool]]:
+    """
+    Return the containers of a Pod whose logs are collected, and whether to collect the logs of
+    their previous instance, which only exist for containers that restarted.
+    """
+    tasks = []
+    for status in (pod.status.containerStatuses if pod.status else None) or []:
+        tasks.append((status.name, False))
+        if status.restartCount:
+            tasks.append((status.name, True))
+    return tasks
+
+
+def _add_file(bundle: tarfile.TarFile, name: str, content: str) -> None:
+    """Add a file with the given content to the bundle."""
+    data = content.encode()
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    bundle.addfile(info, io.BytesIO(data))
+
+
+def collect_diagnostics(
+    lightkube_client: Client,
+    namespace: str = DSS_NAMESPACE,
+    output_file: Optional[str] = None,
+    deadline_seconds: float = DIAGNOSE_DEADLINE_SECONDS,
+) -> str:
+    """
+    Collect the state of DSS into a compressed tarball, to attach to a bug report.
+
+    The Deployments, Pods, Services, PVCs and Events of the notebooks namespace and the DSS
+    namespace, the labels and capacity of the nodes, the current and previous logs of every
+    Pod and the end of the DSS log file are collected concurrently, with at most
+    DIAGNOSE_MAX_WORKERS requests in flight. The logs of each Pod are requested as soon as its
+    namespace has been listed. Whatever has not been collected when `deadline_seconds` elapsed
+    is left out and reported in `timings.json`, with the duration of every collected file.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        namespace (str): The namespace of the notebooks.
+        output_file (Optional[str]): Path of the tarball. Defaults to
+            `dss-diagnose-<timestamp>.tar.gz` in the current directory.
+        deadline_seconds (float): Time after which the tarball is written with what was
+            collected so far.
+
+    Returns:
+        str: The path of the tarball.
+    """
+    start = time.monotonic()
+    deadline = start + deadline_seconds
+    bundle_name = f"dss-diagnose-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    output_file = output_file or f"{bundle_name}.tar.gz"
+    logger.info("Collecting diagnostics. This may take a few seconds.")
+
+    files: Dict[str, str] = {}
+    # Only written by this thread, the workers return the duration of their request
+    timings: Dict[str, dict] = {}
+    executor = DaemonExecutor(max_workers=DIAGNOSE_MAX_WORKERS)
+    futures: Dict[Future, Tuple[str, Optional[str]]] = {}
+
+    def submit(name: str, func: Callable, *args, pods_namespace: Optional[str] = None) -> Future:
+        def timed() -> Tuple[object, Optional[Exception], int]:
+            task_start = time.monotonic()
+            try:
+                result, error = func(*args), None
+            except Exception as e:
+                result, error = None, e
+            return result, error, round((time.monotonic() - task_start) * 1000)
+
+        future = executor.submit(timed)
+        futures[future] = (name, pods_namespace)
+        return future
+
+    for objects_namespace in dict.fromkeys([namespace, DSS_NAMESPACE]):
+        for kind, resource in DIAGNOSE_RESOURCES.items():
+            submit(
+                f"{objects_namespace}/{kind}.json",
+                _list_objects,
+                lightkube_client,
+                resource,
+                objects_namespace,
+                pods_namespace=objects_namespace if resource is Pod else None,
+            )
+    submit("nodes.json", _get_nodes, lightkube_client)
+
+    pending = set(futures)
+    processed = set()
+    while pending:
+        done, pending = wait(
+            pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED
+        )
+        if not done:
+            break
+        for future in done:
+            processed.add(future)
+            name, pods_namespace = futures[future]
+            result, error, duration_ms = future.result()
+            timings[name] = {"duration_ms": duration_ms}
+            if error:
+                logger.debug(f"Failed to collect {name}: {error}.")
+                timings[name]["error"] = str(error)
+                continue
+            files[name] = result if isinstance(result, str) else _to_json(result)
+            if pods_namespace is None:
+                continue
+            # Request the logs of the Pods as soon as they are listed
+            for pod in result:
+                for container, previous in _get_log_tasks(pod):
+                    suffix = ".previous" if previous else ""
+                    log_name = f"{pods_namespace}/logs/{pod.metadata.name}.{container}{suffix}.log"
+                    future = submit(
+                        log_name,
+                        _get_pod_logs,
+                        lightkube_client,
+                        pod.metadata.name,
+                        pods_namespace,
+                        container,
+                        previous,
+                    )
+                    pending.add(future)
+    # Do not wait for the requests that missed the deadline, they run on daemon threads so they
+    # do not delay the exit either
+    executor.shutdown()
+
+    # Requests cancelled by the shutdown, or finished after the deadline, were not collected
+    timed_out = [name for future, (name, _) in futures.items() if future not in processed]
+    for name in timed_out:
+        timings[name] = {"error": f"not collected within {deadline_seconds} seconds"}
+    files["dss.log"] = _get_dss_log_tail()
+    timings["total"] = {"duration_ms": round((time.monotonic() - start) * 1000)}
+    files["timings.json"] = json.dumps(timings, indent=2, sort_keys=True)
+
+    with tarfile.open(output_file, "w:gz") as bundle:
+        for name, content in sorted(files.items()):
+            _add_file(bundle, f"{bundle_name}/{name}", content)
+
+    failed = len([timing for timing in timings.values() if "error" in timing])
+    if failed:
+        logger.warning(f"{failed} items could not be collected. See timings.json for details.")
+    logger.info(f"Diagnostics written to {output_file}")
+    return output_file
@@ -0,0 +1,147 @@
+from pathlib import Path
+from typing import List, Tuple
+
+from lightkube import Client
+from lightkube.core.exceptions import ApiError
+from lightkube.resources.apps_v1 import Deployment
+from prettytable import PrettyTable
+
+from dss.config import DSS_NAMESPACE, INSTALL_STATE_SCHEMA_VERSION, MANIFEST_TEMPLATES_LOCATION
+from dss.install_state import (
+    get_accelerators,
+    get_dss_version,
+    get_manifest_hashes,
+    get_storage_classes,
+    read_install_state,
+)
+from dss.logger import setup_logger
+from dss.utils import does_dss_pvc_exist
+
+# Set up logger
+logger = setup_logger()
+
+# A check's name, whether it passed and details shown to the user
+Check = Tuple[str, bool, str]
+
+
+def _check_state(state: dict) -> List[Check]:
+    """Check the install state itself against this version of the CLI."""
+    installed = state.get("version")
+    current = get_dss_version()
+    return [
+        (
+            "Install state schema",
+            state.get("schema") == INSTALL_STATE_SCHEMA_VERSION,
+            f"recorded {state.get('schema')}, supported {INSTALL_STATE_SCHEMA_VERSION}",
+        ),
+        ("CLI version", installed == current, f"initialized by {installed}, running {current}"),
+    ]
+
+
+def _check_live_objects(lightkube_client: Client, state: dict) -> List[Check]:
+    """Check the install state against the objects in the cluster."""
+    checks = []
+    for namespace in state.get("namespaces", []):
+        exists = does_dss_pvc_exist(lightkube_client, namespace)
+        checks.append((f"Notebooks PVC ({namespace})", exists, "present" if exists else "missing"))
+
+    for name, component in state.get("components", {}).items():
+        if "image" not in component:
+            continue
+        try:
+            deployment = lightkube_client.get(Deployment, name=name, namespace=DSS_NAMESPACE)
+        except ApiError as e:
+            if e.response.status_code != 404:
+                raise e
+            checks.append((f"Deployment {name}", False, "missing"))
+            continue
+        image = deployment.spec.template.spec.containers[0].image
+        checks.append(
+            (
+                f"Deployment {name}",
+                image == component["image"],
+                f"recorded {component['image']}, running {image}",
+            )
+        )
+
+    manifests_dir = Path(Path(__file__).parent, MANIFEST_TEMPLATES_LOCATION)
+    recorded = state.get("manifests", {})
+    current = get_manifest_hashes(
+        [manifests_dir / name for name in recorded if (manifests_dir / name).exists()]
+    )
+    changed = sorted(name for name, digest in recorded.items() if current.get(name) != digest)
+    checks.append(
+        (
+            "Manifests",
+            not changed,
+            f"changed since initialize: {', '.join(changed)}" if changed else "unchanged",
+        )
+    )
+
+    accelerators = get_accelerators(lightkube_client)
+    for vendor, detected in accelerators.items():
+        expected = state.get("accelerators", {}).get(vendor)
+        checks.append(
+            (
+                f"Accelerator {vendor}",
+                detected == expected,
+                f"recorded {expected or 'none'}, detected {detected or 'none'}",
+            )
+        )
+
+    storage_classes = get_storage_classes(lightkube_client)
+    missing = sorted(set(state.get("storage_classes", {})) - set(storage_classes))
+    checks.append(
+        (
+            "Storage classes",
+            not missing,
+            f"missing: {', '.join(missing)}" if missing else "present",
+        )
+    )
+    return checks
+
+
+def run_doctor(lightkube_client: Client, deep: bool = False) -> None:
+    """
+    Check the DSS installation and log the result of each check.
+
+    Without `deep`, only the install state recorded by `dss initialize` is read, with a single
+    request. With `deep`, the state is also verified against the objects in the cluster: the
+    notebook PVCs, the component images, the manifests shipped with the CLI, the GPUs detected
+    on the nodes and the StorageClasses.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        deep (bool): Whether to verify the install state against the live objects.
+
+    Raises:
+        RuntimeError: If the install state is missing or a check fails.
+    """
+    try:
+        state = read_install_state(lightkube_client)
+        if state is None:
+            logger.error("No install state found. DSS was not initialized by this CLI.")
+            logger.info("Run `dss initialize` to install or upgrade DSS.")
+            raise RuntimeError()
+
+        checks = _check_state(state)
+        if deep:
+            checks += _check_live_objects(lightkube_client, state)
+    except ApiError as e:
+        logger.debug(f"Failed to check the installation: {e}.", exc_info=True)
+        logger.error(f"Failed to check the installation: {str(e)}.")
+        raise RuntimeError()
+
+    table = PrettyTable()
+    table.field_names = ["Check", "Result", "Details"]
+    table.align = "l"
+    for name, passed, details in checks:
+        table.add_row([name, "OK" if passed else "FAIL", details])
+    logger.info(f"\n{table}")
+
+    failed = [name for name, passed, _ in checks if not passed]
+    if failed:
+        logger.error(f"{len(failed)} of {len(checks)} checks failed.")
+        logger.info("Run `dss initialize` to bring the installation up to date.")
+        raise RuntimeError()
+    logger.info(f"All {len(checks)} checks passed.")
@@ -0,0 +1,157 @@
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from lightkube import Client
+from lightkube.core.exceptions import ApiError
+from lightkube.resources.apps_v1 import ReplicaSet
+from lightkube.resources.core_v1 import Event, Pod
+
+from dss.config import DSS_NAMESPACE, LIST_PAGE_SIZE, NOTEBOOK_LABEL
+from dss.logger import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+# Interval after which a repeated event is shown again, with the number of times it occurred
+EVENTS_REPEAT_INTERVAL_SECONDS = 60
+
+
+def _get_event_time(event: Event) -> Optional[datetime]:
+    """Return the last time an event occurred."""
+    return event.lastTimestamp or event.eventTime or event.metadata.creationTimestamp
+
+
+class NotebookEventFilter:
+    """
+    Matches the events about a notebook: its Deployment and Service, which are named after the
+    notebook, and its ReplicaSets and Pods, which have the notebook label.
+
+    The objects with the label are listed again when an event is about an unknown Pod or
+    ReplicaSet whose name starts with the notebook name, so Pods created while following the
+    events are matched.
+    """
+
+    def __init__(self, lightkube_client: Client, name: str, namespace: str = DSS_NAMESPACE):
+        self.lightkube_client = lightkube_client
+        self.name = name
+        self.namespace = namespace
+        self.objects: Set[Tuple[str, str]] = {("Deployment", name), ("Service", name)}
+        self.checked: Set[Tuple[str, str]] = set()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """List the ReplicaSets and Pods of the notebook."""
+        for resource in (ReplicaSet, Pod):
+            for obj in self.lightkube_client.list(
+                resource,
+                namespace=self.namespace,
+                labels={NOTEBOOK_LABEL: self.name},
+                chunk_size=LIST_PAGE_SIZE,
+            ):
+                self.objects.add((resource.__name__, obj.metadata.name))
+
+    def matches(self, event: Event) -> bool:
+        """Return True if the event is about the notebook."""
+        key = (event.involvedObject.kind, event.involvedObject.name)
+        if key in self.objects:
+            return True
+        if (
+            key[0] in ("ReplicaSet", "Pod")
+            and key[1].startswith(f"{self.name}-")
+            and key not in self.checked
+        ):
+            self.checked.add(key)
+            self.refresh()
+            return key in self.objects
+        return False
+
+
+class EventPrinter:
+    """
+    Logs events on a single line each, skipping the occurrences already shown.
+
+    Kubernetes records the repetitions of an event by increasing its count. A repeated event is
+    only shown again once EVENTS_REPEAT_INTERVAL_SECONDS elapsed since it was last shown.
+    """
+
+    def __init__(self, repeat_interval_seconds: float = EVENTS_REPEAT_INTERVAL_SECONDS):
+        self.repeat_interval_seconds = repeat_interval_seconds
+        # Number of occurrences shown of each event
+        self.shown_counts: Dict[str, int] = {}
+        # Time each object, reason and message was last shown
+        self.shown_times: Dict[Tuple[str, str, str, str], float] = {}
+
+    def print_event(self, event: Event) -> bool:
+        """Log the event unless it was already shown. Returns True if it was logged."""
+        uid = event.metadata.uid or event.metadata.name
+        count = event.count or 1
+        if self.shown_counts.get(uid, 0) >= count:
+            return False
+        self.shown_counts[uid] = count
+
+        involved = event.involvedObject
+        key = (involved.kind, involved.name, event.reason, event.message)
+        now = time.monotonic()
+        last_shown = self.shown_times.get(key)
+        if last_shown is not None and now - last_shown < self.repeat_interval_seconds:
+            return False
+        self.shown_times[key] = now
+
+        event_time = _get_event_time(event)
+        timestamp = event_time.strftime("%H:%M:%S") if event_time else "--:--:--"
+        repeated = f" (x{count})" if count > 1 else ""
+        logger.info(
+            f"{timestamp} {event.type or 'Normal':<7} {involved.kind}/{involved.name}: "
+            f"{event.reason}: {(event.message or '').strip()}{repeated}"
+        )
+        return True
+
+
+def get_events(
+    lightkube_client: Client,
+    name: Optional[str] = None,
+    namespace: str = DSS_NAMESPACE,
+    follow: bool = False,
+) -> None:
+    """
+    Log the events of the notebooks namespace, oldest first, such as scheduling failures, image
+    pulls and failed probes.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        name (Optional[str]): Only log the events of this notebook.
+        namespace (str): The namespace of the notebooks.
+        follow (bool): Keep logging new events until interrupted.
+    """
+    try:
+        event_filter = NotebookEventFilter(lightkube_client, name, namespace) if name else None
+        printer = EventPrinter()
+
+        def matching(events: Iterable[Event]) -> Iterable[Event]:
+            return (event for event in events if not event_filter or event_filter.matches(event))
+
+        events = sorted(
+            matching(lightkube_client.list(Event, namespace=namespace, chunk_size=LIST_PAGE_SIZE)),
+            key=lambda event: _get_event_time(event) or datetime.min.replace(tzinfo=timezone.utc),
+        )
+        for event in events:
+            printer.print_event(event)
+        if not follow:
+            if not events:
+                logger.info(f"No events found{f' for notebook {name}' if name else ''}.")
+            return
+
+        # The watch starts with the existing events, which were already shown, and expired
+        # events are deleted
+        watched = (
+            event
+            for change, event in lightkube_client.watch(Event, namespace=namespace)
+            if change != "DELETED"
+        )
+        for event in matching(watched):
+            printer.print_event(event)
+    except ApiError as e:
+        logger.debug(f"Failed to retrieve events: {e}.", exc_info=True)
+        logger.error(f"Failed to retrieve events: {str(e)}.")
+        raise RuntimeError()
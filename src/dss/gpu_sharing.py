@@ -0,0 +1,154 @@
+from pathlib import Path
+from typing import Optional, Tuple
+
+from charmed_kubeflow_chisme.kubernetes import KubernetesResourceHandler
+from lightkube import Client
+from lightkube.core.exceptions import ApiError
+from lightkube.generic_resource import create_global_resource
+from lightkube.resources.core_v1 import ConfigMap, Node
+from lightkube.types import PatchType
+
+from dss.config import (
+    DSS_CLI_MANAGER_LABELS,
+    FIELD_MANAGER,
+    GPU_SHARING_CONFIG_KEY,
+    GPU_SHARING_CONFIG_NAME,
+    MANIFEST_TEMPLATES_LOCATION,
+    NVIDIA_CLUSTER_POLICY_NAME,
+    NVIDIA_GPU_OPERATOR_NAMESPACE,
+)
+from dss.logger import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+ClusterPolicy = create_global_resource(
+    group="nvidia.com", version="v1", kind="ClusterPolicy", plural="clusterpolicies"
+)
+
+TIMESLICE_MODE = "timeslice"
+MIG_MODE = "mig"
+
+
+def parse_gpu_sharing(gpu_sharing: str) -> Tuple[str, str]:
+    """
+    Parse a GPU sharing specification of the form `timeslice:N` or `mig:PROFILE`.
+
+    Args:
+        gpu_sharing (str): The GPU sharing specification.
+
+    Returns:
+        Tuple[str, str]: The sharing mode and its value (number of replicas or MIG profile).
+
+    Raises:
+        ValueError: If the specification is not valid.
+    """
+    mode, _, value = gpu_sharing.partition(":")
+    if mode == TIMESLICE_MODE:
+        if not value.isdigit() or int(value) < 2:
+            raise ValueError("time-slicing requires an integer number of replicas of 2 or more")
+        return mode, value
+    if mode == MIG_MODE:
+        if not value:
+            raise ValueError("MIG requires a profile name, e.g. mig:all-1g.5gb")
+        return mode, value
+    raise ValueError(f"expected {TIMESLICE_MODE}:N or {MIG_MODE}:PROFILE, got '{gpu_sharing}'")
+
+
+def configure_gpu_sharing(lightkube_client: Client, gpu_sharing: str) -> None:
+    """
+    Configure the NVIDIA device plugin to share each GPU between several notebooks.
+
+    This renders the device plugin sharing configuration, points the GPU operator's
+    ClusterPolicy to it, and, for MIG, labels the GPU nodes with the requested MIG profile.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        gpu_sharing (str): The GPU sharing specification, `timeslice:N` or `mig:PROFILE`.
+
+    Raises:
+        RuntimeError: If the NVIDIA GPU operator is not installed or the configuration fails.
+    """
+    mode, value = parse_gpu_sharing(gpu_sharing)
+    mig_profile = value if mode == MIG_MODE else None
+
+    manifests_file = Path(
+        Path(__file__).parent, MANIFEST_TEMPLATES_LOCATION, "gpu_sharing.yaml.j2"
+    )
+    config = {
+        "config_name": GPU_SHARING_CONFIG_NAME,
+        "config_key": GPU_SHARING_CONFIG_KEY,
+        "namespace": NVIDIA_GPU_OPERATOR_NAMESPACE,
+        "mig_profile": mig_profile,
+        "replicas": value if mode == TIMESLICE_MODE else None,
+    }
+    k8s_resource_handler = KubernetesResourceHandler(
+        field_manager=FIELD_MANAGER,
+        labels=DSS_CLI_MANAGER_LABELS,
+        template_files=[manifests_file],
+        context=config,
+        resource_types={ConfigMap},
+        lightkube_client=lightkube_client,
+    )
+
+    policy_patch = {
+        "spec": {
+            "devicePlugin": {
+                "config": {"name": GPU_SHARING_CONFIG_NAME, "default": GPU_SHARING_CONFIG_KEY}
+            }
+        }
+    }
+    if mig_profile:
+        policy_patch["spec"]["mig"] = {"strategy": "single"}
+
+    try:
+        lightkube_client.get(ClusterPolicy, name=NVIDIA_CLUSTER_POLICY_NAME)
+    except ApiError as err:
+        logger.debug(f"Failed to get the NVIDIA ClusterPolicy: {err}.", exc_info=True)
+        logger.error("Failed to configure GPU sharing. NVIDIA GPU operator was not found.")
+        logger.info("Note: You might want to follow the DSS documentation to enable NVIDIA GPUs.")
+        raise RuntimeError()
+
+    try:
+        k8s_resource_handler.apply()
+        lightkube_client.patch(
+            ClusterPolicy,
+            NVIDIA_CLUSTER_POLICY_NAME,
+            policy_patch,
+            patch_type=PatchType.MERGE,
+        )
+        if mig_profile:
+            for node in lightkube_client.list(Node, labels={"nvidia.com/gpu.present": "true"}):
+                lightkube_client.patch(
+                    Node,
+                    node.metadata.name,
+                    {"metadata": {"labels": {"nvidia.com/mig.config": mig_profile}}},
+                )
+    except ApiError as err:
+        logger.debug(f"Failed to configure GPU sharing: {err}.", exc_info=True)
+        logger.error(f"Failed to configure GPU sharing with error code {err.status.code}.")
+        logger.info(" Check the debug logs for more details.")
+        raise RuntimeError()
+
+    logger.info(
+        f"GPU sharing configured ({gpu_sharing}). The NVIDIA device plugin will restart to apply"
+        " it. Check `dss status` for the resulting number of GPU slots."
+    )
+
+
+def get_gpu_slots(node_labels: dict) -> Optional[int]:
+    """
+    Return the number of NVIDIA GPU slots notebooks can request from the given node labels.
+
+    With time-slicing, each physical GPU (or MIG device) is advertised `nvidia.com/gpu.replicas`
+    times. Returns None if the labels do not report the GPU count.
+
+    Args:
+        node_labels (dict): The labels of the node, as set by NVIDIA GPU feature discovery.
+    """
+    count = node_labels.get("nvidia.com/gpu.count")
+    if count is None or not str(count).isdigit():
+        return None
+    replicas = node_labels.get("nvidia.com/gpu.replicas", "1")
+    replicas = int(replicas) if str(replicas).isdigit() else 1
+    return int(count) * replicas
@@ -0,0 +1,272 @@
+import json
+import math
+import sqlite3
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from prettytable import PrettyTable
+
+from dss.config import TIMESTAMP_FORMAT, get_image_alias
+from dss.describe import TimelinePhase
+from dss.logger import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+# Database storing the timings of the past operations
+HISTORY_FILE = Path.home() / ".dss/history.db"
+# Operations older than this are deleted as new ones are recorded, to keep the database small
+HISTORY_RETENTION = timedelta(days=90)
+# Number of the latest creates of an image the start time estimates are based on
+ESTIMATE_SAMPLES = 10
+# Percentiles reported by `dss stats`
+STATS_PERCENTILES = (50, 90, 99)
+# Phase of the startup timeline spent pulling the image
+IMAGE_PULL_PHASE = "Image pull"
+
+
+class Operation(NamedTuple):
+    """The timings of an operation on a notebook, with the duration of each of its phases."""
+
+    timestamp: str
+    operation: str
+    image: Optional[str]
+    node: Optional[str]
+    result: str
+    seconds: float
+    phases: Dict[str, float]
+
+
+class OperationHistory:
+    """
+    The past operations on notebooks, stored in an SQLite database.
+
+    Each operation is a row with its total duration and its phases, e.g. the image pull of a
+    create, stored as JSON. The timestamps are stored in TIMESTAMP_FORMAT, so they sort in
+    chronological order.
+    """
+
+    def __init__(self, history_file: Path = HISTORY_FILE):
+        history_file.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(history_file)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS operations ("
+            "timestamp TEXT, operation TEXT, image TEXT, node TEXT, result TEXT, seconds REAL, "
+            "phases TEXT)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS operations_timestamp ON operations (timestamp)"
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def add(self, operation: Operation) -> None:
+        """Record an operation, and delete the ones older than HISTORY_RETENTION."""
+        expired = (datetime.now(timezone.utc) - HISTORY_RETENTION).strftime(TIMESTAMP_FORMAT)
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO operations "
+                "(timestamp, operation, image, node, result, seconds, phases) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*operation[:-1], json.dumps(operation.phases)),
+            )
+            self.connection.execute("DELETE FROM operations WHERE timestamp < ?", (expired,))
+
+    def get_operations(
+        self,
+        since: Optional[datetime] = None,
+        operation: Optional[str] = None,
+        image: Optional[str] = None,
+    ) -> List[Operation]:
+        """
+        Return the recorded operations, newest first.
+
+        Args:
+            since (Optional[datetime]): Only return operations recorded after this time.
+            operation (Optional[str]): Only return operations of this type, e.g. `create`.
+            image (Optional[str]): Only return operations on notebooks of this image.
+        """
+        query = (
+            "SELECT timestamp, operation, image, node, result, seconds, phases FROM operations "
+            "WHERE timestamp >= ?"
+        )
+        parameters = [since.strftime(TIMESTAMP_FORMAT) if since else ""]
+        if operation:
+            query += " AND operation = ?"
+            parameters.append(operation)
+        if image:
+            query += " AND image = ?"
+            parameters.append(image)
+        rows = self.connection.execute(query + " ORDER BY timestamp DESC", parameters)
+        return [Operation(*row[:-1], json.loads(row[-1])) for row in rows]
+
+
+def record_operation(
+    operation: str,
+    seconds: float,
+    result: str = "success",
+    image: Optional[str] = None,
+    node: Optional[str] = None,
+    phases: Optional[List[TimelinePhase]] = None,
+    history_file: Path = HISTORY_FILE,
+) -> None:
+    """
+    Record the timings of an operation. This is best effort, a failure to record is only logged.
+
+    Args:
+        operation (str): The operation, e.g. `create`.
+        seconds (float): The duration of the whole operation.
+        result (str): `success`, or why the operation failed.
+        image (Optional[str]): The image of the notebook.
+        node (Optional[str]): The node of the notebook Pod.
+        phases (Optional[List[TimelinePhase]]): The phases of the operation.
+        history_file (Path): The database storing the operations.
+    """
+    durations = defaultdict(float)
+    for phase in phases or []:
+        durations[phase.name] += phase.seconds
+    timestamp = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+    try:
+        history = OperationHistory(history_file)
+        try:
+            history.add(
+                Operation(timestamp, operation, image, node, result, seconds, dict(durations))
+            )
+        finally:
+            history.close()
+    except (OSError, sqlite3.Error) as e:
+        logger.debug(f"Failed to record the {operation} operation: {e}.", exc_info=True)
+
+
+def _median(values: List[float]) -> Optional[float]:
+    """Return the median of the values, or None if there are none."""
+    return _percentile(values, 50) if values else None
+
+
+def _percentile(values: List[float], percentile: int) -> float:
+    """Return a percentile of the values, with the nearest-rank method."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percentile / 100 * len(ordered)) - 1, 0)]
+
+
+def estimate_startup_seconds(
+    image: str, cached: bool, history_file: Path = HISTORY_FILE
+) -> Optional[float]:
+    """
+    Return the estimated startup time of a notebook, from the latest successful creates of
+    notebooks with the image.
+
+    Args:
+        image (str): The image of the notebook.
+        cached (bool): Whether the image is already present on the node.
+        history_file (Path): The database storing the operations.
+
+    Returns:
+        Optional[float]: The estimate in seconds, or None without past startups to base it on.
+    """
+    try:
+        history = OperationHistory(history_file)
+        try:
+            creates = history.get_operations(operation="create", image=image)
+        finally:
+            history.close()
+    except (OSError, sqlite3.Error) as e:
+        logger.debug(f"Failed to read the operation history: {e}.", exc_info=True)
+        return None
+
+    timelines = [
+        create.phases for create in creates if create.result == "success" and create.phases
+    ][:ESTIMATE_SAMPLES]
+    start_seconds = _median(
+        [sum(phases.values()) - phases.get(IMAGE_PULL_PHASE, 0.0) for phases in timelines]
+    )
+    if start_seconds is None or cached:
+        return start_seconds
+    pull_seconds = _median(
+        [phases[IMAGE_PULL_PHASE] for phases in timelines if phases.get(IMAGE_PULL_PHASE)]
+    )
+    return None if pull_seconds is None else start_seconds + pull_seconds
+
+
+def _get_image_name(image: Optional[str]) -> str:
+    """Return the alias of a recommended image, or the image itself."""
+    return (get_image_alias(image) or image) if image else "-"
+
+
+def get_stats_table(operations: List[Operation]) -> PrettyTable:
+    """
+    Return a table with the duration percentiles of each operation and each of its phases, per
+    image. The durations are the ones of the successful operations.
+    """
+    durations = defaultdict(list)
+    failures = defaultdict(int)
+    for operation in operations:
+        key = (_get_image_name(operation.image), operation.operation)
+        if operation.result != "success":
+            failures[key] += 1
+            continue
+        durations[key].append(operation.seconds)
+        for phase, seconds in operation.phases.items():
+            durations[(*key, phase)].append(seconds)
+
+    table = PrettyTable()
+    table.field_names = [
+        "Image",
+        "Operation",
+        "Count",
+        "Failures",
+        *(f"p{percentile}" for percentile in STATS_PERCENTILES),
+    ]
+    table.align = "l"
+    for key in sorted(set(durations) | set(failures)):
+        values = durations.get(key, [])
+        image, operation, *phase = key
+        table.add_row(
+            [
+                image,
+                f"  {phase[0]}" if phase else operation,
+                len(values),
+                "" if phase else failures.get(key, 0),
+                *(
+                    f"{_percentile(values, percentile):.1f}s" if values else "-"
+                    for percentile in STATS_PERCENTILES
+                ),
+            ]
+        )
+    return table
+
+
+def get_stats(since: Optional[timedelta] = None, history_file: Path = HISTORY_FILE) -> None:
+    """
+    Log the duration percentiles of the operations recorded within `since`, per image and
+    operation.
+
+    Args:
+        since (Optional[timedelta]): The time window, or None for the whole history.
+        history_file (Path): The database storing the operations.
+
+    Raises:
+        RuntimeError: If the history cannot be read.
+    """
+    try:
+        history = OperationHistory(history_file)
+        try:
+            operations = history.get_operations(
+                since=datetime.now(timezone.utc) - since if since else None
+            )
+        finally:
+            history.close()
+    except (OSError, sqlite3.Error) as e:
+        logger.debug(f"Failed to read the operation history: {e}.", exc_info=True)
+        logger.error(f"Failed to read the operation history at {history_file}: {e}.")
+        raise RuntimeError()
+
+    if not operations:
+        logger.info("No operations recorded yet. dss create, start and stop record their timings.")
+        return
+    logger.info(f"\n{get_stats_table(operations)}")
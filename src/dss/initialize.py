@@ -1,7 +1,9 @@
 from pathlib import Path
+from typing import Dict, Optional
 
 from charmed_kubeflow_chisme.kubernetes import KubernetesResourceHandler
 from lightkube import Client
+from lightkube.core.exceptions import ApiError
 from lightkube.resources.apps_v1 import Deployment
 from lightkube.resources.core_v1 import Namespace, PersistentVolumeClaim, Service
 
@@ -14,23 +16,54 @@ from dss.config import (
     MLFLOW_DEPLOYMENT_NAME,
     NOTEBOOK_PVC_NAME,
 )
+from dss.create_notebook import create_warm_pool
+from dss.gpu_sharing import configure_gpu_sharing
+from dss.install_state import record_install_state
 from dss.logger import setup_logger
-from dss.utils import wait_for_deployment_ready
+from dss.utils import PodFailureError, wait_for_deployment_ready
+from dss.warm_pool import WARM_POOL_PREFIX
 
 # Set up logger
 logger = setup_logger()
 
 
-def initialize(lightkube_client: Client) -> None:
+def initialize(
+    lightkube_client: Client,
+    gpu_sharing: Optional[str] = None,
+    warm_pool: Optional[Dict[str, int]] = None,
+    namespace: str = DSS_NAMESPACE,
+) -> None:
     """
     Initializes the Kubernetes cluster by applying manifests from a YAML file.
 
     Args:
         lightkube_client (Client): The Kubernetes client.
+        gpu_sharing (Optional[str]): If set, configure NVIDIA GPU sharing with the given
+                                     specification, `timeslice:N` or `mig:PROFILE`.
+        warm_pool (Optional[Dict[str, int]]): Number of ready notebook Pods to keep for each
+                                              image alias, adopted by `dss create`.
+        namespace (str): The namespace for the notebooks. A namespace other than the DSS
+                         namespace gets its own notebooks PVC and shares the MLflow deployed
+                         in the DSS namespace.
 
     Returns:
         None
+
+    Raises:
+        RuntimeError: If the tenant namespace already exists and was not created by DSS, or
+                      MLflow fails to start.
     """
+    # `dss purge` deletes the namespaces labelled as part of DSS, so a namespace that already
+    # exists is never labelled, as it may hold workloads unrelated to DSS
+    if namespace != DSS_NAMESPACE and _is_foreign_namespace(lightkube_client, namespace):
+        logger.debug(f"Failed to initialize DSS. Namespace {namespace} was not created by DSS.")
+        logger.error(
+            f"Failed to initialize DSS. Namespace {namespace} already exists and was not "
+            "created by DSS."
+        )
+        logger.info("Choose a namespace that does not exist yet, it is created by DSS.")
+        raise RuntimeError()
+
     # Path to the manifests YAML file
     manifests_files = [
         Path(Path(__file__).parent, MANIFEST_TEMPLATES_LOCATION, "dss_core.yaml.j2"),
@@ -52,12 +85,45 @@ def initialize(lightkube_client: Client) -> None:
         lightkube_client=lightkube_client,
     )
 
+    # Each tenant namespace gets its own Namespace and notebooks PVC
+    tenant_resource_handler = None
+    if namespace != DSS_NAMESPACE:
+        tenant_resource_handler = KubernetesResourceHandler(
+            field_manager=FIELD_MANAGER,
+            labels=DSS_CLI_MANAGER_LABELS,
+            template_files=manifests_files[:1],
+            context={**config, "namespace": namespace},
+            resource_types={PersistentVolumeClaim, Namespace},
+            lightkube_client=lightkube_client,
+        )
+
     try:
         # Apply resources using KubernetesResourceHandler
         k8s_resource_handler.apply()
+        if tenant_resource_handler:
+            tenant_resource_handler.apply()
 
         # Wait for mlflow deployment to be ready
-        wait_for_deployment_ready(lightkube_client, namespace="dss", deployment_name="mlflow")
+        wait_for_deployment_ready(
+            lightkube_client, namespace=DSS_NAMESPACE, deployment_name=MLFLOW_DEPLOYMENT_NAME
+        )
+
+        if gpu_sharing:
+            configure_gpu_sharing(lightkube_client, gpu_sharing)
+
+        warm_pools = {
+            f"{WARM_POOL_PREFIX}{image}": create_warm_pool(
+                image, count, lightkube_client, namespace
+            )
+            for image, count in (warm_pool or {}).items()
+        }
+
+        record_install_state(
+            lightkube_client,
+            manifests_files,
+            _get_components(k8s_resource_handler, gpu_sharing, warm_pools),
+            namespace,
+        )
 
         logger.info(
             "DSS initialized. To create your first notebook run the command:\n\ndss create\n\n"  # noqa E501
@@ -72,3 +138,43 @@ def initialize(lightkube_client: Client) -> None:
             "Deleting resources..."
         )
         k8s_resource_handler.delete()
+    except PodFailureError as err:
+        logger.debug(f"Failed to initialize DSS: {err}.", exc_info=True)
+        logger.error(
+            f"MLflow failed to start with {err.reason}: {err.detail}. Deleting resources..."
+        )
+        k8s_resource_handler.delete()
+        raise RuntimeError()
+
+
+def _is_foreign_namespace(lightkube_client: Client, namespace: str) -> bool:
+    """Return True if the namespace exists and was not created by `dss initialize`."""
+    try:
+        obj = lightkube_client.get(Namespace, name=namespace)
+    except ApiError as e:
+        if e.status.code == 404:
+            return False
+        raise e
+    return (obj.metadata.labels or {}).get("app.kubernetes.io/part-of") != "dss"
+
+
+def _get_components(
+    k8s_resource_handler: KubernetesResourceHandler,
+    gpu_sharing: Optional[str],
+    warm_pools: Optional[Dict[str, dict]] = None,
+) -> Dict[str, dict]:
+    """
+    Return the installed components and their images, as recorded in the install state.
+
+    The warm pools are recorded with their config hash, so `dss create` only looks for warm
+    Pods when a pool matches the notebook.
+    """
+    components = {
+        obj.metadata.name: {"image": obj.spec.template.spec.containers[0].image}
+        for obj in k8s_resource_handler.render_manifests()
+        if isinstance(obj, Deployment)
+    }
+    if gpu_sharing:
+        components["gpu-sharing"] = {"spec": gpu_sharing}
+    components.update(warm_pools or {})
+    return components
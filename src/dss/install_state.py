@@ -0,0 +1,171 @@
+import hashlib
+import json
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from lightkube import Client
+from lightkube.core.exceptions import ApiError
+from lightkube.models.meta_v1 import ObjectMeta
+from lightkube.resources.core_v1 import ConfigMap
+from lightkube.resources.storage_v1 import StorageClass
+
+from dss.config import (
+    DSS_CLI_MANAGER_LABELS,
+    DSS_NAMESPACE,
+    FIELD_MANAGER,
+    INSTALL_STATE_CONFIGMAP_NAME,
+    INSTALL_STATE_KEY,
+    INSTALL_STATE_SCHEMA_VERSION,
+    LIST_PAGE_SIZE,
+)
+from dss.logger import setup_logger
+from dss.nodes import get_node_inventory
+
+# Set up logger
+logger = setup_logger()
+
+# Annotation marking the default StorageClass of the cluster
+DEFAULT_STORAGE_CLASS_ANNOTATION = "storageclass.kubernetes.io/is-default-class"
+
+
+def get_dss_version() -> str:
+    """Return the version of the installed DSS CLI, or `unknown` if it is not installed."""
+    try:
+        return version("dss")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def get_manifest_hashes(manifests_files: List[Path]) -> Dict[str, str]:
+    """Return the SHA-256 of each manifest template, keyed by file name."""
+    return {path.name: hashlib.sha256(path.read_bytes()).hexdigest() for path in manifests_files}
+
+
+def get_accelerators(lightkube_client: Client) -> Dict[str, Optional[str]]:
+    """Return the NVIDIA GPU product and Intel GPU support detected on the cluster nodes."""
+    nodes = get_node_inventory(lightkube_client)
+    nvidia_nodes = [node for node in nodes if node.nvidia_enabled]
+    return {
+        "nvidia": nvidia_nodes[0].gpu_product if nvidia_nodes else None,
+        "intel": "enabled" if any(node.intel_enabled for node in nodes) else None,
+    }
+
+
+def get_storage_classes(lightkube_client: Client) -> Dict[str, bool]:
+    """
+    Return the StorageClasses of the cluster and whether each one is the default.
+
+    An empty dict is returned if the StorageClasses cannot be listed, e.g. for lack of
+    permissions, since they are informational only.
+    """
+    try:
+        return {
+            storage_class.metadata.name: (storage_class.metadata.annotations or {}).get(
+                DEFAULT_STORAGE_CLASS_ANNOTATION
+            )
+            == "true"
+            for storage_class in lightkube_client.list(StorageClass, chunk_size=LIST_PAGE_SIZE)
+        }
+    except ApiError as e:
+        logger.debug(f"Failed to list StorageClasses: {e}.", exc_info=True)
+        return {}
+
+
+def read_install_state(lightkube_client: Client) -> Optional[dict]:
+    """
+    Return the install state recorded by `dss initialize`, with a single request.
+
+    Returns:
+        Optional[dict]: The install state, or None if DSS was not initialized or was initialized
+                        by a version that did not record it.
+
+    Raises:
+        ApiError: If the request fails for a reason other than the state not existing.
+    """
+    try:
+        config_map = lightkube_client.get(
+            ConfigMap, name=INSTALL_STATE_CONFIGMAP_NAME, namespace=DSS_NAMESPACE
+        )
+    except ApiError as e:
+        if e.response.status_code == 404:
+            return None
+        raise e
+    try:
+        return json.loads((config_map.data or {})[INSTALL_STATE_KEY])
+    except (KeyError, ValueError):
+        logger.warning(
+            f"Ignoring the invalid install state in ConfigMap {INSTALL_STATE_CONFIGMAP_NAME}."
+        )
+        return None
+
+
+def write_install_state(lightkube_client: Client, state: dict) -> None:
+    """Store the install state in the install state ConfigMap of the DSS namespace."""
+    config_map = ConfigMap(
+        metadata=ObjectMeta(
+            name=INSTALL_STATE_CONFIGMAP_NAME,
+            namespace=DSS_NAMESPACE,
+            labels={**DSS_CLI_MANAGER_LABELS, "app.kubernetes.io/part-of": "dss"},
+        ),
+        data={INSTALL_STATE_KEY: json.dumps(state, indent=2, sort_keys=True)},
+    )
+    lightkube_client.apply(config_map, field_manager=FIELD_MANAGER, force=True)
+
+
+def record_install_state(
+    lightkube_client: Client,
+    manifests_files: List[Path],
+    components: Dict[str, dict],
+    namespace: str = DSS_NAMESPACE,
+) -> dict:
+    """
+    Record what `dss initialize` installed, so other commands can check it with a single read.
+
+    The namespaces and components recorded by previous runs are kept, so every tenant
+    namespace remains recorded, and so do the warm pools and GPU sharing configured by a run
+    that did not configure them again.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        manifests_files (List[Path]): The manifest templates that were applied.
+        components (Dict[str, dict]): The installed components, e.g. the MLflow image. They
+                                      replace the previously recorded components of the same
+                                      name.
+        namespace (str): The notebooks namespace that was initialized.
+
+    Returns:
+        dict: The recorded install state.
+    """
+    previous = read_install_state(lightkube_client) or {}
+    namespaces = set(previous.get("namespaces", [DSS_NAMESPACE]))
+    namespaces.add(namespace)
+    components = {**previous.get("components", {}), **components}
+    state = {
+        "schema": INSTALL_STATE_SCHEMA_VERSION,
+        "version": get_dss_version(),
+        "components": components,
+        "manifests": get_manifest_hashes(manifests_files),
+        "accelerators": get_accelerators(lightkube_client),
+        "storage_classes": get_storage_classes(lightkube_client),
+        "namespaces": sorted(namespaces),
+    }
+    write_install_state(lightkube_client, state)
+    logger.debug(f"Recorded install state: {state}.")
+    return state
+
+
+def is_namespace_initialized(state: dict, namespace: str) -> bool:
+    """Return True if the install state records that `namespace` was initialized."""
+    return namespace in state.get("namespaces", [])
+
+
+def warn_on_version_skew(state: dict) -> None:
+    """Log a warning if DSS was initialized by a different version of the CLI."""
+    installed = state.get("version")
+    current = get_dss_version()
+    if installed != current:
+        logger.warning(
+            f"DSS was initialized by version {installed} of the CLI, this is version {current}."
+            " Run `dss doctor --deep` to check the installation."
+        )
@@ -1,77 +1,329 @@
+import itertools
 import sys
+import textwrap
+from collections import defaultdict
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
 import lightkube
 from lightkube import Client
 from lightkube.core.exceptions import ApiError
 from lightkube.resources.apps_v1 import Deployment
+from lightkube.resources.core_v1 import Pod, Service
 from prettytable import PrettyTable
 
-from dss.config import DSS_NAMESPACE, NOTEBOOK_LABEL, DeploymentState
+from dss.config import (
+    DSS_NAMESPACE,
+    INTEL_GPU_RESOURCE,
+    LIST_PAGE_SIZE,
+    NOTEBOOK_LABEL,
+    NVIDIA_GPU_RESOURCE,
+    SHM_VOLUME_NAME,
+    DeploymentState,
+)
+from dss.contexts import run_on_contexts
 from dss.logger import setup_logger
-from dss.utils import get_deployment_state, get_service_url
+from dss.utils import get_deployment_state, get_url_from_service
 
 # Set up logger
 logger = setup_logger()
 
+# Width of each column when listing to a terminal, so that every page of rows lines up
+TERMINAL_COLUMN_WIDTHS = {
+    "Cluster": 12,
+    "Namespace": 12,
+    "Name": 20,
+    "Image": 26,
+    "GPU": 10,
+    "URL": 24,
+}
 
-def list_notebooks(lightkube_client: Client, wide: bool = False) -> None:
+
+def list_notebooks(
+    lightkube_client: Client,
+    wide: bool = False,
+    namespace: str = DSS_NAMESPACE,
+    all_namespaces: bool = False,
+) -> None:
     """
-    List the available notebooks in the DSS namespace.
+    List the available notebooks in the given namespace, or in every namespace.
 
     Args:
         lightkube_client (Client): The Kubernetes client.
         wide (bool, optional): Whether to display the full information without truncation.
                                Defaults to False.
+        namespace (str, optional): The namespace of the notebooks. Defaults to DSS_NAMESPACE.
+        all_namespaces (bool, optional): Whether to list the notebooks of every namespace, with
+                                         a Namespace column. Defaults to False.
     """
+    field_names = _get_field_names(wide, namespace_column=all_namespaces)
+    widths = _get_column_widths(field_names, wide)
+    table = _create_table(field_names, widths)
+    # With fixed column widths, each page of rows can be printed as soon as it is retrieved
+    stream = widths is not None
+
     try:
-        deployments = list(
-            lightkube_client.list(
-                Deployment,
-                namespace=DSS_NAMESPACE,
-                labels={NOTEBOOK_LABEL: lightkube.operators.exists()},
-            )
-        )
+        rows = _get_rows(lightkube_client, wide, namespace, all_namespaces)
+        found = False
+        for page in _get_pages(rows, LIST_PAGE_SIZE if stream else None):
+            for row in page:
+                table.add_row(_fit_cells(row, widths))
+            if stream:
+                # TODO: remove the newline after https://github.com/canonical/data-science-stack/issues/77  # noqa E501
+                logger.info(("" if found else "\n") + table.get_string(header=not found))
+                table.clear_rows()
+            found = True
     except ApiError as e:
         logger.debug(f"Failed to list notebooks: {e}.", exc_info=True)
         logger.error(f"Failed to list notebooks: {str(e)}.")
         raise RuntimeError()
 
-    if not deployments:
+    if not found:
         logger.info("No notebooks found.")
         return
 
-    # Create a PrettyTable object
-    table = PrettyTable()
-    table.field_names = ["Name", "Image", "URL"]
-    table.border = False
-    table.align = "l"  # Align the text to left
+    if not stream:
+        # TODO: remove the newline after https://github.com/canonical/data-science-stack/issues/77
+        logger.info(f"\n{table}")
+
+
+def list_notebooks_all_contexts(
+    wide: bool = False, namespace: str = DSS_NAMESPACE, all_namespaces: bool = False
+) -> None:
+    """
+    List the notebooks of every cluster context in a single table with a Cluster column.
+
+    The clusters are queried concurrently, and clusters that fail or time out are reported
+    without failing the whole listing.
+
+    Args:
+        wide (bool, optional): Whether to display the full information without truncation.
+                               Defaults to False.
+        namespace (str, optional): The namespace of the notebooks. Defaults to DSS_NAMESPACE.
+        all_namespaces (bool, optional): Whether to list the notebooks of every namespace.
+                                         Defaults to False.
+    """
+    results = run_on_contexts(
+        lambda client: list(_get_rows(client, wide, namespace, all_namespaces))
+    )
+    if not results:
+        logger.info("No contexts found. Add one with `dss context add`.")
+        return
+
+    field_names = _get_field_names(wide, cluster=True, namespace_column=all_namespaces)
+    widths = _get_column_widths(field_names, wide)
+    table = _create_table(field_names, widths)
+    for context, rows in results.items():
+        if isinstance(rows, Exception):
+            logger.debug(f"Failed to list notebooks in context {context}: {rows}.")
+            logger.warning(f"Failed to list notebooks in context {context}: {rows}.")
+            continue
+        for row in rows:
+            table.add_row(_fit_cells([context, *row], widths))
+
+    if not table.rows:
+        logger.info("No notebooks found.")
+        return
+
+    # TODO: remove the newline after https://github.com/canonical/data-science-stack/issues/77
+    logger.info(f"\n{table}")
 
+
+def _get_field_names(
+    wide: bool, cluster: bool = False, namespace_column: bool = False
+) -> List[str]:
+    """Return the notebook columns, prefixed by Cluster and Namespace."""
+    field_names = ["Name", "Image", "GPU", "URL"]
+    if wide:
+        field_names = ["Name", "Image", "GPU", "Shared memory", "URL"]
+    if namespace_column:
+        field_names = ["Namespace", *field_names]
+    if cluster:
+        field_names = ["Cluster", *field_names]
+    return field_names
+
+
+def _get_column_widths(field_names: List[str], wide: bool) -> Optional[List[int]]:
+    """Return the fixed width of each column, or None to fit the columns to their content."""
     # Adjust column widths based on the output destination
     if sys.stdout.isatty() and not wide:
         # Output is to a terminal and not in wide mode
-        table._max_width = {"Name": 26, "Image": 30, "URL": 24}
-
-    for deployment in deployments:
-        name = deployment.metadata.name
-        image = deployment.spec.template.spec.containers[0].image
-        state = get_deployment_state(deployment, lightkube_client)
-
-        # Use state to decide what to display in the URL column
-        if state == DeploymentState.ACTIVE:
-            available_replicas = deployment.status.availableReplicas
-            url = get_service_url(name, DSS_NAMESPACE, lightkube_client)
-            if not url:
-                # TODO: Add documentation link
-                logger.warning(
-                    f"No service found for the notebook {name}. Please refer to our documentation."
-                )
-                url = f"({DeploymentState.NO_SERVICE.value})"
-            elif not available_replicas:
-                url = f"({DeploymentState.STOPPED.value})"
-        else:
-            url = f"({state.value})"
-
-        table.add_row([name, image, url])
+        return [TERMINAL_COLUMN_WIDTHS[name] for name in field_names]
+    return None
 
-    # TODO: remove the newline after https://github.com/canonical/data-science-stack/issues/77
-    logger.info(f"\n{table}")
+
+def _fit_cells(cells: List[str], widths: Optional[List[int]]) -> List[str]:
+    """Wrap each cell to the width of its column and pad its lines to exactly that width."""
+    if widths is None:
+        return list(cells)
+    return [
+        "\n".join(line.ljust(width) for line in textwrap.wrap(str(cell), width) or [""])
+        for cell, width in zip(cells, widths)
+    ]
+
+
+def _create_table(field_names: List[str], widths: Optional[List[int]] = None) -> PrettyTable:
+    """Return an empty table with the given columns, of fixed widths if `widths` is given."""
+    table = PrettyTable()
+    table.field_names = _fit_cells(field_names, widths)
+    table.border = False
+    table.align = "l"  # Align the text to left
+    return table
+
+
+def _get_pages(rows: Iterable[List[str]], size: Optional[int]) -> Iterator[List[List[str]]]:
+    """Group the rows in pages of `size` rows, or in a single page if `size` is None."""
+    rows = iter(rows)
+    while True:
+        page = list(itertools.islice(rows, size))
+        if not page:
+            return
+        yield page
+
+
+def _get_rows(
+    lightkube_client: Client, wide: bool, namespace: str, all_namespaces: bool
+) -> Iterator[List[str]]:
+    """Return the notebook rows of the namespace, or of every namespace if `all_namespaces`."""
+    if all_namespaces:
+        return get_notebook_rows_all_namespaces(lightkube_client, wide)
+    return get_notebook_rows(lightkube_client, wide, namespace)
+
+
+def get_notebook_rows(
+    lightkube_client: Client, wide: bool = False, namespace: str = DSS_NAMESPACE
+) -> Iterator[List[str]]:
+    """
+    Yield a table row for each notebook in the namespace.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        wide (bool, optional): Whether to include the columns only shown in wide mode.
+        namespace (str, optional): The namespace of the notebooks. Defaults to DSS_NAMESPACE.
+
+    Raises:
+        ApiError: If the notebooks cannot be listed.
+    """
+    for _, row in _get_notebook_rows_by_page(lightkube_client, wide, namespace):
+        yield row
+
+
+def get_notebook_rows_all_namespaces(
+    lightkube_client: Client, wide: bool = False
+) -> Iterator[List[str]]:
+    """
+    Yield a table row, starting with the namespace, for each notebook in every namespace.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        wide (bool, optional): Whether to include the columns only shown in wide mode.
+
+    Raises:
+        ApiError: If the notebooks cannot be listed.
+    """
+    for deployment, row in _get_notebook_rows_by_page(lightkube_client, wide, lightkube.ALL_NS):
+        yield [deployment.metadata.namespace, *row]
+
+
+def _get_notebook_rows_by_page(
+    lightkube_client: Client, wide: bool, namespace: str
+) -> Iterator[Tuple[Deployment, List[str]]]:
+    """
+    Yield each notebook Deployment of the namespace, or of every namespace, with its row.
+
+    The Deployments are retrieved in pages and turned into rows as they arrive. For each page,
+    the Pods and the Services of its notebooks are retrieved with one labelled list each, and
+    joined to the Deployments by namespace and name, so listing takes three requests per page
+    instead of two per notebook, and only the objects of the current page are kept in memory.
+
+    The Deployments are retrieved in full rather than as metadata only, as the image, GPUs and
+    shared memory shown in each row are in their Pod template.
+    """
+    deployments = lightkube_client.list(
+        Deployment,
+        namespace=namespace,
+        labels={NOTEBOOK_LABEL: lightkube.operators.exists()},
+        chunk_size=LIST_PAGE_SIZE,
+    )
+    for page in _get_pages(deployments, LIST_PAGE_SIZE):
+        names = sorted({deployment.metadata.name for deployment in page})
+        pods = defaultdict(list)
+        for pod in lightkube_client.list(
+            Pod,
+            namespace=namespace,
+            labels={NOTEBOOK_LABEL: lightkube.operators.in_(names)},
+            chunk_size=LIST_PAGE_SIZE,
+        ):
+            pods[(pod.metadata.namespace, pod.metadata.labels[NOTEBOOK_LABEL])].append(pod)
+        services = {
+            (service.metadata.namespace, service.metadata.name): service
+            for service in lightkube_client.list(
+                Service,
+                namespace=namespace,
+                labels={
+                    "app.kubernetes.io/part-of": "dss",
+                    "app.kubernetes.io/name": lightkube.operators.in_(names),
+                },
+                chunk_size=LIST_PAGE_SIZE,
+            )
+        }
+
+        for deployment in page:
+            key = (deployment.metadata.namespace, deployment.metadata.name)
+            state = get_deployment_state(deployment, lightkube_client, pods[key])
+            service = services.get(key)
+            row = _get_notebook_row(
+                deployment,
+                state,
+                lambda: get_url_from_service(service) if service else None,
+                wide,
+            )
+            yield deployment, row
+
+
+def _get_notebook_row(
+    deployment: Deployment,
+    state: DeploymentState,
+    get_url: Callable[[], Optional[str]],
+    wide: bool,
+) -> List[str]:
+    """Return the table row of a notebook, calling `get_url` only if the notebook is active."""
+    name = deployment.metadata.name
+    image = deployment.spec.template.spec.containers[0].image
+    gpu = _get_gpu_assignment(deployment)
+
+    # Use state to decide what to display in the URL column
+    if state == DeploymentState.ACTIVE:
+        available_replicas = deployment.status.availableReplicas
+        url = get_url()
+        if not url:
+            # TODO: Add documentation link
+            logger.warning(
+                f"No service found for the notebook {name}. Please refer to our documentation."
+            )
+            url = f"({DeploymentState.NO_SERVICE.value})"
+        elif not available_replicas:
+            url = f"({DeploymentState.STOPPED.value})"
+    else:
+        url = f"({state.value})"
+
+    if wide:
+        return [name, image, gpu, _get_shm_size(deployment), url]
+    return [name, image, gpu, url]
+
+
+def _get_gpu_assignment(deployment: Deployment) -> str:
+    """Return a short description of the GPUs assigned to the notebook, e.g. `1 (nvidia)`."""
+    resources = deployment.spec.template.spec.containers[0].resources
+    limits = resources.limits if resources and resources.limits else {}
+    for resource, vendor in ((NVIDIA_GPU_RESOURCE, "nvidia"), (INTEL_GPU_RESOURCE, "intel")):
+        if resource in limits:
+            return f"{limits[resource]} ({vendor})"
+    return "-"
+
+
+def _get_shm_size(deployment: Deployment) -> str:
+    """Return the size limit of the notebook's shared memory volume, or `-` if unlimited."""
+    for volume in deployment.spec.template.spec.volumes or []:
+        if volume.name == SHM_VOLUME_NAME and volume.emptyDir and volume.emptyDir.sizeLimit:
+            return str(volume.emptyDir.sizeLimit)
+    return "-"
@@ -0,0 +1,316 @@
+import gzip
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import lightkube
+from lightkube import Client
+from lightkube.resources.core_v1 import Pod
+
+from dss.config import LIST_PAGE_SIZE, NOTEBOOK_LABEL, TIMESTAMP_FORMAT
+from dss.logger import setup_logger
+from dss.utils import get_previous_pod_logs
+
+# Set up logger
+logger = setup_logger()
+
+# Directory storing the archived logs and their index
+ARCHIVE_DIR = Path.home() / ".dss/logs"
+ARCHIVE_INDEX_FILE = "index.db"
+# Interval between checks for new or restarted Pods, and between writes to the archive
+ARCHIVE_SYNC_INTERVAL_SECONDS = 10
+# Labels of every Pod created by DSS, in any namespace
+DSS_POD_LABELS = {"app.kubernetes.io/part-of": "dss"}
+DURATION_REGEX = re.compile(r"^(\d+)([smhd])$")
+DURATION_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+class LogEntry(NamedTuple):
+    """A line of the logs of a DSS Pod."""
+
+    timestamp: str
+    namespace: str
+    pod: str
+    source: str
+    line: str
+
+
+def parse_duration(value: str) -> timedelta:
+    """
+    Parse a duration of the form `30s`, `15m`, `12h` or `7d`.
+
+    Raises:
+        ValueError: If the duration is not valid.
+    """
+    match = DURATION_REGEX.match(value)
+    if not match:
+        raise ValueError(f"expected a number followed by s, m, h or d, got '{value}'")
+    return timedelta(**{DURATION_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def _normalize_timestamp(timestamp: str) -> str:
+    """
+    Convert an RFC 3339 timestamp from the Kubernetes API, whose fraction of a second has a
+    variable number of digits, to TIMESTAMP_FORMAT.
+    """
+    seconds, _, fraction = timestamp.rstrip("Z").partition(".")
+    parsed = datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S")
+    return parsed.replace(microsecond=int(fraction[:6].ljust(6, "0"))).strftime(TIMESTAMP_FORMAT)
+
+
+class LogArchive:
+    """
+    Logs stored in compressed segments partitioned by hour, with an SQLite full-text index.
+
+    Each segment is a gzip file at `<date>/<hour>/<namespace>.<pod>.log.gz`, appended to as new
+    lines are archived. The index holds every line with its timestamp and source, so searches
+    do not need to decompress the segments.
+    """
+
+    def __init__(self, archive_dir: Path = ARCHIVE_DIR):
+        self.archive_dir = archive_dir
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(archive_dir / ARCHIVE_INDEX_FILE)
+        self.connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS lines USING fts5("
+            "line, timestamp UNINDEXED, namespace UNINDEXED, pod UNINDEXED, source UNINDEXED, "
+            "segment UNINDEXED)"
+        )
+        # Timestamp of the last archived line of each Pod, to resume without duplicates
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS positions ("
+            "namespace TEXT, pod TEXT, timestamp TEXT, PRIMARY KEY (namespace, pod))"
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        """Close the index."""
+        self.connection.close()
+
+    def get_segment(self, entry: LogEntry) -> str:
+        """Return the path of the segment of a log line, relative to the archive directory."""
+        return (
+            f"{entry.timestamp[:10]}/{entry.timestamp[11:13]}/{entry.namespace}.{entry.pod}.log.gz"
+        )
+
+    def add(self, entries: List[LogEntry]) -> None:
+        """Append log lines to their segments and index them."""
+        if not entries:
+            return
+        segments = defaultdict(list)
+        for entry in entries:
+            segments[self.get_segment(entry)].append(entry)
+        for segment, segment_entries in segments.items():
+            path = self.archive_dir / segment
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Appending to a gzip file adds a member, and the members are read back as one file
+            with gzip.open(path, "at") as output:
+                output.writelines(f"{entry.timestamp} {entry.line}\n" for entry in segment_entries)
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO lines (line, timestamp, namespace, pod, source, segment) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        entry.line,
+                        entry.timestamp,
+                        entry.namespace,
+                        entry.pod,
+                        entry.source,
+                        segment,
+                    )
+                    for segment, segment_entries in segments.items()
+                    for entry in segment_entries
+                ],
+            )
+            last = {}
+            for entry in entries:
+                key = (entry.namespace, entry.pod)
+                last[key] = max(last.get(key, entry.timestamp), entry.timestamp)
+            self.connection.executemany(
+                "INSERT INTO positions (namespace, pod, timestamp) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace, pod) DO UPDATE SET timestamp = excluded.timestamp "
+                "WHERE excluded.timestamp > positions.timestamp",
+                [(namespace, pod, timestamp) for (namespace, pod), timestamp in last.items()],
+            )
+
+    def get_last_timestamp(self, namespace: str, pod: str) -> Optional[str]:
+        """Return the timestamp of the last archived line of a Pod, if any."""
+        row = self.connection.execute(
+            "SELECT timestamp FROM positions WHERE namespace = ? AND pod = ?", (namespace, pod)
+        ).fetchone()
+        return row[0] if row else None
+
+    def search(self, text: str, since: Optional[datetime] = None) -> List[LogEntry]:
+        """
+        Return the archived lines containing `text`, oldest first.
+
+        Args:
+            text (str): The words to search for, matched as a phrase and ignoring case.
+            since (Optional[datetime]): Only return lines logged after this time.
+        """
+        # Quoting the text makes it a phrase, so punctuation is not parsed as query syntax
+        query = '"' + text.replace('"', '""') + '"'
+        since_timestamp = since.strftime(TIMESTAMP_FORMAT) if since else ""
+        rows = self.connection.execute(
+            "SELECT timestamp, namespace, pod, source, line FROM lines "
+            "WHERE lines MATCH ? AND timestamp >= ? ORDER BY timestamp",
+            (query, since_timestamp),
+        )
+        return [LogEntry(*row) for row in rows]
+
+
+def _get_source(pod: Pod) -> str:
+    """Return the notebook or component a Pod belongs to."""
+    labels = pod.metadata.labels or {}
+    return labels.get(NOTEBOOK_LABEL) or labels.get("app.kubernetes.io/name") or pod.metadata.name
+
+
+def _get_restart_count(pod: Pod) -> int:
+    """Return the total number of container restarts of a Pod."""
+    statuses = pod.status.containerStatuses if pod.status else None
+    return sum(status.restartCount for status in statuses or [])
+
+
+def _get_entries(
+    lines: Iterable[str], last_timestamp: Optional[str], namespace: str, name: str, source: str
+) -> Iterator[LogEntry]:
+    """Yield the entries of the timestamped log lines that were logged after `last_timestamp`."""
+    for line in lines:
+        timestamp, _, text = line.partition(" ")
+        timestamp = _normalize_timestamp(timestamp)
+        # `since` has a resolution of seconds, so lines already archived are skipped
+        if last_timestamp and timestamp <= last_timestamp:
+            continue
+        yield LogEntry(timestamp, namespace, name, source, text)
+
+
+def _follow_pod_logs(
+    lightkube_client: Client,
+    pod: Pod,
+    last_timestamp: Optional[str],
+    entries: "queue.Queue[LogEntry]",
+    previous: bool = False,
+) -> None:
+    """
+    Put the lines logged by a Pod after `last_timestamp` in `entries` until its logs end.
+
+    If `previous` is set, the Pod's containers restarted since it was last followed, and the
+    lines its previous containers logged before stopping are put in `entries` first.
+    """
+    namespace, name, source = pod.metadata.namespace, pod.metadata.name, _get_source(pod)
+    if previous:
+        try:
+            lines = get_previous_pod_logs(lightkube_client, name, namespace, timestamps=True)
+            for entry in _get_entries(lines.splitlines(), last_timestamp, namespace, name, source):
+                entries.put(entry)
+        except Exception as e:
+            logger.debug(f"Failed to get the previous logs of Pod {namespace}/{name}: {e}.")
+    since = None
+    if last_timestamp:
+        last = datetime.strptime(last_timestamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+        since = int((datetime.now(timezone.utc) - last).total_seconds()) + 1
+    try:
+        lines = lightkube_client.log(
+            name, namespace=namespace, follow=True, timestamps=True, since=since, newlines=False
+        )
+        for entry in _get_entries(lines, last_timestamp, namespace, name, source):
+            entries.put(entry)
+    except Exception as e:
+        logger.debug(f"Stopped following the logs of Pod {namespace}/{name}: {e}.")
+
+
+def _drain(entries: "queue.Queue[LogEntry]") -> List[LogEntry]:
+    """Return the entries currently in the queue."""
+    drained = []
+    while True:
+        try:
+            drained.append(entries.get_nowait())
+        except queue.Empty:
+            return drained
+
+
+def _sync_followers(
+    lightkube_client: Client,
+    archive: LogArchive,
+    followers: Dict[Tuple[str, str, int], threading.Thread],
+    entries: "queue.Queue[LogEntry]",
+) -> None:
+    """
+    Follow the logs of the DSS Pods that are not followed yet, including Pods whose containers
+    restarted since they were last followed, and forget the Pods that no longer exist.
+    """
+    pods = lightkube_client.list(
+        Pod, namespace=lightkube.ALL_NS, labels=DSS_POD_LABELS, chunk_size=LIST_PAGE_SIZE
+    )
+    current = set()
+    for pod in pods:
+        if not pod.status or pod.status.phase == "Pending":
+            continue
+        key = (pod.metadata.namespace, pod.metadata.name, _get_restart_count(pod))
+        current.add(key)
+        follower = followers.get(key)
+        # A stream ends when the container stops, or when the connection drops while running
+        if follower and (follower.is_alive() or pod.status.phase != "Running"):
+            continue
+        last_timestamp = archive.get_last_timestamp(*key[:2])
+        # The logs of the previous containers are fetched once, when the restart count grows
+        previous = not follower and key[2] > 0
+        followers[key] = threading.Thread(
+            target=_follow_pod_logs,
+            args=(lightkube_client, pod, last_timestamp, entries, previous),
+            daemon=True,
+        )
+        followers[key].start()
+        logger.debug(f"Following the logs of Pod {key[0]}/{key[1]}.")
+    for key in set(followers) - current:
+        del followers[key]
+
+
+def run_archiver(
+    lightkube_client: Client,
+    archive_dir: Path = ARCHIVE_DIR,
+    interval_seconds: int = ARCHIVE_SYNC_INTERVAL_SECONDS,
+) -> None:
+    """
+    Continuously archive the logs of every DSS Pod in every namespace until interrupted.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        archive_dir (Path): The directory of the archive.
+        interval_seconds (int): Interval between checks for new Pods and writes to the archive.
+    """
+    archive = LogArchive(archive_dir)
+    followers = {}
+    entries = queue.Queue()
+    logger.info(f"Archiving the DSS logs to {archive_dir}. Press Ctrl+C to exit.")
+    try:
+        while True:
+            # Write the queued lines first, so restarted followers resume after them
+            archive.add(_drain(entries))
+            _sync_followers(lightkube_client, archive, followers, entries)
+            time.sleep(interval_seconds)
+    finally:
+        archive.add(_drain(entries))
+        archive.close()
+
+
+def iter_search_results(
+    text: str, since: Optional[timedelta] = None, archive_dir: Path = ARCHIVE_DIR
+) -> Iterator[LogEntry]:
+    """Yield the archived lines containing `text`, logged within `since` if set."""
+    if not (archive_dir / ARCHIVE_INDEX_FILE).exists():
+        return
+    archive = LogArchive(archive_dir)
+    try:
+        start = datetime.now(timezone.utc) - since if since else None
+        yield from archive.search(text, start)
+    finally:
+        archive.close()
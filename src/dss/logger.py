@@ -1,25 +1,212 @@
+import atexit
+import copy
+import fcntl
+import gzip
+import json
 import logging
 import os
+import queue
+import shutil
 import sys
-from logging.handlers import RotatingFileHandler
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+from dss.config import CORRELATION_ID_ENV_VAR, LOG_FORMAT_ENV_VAR
+
+# Fields added to every record, identifying the dss invocation that logged it
+LOG_CONTEXT_FIELDS = ("correlation_id", "command", "notebook")
+_log_context = {
+    "correlation_id": os.environ.get(CORRELATION_ID_ENV_VAR) or uuid.uuid4().hex,
+    "command": None,
+    "notebook": None,
+}
 
 
 class CustomFormatter(logging.Formatter):
-    """Custom formatter to adjust format based on log level."""
+    """
+    Custom formatter to adjust format based on log level.
+
+    A formatter is compiled for each format, so records can be formatted concurrently.
+    """
+
+    def __init__(self, fmt: str = "[%(levelname)s] %(message)s", datefmt: str = None):
+        super().__init__(fmt, datefmt=datefmt)
+        # INFO messages are shown without the level in brackets
+        self._info_formatter = logging.Formatter("%(message)s", datefmt=datefmt)
 
     def format(self, record: logging.LogRecord) -> str:  # noqa: A003
-        # Check if the log level is INFO and remove the brackets if so
-        if record.levelname == "INFO":
-            self._style._fmt = "%(message)s"
-        else:
-            self._style._fmt = "[%(levelname)s] %(message)s"
+        if record.levelno == logging.INFO:
+            return self._info_formatter.format(record)
         return super().format(record)
 
 
+class JsonFormatter(logging.Formatter):
+    """Formats records as JSON lines, with the fields set by `set_log_context`."""
+
+    def format(self, record: logging.LogRecord) -> str:  # noqa: A003
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "module": record.module,
+            "function": record.funcName,
+            "message": record.getMessage(),
+            # Time since the start of the dss invocation
+            "elapsed_ms": round(record.relativeCreated),
+        }
+        entry.update({field: getattr(record, field, None) for field in LOG_CONTEXT_FIELDS})
+        if getattr(record, "duration_ms", None) is not None:
+            entry["duration_ms"] = record.duration_ms
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def set_log_context(**fields: str) -> None:
+    """
+    Set fields added to every record of this dss invocation, e.g. `command` or `notebook`.
+    """
+    unknown = set(fields) - set(LOG_CONTEXT_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown log context fields: {', '.join(sorted(unknown))}")
+    _log_context.update(fields)
+
+
+class _ExceptionPreservingQueueHandler(QueueHandler):
+    """
+    Queues records for the file handler, keeping their exception.
+
+    `QueueHandler.prepare` formats the exception into the message and clears `exc_info`, which
+    would leave the JSON formatter without its `exception` field. The queue is only consumed
+    in this process, so the records do not need to be picklable.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Copy the record, as the console handler may format the same one
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _LogContextFilter(logging.Filter):
+    """Adds the log context to the records, before they are queued for the file handler."""
+
+    def filter(self, record: logging.LogRecord) -> bool:  # noqa: A003
+        for field, value in _log_context.items():
+            setattr(record, field, value)
+        return True
+
+
+def _gzip_namer(name: str) -> str:
+    """Name the rotated log files with a `.gz` extension."""
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compress the rotated log file."""
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+class ConcurrentRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler that can share its file with other processes.
+
+    Records are buffered by `emit` and written in a single write by `flush`. Writes and
+    rotation are done while holding an exclusive lock on a `.lock` file next to the log file,
+    and the file is reopened if another process rotated it. Rotated files are compressed.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, backup_count: int = 0):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.namer = _gzip_namer
+        self.rotator = _gzip_rotator
+        self.lock_file_path = f"{self.baseFilename}.lock"
+        self._pending = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._pending.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+    def _open_current(self) -> None:
+        """Open the log file, or reopen it if it was rotated since it was opened."""
+        if self.stream is not None:
+            try:
+                current = os.stat(self.baseFilename).st_ino
+            except FileNotFoundError:
+                current = None
+            if current != os.fstat(self.stream.fileno()).st_ino:
+                self.stream.close()
+                self.stream = None
+        if self.stream is None:
+            self.stream = self._open()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if not self._pending:
+                return
+            data = "".join(self._pending)
+            self._pending = []
+            with open(self.lock_file_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._open_current()
+                size = os.fstat(self.stream.fileno()).st_size
+                if self.maxBytes > 0 and size > 0 and size + len(data) > self.maxBytes:
+                    self.doRollover()
+                    self._open_current()
+                self.stream.write(data)
+                self.stream.flush()
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(QueueListener):
+    """Queue listener that flushes its handlers once the queue is empty, to write in batches."""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self.queue.empty():
+            self.flush()
+
+    def flush(self) -> None:
+        """Flush the handlers."""
+        for handler in self.handlers:
+            handler.flush()
+
+    def stop(self) -> None:
+        super().stop()
+        self.flush()
+
+
+def flush_logs(logger: logging.Logger) -> None:
+    """Wait until the records queued by the logger have been written to the log file."""
+    for handler in logger.handlers:
+        if isinstance(handler, QueueHandler):
+            handler.queue.join()
+
+
+def get_log_file_path(logger: logging.Logger) -> Optional[str]:
+    """Return the path of the log file written by the logger, if any."""
+    for handler in logger.handlers:
+        for file_handler in getattr(getattr(handler, "listener", None), "handlers", []):
+            if isinstance(file_handler, logging.FileHandler):
+                return file_handler.baseFilename
+    return None
+
+
 def setup_logger(
     log_file_path: str = None,
     file_log_level: int = logging.DEBUG,
     console_log_level: int = logging.INFO,
+    file_log_format: str = None,
 ) -> logging.Logger:
     """
     Set up a logger with optional file and console arguments.
@@ -28,6 +215,8 @@ def setup_logger(
         log_file_path (str, optional): Path to the log file. Defaults to $SNAP_COMMON/logs/dss.log.
         file_log_level (int, optional): Logging level for file logs. Defaults to logging.DEBUG.
         console_log_level (int, optional): Logging level for console logs. Defaults to logging.INFO.
+        file_log_format (str, optional): Format of the file logs, `text` or `json` for JSON lines.
+            Defaults to $DSS_LOG_FORMAT, or `text` if it is not set.
 
     Returns:
         logging.Logger: Configured logger.
@@ -36,6 +225,7 @@ def setup_logger(
 
     if not logger.handlers:
         logger.setLevel(min(file_log_level, console_log_level))
+        logger.addFilter(_LogContextFilter())
 
         # Console formatter
         console_formatter = CustomFormatter(
@@ -55,13 +245,30 @@ def setup_logger(
             log_file_path = os.path.join(log_dir, "dss.log")
 
         # File formatter
-        file_formatter = logging.Formatter(
-            "%(asctime)s [%(levelname)s] [%(module)s] [%(funcName)s]: %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
+        if file_log_format is None:
+            file_log_format = os.environ.get(LOG_FORMAT_ENV_VAR, "text")
+        if file_log_format == "json":
+            file_formatter = JsonFormatter()
+        else:
+            file_formatter = logging.Formatter(
+                "%(asctime)s [%(levelname)s] [%(module)s] [%(funcName)s]: %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S",
+            )
+        # The file is written by a background thread, so logging never blocks on file writes
+        # or rotation, and records are written in batches
+        file_handler = ConcurrentRotatingFileHandler(
+            log_file_path, max_bytes=5 * 1024 * 1024, backup_count=5
         )
-        file_handler = RotatingFileHandler(log_file_path, maxBytes=5 * 1024 * 1024, backupCount=5)
         file_handler.setLevel(file_log_level)
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        queue_handler = _ExceptionPreservingQueueHandler(queue.Queue())
+        queue_handler.setLevel(file_log_level)
+        queue_handler.listener = BatchingQueueListener(
+            queue_handler.queue, file_handler, respect_handler_level=True
+        )
+        queue_handler.listener.start()
+        # Write the queued records before exiting
+        atexit.register(queue_handler.listener.stop)
+        logger.addHandler(queue_handler)
 
     return logger
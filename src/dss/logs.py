@@ -1,16 +1,32 @@
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Iterator, Optional, TextIO
+
 from lightkube import Client
 from lightkube.core.exceptions import ApiError
 from lightkube.resources.apps_v1 import Deployment
 from lightkube.resources.core_v1 import Pod
 
-from dss.config import DSS_NAMESPACE, MLFLOW_DEPLOYMENT_NAME
+from dss.config import DSS_NAMESPACE, LIST_PAGE_SIZE, MLFLOW_DEPLOYMENT_NAME
+from dss.log_archive import ARCHIVE_DIR, iter_search_results
 from dss.logger import setup_logger
 
 # Set up logger
 logger = setup_logger()
 
+# Size of the buffer used to write the logs, so large logs are written with few system calls
+LOGS_BUFFER_SIZE = 1024 * 1024
+
 
-def get_logs(parts: str, name: str, lightkube_client: Client) -> None:
+def get_logs(
+    parts: str,
+    name: str,
+    lightkube_client: Client,
+    namespace: str = DSS_NAMESPACE,
+    output_file: Optional[str] = None,
+) -> None:
     """
     Retrieve logs from specified parts of the DSS application.
 
@@ -19,36 +35,52 @@ def get_logs(parts: str, name: str, lightkube_client: Client) -> None:
         name (str): Name of the notebook or deployment to retrieve logs from.
             This parameter is required for 'notebooks' logs but not for 'mlflow' or 'all'.
         lightkube_client (Client): The Kubernetes client.
+        namespace (str): The namespace of the notebooks. MLflow logs are always retrieved from
+            the DSS namespace.
+        output_file (Optional[str]): Write the logs to this file instead of the standard output.
 
     Returns:
         None
     """
+    # Only the namespace and name of each Pod is kept, and objects are listed in pages, so
+    # memory does not grow with the size of the Deployments and Pods
     try:
         if parts == "notebooks":
-            notebook_deployments = list(lightkube_client.list(Deployment, namespace=DSS_NAMESPACE))
+            notebook_deployments = lightkube_client.list(
+                Deployment, namespace=namespace, chunk_size=LIST_PAGE_SIZE
+            )
             for deployment in notebook_deployments:
                 if deployment.metadata.name == name:
                     break
             else:
                 logger.debug(
-                    f"Failed to retrieve logs. Deployment '{name}' does not exist in {DSS_NAMESPACE} namespace."  # noqa E501
+                    f"Failed to retrieve logs. Deployment '{name}' does not exist in {namespace} namespace."  # noqa E501
                 )
                 logger.error(f"Failed to retrieve logs. Notebook '{name}' does not exist.")
                 logger.info("Run 'dss list' to check all notebooks.")
                 raise RuntimeError()
-            pods = lightkube_client.list(
-                Pod, namespace=DSS_NAMESPACE, labels=deployment.spec.selector.matchLabels
-            )
+            pods = [
+                (namespace, pod.metadata.name)
+                for pod in lightkube_client.list(
+                    Pod,
+                    namespace=namespace,
+                    labels=deployment.spec.selector.matchLabels,
+                    chunk_size=LIST_PAGE_SIZE,
+                )
+            ]
         elif parts == "mlflow":
             try:
                 mlflow_deployment = lightkube_client.get(
                     Deployment, name=MLFLOW_DEPLOYMENT_NAME, namespace=DSS_NAMESPACE
                 )
-                pods = lightkube_client.list(
-                    Pod,
-                    namespace=DSS_NAMESPACE,
-                    labels=mlflow_deployment.spec.selector.matchLabels,
-                )
+                pods = [
+                    (DSS_NAMESPACE, pod.metadata.name)
+                    for pod in lightkube_client.list(
+                        Pod,
+                        namespace=DSS_NAMESPACE,
+                        labels=mlflow_deployment.spec.selector.matchLabels,
+                    )
+                ]
             except ApiError as e:
                 logger.debug(f"Failed to retrieve logs for MLflow: {e}", exc_info=True)
                 logger.error(
@@ -60,14 +92,21 @@ def get_logs(parts: str, name: str, lightkube_client: Client) -> None:
                 logger.info("  dss initialize  to install dss")
                 raise RuntimeError()
         elif parts == "all":
-            deployments = list(lightkube_client.list(Deployment, namespace=DSS_NAMESPACE))
             pods = []
-            for deployment in deployments:
-                pods += list(
-                    lightkube_client.list(
-                        Pod, namespace=DSS_NAMESPACE, labels=deployment.spec.selector.matchLabels
-                    )
+            for pods_namespace in dict.fromkeys([namespace, DSS_NAMESPACE]):
+                deployments = lightkube_client.list(
+                    Deployment, namespace=pods_namespace, chunk_size=LIST_PAGE_SIZE
                 )
+                for deployment in deployments:
+                    pods += [
+                        (pods_namespace, pod.metadata.name)
+                        for pod in lightkube_client.list(
+                            Pod,
+                            namespace=pods_namespace,
+                            labels=deployment.spec.selector.matchLabels,
+                            chunk_size=LIST_PAGE_SIZE,
+                        )
+                    ]
     except ApiError as e:
         logger.debug(f"Failed to retrieve logs for {parts} {name}: {e}", exc_info=True)
         logger.error(
@@ -83,19 +122,87 @@ def get_logs(parts: str, name: str, lightkube_client: Client) -> None:
         logger.error(f"Failed to retrieve logs. No pods found for {parts} {name}.")
         raise RuntimeError()
 
-    for pod in pods:
-        # Retrieve logs from the pod
-        logger.info(f"Logs for {pod.metadata.name}:")
-        try:
-            for line in lightkube_client.log(pod.metadata.name, namespace=DSS_NAMESPACE):
-                # Remove the newline character from the end of the log message
-                line = line.rstrip("\n")
-                logger.info(line)
-        except ApiError as e:
-            logger.debug(
-                f"Failed to retrieve logs for pod {pod.metadata.name}: {e}", exc_info=True
-            )
-            logger.error(
-                f"Failed to retrieve logs. There was a problem while getting the logs for {pod.metadata.name}"  # noqa: E501
-            )
-            raise RuntimeError()
+    with _open_output(output_file) as output:
+        for pod_namespace, pod_name in pods:
+            # Retrieve logs from the pod
+            logger.info(f"Logs for {pod_name}:")
+            if output_file:
+                output.write(f"Logs for {pod_name}:\n")
+            try:
+                # The lines are copied as they are, without going through the logger, so large
+                # logs are not formatted line by line nor duplicated into the DSS log file
+                size = 0
+                for line in lightkube_client.log(pod_name, namespace=pod_namespace):
+                    output.write(line)
+                    size += len(line)
+                output.flush()
+                logger.debug(f"Wrote {size} characters of logs for pod {pod_name}.")
+            except ApiError as e:
+                output.flush()
+                logger.debug(f"Failed to retrieve logs for pod {pod_name}: {e}", exc_info=True)
+                logger.error(
+                    f"Failed to retrieve logs. There was a problem while getting the logs for {pod_name}"  # noqa: E501
+                )
+                raise RuntimeError()
+
+
+def search_logs(
+    text: str, since: Optional[timedelta] = None, output_file: Optional[str] = None
+) -> None:
+    """
+    Print the lines of the log archive containing `text`, across all notebooks and MLflow.
+
+    The archive is filled by `dss logs --archive`, so logs of notebooks that were stopped,
+    restarted or removed can be searched.
+
+    Args:
+        text (str): The text to search for.
+        since (Optional[timedelta]): Only show lines logged within this duration.
+        output_file (Optional[str]): Write the matches to this file instead of the standard
+            output.
+    """
+    found = 0
+    try:
+        with _open_output(output_file) as output:
+            for entry in iter_search_results(text, since):
+                output.write(f"{entry.timestamp} {entry.namespace}/{entry.source}: {entry.line}\n")
+                found += 1
+    except sqlite3.Error as e:
+        logger.debug(f"Failed to search the log archive: {e}.", exc_info=True)
+        logger.error(f"Failed to search the log archive in {ARCHIVE_DIR}: {str(e)}.")
+        raise RuntimeError()
+
+    if not found:
+        logger.info(f"No archived logs found containing '{text}'.")
+        logger.info("Note: logs are archived while `dss logs --archive` is running.")
+
+
+@contextmanager
+def _open_output(output_file: Optional[str] = None) -> Iterator[TextIO]:
+    """
+    Open a writer with a large buffer for the logs, to `output_file` or to the standard output.
+
+    The standard output is reopened with a larger buffer when it is a file descriptor, since it
+    is line buffered on a terminal.
+    """
+    if output_file:
+        with open(output_file, "w", buffering=LOGS_BUFFER_SIZE) as output:
+            yield output
+        return
+
+    sys.stdout.flush()
+    try:
+        fileno = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        # The standard output was replaced by an object that is not backed by a file descriptor
+        yield sys.stdout
+        return
+    with open(
+        fileno,
+        "w",
+        buffering=LOGS_BUFFER_SIZE,
+        encoding=sys.stdout.encoding,
+        errors="replace",
+        closefd=False,
+    ) as output:
+        yield output
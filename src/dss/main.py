@@ -1,25 +1,113 @@
+import time
+from datetime import timedelta
+from typing import Optional
+
 import click
 
-from dss.config import DEFAULT_NOTEBOOK_IMAGE, RECOMMENDED_IMAGES_MESSAGE
+from dss.capacity import DEFAULT_PROFILE_CPU, DEFAULT_PROFILE_MEMORY, get_profile
+from dss.config import (
+    DEFAULT_NOTEBOOK_IMAGE,
+    DSS_NAMESPACE,
+    NAMESPACE_REGEX,
+    NOTEBOOK_IMAGES_ALIASES,
+    NOTEBOOK_NAMESPACE_ENV_VAR,
+    RECOMMENDED_IMAGES_MESSAGE,
+)
+from dss.contexts import add_context, list_contexts, use_context
 from dss.create_notebook import create_notebook
+from dss.cull import cull_idle_notebooks, run_culler
+from dss.describe import describe_notebook
+from dss.diagnose import DIAGNOSE_DEADLINE_SECONDS, collect_diagnostics
+from dss.doctor import run_doctor
+from dss.events import get_events
+from dss.gpu_sharing import parse_gpu_sharing
+from dss.history import get_stats
 from dss.initialize import initialize
-from dss.list import list_notebooks
-from dss.logger import setup_logger
-from dss.logs import get_logs
+from dss.list import list_notebooks, list_notebooks_all_contexts
+from dss.log_archive import parse_duration, run_archiver
+from dss.logger import set_log_context, setup_logger
+from dss.logs import get_logs, search_logs
+from dss.proxy import run_proxy
 from dss.purge import purge
 from dss.remove_notebook import remove_notebook
+from dss.resize import resize_notebook
+from dss.resources import get_resource_requirements, get_shm_size
 from dss.start import start_notebook
-from dss.status import get_status
+from dss.status import get_status, get_status_all_contexts
 from dss.stop import stop_notebook
-from dss.utils import KUBECONFIG_DEFAULT, get_lightkube_client, save_kubeconfig
+from dss.utils import (
+    DEFAULT_CONTEXT,
+    KUBECONFIG_DEFAULT,
+    get_current_context,
+    get_kubeconfig_path,
+    get_lightkube_client,
+    save_kubeconfig,
+)
 
 # Set up logger
 logger = setup_logger()
 
 
 @click.group()
-def main():
+@click.pass_context
+def main(ctx: click.Context):
     """Command line interface for managing the DSS application."""
+    # Identify the records of this invocation and log its duration, so latency can be
+    # queried per command from the log file
+    set_log_context(command=ctx.invoked_subcommand)
+    start = time.monotonic()
+    ctx.call_on_close(
+        lambda: logger.debug(
+            f"Command {ctx.invoked_subcommand} finished.",
+            extra={"duration_ms": round((time.monotonic() - start) * 1000)},
+        )
+    )
+
+
+def _validate_gpu_sharing(ctx: click.Context, param: click.Parameter, value: str) -> str:
+    """Validate the --gpu-sharing option."""
+    if value is not None:
+        try:
+            parse_gpu_sharing(value)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+    return value
+
+
+def _parse_warm_pool(ctx: click.Context, param: click.Parameter, value: tuple) -> dict:
+    """Parse the --warm-pool options into a mapping of image alias to number of notebooks."""
+    warm_pool = {}
+    for spec in value:
+        image, _, count = spec.partition(":")
+        if image not in NOTEBOOK_IMAGES_ALIASES:
+            raise click.BadParameter(
+                f"'{image}' is not an image alias, use one of {', '.join(NOTEBOOK_IMAGES_ALIASES)}"
+            )
+        if not count.isdigit() or int(count) < 1:
+            raise click.BadParameter(f"expected ALIAS:N with N a positive integer, got '{spec}'")
+        warm_pool[image] = int(count)
+    return warm_pool
+
+
+def namespace_option(func):
+    """Add the --namespace option, defaulting to $DSS_NOTEBOOK_NAMESPACE or the DSS namespace."""
+    return click.option(
+        "--namespace",
+        envvar=NOTEBOOK_NAMESPACE_ENV_VAR,
+        default=DSS_NAMESPACE,
+        show_default=True,
+        callback=_validate_namespace,
+        help=f"Namespace of the notebooks, so that each user can have their own. Defaults to ${NOTEBOOK_NAMESPACE_ENV_VAR} if set.",  # noqa E501
+    )(func)
+
+
+def _validate_namespace(ctx: click.Context, param: click.Parameter, value: str) -> str:
+    """Validate the --namespace option."""
+    if not NAMESPACE_REGEX.match(value):
+        raise click.BadParameter(
+            f"'{value}' is not a valid namespace, expected lowercase letters, digits and '-'"
+        )
+    return value
 
 
 @main.command(name="initialize")
@@ -27,23 +115,47 @@ def main():
     "--kubeconfig",
     help=f"Content of a Kubernetes config file defining the cluster to use.  The kubeconfig will be saved to {KUBECONFIG_DEFAULT} and overwrite any kubeconfig previously stored there.  Future `dss` commands will reuse this kubeconfig by default.",  # noqa E501
 )
-def initialize_command(kubeconfig: str) -> None:
+@click.option(
+    "--gpu-sharing",
+    callback=_validate_gpu_sharing,
+    help="Share each NVIDIA GPU between notebooks, either with time-slicing (timeslice:N, where N is the number of notebooks per GPU) or with a MIG profile (mig:PROFILE, e.g. mig:all-1g.5gb).",  # noqa E501
+)
+@click.option(
+    "--warm-pool",
+    multiple=True,
+    callback=_parse_warm_pool,
+    help="Keep N ready notebooks of an image alias (ALIAS:N, e.g. pytorch:2) so that `dss create` with that image starts in seconds. Can be repeated.",  # noqa E501
+)
+@namespace_option
+def initialize_command(kubeconfig: str, gpu_sharing: str, warm_pool: dict, namespace: str) -> None:
     """
     Initialize DSS on the given Kubernetes cluster.
     """
     logger.info("Executing initialize command")
 
+    # An explicit kubeconfig is used instead of the one of the current context
+    kubeconfig_path = None
     try:
         if kubeconfig:
-            save_kubeconfig(kubeconfig=kubeconfig)
+            kubeconfig_path = save_kubeconfig(kubeconfig=kubeconfig)
     except Exception as e:
         logger.debug(f"Failed to save kubeconfig: {e}.", exc_info=True)
         logger.error(f"Failed to save kubeconfig: {str(e)}.")
         click.get_current_context().exit(1)
+    if kubeconfig_path and get_kubeconfig_path() != kubeconfig_path:
+        logger.info(
+            f"Note: Other commands use the current context {get_current_context()}. Run "
+            f"`dss context use {DEFAULT_CONTEXT}` for them to use the provided kubeconfig."
+        )
 
     try:
-        lightkube_client = get_lightkube_client()
-        initialize(lightkube_client=lightkube_client)
+        lightkube_client = get_lightkube_client(kubeconfig_path)
+        initialize(
+            lightkube_client=lightkube_client,
+            gpu_sharing=gpu_sharing,
+            warm_pool=warm_pool,
+            namespace=namespace,
+        )
     except RuntimeError:
         click.get_current_context().exit(1)
     except Exception as e:
@@ -59,12 +171,50 @@ Examples
   # To initialize DSS with microk8s's kubeconfig
   dss initialize --kubeconfig "$(microk8s config)"
 
+  # To share each NVIDIA GPU between up to 4 notebooks
+  dss initialize --gpu-sharing=timeslice:4
+
+  # To keep 2 ready pytorch notebooks for fast creation
+  dss initialize --warm-pool=pytorch:2
+
+  # To add a namespace with its own notebooks storage for the user alice
+  dss initialize --namespace=alice
+
 """
 
 
 IMAGE_OPTION_HELP = "\b\nThe image used for the notebook server.\n"
 
 
+def resource_options(func):
+    """Add the --cpu, --memory and --guaranteed options to a command."""
+    func = click.option(
+        "--guaranteed",
+        is_flag=True,
+        default=False,
+        help="Set the limits equal to the requests so the notebook gets the Guaranteed QoS class. Requires --memory and an integer --cpu.",  # noqa E501
+    )(func)
+    func = click.option(
+        "--memory",
+        default=None,
+        help="Memory reserved for the notebook server, e.g. 8Gi.",
+    )(func)
+    func = click.option(
+        "--cpu",
+        default=None,
+        help="CPUs reserved for the notebook server, e.g. 2 or 500m.",
+    )(func)
+    return func
+
+
+def _validate_resources(cpu: str, memory: str, guaranteed: bool) -> None:
+    """Validate the --cpu, --memory and --guaranteed options."""
+    try:
+        get_resource_requirements(cpu, memory, guaranteed)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+
 @main.command(name="create")
 @click.argument(
     "name",
@@ -75,12 +225,40 @@ IMAGE_OPTION_HELP = "\b\nThe image used for the notebook server.\n"
     default=DEFAULT_NOTEBOOK_IMAGE,
     help=IMAGE_OPTION_HELP,
 )
-def create_notebook_command(name: str, image: str) -> None:
+@click.option(
+    "--gpu",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Number of GPUs to assign to the notebook server. By default, a GPU is assigned when the cluster and the image support it. Use 0 to disable GPUs.",  # noqa E501
+)
+@resource_options
+@click.option(
+    "--shm-size",
+    default=None,
+    help="Size of the shared memory (/dev/shm) of the notebook server, used by multi-process data loaders, e.g. 2Gi. Defaults to half of --memory, or unlimited if --memory is not set.",  # noqa E501
+)
+@namespace_option
+def create_notebook_command(
+    name: str,
+    image: str,
+    gpu: int,
+    cpu: str,
+    memory: str,
+    guaranteed: bool,
+    shm_size: str,
+    namespace: str,
+) -> None:
     """Create a Jupyter notebook in DSS and connect it to MLflow. This command also
     outputs the URL to access the notebook on success.
 
     \b
     """
+    set_log_context(notebook=name)
+    _validate_resources(cpu, memory, guaranteed)
+    try:
+        get_shm_size(shm_size, memory)
+    except ValueError as e:
+        raise click.UsageError(str(e))
     logger.info("Executing create command")
     if image == DEFAULT_NOTEBOOK_IMAGE:
         logger.info(
@@ -91,7 +269,17 @@ def create_notebook_command(name: str, image: str) -> None:
     try:
         lightkube_client = get_lightkube_client()
 
-        create_notebook(name=name, image=image, lightkube_client=lightkube_client)
+        create_notebook(
+            name=name,
+            image=image,
+            lightkube_client=lightkube_client,
+            gpu=gpu,
+            cpu=cpu,
+            memory=memory,
+            guaranteed=guaranteed,
+            shm_size=shm_size,
+            namespace=namespace,
+        )
     except RuntimeError:
         click.get_current_context().exit(1)
     except Exception as e:
@@ -104,18 +292,59 @@ create_notebook_command.help += f"""
 Examples
   dss create my-notebook --image=pytorch
   dss create my-notebook --image={DEFAULT_NOTEBOOK_IMAGE}
+  dss create my-notebook --image=pytorch-cuda --gpu=1
+  dss create my-notebook --image=pytorch --cpu=4 --memory=16Gi --guaranteed
+  dss create my-notebook --image=pytorch --memory=16Gi --shm-size=4Gi
 
     \b\n{RECOMMENDED_IMAGES_MESSAGE}
 """
 
 
+def _parse_since(ctx: click.Context, param: click.Parameter, value: str) -> Optional[timedelta]:
+    """Parse the --since duration."""
+    if value is None:
+        return None
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
 @main.command(name="logs")
 @click.argument("notebook_name", required=False)
 @click.option(
     "--all", "print_all", is_flag=True, help="Print the logs for all notebooks and MLflow."
 )
 @click.option("--mlflow", is_flag=True, help="Print the logs for the MLflow deployment.")
-def logs_command(notebook_name: str, print_all: bool, mlflow: bool) -> None:
+@click.option(
+    "-o",
+    "--output",
+    "output_file",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the logs to a file instead of printing them.",
+)
+@click.option(
+    "--archive",
+    is_flag=True,
+    help="Continuously archive the logs of all notebooks and MLflow to ~/.dss/logs.",
+)
+@click.option("--search", help="Search the archived logs for the given text.")
+@click.option(
+    "--since",
+    callback=_parse_since,
+    help="With --search, only show logs from the given duration, e.g. 12h or 7d.",
+)
+@namespace_option
+def logs_command(
+    notebook_name: str,
+    print_all: bool,
+    mlflow: bool,
+    output_file: str,
+    archive: bool,
+    search: str,
+    since: Optional[timedelta],
+    namespace: str,
+) -> None:
     """Prints the logs for the specified notebook or DSS component.
 
     \b
@@ -123,8 +352,19 @@ def logs_command(notebook_name: str, print_all: bool, mlflow: bool) -> None:
       dss logs my-notebook
       dss logs --mlflow
       dss logs --all
+      dss logs my-notebook --output my-notebook.log
+      dss logs --archive
+      dss logs --search 'CUDA out of memory' --since 7d
     """
-    if not notebook_name and not mlflow and not print_all:
+    set_log_context(notebook=notebook_name)
+    if search:
+        try:
+            search_logs(search, since, output_file)
+        except RuntimeError:
+            click.get_current_context().exit(1)
+        return
+
+    if not notebook_name and not mlflow and not print_all and not archive:
         click.echo(
             "Failed to retrieve logs. Missing notebook name. Run the logs command with desired notebook name."  # noqa E501
         )
@@ -133,12 +373,14 @@ def logs_command(notebook_name: str, print_all: bool, mlflow: bool) -> None:
     try:
         lightkube_client = get_lightkube_client()
 
-        if print_all:
-            get_logs("all", None, lightkube_client)
+        if archive:
+            run_archiver(lightkube_client)
+        elif print_all:
+            get_logs("all", None, lightkube_client, namespace, output_file)
         elif mlflow:
-            get_logs("mlflow", None, lightkube_client)
+            get_logs("mlflow", None, lightkube_client, output_file=output_file)
         elif notebook_name:
-            get_logs("notebooks", notebook_name, lightkube_client)
+            get_logs("notebooks", notebook_name, lightkube_client, namespace, output_file)
     except RuntimeError:
         click.get_current_context().exit(1)
     except Exception as e:
@@ -147,13 +389,105 @@ def logs_command(notebook_name: str, print_all: bool, mlflow: bool) -> None:
         click.get_current_context().exit(1)
 
 
+ALL_CONTEXTS_OPTION_HELP = (
+    "Query the clusters of all contexts concurrently and show them in a single table."  # noqa E501
+)
+
+
+@main.command(name="describe")
+@click.argument("name", required=True)
+@click.option(
+    "--timeline",
+    is_flag=True,
+    help="Show how long each phase of the startup of the notebook took.",
+)
+@namespace_option
+def describe_command(name: str, timeline: bool, namespace: str) -> None:
+    """
+    Shows the details of a notebook.
+
+    With --timeline, the startup of the notebook is broken down into scheduling, volume and
+    sandbox setup, image pull, container start and Jupyter boot.
+
+    \b
+    Examples:
+      dss describe my-notebook
+      dss describe my-notebook --timeline
+    """
+    set_log_context(notebook=name)
+    try:
+        lightkube_client = get_lightkube_client()
+
+        describe_notebook(lightkube_client, name, namespace, timeline)
+    except RuntimeError:
+        click.get_current_context().exit(1)
+    except Exception as e:
+        logger.debug(f"Failed to describe notebook: {e}.", exc_info=True)
+        logger.error(f"Failed to describe notebook: {str(e)}.")
+        click.get_current_context().exit(1)
+
+
+@main.command(name="events")
+@click.argument("notebook_name", required=False)
+@click.option("-f", "--follow", is_flag=True, help="Keep printing new events until interrupted.")
+@namespace_option
+def events_command(notebook_name: str, follow: bool, namespace: str) -> None:
+    """
+    Prints the events of the notebooks, such as scheduling failures, image pulls and failed
+    probes.
+
+    \b
+    Examples:
+      dss events
+      dss events my-notebook --follow
+    """
+    set_log_context(notebook=notebook_name)
+    try:
+        lightkube_client = get_lightkube_client()
+
+        get_events(lightkube_client, notebook_name, namespace, follow)
+    except RuntimeError:
+        click.get_current_context().exit(1)
+    except KeyboardInterrupt:
+        logger.info("Stopped following events.")
+    except Exception as e:
+        logger.debug(f"Failed to retrieve events: {e}.", exc_info=True)
+        logger.error(f"Failed to retrieve events: {str(e)}.")
+        click.get_current_context().exit(1)
+
+
 @main.command(name="status")
-def status_command() -> None:
-    """Checks the status of key components within the DSS environment. Verifies if the MLflow deployment is ready and checks if GPU acceleration is enabled on the Kubernetes cluster by examining the labels of Kubernetes nodes for NVIDIA or Intel GPU devices."""  # noqa E501
+@click.option("--all-contexts", default=False, is_flag=True, help=ALL_CONTEXTS_OPTION_HELP)
+@click.option(
+    "--cpu",
+    default=None,
+    help=f"CPUs of the notebooks counted in the headroom. Defaults to {DEFAULT_PROFILE_CPU}.",
+)
+@click.option(
+    "--memory",
+    default=None,
+    help=f"Memory of the notebooks counted in the headroom. Defaults to {DEFAULT_PROFILE_MEMORY}.",
+)
+@click.option(
+    "--gpu",
+    type=click.IntRange(min=0),
+    default=0,
+    help="GPUs of the notebooks counted in the headroom.",
+)
+def status_command(all_contexts: bool, cpu: str, memory: str, gpu: int) -> None:
+    """Checks the status of key components within the DSS environment. Verifies if the MLflow deployment is ready and checks if GPU acceleration is enabled on the Kubernetes cluster by examining the labels of Kubernetes nodes for NVIDIA or Intel GPU devices. Shows the capacity left on the nodes and how many more notebooks of the given size fit."""  # noqa E501
+    try:
+        profile = get_profile(cpu, memory, gpu)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
     try:
+        if all_contexts:
+            get_status_all_contexts()
+            return
         lightkube_client = get_lightkube_client()
 
-        get_status(lightkube_client)
+        get_status(lightkube_client, profile)
     except RuntimeError:
         click.get_current_context().exit(1)
     except Exception as e:
@@ -162,6 +496,94 @@ def status_command() -> None:
         click.get_current_context().exit(1)
 
 
+@main.command(name="doctor")
+@click.option(
+    "--deep",
+    is_flag=True,
+    help="Also verify the recorded install state against the objects in the cluster.",
+)
+def doctor_command(deep: bool) -> None:
+    """
+    Check the DSS installation against the install state recorded by `dss initialize`.
+    """
+    try:
+        lightkube_client = get_lightkube_client()
+
+        run_doctor(lightkube_client, deep)
+    except RuntimeError:
+        click.get_current_context().exit(1)
+    except Exception as e:
+        logger.debug(f"Failed to check the installation: {e}.", exc_info=True)
+        logger.error(f"Failed to check the installation: {str(e)}.")
+        click.get_current_context().exit(1)
+
+
+@main.command(name="diagnose")
+@click.option(
+    "-o",
+    "--output",
+    "output_file",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Path of the tarball. Defaults to dss-diagnose-<timestamp>.tar.gz.",
+)
+@click.option(
+    "--deadline",
+    type=click.IntRange(min=1),
+    default=DIAGNOSE_DEADLINE_SECONDS,
+    show_default=True,
+    help="Seconds after which the tarball is written with what was collected so far.",
+)
+@namespace_option
+def diagnose_command(output_file: str, deadline: int, namespace: str) -> None:
+    """
+    Collect the objects, logs and events of DSS into a tarball to attach to a bug report.
+
+    \b
+    Examples:
+      dss diagnose
+      dss diagnose --output dss-bug.tar.gz
+    """
+    try:
+        lightkube_client = get_lightkube_client()
+
+        collect_diagnostics(lightkube_client, namespace, output_file, deadline)
+    except RuntimeError:
+        click.get_current_context().exit(1)
+    except Exception as e:
+        logger.debug(f"Failed to collect diagnostics: {e}.", exc_info=True)
+        logger.error(f"Failed to collect diagnostics: {str(e)}.")
+        click.get_current_context().exit(1)
+
+
+@main.command(name="stats")
+@click.option(
+    "--since",
+    default="30d",
+    show_default=True,
+    callback=_parse_since,
+    help="Only include the operations from the given duration, e.g. 12h or 7d.",
+)
+def stats_command(since: timedelta) -> None:
+    """
+    Show the duration percentiles of the past creates, starts and stops, per image.
+
+    The creates are broken down into the phases of the notebook startup, such as the image pull.
+
+    \b
+    Examples:
+      dss stats
+      dss stats --since 7d
+    """
+    try:
+        get_stats(since)
+    except RuntimeError:
+        click.get_current_context().exit(1)
+    except Exception as e:
+        logger.debug(f"Failed to show stats: {e}.", exc_info=True)
+        logger.error(f"Failed to show stats: {str(e)}.")
+        click.get_current_context().exit(1)
+
+
 @main.command(name="list")
 @click.option(
     "--wide",
@@ -169,15 +591,26 @@ def status_command() -> None:
     is_flag=True,
     help="Display full information without truncation.",
 )
-def list_command(wide: bool):
+@click.option("--all-contexts", default=False, is_flag=True, help=ALL_CONTEXTS_OPTION_HELP)
+@namespace_option
+@click.option(
+    "--all-namespaces",
+    default=False,
+    is_flag=True,
+    help="List the notebooks of every namespace, with a Namespace column.",
+)
+def list_command(wide: bool, all_contexts: bool, namespace: str, all_namespaces: bool):
     """
     Lists all created notebooks in the DSS environment.
 
     The output is truncated to 80 characters. Use the --wide flag to display full information.
     """
     try:
+        if all_contexts:
+            list_notebooks_all_contexts(wide, namespace, all_namespaces)
+            return
         lightkube_client = get_lightkube_client()
-        list_notebooks(lightkube_client, wide)
+        list_notebooks(lightkube_client, wide, namespace, all_namespaces)
     except RuntimeError:
         click.get_current_context().exit(1)
     except Exception as e:
@@ -188,16 +621,27 @@ def list_command(wide: bool):
 
 @main.command(name="stop")
 @click.argument("notebook_name", required=True)
-def stop_notebook_command(notebook_name: str):
+@click.option(
+    "--wait/--no-wait",
+    default=True,
+    show_default=True,
+    help="Wait for the notebook Pod to be deleted, and record how long it took.",
+)
+@namespace_option
+def stop_notebook_command(notebook_name: str, wait: bool, namespace: str):
     """
     Stops a running notebook in the DSS environment.
     \b
-    Example:
+    Examples:
         dss stop my-notebook
+        dss stop my-notebook --no-wait
     """
+    set_log_context(notebook=notebook_name)
     try:
         lightkube_client = get_lightkube_client()
-        stop_notebook(name=notebook_name, lightkube_client=lightkube_client)
+        stop_notebook(
+            name=notebook_name, lightkube_client=lightkube_client, namespace=namespace, wait=wait
+        )
     except RuntimeError:
         click.get_current_context().exit(1)
     except Exception as e:
@@ -211,18 +655,29 @@ def stop_notebook_command(notebook_name: str):
     "name",
     required=True,
 )
-def start_notebook_command(name: str):
+@click.option(
+    "--wait/--no-wait",
+    default=True,
+    show_default=True,
+    help="Wait for the notebook to be ready, and record how long it took.",
+)
+@namespace_option
+def start_notebook_command(name: str, wait: bool, namespace: str):
     """
     Starts a stopped notebook in the DSS environment.
     \b
-    Example:
+    Examples:
         dss start my-notebook
+        dss start my-notebook --no-wait
     """
+    set_log_context(notebook=name)
     logger.info("Executing start command")
 
     try:
         lightkube_client = get_lightkube_client()
-        start_notebook(name=name, lightkube_client=lightkube_client)
+        start_notebook(
+            name=name, lightkube_client=lightkube_client, namespace=namespace, wait=wait
+        )
     except RuntimeError:
         click.get_current_context().exit(1)
     except Exception as e:
@@ -232,21 +687,69 @@ def start_notebook_command(name: str):
         click.get_current_context().exit(1)
 
 
+@main.command(name="resize")
+@click.argument(
+    "name",
+    required=True,
+)
+@resource_options
+@click.option(
+    "--shm-size",
+    default=None,
+    help="Size of the shared memory (/dev/shm) of the notebook server, e.g. 2Gi. By default, the current size is kept, unless it is the default half of the memory, which follows --memory.",  # noqa E501
+)
+@namespace_option
+def resize_notebook_command(
+    name: str, cpu: str, memory: str, guaranteed: bool, shm_size: str, namespace: str
+):
+    """
+    Changes the CPU, memory and shared memory of an existing notebook in the DSS environment.
+    The notebook is restarted to apply the change.
+    \b
+    Examples:
+        dss resize my-notebook --cpu=4 --memory=16Gi --guaranteed
+        dss resize my-notebook --shm-size=4Gi
+    """
+    set_log_context(notebook=name)
+    _validate_resources(cpu, memory, guaranteed)
+    logger.info("Executing resize command")
+
+    try:
+        lightkube_client = get_lightkube_client()
+        resize_notebook(
+            name=name,
+            lightkube_client=lightkube_client,
+            cpu=cpu,
+            memory=memory,
+            guaranteed=guaranteed,
+            namespace=namespace,
+            shm_size=shm_size,
+        )
+    except RuntimeError:
+        click.get_current_context().exit(1)
+    except Exception as e:
+        logger.debug(f"Failed to resize notebook: {e}.", exc_info=True)
+        logger.error(f"Failed to resize notebook: {str(e)}.")
+        click.get_current_context().exit(1)
+
+
 @main.command(name="remove")
 @click.argument(
     "name",
     required=True,
 )
-def remove_notebook_command(name: str):
+@namespace_option
+def remove_notebook_command(name: str, namespace: str):
     """
     Remove a Jupter Notebook in DSS with the name NAME.
     """
+    set_log_context(notebook=name)
     logger.info("Executing remove command")
 
     try:
         lightkube_client = get_lightkube_client()
 
-        remove_notebook(name=name, lightkube_client=lightkube_client)
+        remove_notebook(name=name, lightkube_client=lightkube_client, namespace=namespace)
     except RuntimeError:
         click.get_current_context().exit(1)
     except Exception as e:
@@ -255,6 +758,139 @@ def remove_notebook_command(name: str):
         click.get_current_context().exit(1)
 
 
+@main.command(name="cull")
+@click.option(
+    "--idle-timeout",
+    type=click.IntRange(min=1),
+    default=60,
+    show_default=True,
+    help="Minutes without Jupyter activity after which a notebook is stopped.",
+)
+@click.option(
+    "--interval",
+    type=click.IntRange(min=1),
+    default=300,
+    show_default=True,
+    help="Seconds between checks for idle notebooks.",
+)
+@click.option("--once", is_flag=True, help="Check for idle notebooks once and exit.")
+@namespace_option
+def cull_command(idle_timeout: int, interval: int, once: bool, namespace: str):
+    """
+    Stops notebooks that have been idle for a while, releasing their GPUs and memory.
+    Notebooks are checked periodically until interrupted, unless --once is given.
+    \b
+    Examples:
+        dss cull --idle-timeout=30
+        dss cull --once
+    """
+    try:
+        lightkube_client = get_lightkube_client()
+        if once:
+            culled = cull_idle_notebooks(lightkube_client, idle_timeout * 60, namespace)
+            if not culled:
+                logger.info("No idle notebooks found.")
+        else:
+            run_culler(lightkube_client, idle_timeout * 60, interval, namespace)
+    except RuntimeError:
+        click.get_current_context().exit(1)
+    except KeyboardInterrupt:
+        logger.info("Stopped checking for idle notebooks.")
+    except Exception as e:
+        logger.debug(f"Failed to stop idle notebooks: {e}.", exc_info=True)
+        logger.error(f"Failed to stop idle notebooks: {str(e)}.")
+        click.get_current_context().exit(1)
+
+
+@main.command(name="proxy")
+@click.argument("names", nargs=-1)
+@click.option(
+    "--port",
+    type=click.IntRange(min=1, max=65535),
+    default=8888,
+    show_default=True,
+    help="First local port to serve notebooks on. Notebooks get consecutive ports.",
+)
+@click.option(
+    "--address",
+    default="127.0.0.1",
+    show_default=True,
+    help="Local address to serve notebooks on.",
+)
+@namespace_option
+def proxy_command(names: tuple, port: int, address: str, namespace: str):
+    """
+    Serves notebooks on local ports and starts stopped notebooks when they are accessed.
+    Serves all notebooks unless NAMES are given. Combined with `dss cull`, this keeps GPUs free
+    without having to run `dss start`.
+    \b
+    Examples:
+        dss proxy
+        dss proxy my-notebook --port=9000
+    """
+    try:
+        lightkube_client = get_lightkube_client()
+        run_proxy(lightkube_client, list(names), port=port, address=address, namespace=namespace)
+    except RuntimeError:
+        click.get_current_context().exit(1)
+    except KeyboardInterrupt:
+        logger.info("Stopped serving notebooks.")
+    except Exception as e:
+        logger.debug(f"Failed to serve notebooks: {e}.", exc_info=True)
+        logger.error(f"Failed to serve notebooks: {str(e)}.")
+        click.get_current_context().exit(1)
+
+
+@main.group(name="context")
+def context_group():
+    """
+    Manages the named clusters that DSS commands can run against.
+
+    \b
+    Examples:
+        dss context add workstation-2 --kubeconfig "$(cat ~/workstation-2.yaml)"
+        dss context use workstation-2
+        dss list --all-contexts
+    """
+
+
+@context_group.command(name="add")
+@click.argument("name", required=True)
+@click.option(
+    "--kubeconfig",
+    required=True,
+    help="Content of a Kubernetes config file defining the cluster of the context.",
+)
+def context_add_command(name: str, kubeconfig: str):
+    """Stores the kubeconfig of a cluster under the context NAME."""
+    try:
+        add_context(name, kubeconfig)
+    except ValueError as e:
+        logger.error(f"Failed to add context: {e}.")
+        click.get_current_context().exit(1)
+    except Exception as e:
+        logger.debug(f"Failed to add context: {e}.", exc_info=True)
+        logger.error(f"Failed to add context: {str(e)}.")
+        click.get_current_context().exit(1)
+
+
+@context_group.command(name="use")
+@click.argument("name", required=True)
+def context_use_command(name: str):
+    """Selects the context NAME for the following DSS commands."""
+    try:
+        use_context(name)
+    except ValueError as e:
+        logger.error(f"Failed to use context: {e}.")
+        click.get_current_context().exit(1)
+
+
+@context_group.command(name="list")
+def context_list_command():
+    """Lists the contexts, marking the current one with *."""
+    list_contexts()
+
+
 @main.command(name="purge")
 def purge_command() -> None:
     """
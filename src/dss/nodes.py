@@ -0,0 +1,112 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from lightkube import Client
+from lightkube.resources.core_v1 import Node
+
+from dss.config import LIST_PAGE_SIZE, NVIDIA_GPU_RESOURCE
+from dss.resources import parse_memory_quantity
+
+# Labels set on the nodes by the NVIDIA GPU operator and the Intel device plugins operator
+NVIDIA_NODE_LABELS = (
+    "nvidia.com/gpu.present",
+    "nvidia.com/gpu.deploy.container-toolkit",
+    "nvidia.com/gpu.deploy.device-plugin",
+)
+INTEL_NODE_LABEL = "intel.feature.node.kubernetes.io/gpu"
+
+
+@dataclass
+class NodeInfo:
+    """Scheduling-relevant information about a Kubernetes Node."""
+
+    name: str
+    labels: Dict[str, str] = field(default_factory=dict)
+    allocatable: Dict[str, str] = field(default_factory=dict)
+    images: Set[str] = field(default_factory=set)
+
+    @property
+    def nvidia_enabled(self) -> bool:
+        """True if the node has the labels set by the NVIDIA GPU operator."""
+        return all(label in self.labels for label in NVIDIA_NODE_LABELS)
+
+    @property
+    def intel_enabled(self) -> bool:
+        """True if the node has the Intel GPU label."""
+        return INTEL_NODE_LABEL in self.labels
+
+    @property
+    def gpu_product(self) -> str:
+        """The NVIDIA GPU product name of the node."""
+        return self.labels.get("nvidia.com/gpu.product", "NVIDIA GPU")
+
+    def get_allocatable_gpus(self, gpu_resource: str = NVIDIA_GPU_RESOURCE) -> int:
+        """Return the number of allocatable GPUs of the given resource, e.g. `nvidia.com/gpu`."""
+        return int(self.allocatable.get(gpu_resource, 0))
+
+    def get_allocatable_memory(self) -> int:
+        """Return the allocatable memory of the node in bytes."""
+        return parse_memory_quantity(self.allocatable.get("memory", "0"))
+
+    def has_image(self, image: str) -> bool:
+        """Return True if the image is already present in the node's image cache."""
+        return any(name == image or name.endswith(f"/{image}") for name in self.images)
+
+
+def get_node_inventory(lightkube_client: Client) -> List[NodeInfo]:
+    """
+    Return the labels, allocatable resources and cached images of every node in the cluster.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+    """
+    nodes = []
+    for node in lightkube_client.list(Node, chunk_size=LIST_PAGE_SIZE):
+        status = node.status
+        images = set()
+        for image in status.images if status and status.images else []:
+            images.update(image.names or [])
+        nodes.append(
+            NodeInfo(
+                name=node.metadata.name,
+                labels=node.metadata.labels or {},
+                allocatable=(status.allocatable if status and status.allocatable else {}),
+                images=images,
+            )
+        )
+    return nodes
+
+
+def select_node(
+    nodes: List[NodeInfo],
+    image: str,
+    gpu_resource: Optional[str] = None,
+    gpu_count: int = 1,
+) -> Optional[NodeInfo]:
+    """
+    Return the best node for a notebook, or None if no node can run it.
+
+    Only nodes with enough allocatable GPUs of the requested resource are considered. Nodes
+    that already have the image are preferred, then nodes with more GPUs and memory.
+
+    Args:
+        nodes (List[NodeInfo]): The node inventory.
+        image (str): The notebook image.
+        gpu_resource (Optional[str]): The GPU resource requested, if any.
+        gpu_count (int): The number of GPUs requested.
+    """
+    candidates = [
+        node
+        for node in nodes
+        if not gpu_resource or node.get_allocatable_gpus(gpu_resource) >= gpu_count
+    ]
+    if not candidates:
+        return None
+    return max(
+        candidates,
+        key=lambda node: (
+            node.has_image(image),
+            node.get_allocatable_gpus(gpu_resource) if gpu_resource else 0,
+            node.get_allocatable_memory(),
+        ),
+    )
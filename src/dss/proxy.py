@@ -0,0 +1,247 @@
+import select
+import socket
+import socketserver
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import lightkube
+from lightkube import Client
+from lightkube.core.exceptions import ApiError
+from lightkube.models.autoscaling_v1 import ScaleSpec
+from lightkube.models.meta_v1 import ObjectMeta
+from lightkube.resources.apps_v1 import Deployment
+from lightkube.resources.core_v1 import Service
+
+from dss.config import DSS_NAMESPACE, LIST_PAGE_SIZE, NOTEBOOK_LABEL
+from dss.logger import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+# Time to wait for a stopped notebook to become available before dropping the connection
+ACTIVATION_TIMEOUT_SECONDS = 600
+# Interval between checks of whether a starting notebook is available
+ACTIVATION_POLL_INTERVAL_SECONDS = 2
+# Time to wait for the notebook Service to accept a connection
+UPSTREAM_CONNECT_TIMEOUT_SECONDS = 10
+# Size of the buffer used to forward traffic
+PROXY_BUFFER_SIZE = 64 * 1024
+
+
+def _is_available(deployment: Deployment) -> bool:
+    """Return True if the Deployment has at least one available replica."""
+    return bool(deployment.status and deployment.status.availableReplicas)
+
+
+def wait_for_deployment_available(
+    lightkube_client: Client,
+    name: str,
+    namespace: str,
+    timeout_seconds: float = ACTIVATION_TIMEOUT_SECONDS,
+    interval_seconds: float = ACTIVATION_POLL_INTERVAL_SECONDS,
+) -> None:
+    """
+    Wait for a Deployment to have an available replica.
+
+    The Deployment is polled rather than watched, since a watch without events blocks past any
+    deadline and the activation lock would be held forever.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        name (str): The name of the Deployment.
+        namespace (str): The namespace of the Deployment.
+        timeout_seconds (float): Timeout in seconds.
+        interval_seconds (float): Interval between checks in seconds.
+
+    Raises:
+        TimeoutError: If the Deployment is not available before the timeout.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        deployment = lightkube_client.get(Deployment, name=name, namespace=namespace)
+        if _is_available(deployment):
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Timeout waiting for notebook {name} to be available")
+        time.sleep(min(interval_seconds, remaining))
+
+
+class NotebookProxy:
+    """Activates a notebook on demand and resolves the address of its Service."""
+
+    def __init__(self, name: str, lightkube_client: Client, namespace: str = DSS_NAMESPACE):
+        self.name = name
+        self.namespace = namespace
+        self.lightkube_client = lightkube_client
+        self._lock = threading.Lock()
+        # Address of the Service once the notebook is known to be available
+        self._address: Optional[Tuple[str, int]] = None
+
+    def activate(self) -> Tuple[str, int]:
+        """
+        Start the notebook if it is scaled to zero, wait for it to be available and return the
+        address of its Service.
+
+        Concurrent connections share a single activation. Once the notebook is available, its
+        address is cached so the next connections skip the lock and the API calls, until
+        `invalidate` is called.
+
+        Raises:
+            RuntimeError: If the notebook does not exist or cannot be started.
+            TimeoutError: If the notebook does not become available in time.
+        """
+        address = self._address
+        if address:
+            return address
+        with self._lock:
+            if self._address:
+                return self._address
+            try:
+                deployment = self.lightkube_client.get(
+                    Deployment, name=self.name, namespace=self.namespace
+                )
+                if not _is_available(deployment):
+                    if not deployment.spec.replicas:
+                        logger.info(f"Starting notebook {self.name} on first access.")
+                        self.lightkube_client.replace(
+                            Deployment.Scale(
+                                metadata=ObjectMeta(name=self.name, namespace=self.namespace),
+                                spec=ScaleSpec(replicas=1),
+                            )
+                        )
+                    wait_for_deployment_available(self.lightkube_client, self.name, self.namespace)
+                    logger.info(f"Notebook {self.name} is available.")
+                service = self.lightkube_client.get(
+                    Service, name=self.name, namespace=self.namespace
+                )
+            except ApiError as e:
+                logger.debug(f"Failed to activate notebook {self.name}: {e}.", exc_info=True)
+                logger.error(f"Failed to activate notebook {self.name}.")
+                raise RuntimeError()
+            self._address = (service.spec.clusterIP, service.spec.ports[0].port)
+            return self._address
+
+    def invalidate(self) -> None:
+        """Forget the cached address, e.g. after the notebook was stopped."""
+        self._address = None
+
+    def connect(self) -> socket.socket:
+        """
+        Activate the notebook and connect to its Service. If the cached address no longer
+        accepts connections, the notebook is activated again once.
+
+        Raises:
+            RuntimeError: If the notebook does not exist or cannot be started.
+            TimeoutError: If the notebook does not become available in time.
+            OSError: If the Service does not accept the connection.
+        """
+        address = self.activate()
+        try:
+            return self._connect(address)
+        except OSError as e:
+            logger.debug(f"Failed to connect to notebook {self.name}, activating it again: {e}.")
+            self.invalidate()
+            return self._connect(self.activate())
+
+    @staticmethod
+    def _connect(address: Tuple[str, int]) -> socket.socket:
+        """Connect to an address, and leave the socket blocking for the forwarding."""
+        upstream_socket = socket.create_connection(
+            address, timeout=UPSTREAM_CONNECT_TIMEOUT_SECONDS
+        )
+        upstream_socket.settimeout(None)
+        return upstream_socket
+
+
+def _forward(client_socket: socket.socket, upstream_socket: socket.socket) -> None:
+    """Forward traffic in both directions until one of the sockets is closed."""
+    sockets = [client_socket, upstream_socket]
+    while True:
+        readable, _, _ = select.select(sockets, [], [])
+        for sock in readable:
+            data = sock.recv(PROXY_BUFFER_SIZE)
+            if not data:
+                return
+            target = upstream_socket if sock is client_socket else client_socket
+            target.sendall(data)
+
+
+class _NotebookProxyHandler(socketserver.BaseRequestHandler):
+    """Handles a client connection by activating the notebook and forwarding the traffic."""
+
+    def handle(self):
+        notebook_proxy = self.server.notebook_proxy
+        try:
+            upstream_socket = notebook_proxy.connect()
+        except (RuntimeError, OSError) as e:
+            logger.debug(f"Dropping connection to notebook {notebook_proxy.name}: {e}.")
+            return
+        with upstream_socket:
+            _forward(self.request, upstream_socket)
+
+
+class _ProxyServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address: Tuple[str, int], notebook_proxy: NotebookProxy):
+        super().__init__(server_address, _NotebookProxyHandler)
+        self.notebook_proxy = notebook_proxy
+
+
+def run_proxy(
+    lightkube_client: Client,
+    names: Optional[List[str]] = None,
+    port: int = 8888,
+    address: str = "127.0.0.1",
+    namespace: str = DSS_NAMESPACE,
+) -> None:
+    """
+    Serve each notebook on a local port, starting stopped notebooks when they are accessed.
+
+    Notebooks are given consecutive ports starting at `port`. The first connection to a
+    stopped notebook is held until the notebook is scaled up and available, and then forwarded.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        names (Optional[List[str]]): The notebooks to serve. Defaults to all notebooks.
+        port (int): The first local port to listen on.
+        address (str): The local address to listen on.
+        namespace (str): The namespace of the notebooks.
+    """
+    if not names:
+        try:
+            names = [
+                deployment.metadata.name
+                for deployment in lightkube_client.list(
+                    Deployment,
+                    namespace=namespace,
+                    labels={NOTEBOOK_LABEL: lightkube.operators.exists()},
+                    chunk_size=LIST_PAGE_SIZE,
+                )
+            ]
+        except ApiError as e:
+            logger.debug(f"Failed to list notebooks: {e}.", exc_info=True)
+            logger.error(f"Failed to list notebooks: {str(e)}.")
+            raise RuntimeError()
+    if not names:
+        logger.info("No notebooks found.")
+        return
+
+    servers = []
+    try:
+        for offset, name in enumerate(names):
+            server = _ProxyServer(
+                (address, port + offset), NotebookProxy(name, lightkube_client, namespace)
+            )
+            servers.append(server)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            logger.info(f"Notebook {name} available at http://{address}:{port + offset}")
+        logger.info("Press Ctrl+C to exit.")
+        threading.Event().wait()
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
@@ -12,7 +12,8 @@ logger = setup_logger()
 def purge(lightkube_client: Client) -> None:
     """
     Removes all notebooks and DSS components. This is done by removing the
-    `dss` namespace, and thus all resources living in that namespace.
+    `dss` namespace and the tenant namespaces created by `dss initialize --namespace`,
+    and thus all resources living in those namespaces.
 
     Args:
         lightkube_client (Client): The Kubernetes client.
@@ -26,9 +27,18 @@ def purge(lightkube_client: Client) -> None:
         raise RuntimeError()
     else:
         try:
-            lightkube_client.delete(Namespace, DSS_NAMESPACE)
+            namespaces = [DSS_NAMESPACE] + [
+                namespace.metadata.name
+                for namespace in lightkube_client.list(
+                    Namespace, labels={"app.kubernetes.io/part-of": "dss"}
+                )
+                if namespace.metadata.name != DSS_NAMESPACE
+            ]
+            for namespace in namespaces:
+                lightkube_client.delete(Namespace, namespace)
             # need to wait on namespace deletion to be completed
-            wait_for_namespace_to_be_deleted(lightkube_client, DSS_NAMESPACE)
+            for namespace in namespaces:
+                wait_for_namespace_to_be_deleted(lightkube_client, namespace)
             logger.info(
                 "Success: All DSS components and notebooks purged successfully from the Kubernetes cluster."  # noqa E501
             )
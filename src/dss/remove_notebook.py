@@ -5,13 +5,12 @@ from lightkube.resources.core_v1 import Service
 
 from dss.config import DSS_NAMESPACE
 from dss.logger import setup_logger
-from dss.utils import does_notebook_exist
 
 # Set up logger
 logger = setup_logger()
 
 
-def remove_notebook(name: str, lightkube_client: Client) -> None:
+def remove_notebook(name: str, lightkube_client: Client, namespace: str = DSS_NAMESPACE) -> None:
     """
     Removes the Notebook of name `name` from the Kubernetes cluster.
 
@@ -20,34 +19,36 @@ def remove_notebook(name: str, lightkube_client: Client) -> None:
     Args:
         name (str): The name of the notebook server.
         lightkube_client (Client): The Kubernetes client.
+        namespace (str): The namespace of the notebook server. Defaults to DSS_NAMESPACE.
     """
 
-    if not does_notebook_exist(
-        name=name, namespace=DSS_NAMESPACE, lightkube_client=lightkube_client
-    ):
-        logger.debug(f"Failed to remove Notebook. Notebook {name} does not exist.")
-        logger.error(f"Failed to remove Notebook. Notebook {name} does not exist.")  # noqa E501
-        logger.info("Run 'dss list' to check all notebooks.")
-        raise RuntimeError()
-
-    # From this point forward we know either one or both
-    # resources (Deployment, Service) exist for the Notebook.
+    # The resources are deleted without checking first that the notebook exists, a missing
+    # notebook is reported when every delete returns 404
     exceptions = []
+    missing = []
     notebook_resources = [Deployment, Service]
     for resource in notebook_resources:
         try:
-            lightkube_client.delete(res=resource, name=name, namespace=DSS_NAMESPACE)
+            lightkube_client.delete(res=resource, name=name, namespace=namespace)
         except ApiError as err:
             if err.status.code == 404:
-                logger.warn(
-                    f"Failed to remove {resource.__name__} {name}. {resource.__name__} {name} does not exist. Ignoring."  # noqa E501
-                )
+                missing.append(resource)
             else:
                 logger.debug(
                     f"Failed to delete {resource.__name__} for notebook {name}, with error: {err}"
                 )
                 exceptions.append(err)
 
+    if len(missing) == len(notebook_resources):
+        logger.debug(f"Failed to remove Notebook. Notebook {name} does not exist.")
+        logger.error(f"Failed to remove Notebook. Notebook {name} does not exist.")  # noqa E501
+        logger.info("Run 'dss list' to check all notebooks.")
+        raise RuntimeError()
+    for resource in missing:
+        logger.warn(
+            f"Failed to remove {resource.__name__} {name}. {resource.__name__} {name} does not exist. Ignoring."  # noqa E501
+        )
+
     if exceptions:
         logger.debug(f"Failed to remove notebook {name}: {exceptions}")
         logger.error(f"Failed to remove notebook {name}. Please try again.")
@@ -0,0 +1,151 @@
+from typing import Optional
+
+from lightkube import Client
+from lightkube.core.exceptions import ApiError
+from lightkube.resources.apps_v1 import Deployment
+from lightkube.types import PatchType
+
+from dss.config import DSS_NAMESPACE, SHM_VOLUME_NAME
+from dss.logger import setup_logger
+from dss.resources import get_resource_requirements, get_shm_size, parse_memory_quantity
+
+# Set up logger
+logger = setup_logger()
+
+
+def resize_notebook(
+    name: str,
+    lightkube_client: Client,
+    cpu: Optional[str] = None,
+    memory: Optional[str] = None,
+    guaranteed: bool = False,
+    namespace: str = DSS_NAMESPACE,
+    shm_size: Optional[str] = None,
+) -> None:
+    """
+    Change the CPU and memory of an existing Notebook server by patching its Deployment.
+
+    GPU limits are preserved. Without `guaranteed`, any CPU and memory limits are removed so the
+    notebook can burst above its requests. The shared memory volume is resized to `shm_size` if
+    given. Otherwise, when the memory changes, it is resized to half of the new memory only if it
+    had the default size of `dss create`, so a size given with `--shm-size` at creation is kept.
+    Patching the Deployment restarts the notebook server.
+
+    Args:
+        name (str): The name of the notebook server.
+        lightkube_client (Client): The Kubernetes client.
+        cpu (Optional[str]): CPU quantity to request, e.g. `2` or `500m`.
+        memory (Optional[str]): Memory quantity to request, e.g. `8Gi`.
+        guaranteed (bool): Whether to set the limits equal to the requests.
+        namespace (str): The namespace of the notebook server. Defaults to DSS_NAMESPACE.
+        shm_size (Optional[str]): Size of the shared memory volume, e.g. `2Gi`.
+    """
+    try:
+        requests, limits = get_resource_requirements(cpu, memory, guaranteed)
+        # Validates the shared memory size before any request, it is computed once the current
+        # resources are known
+        get_shm_size(shm_size, memory)
+    except ValueError as e:
+        logger.debug(f"Failed to resize notebook {name}. Invalid resources: {e}.")
+        logger.error(f"Failed to resize notebook {name}: {e}.")
+        raise RuntimeError()
+    if not requests and shm_size is None:
+        logger.error(
+            f"Failed to resize notebook {name}. Specify --cpu, --memory and/or --shm-size."
+        )
+        raise RuntimeError()
+
+    try:
+        deployment = lightkube_client.get(Deployment, name=name, namespace=namespace)
+    except ApiError as e:
+        if e.status.code == 404:
+            logger.debug(f"Failed to resize notebook. Notebook {name} does not exist.")
+            logger.error(f"Failed to resize notebook. Notebook {name} does not exist.")
+            logger.info("Run 'dss list' to check all notebooks.")
+        else:
+            logger.debug(f"Failed to get Deployment {name}: {e}.", exc_info=True)
+            logger.error(f"Failed to resize notebook {name}.")
+        raise RuntimeError()
+
+    current = deployment.spec.template.spec.containers[0].resources
+    new_requests = dict(current.requests or {}) if current else {}
+    new_requests.update(requests)
+    new_limits = {
+        resource: quantity
+        for resource, quantity in ((current.limits or {}) if current else {}).items()
+        if resource not in ("cpu", "memory")
+    }
+    new_limits.update(limits)
+
+    resources = {"requests": new_requests}
+    if new_limits:
+        resources["limits"] = new_limits
+    patch = [
+        {"op": "add", "path": "/spec/template/spec/containers/0/resources", "value": resources}
+    ]
+    for index, volume in enumerate(deployment.spec.template.spec.volumes or []):
+        if volume.name != SHM_VOLUME_NAME or not volume.emptyDir:
+            continue
+        current_memory = (current.requests or {}).get("memory") if current else None
+        try:
+            new_shm_size = _get_new_shm_size(
+                volume.emptyDir.sizeLimit, current_memory, memory, shm_size
+            )
+        except ValueError as e:
+            logger.debug(f"Failed to resize notebook {name}. Invalid shared memory: {e}.")
+            logger.error(f"Failed to resize notebook {name}: {e}.")
+            raise RuntimeError()
+        if new_shm_size:
+            patch.append(
+                {
+                    "op": "add",
+                    "path": f"/spec/template/spec/volumes/{index}/emptyDir/sizeLimit",
+                    "value": new_shm_size,
+                }
+            )
+
+    try:
+        lightkube_client.patch(
+            Deployment, name, patch, namespace=namespace, patch_type=PatchType.JSON
+        )
+    except ApiError as e:
+        logger.debug(f"Failed to patch Deployment {name}: {e}.", exc_info=True)
+        logger.error(f"Failed to resize notebook {name}.")
+        raise RuntimeError()
+
+    logger.info(
+        f"Resizing the notebook {name}. The notebook will restart, check `dss list` for its status."
+    )
+
+
+def _get_new_shm_size(
+    current_size: Optional[str],
+    current_memory: Optional[str],
+    memory: Optional[str],
+    shm_size: Optional[str],
+) -> Optional[str]:
+    """
+    Return the new size limit of the shared memory volume, or None to keep the current one.
+
+    Without `shm_size`, the size is only derived from the new memory if it was derived from the
+    current memory, or unlimited.
+
+    Raises:
+        ValueError: If a quantity is invalid, or if the shared memory exceeds the memory.
+    """
+    if shm_size is not None:
+        return get_shm_size(shm_size, memory or current_memory)
+    if memory is None:
+        return None
+    if current_size is None or (
+        current_memory is not None
+        and parse_memory_quantity(str(current_size))
+        == parse_memory_quantity(get_shm_size(memory=current_memory))
+    ):
+        return get_shm_size(memory=memory)
+    if parse_memory_quantity(str(current_size)) > parse_memory_quantity(memory):
+        raise ValueError(
+            f"the shared memory size {current_size} is larger than --memory {memory}, "
+            "set a smaller one with --shm-size"
+        )
+    return None
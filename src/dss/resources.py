@@ -0,0 +1,126 @@
+import re
+from typing import Optional, Tuple
+
+# Multipliers for the suffixes allowed in Kubernetes memory quantities
+MEMORY_SUFFIXES = {
+    "": 1,
+    "k": 10**3,
+    "K": 10**3,
+    "M": 10**6,
+    "G": 10**9,
+    "T": 10**12,
+    "P": 10**15,
+    "E": 10**18,
+    "Ki": 2**10,
+    "Mi": 2**20,
+    "Gi": 2**30,
+    "Ti": 2**40,
+    "Pi": 2**50,
+    "Ei": 2**60,
+}
+
+CPU_QUANTITY_REGEX = re.compile(r"^(\d+(?:\.\d+)?)(m?)$")
+MEMORY_QUANTITY_REGEX = re.compile(r"^(\d+(?:\.\d+)?)(Ki|Mi|Gi|Ti|Pi|Ei|k|K|M|G|T|P|E)?$")
+
+
+def parse_cpu_quantity(quantity: str) -> float:
+    """
+    Parse a Kubernetes CPU quantity, e.g. `2`, `1.5` or `500m`, into a number of cores.
+
+    Raises:
+        ValueError: If the quantity is not a valid CPU quantity.
+    """
+    match = CPU_QUANTITY_REGEX.match(str(quantity).strip())
+    if not match:
+        raise ValueError(f"invalid CPU quantity '{quantity}', expected e.g. 2, 1.5 or 500m")
+    value = float(match.group(1))
+    return value / 1000 if match.group(2) else value
+
+
+def parse_memory_quantity(quantity: str) -> int:
+    """
+    Parse a Kubernetes memory quantity, e.g. `8Gi` or `512M`, into a number of bytes.
+
+    Raises:
+        ValueError: If the quantity is not a valid memory quantity.
+    """
+    match = MEMORY_QUANTITY_REGEX.match(str(quantity).strip())
+    if not match:
+        raise ValueError(f"invalid memory quantity '{quantity}', expected e.g. 8Gi or 512Mi")
+    return int(float(match.group(1)) * MEMORY_SUFFIXES[match.group(2) or ""])
+
+
+def get_resource_requirements(
+    cpu: Optional[str] = None, memory: Optional[str] = None, guaranteed: bool = False
+) -> Tuple[dict, dict]:
+    """
+    Return the CPU and memory requests and limits for a notebook container.
+
+    By default the given values are only requested, so the notebook is scheduled with that
+    capacity reserved and can burst above it. With `guaranteed`, limits are set equal to the
+    requests, which gives the Pod the Guaranteed QoS class and, with integer CPUs, makes it
+    eligible for exclusive cores from the kubelet CPU manager.
+
+    Args:
+        cpu (Optional[str]): CPU quantity, e.g. `2` or `500m`.
+        memory (Optional[str]): Memory quantity, e.g. `8Gi`.
+        guaranteed (bool): Whether to set the limits equal to the requests.
+
+    Returns:
+        Tuple[dict, dict]: The requests and limits.
+
+    Raises:
+        ValueError: If a quantity is invalid, or if `guaranteed` is set without both an
+                    integer CPU and a memory quantity.
+    """
+    requests = {}
+    if cpu is not None:
+        parse_cpu_quantity(cpu)
+        requests["cpu"] = str(cpu)
+    if memory is not None:
+        parse_memory_quantity(memory)
+        requests["memory"] = str(memory)
+
+    if not guaranteed:
+        return requests, {}
+
+    if cpu is None or memory is None:
+        raise ValueError("--guaranteed requires both --cpu and --memory")
+    if not parse_cpu_quantity(cpu).is_integer():
+        raise ValueError("--guaranteed requires an integer number of CPUs")
+    return requests, dict(requests)
+
+
+def format_memory_quantity(size_bytes: int) -> str:
+    """Format a number of bytes as a Kubernetes memory quantity, e.g. `4Gi` or `1536Mi`."""
+    if size_bytes % MEMORY_SUFFIXES["Gi"] == 0:
+        return f"{size_bytes // MEMORY_SUFFIXES['Gi']}Gi"
+    return f"{max(size_bytes // MEMORY_SUFFIXES['Mi'], 1)}Mi"
+
+
+def get_shm_size(shm_size: Optional[str] = None, memory: Optional[str] = None) -> Optional[str]:
+    """
+    Return the size limit of the notebook's shared memory (`/dev/shm`) volume.
+
+    The shared memory volume is backed by RAM and counts against the container's memory, so by
+    default half of the notebook's memory is used. Without memory, the volume is not limited.
+
+    Args:
+        shm_size (Optional[str]): Explicit shared memory size, e.g. `2Gi`.
+        memory (Optional[str]): Memory quantity of the notebook, e.g. `8Gi`.
+
+    Returns:
+        Optional[str]: The size limit, or None for no limit.
+
+    Raises:
+        ValueError: If a quantity is invalid, or if the shared memory exceeds the memory.
+    """
+    if shm_size is None:
+        if memory is None:
+            return None
+        return format_memory_quantity(parse_memory_quantity(memory) // 2)
+
+    shm_size_bytes = parse_memory_quantity(shm_size)
+    if memory is not None and shm_size_bytes > parse_memory_quantity(memory):
+        raise ValueError(f"--shm-size {shm_size} cannot be larger than --memory {memory}")
+    return str(shm_size)
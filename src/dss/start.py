@@ -1,45 +1,95 @@
+import time
+
 from lightkube import Client
 from lightkube.core.exceptions import ApiError
 from lightkube.models.autoscaling_v1 import ScaleSpec
 from lightkube.models.meta_v1 import ObjectMeta
 from lightkube.resources.apps_v1 import Deployment
 
-from dss.config import DSS_NAMESPACE
+from dss.config import DSS_NAMESPACE, NOTEBOOK_POLL_INTERVAL_SECONDS, NOTEBOOK_WAIT_TIMEOUT_SECONDS
+from dss.history import record_operation
 from dss.logger import setup_logger
-from dss.utils import does_notebook_exist
+from dss.utils import PodFailureError, get_notebook_pod, wait_for_deployment_ready
 
 # Set up logger
 logger = setup_logger()
 
 
-def start_notebook(name: str, lightkube_client: Client) -> None:
+def start_notebook(
+    name: str,
+    lightkube_client: Client,
+    namespace: str = DSS_NAMESPACE,
+    wait: bool = True,
+    timeout_seconds: int = NOTEBOOK_WAIT_TIMEOUT_SECONDS,
+) -> None:
     """
     Start a Notebook server on the Kubernetes cluster by scaling up the Notebook's Deployment to 1.
 
+    When waiting, the start is recorded in the operation history once the notebook is ready,
+    with the image and the node of the notebook Pod.
+
     Args:
         name (str): The name of the notebook server.
         lightkube_client (Client): The Kubernetes client.
+        namespace (str): The namespace of the notebook server. Defaults to DSS_NAMESPACE.
+        wait (bool): Whether to wait for the notebook to be ready. Defaults to True.
+        timeout_seconds (int): Time after which the notebook is no longer waited for. Defaults
+                               to NOTEBOOK_WAIT_TIMEOUT_SECONDS.
     """
-
-    if not does_notebook_exist(
-        name=name, namespace=DSS_NAMESPACE, lightkube_client=lightkube_client
-    ):
-        logger.debug(f"Failed to start notebook {name}. Notebook {name} does not exist.")
-        logger.error(f"Failed to start notebook. Notebook {name} does not exist.")
-        logger.info("Run 'dss list' to check all notebooks.")
-        raise RuntimeError()
-
+    # The Deployment is scaled without checking first that the notebook exists, a missing
+    # notebook is reported from the 404 response
     obj = Deployment.Scale(
-        metadata=ObjectMeta(name=name, namespace=DSS_NAMESPACE), spec=ScaleSpec(replicas=1)
+        metadata=ObjectMeta(name=name, namespace=namespace), spec=ScaleSpec(replicas=1)
     )
 
+    start = time.monotonic()
     try:
         lightkube_client.replace(obj)
-        logger.info(
-            f"Starting the notebook {name}. Check `dss list` for the status of the notebook."
+        if not wait:
+            logger.info(
+                f"Starting the notebook {name}. Check `dss list` for the status of the notebook."
+            )
+            return
+        logger.info(f"Starting the notebook {name}.")
+        wait_for_deployment_ready(
+            lightkube_client,
+            namespace=namespace,
+            deployment_name=name,
+            timeout_seconds=timeout_seconds,
+            interval_seconds=NOTEBOOK_POLL_INTERVAL_SECONDS,
         )
-        return
     except ApiError as e:
+        # A missing notebook is not recorded, it was never started
+        if e.status.code == 404:
+            logger.debug(f"Failed to start notebook {name}. Notebook {name} does not exist.")
+            logger.error(f"Failed to start notebook. Notebook {name} does not exist.")
+            logger.info("Run 'dss list' to check all notebooks.")
+            raise RuntimeError()
+        if wait:
+            record_operation("start", time.monotonic() - start, "ApiError")
         logger.debug(f"Failed to scale up Deployment {name}: {e}.", exc_info=True)
         logger.error(f"Failed to start notebook {name}.")
         raise RuntimeError()
+    except PodFailureError as err:
+        record_operation("start", time.monotonic() - start, err.reason)
+        logger.debug(f"Failed to start notebook {name}: {err}.", exc_info=True)
+        logger.error(f"Failed to start notebook {name}.")
+        logger.error(f"The notebook Pod failed with {err.reason}: {err.detail}.")
+        raise RuntimeError()
+    except TimeoutError as e:
+        record_operation("start", time.monotonic() - start, "Timeout")
+        logger.debug(f"Failed to start notebook {name}: {e}.", exc_info=True)
+        logger.error(f"Timed out while waiting for notebook {name} to start.")
+        logger.info("Check `dss list` for the status of the notebook.")
+        raise RuntimeError()
+
+    seconds = time.monotonic() - start
+    image, node = None, None
+    try:
+        pod = get_notebook_pod(name, namespace, lightkube_client)
+        if pod and pod.spec:
+            image, node = pod.spec.containers[0].image, pod.spec.nodeName
+    except Exception as e:
+        logger.debug(f"Failed to get the Pod of notebook {name}: {e}.", exc_info=True)
+    record_operation("start", seconds, image=image, node=node)
+    logger.info(f"Success: Notebook {name} started successfully.")
@@ -1,60 +1,328 @@
+import time
+from concurrent.futures import wait
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import lightkube
 from lightkube import Client
+from lightkube.resources.apps_v1 import Deployment
+from prettytable import PrettyTable
 
-from dss.config import DSS_NAMESPACE, MLFLOW_DEPLOYMENT_NAME
+from dss.capacity import (
+    ClusterUsage,
+    format_profile,
+    get_cluster_usage,
+    get_headroom,
+    get_headroom_table,
+    get_notebooks_usage_table,
+    get_profile,
+)
+from dss.config import (
+    DSS_NAMESPACE,
+    INTEL_GPU_RESOURCE,
+    LIST_PAGE_SIZE,
+    MLFLOW_DEPLOYMENT_NAME,
+    NOTEBOOK_IMAGES_ALIASES,
+    NOTEBOOK_LABEL,
+    NVIDIA_GPU_RESOURCE,
+)
+from dss.contexts import run_on_contexts
+from dss.gpu_sharing import get_gpu_slots
+from dss.install_state import read_install_state, warn_on_version_skew
 from dss.logger import setup_logger
+from dss.nodes import NodeInfo, get_node_inventory
+from dss.resources import format_memory_quantity
 from dss.utils import (
-    does_mlflow_deployment_exist,
-    get_labels_for_node,
-    get_service_url,
-    intel_is_present_in_node,
+    DaemonExecutor,
+    get_notebook_resources,
+    get_service_proxy_status,
+    get_url_from_service,
 )
 
 # Set up logger
 logger = setup_logger()
 
+# Time after which the status probes still running are reported as timed out
+STATUS_DEADLINE_SECONDS = 10
+MLFLOW_PORT = 5000
+MLFLOW_HEALTH_PATH = "/health"
+
+
+class ProbeResult(NamedTuple):
+    """The result of a status probe, or the error it raised, and how long it took."""
+
+    value: Any = None
+    error: Optional[Exception] = None
+    seconds: Optional[float] = None
+
+
+def run_probes(
+    probes: Dict[str, Callable[[], Any]], deadline_seconds: float = STATUS_DEADLINE_SECONDS
+) -> Dict[str, ProbeResult]:
+    """
+    Run the probes concurrently, with a deadline shared by all of them.
+
+    Probes that have not finished by the deadline are reported with a TimeoutError, instead of
+    delaying the others.
+
+    Args:
+        probes (Dict[str, Callable[[], Any]]): The probes, by name.
+        deadline_seconds (float): The time after which the probes still running are abandoned.
+
+    Returns:
+        Dict[str, ProbeResult]: The result of each probe, by name.
+    """
+
+    def timed(probe: Callable[[], Any]) -> ProbeResult:
+        start = time.monotonic()
+        try:
+            return ProbeResult(value=probe(), seconds=time.monotonic() - start)
+        except Exception as e:
+            return ProbeResult(error=e, seconds=time.monotonic() - start)
+
+    executor = DaemonExecutor(max_workers=len(probes))
+    futures = {name: executor.submit(timed, probe) for name, probe in probes.items()}
+    wait(futures.values(), timeout=deadline_seconds)
+    # Do not wait for the probes that timed out, they run on daemon threads so they do not delay
+    # the exit either
+    executor.shutdown()
+
+    results = {}
+    for name, future in futures.items():
+        if future.done():
+            results[name] = future.result()
+        else:
+            error = TimeoutError(f"no response within {deadline_seconds} seconds")
+            results[name] = ProbeResult(error=error)
+    return results
+
+
+def get_mlflow_health(lightkube_client: Client) -> int:
+    """Return the HTTP status code of the MLflow health endpoint."""
+    return get_service_proxy_status(
+        lightkube_client, MLFLOW_DEPLOYMENT_NAME, DSS_NAMESPACE, MLFLOW_PORT, MLFLOW_HEALTH_PATH
+    )
+
+
+def _get_mlflow_state(deployment: Optional[Deployment]) -> str:
+    """Return whether the MLflow Deployment exists and has an available replica."""
+    if deployment is None:
+        return "Not found"
+    available = (deployment.status.availableReplicas if deployment.status else None) or 0
+    if available:
+        return "Ready"
+    return f"Not ready ({available}/{deployment.spec.replicas or 0} available)"
 
-def get_status(lightkube_client: Client) -> None:
+
+def get_status(
+    lightkube_client: Client,
+    profile: Optional[Dict[str, float]] = None,
+    deadline_seconds: float = STATUS_DEADLINE_SECONDS,
+) -> None:
     """
     Logs  the status of key components within the DSS environment.
 
+    The install state, the MLflow Deployment and Service, the MLflow health endpoint, the nodes
+    and the Pods are probed concurrently, and the latency of each probe is logged. The
+    resources requested on each node are compared to its allocatable capacity, to show how many
+    more notebooks of `profile` fit.
+
     Args:
         lightkube_client (Client): The Kubernetes client.
+        profile (Optional[Dict[str, float]]): The requests of the notebooks counted in the
+            headroom, as returned by `get_profile`. Defaults to the default profile.
+        deadline_seconds (float): The time after which the probes still running are abandoned.
+
+    Raises:
+        RuntimeError: If a probe failed or timed out, after logging the other results.
     """
-    # Check MLflow deployment
-    mlflow_ready = does_mlflow_deployment_exist(lightkube_client)
+    results = run_probes(
+        {
+            "install state": lambda: read_install_state(lightkube_client),
+            "MLflow deployment": lambda: get_notebook_resources(
+                MLFLOW_DEPLOYMENT_NAME, DSS_NAMESPACE, lightkube_client
+            ),
+            "MLflow health": lambda: get_mlflow_health(lightkube_client),
+            "nodes": lambda: get_node_inventory(lightkube_client),
+            "pods": lambda: get_cluster_usage(lightkube_client),
+        },
+        deadline_seconds,
+    )
+    for name, result in results.items():
+        if result.error:
+            logger.debug(f"Failed to check the {name}: {result.error}.")
 
-    # Log MLflow deployment status and URL
-    if mlflow_ready:
-        mlflow_url = get_service_url(MLFLOW_DEPLOYMENT_NAME, DSS_NAMESPACE, lightkube_client)
-        logger.info("MLflow deployment: Ready")
-        logger.info(f"MLflow URL: {mlflow_url}")
+    # Log the version recorded by `dss initialize`
+    install_state = results["install state"]
+    if install_state.error:
+        logger.info("DSS version: Unknown")
+    elif install_state.value:
+        logger.info(f"DSS version: {install_state.value.get('version')}")
+        warn_on_version_skew(install_state.value)
     else:
-        logger.info("MLflow deployment: Not ready")
-
-    # Check NVIDIA GPU acceleration
-    gpu_acceleration = False
-    try:
-        node_labels = get_labels_for_node(lightkube_client)
-    except ValueError as e:
-        logger.debug(f"Failed to get labels for nodes: {e}.", exc_info=True)
-        logger.error(f"Failed to retrieve status: {e}.")
+        logger.info("DSS version: Not recorded")
+
+    # Log MLflow deployment status, URL and health
+    mlflow = results["MLflow deployment"]
+    if mlflow.error:
+        logger.info("MLflow deployment: Unknown")
+    else:
+        mlflow_state = _get_mlflow_state(mlflow.value.deployment)
+        logger.info(f"MLflow deployment: {mlflow_state}")
+        if mlflow.value.service is not None:
+            logger.info(f"MLflow URL: {get_url_from_service(mlflow.value.service)}")
+    health = results["MLflow health"]
+    if health.error:
+        logger.info("MLflow health: Unreachable")
+    else:
+        logger.info(
+            f"MLflow health: {'OK' if health.value == 200 else f'Failing (HTTP {health.value})'}"
+        )
+
+    nodes_result = results["nodes"]
+    if nodes_result.error:
+        logger.info("GPU acceleration: Unknown")
+    else:
+        _log_gpu_status(nodes_result.value)
+    usage_result = results["pods"]
+    if not nodes_result.error and not usage_result.error:
+        _log_headroom(nodes_result.value, usage_result.value, profile or get_profile())
+
+    latencies = ", ".join(f"{name} {_format_latency(result)}" for name, result in results.items())
+    logger.info(f"Probe latency: {latencies}")
+
+    failed = [name for name, result in results.items() if result.error]
+    if failed:
+        logger.error(f"Failed to check the {', '.join(failed)}. Check the debug logs for details.")
         raise RuntimeError()
-    if (
-        "nvidia.com/gpu.present" in node_labels
-        and "nvidia.com/gpu.deploy.container-toolkit" in node_labels
-        and "nvidia.com/gpu.deploy.device-plugin" in node_labels
-    ):
-        gpu_acceleration = True
-        card_name = node_labels.get("nvidia.com/gpu.product", "NVIDIA GPU")
+
+
+def _format_latency(result: ProbeResult) -> str:
+    """Return the latency of a probe in milliseconds, or that it timed out."""
+    if result.seconds is None:
+        return "timed out"
+    return f"{round(result.seconds * 1000)}ms{' (failed)' if result.error else ''}"
+
+
+def _log_headroom(nodes: List[NodeInfo], usage: ClusterUsage, profile: Dict[str, float]) -> None:
+    """Log the requested and allocatable resources of the nodes, and of each notebook."""
+    headroom = get_headroom(nodes, usage)
+    logger.info(f"Capacity (requested/allocatable):\n{get_headroom_table(headroom, profile)}")
+    fitting = sum(node.count_fitting(profile) for node in headroom)
+    logger.info(f"Notebooks that still fit ({format_profile(profile)}): {fitting}")
+    if usage.notebooks:
+        logger.info(f"Notebook requests:\n{get_notebooks_usage_table(usage.notebooks)}")
+
+
+def _log_gpu_status(nodes: List[NodeInfo]) -> None:
+    """Log the GPU acceleration of the nodes, and their capacity if there are several."""
+    # Check NVIDIA GPU acceleration on every node
+    nvidia_nodes = [node for node in nodes if node.nvidia_enabled]
 
     # Log GPU status
-    if gpu_acceleration:
-        logger.info(f"NVIDIA GPU acceleration: Enabled ({card_name})")
+    if nvidia_nodes:
+        logger.info(f"NVIDIA GPU acceleration: Enabled ({nvidia_nodes[0].gpu_product})")
+        node_slots = [get_gpu_slots(node.labels) for node in nvidia_nodes]
+        if any(slots is not None for slots in node_slots):
+            gpu_slots = sum(slots for slots in node_slots if slots is not None)
+            sharing = nvidia_nodes[0].labels.get("nvidia.com/gpu.sharing-strategy", "none")
+            logger.info(f"NVIDIA GPU slots: {gpu_slots} (sharing: {sharing})")
     else:
         logger.info("NVIDIA GPU acceleration: Disabled")
 
     # Check Intel GPU acceleration and Log status
-    if intel_is_present_in_node(lightkube_client):
+    if any(node.intel_enabled for node in nodes):
         logger.info("Intel GPU acceleration: Enabled")
     else:
         logger.info("Intel GPU acceleration: Disabled")
+
+    # Log the capacity of each node when the notebooks can be placed on more than one
+    if len(nodes) > 1:
+        logger.info(f"Nodes:\n{_get_nodes_table(nodes)}")
+
+
+def get_status_all_contexts() -> None:
+    """
+    Log a table with the MLflow and GPU status of every cluster context.
+
+    The clusters are queried concurrently, and clusters that fail or time out are shown as
+    unreachable without failing the whole status.
+    """
+    results = run_on_contexts(get_cluster_summary)
+    if not results:
+        logger.info("No contexts found. Add one with `dss context add`.")
+        return
+
+    table = PrettyTable()
+    table.field_names = ["Cluster", "MLflow", "NVIDIA GPU", "Intel GPU", "Free GPUs"]
+    table.align = "l"
+    for context, summary in results.items():
+        if isinstance(summary, Exception):
+            logger.debug(f"Failed to retrieve status of context {context}: {summary}.")
+            table.add_row([context, "Unreachable", "-", "-", "-"])
+        else:
+            table.add_row([context, *summary])
+    logger.info(f"\n{table}")
+
+
+def get_cluster_summary(lightkube_client: Client) -> List[str]:
+    """
+    Return the MLflow status, GPU vendors and number of GPUs not used by running notebooks.
+
+    Raises:
+        ApiError: If the cluster cannot be queried.
+    """
+    mlflow_deployment = get_notebook_resources(
+        MLFLOW_DEPLOYMENT_NAME, DSS_NAMESPACE, lightkube_client
+    ).deployment
+    mlflow = "Ready" if _get_mlflow_state(mlflow_deployment) == "Ready" else "Not ready"
+    nodes = get_node_inventory(lightkube_client)
+    nvidia_nodes = [node for node in nodes if node.nvidia_enabled]
+    intel_nodes = [node for node in nodes if node.intel_enabled]
+
+    allocatable = sum(node.get_allocatable_gpus(NVIDIA_GPU_RESOURCE) for node in nvidia_nodes)
+    allocatable += sum(node.get_allocatable_gpus(INTEL_GPU_RESOURCE) for node in intel_nodes)
+    in_use = 0
+    for deployment in lightkube_client.list(
+        Deployment,
+        namespace=lightkube.ALL_NS,
+        labels={NOTEBOOK_LABEL: lightkube.operators.exists()},
+        chunk_size=LIST_PAGE_SIZE,
+    ):
+        if not deployment.spec.replicas:
+            continue
+        resources = deployment.spec.template.spec.containers[0].resources
+        limits = resources.limits if resources and resources.limits else {}
+        in_use += sum(int(limits.get(r, 0)) for r in (NVIDIA_GPU_RESOURCE, INTEL_GPU_RESOURCE))
+
+    return [
+        mlflow,
+        nvidia_nodes[0].gpu_product if nvidia_nodes else "-",
+        "Enabled" if intel_nodes else "-",
+        str(max(allocatable - in_use, 0)) if nvidia_nodes or intel_nodes else "-",
+    ]
+
+
+def _get_nodes_table(nodes: List[NodeInfo]) -> PrettyTable:
+    """Return a table with the allocatable resources and cached DSS images of each node."""
+    table = PrettyTable()
+    table.field_names = ["Name", "CPU", "Memory", "GPU", "Cached images"]
+    table.align = "l"
+    for node in nodes:
+        gpus = []
+        if node.nvidia_enabled:
+            gpus.append(f"{node.get_allocatable_gpus(NVIDIA_GPU_RESOURCE)} (nvidia)")
+        if node.intel_enabled:
+            gpus.append(f"{node.get_allocatable_gpus(INTEL_GPU_RESOURCE)} (intel)")
+        cached = sorted(
+            alias for alias, image in NOTEBOOK_IMAGES_ALIASES.items() if node.has_image(image)
+        )
+        table.add_row(
+            [
+                node.name,
+                node.allocatable.get("cpu", "-"),
+                format_memory_quantity(node.get_allocatable_memory()),
+                ", ".join(gpus) or "-",
+                ", ".join(cached) or "-",
+            ]
+        )
+    return table
@@ -1,45 +1,91 @@
+import time
+
 from lightkube import Client
 from lightkube.core.exceptions import ApiError
 from lightkube.models.autoscaling_v1 import ScaleSpec
 from lightkube.models.meta_v1 import ObjectMeta
 from lightkube.resources.apps_v1 import Deployment
 
-from dss.config import DSS_NAMESPACE
+from dss.config import DSS_NAMESPACE, NOTEBOOK_POLL_INTERVAL_SECONDS, NOTEBOOK_WAIT_TIMEOUT_SECONDS
+from dss.history import record_operation
 from dss.logger import setup_logger
-from dss.utils import does_notebook_exist
+from dss.utils import get_notebook_pod, wait_for_notebook_pod_deleted
 
 # Set up logger
 logger = setup_logger()
 
 
-def stop_notebook(name: str, lightkube_client: Client) -> None:
+def stop_notebook(
+    name: str,
+    lightkube_client: Client,
+    namespace: str = DSS_NAMESPACE,
+    wait: bool = True,
+    timeout_seconds: int = NOTEBOOK_WAIT_TIMEOUT_SECONDS,
+) -> None:
     """
     Stops a Notebook server on the Kubernetes cluster by scaling down the Notebook's Deployment.
 
+    When waiting, the stop is recorded in the operation history once the notebook Pod is deleted,
+    with the image and the node of the Pod.
+
     Args:
         name (str): The name of the notebook server.
         lightkube_client (Client): The Kubernetes client.
+        namespace (str): The namespace of the notebook server. Defaults to DSS_NAMESPACE.
+        wait (bool): Whether to wait for the notebook Pod to be deleted. Defaults to True.
+        timeout_seconds (int): Time after which the notebook is no longer waited for. Defaults
+                               to NOTEBOOK_WAIT_TIMEOUT_SECONDS.
     """
-
-    if not does_notebook_exist(
-        name=name, namespace=DSS_NAMESPACE, lightkube_client=lightkube_client
-    ):
-        logger.debug(f"Failed to stop Notebook. Notebook {name} does not exist.")
-        logger.error(f"Failed to stop Notebook. Notebook {name} does not exist.")
-        logger.info("Run 'dss list' to check all notebooks.")
-        raise RuntimeError()
-
+    # The Deployment is scaled without checking first that the notebook exists, a missing
+    # notebook is reported from the 404 response
     obj = Deployment.Scale(
-        metadata=ObjectMeta(name=name, namespace=DSS_NAMESPACE), spec=ScaleSpec(replicas=0)
+        metadata=ObjectMeta(name=name, namespace=namespace), spec=ScaleSpec(replicas=0)
     )
 
+    # The Pod is read before it is deleted, the image and node are only recorded if it is found
+    image, node = None, None
+    if wait:
+        try:
+            pod = get_notebook_pod(name, namespace, lightkube_client)
+            if pod and pod.spec:
+                image, node = pod.spec.containers[0].image, pod.spec.nodeName
+        except Exception as e:
+            logger.debug(f"Failed to get the Pod of notebook {name}: {e}.", exc_info=True)
+
+    start = time.monotonic()
     try:
         lightkube_client.replace(obj)
-        logger.info(
-            f"Stopping the notebook {name}. Check `dss list` for the status of the notebook."
+        if not wait:
+            logger.info(
+                f"Stopping the notebook {name}. Check `dss list` for the status of the notebook."
+            )
+            return
+        logger.info(f"Stopping the notebook {name}.")
+        wait_for_notebook_pod_deleted(
+            lightkube_client,
+            namespace=namespace,
+            name=name,
+            timeout_seconds=timeout_seconds,
+            interval_seconds=NOTEBOOK_POLL_INTERVAL_SECONDS,
         )
-        return
     except ApiError as e:
+        # A missing notebook is not recorded, it was never stopped
+        if e.status.code == 404:
+            logger.debug(f"Failed to stop Notebook. Notebook {name} does not exist.")
+            logger.error(f"Failed to stop Notebook. Notebook {name} does not exist.")
+            logger.info("Run 'dss list' to check all notebooks.")
+            raise RuntimeError()
+        if wait:
+            record_operation("stop", time.monotonic() - start, "ApiError", image=image, node=node)
         logger.debug(f"Failed to scale down Deployment {name}: {e}", exc_info=True)
         logger.error(f"Failed to stop notebook {name}.")
         raise RuntimeError()
+    except TimeoutError as e:
+        record_operation("stop", time.monotonic() - start, "Timeout", image=image, node=node)
+        logger.debug(f"Failed to stop notebook {name}: {e}.", exc_info=True)
+        logger.error(f"Timed out while waiting for notebook {name} to stop.")
+        logger.info("Check `dss list` for the status of the notebook.")
+        raise RuntimeError()
+
+    record_operation("stop", time.monotonic() - start, image=image, node=node)
+    logger.info(f"Success: Notebook {name} stopped successfully.")
@@ -1,21 +1,28 @@
 import os
+import queue
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Union
+from typing import Callable, Iterable, NamedTuple, Optional, Union
 
 import lightkube
 from lightkube import ApiError, Client, KubeConfig
+from lightkube.core.generic_client import BasicRequest
 from lightkube.resources.apps_v1 import Deployment
-from lightkube.resources.core_v1 import Namespace, Node, PersistentVolumeClaim, Pod, Service
+from lightkube.resources.core_v1 import Namespace, PersistentVolumeClaim, Pod, Service
 
 from dss.config import (
     DSS_NAMESPACE,
+    LIST_PAGE_SIZE,
     MLFLOW_DEPLOYMENT_NAME,
     NOTEBOOK_LABEL,
     NOTEBOOK_PVC_NAME,
     DeploymentState,
 )
 from dss.logger import setup_logger
+from dss.nodes import NodeInfo, get_node_inventory
 
 # Set up logger
 logger = setup_logger()
@@ -26,18 +33,168 @@ NOTEBOOK_RESOURCES = (Service, Deployment)
 # Name for the environment variable storing kubeconfig
 KUBECONFIG_ENV_VAR = "DSS_KUBECONFIG"
 KUBECONFIG_DEFAULT = Path.home() / ".dss/config"
-
-
-class ImagePullBackOffError(Exception):
+# Directory storing the kubeconfig of each named cluster context, and file naming the current one
+CONTEXTS_DIR = Path.home() / ".dss/contexts"
+CURRENT_CONTEXT_FILE = Path.home() / ".dss/current-context"
+# Name of the context using the kubeconfig at KUBECONFIG_DEFAULT
+DEFAULT_CONTEXT = "default"
+# Waiting reasons of a container whose image cannot be pulled
+IMAGE_PULL_FAILURE_REASONS = ("ImagePullBackOff", "ErrImagePull", "InvalidImageName")
+# Waiting reasons of a container that cannot be created or keeps exiting
+CONTAINER_FAILURE_REASONS = (
+    "CrashLoopBackOff",
+    "CreateContainerConfigError",
+    "CreateContainerError",
+    "RunContainerError",
+)
+# Failure reasons that may resolve on their own, e.g. once a node is added by the cluster
+# autoscaler or a Secret the container needs is created, and their grace period before the
+# wait for the Deployment is aborted
+TRANSIENT_FAILURE_REASONS = (
+    "Unschedulable",
+    "CreateContainerConfigError",
+    "CreateContainerError",
+    "RunContainerError",
+)
+TRANSIENT_FAILURE_GRACE_SECONDS = 60
+# State of a Deployment whose Pod failed, by failure reason
+POD_FAILURE_STATES = {
+    **{reason: DeploymentState.ERRIMAGE for reason in IMAGE_PULL_FAILURE_REASONS},
+    **{reason: DeploymentState.ERRCONTAINER for reason in CONTAINER_FAILURE_REASONS},
+    "CrashLoopBackOff": DeploymentState.CRASHLOOP,
+    "OOMKilled": DeploymentState.OOMKILLED,
+    "Unschedulable": DeploymentState.UNSCHEDULABLE,
+}
+
+
+class PodFailureError(Exception):
     """
-    Raised when the Notebook Pod is unable to pull the image.
+    Raised when a Pod of a Deployment failed or is stuck, and will not become ready without
+    intervention.
     """
 
     __module__ = None
 
-    def __init__(self, msg: str, *args):
+    def __init__(self, msg: str, reason: str = "Unknown", detail: str = "", *args):
         super().__init__(str(msg), *args)
         self.msg = str(msg)
+        self.reason = reason
+        self.detail = detail
+
+
+class ImagePullBackOffError(PodFailureError):
+    """
+    Raised when the Notebook Pod is unable to pull the image.
+    """
+
+
+class DaemonExecutor:
+    """
+    Run functions on at most `max_workers` daemon threads, for requests that may not finish
+    before a deadline.
+
+    The threads of a ThreadPoolExecutor are joined when the interpreter exits, even after
+    `shutdown(wait=False)`, so a hung request delays the exit of the command until the client
+    times out. The daemon threads of this executor do not.
+    """
+
+    def __init__(self, max_workers: int):
+        self._max_workers = max_workers
+        self._workers = 0
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, func: Callable, *args) -> Future:
+        """Schedule `func(*args)` and return its Future."""
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new calls after shutdown")
+            self._queue.put((future, func, args))
+            if self._workers < self._max_workers:
+                self._workers += 1
+                threading.Thread(target=self._work, daemon=True).start()
+        return future
+
+    def _work(self) -> None:
+        """Run the queued calls until the executor is shut down."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, func, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def shutdown(self) -> None:
+        """Cancel the calls that have not started, without waiting for the running ones."""
+        with self._lock:
+            self._shutdown = True
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+            for _ in range(self._workers):
+                self._queue.put(None)
+
+
+class PodFailure(NamedTuple):
+    """Why a Pod will not become ready: a reason such as `OOMKilled`, and its details."""
+
+    reason: str
+    detail: str
+
+
+def get_pod_failure(pod: Pod) -> Optional[PodFailure]:
+    """
+    Return why a Pod will not become ready without intervention, or None if it still may.
+
+    The Pod conditions are checked for a Pod the scheduler cannot place, then the state and the
+    last termination of each container for images that cannot be pulled, containers that cannot
+    be created, and containers that keep exiting or were killed for running out of memory.
+    """
+    status = pod.status
+    if not status:
+        return None
+    for condition in status.conditions or []:
+        if (
+            condition.type == "PodScheduled"
+            and condition.status == "False"
+            and condition.reason == "Unschedulable"
+        ):
+            return PodFailure("Unschedulable", condition.message or "")
+
+    for container_status in [
+        *(status.initContainerStatuses or []),
+        *(status.containerStatuses or []),
+    ]:
+        state = container_status.state
+        last_terminated = (
+            container_status.lastState.terminated if container_status.lastState else None
+        )
+        if state and state.terminated and state.terminated.reason == "OOMKilled":
+            return PodFailure("OOMKilled", f"container {container_status.name} ran out of memory")
+        waiting = state.waiting if state else None
+        if not waiting or waiting.reason not in POD_FAILURE_STATES:
+            continue
+        if last_terminated and last_terminated.reason == "OOMKilled":
+            return PodFailure("OOMKilled", f"container {container_status.name} ran out of memory")
+        if waiting.reason == "CrashLoopBackOff" and last_terminated:
+            return PodFailure(
+                waiting.reason,
+                f"container {container_status.name} keeps exiting with code "
+                f"{last_terminated.exitCode}",
+            )
+        return PodFailure(waiting.reason, waiting.message or "")
+    return None
 
 
 def wait_for_deployment_ready(
@@ -46,6 +203,7 @@ def wait_for_deployment_ready(
     deployment_name: str,
     timeout_seconds: Optional[int] = 600,
     interval_seconds: int = 10,
+    grace_seconds: int = TRANSIENT_FAILURE_GRACE_SECONDS,
 ) -> None:
     """
     Waits for a Kubernetes deployment to be ready. Can wait indefinitely if timeout_seconds is None.
@@ -57,15 +215,21 @@ def wait_for_deployment_ready(
         timeout_seconds (Optional[int]): Timeout in seconds, or None for no timeout.
                                          Defaults to 180.
         interval_seconds (int): Interval between checks in seconds. Defaults to 10.
+        grace_seconds (int): How long a failure in TRANSIENT_FAILURE_REASONS must persist
+                             before the wait is aborted. Defaults to 60.
 
     Raises:
         ImagePullBackOffError: If there is an issue pulling the deployment image.
+        PodFailureError: If a Pod of the deployment keeps crashing, runs out of memory, cannot
+                         be scheduled or its container cannot be created.
         TimeoutError: If the timeout is reached before the deployment is ready.
     """
     logger.info(
         f"Waiting for deployment {deployment_name} in namespace {namespace} to be ready..."
     )
     start_time = time.time()
+    # When each transient failure was first observed, by Pod and reason
+    first_observed = {}
     while True:
         deployment: Deployment = client.get(Deployment, namespace=namespace, name=deployment_name)
         if deployment.status and deployment.status.availableReplicas == deployment.spec.replicas:
@@ -83,17 +247,32 @@ def wait_for_deployment_ready(
             if e.response.status_code == 404:
                 pods = []
 
-        if pods:
-            reason = (
-                pods[0].status.containerStatuses[0].state.waiting.reason
-                if pods[0].status.containerStatuses
-                and pods[0].status.containerStatuses[0].state.waiting
-                else "Unknown"
+        observed = {}
+        for pod in pods:
+            failure = get_pod_failure(pod)
+            if not failure:
+                continue
+            if failure.reason in TRANSIENT_FAILURE_REASONS:
+                key = (pod.metadata.name, failure.reason)
+                observed[key] = first_observed.get(key, time.time())
+                if time.time() - observed[key] < grace_seconds:
+                    logger.debug(
+                        f"Pod {pod.metadata.name} has {failure.reason}: {failure.detail}. "
+                        "Waiting for it to resolve..."
+                    )
+                    continue
+            error = (
+                ImagePullBackOffError
+                if failure.reason in IMAGE_PULL_FAILURE_REASONS
+                else PodFailureError
             )
-            if reason in ["ImagePullBackOff", "ErrImagePull"]:
-                raise ImagePullBackOffError(
-                    f"Failed to create Deployment {deployment_name} with {reason}"
-                )
+            raise error(
+                f"Failed to create Deployment {deployment_name} with {failure.reason}",
+                failure.reason,
+                failure.detail,
+            )
+        # A failure that resolved restarts its grace period if it comes back
+        first_observed = observed
 
         if timeout_seconds is not None and time.time() - start_time >= timeout_seconds:
             raise TimeoutError(
@@ -106,29 +285,98 @@ def wait_for_deployment_ready(
             )
 
 
+def wait_for_notebook_pod_deleted(
+    client: Client,
+    namespace: str,
+    name: str,
+    timeout_seconds: Optional[int] = 600,
+    interval_seconds: int = 10,
+) -> None:
+    """
+    Waits for the Pods of a notebook to be deleted after its deployment is scaled to zero.
+
+    The Pods are polled rather than the deployment, whose replicas drop to zero while the Pods
+    are still terminating.
+
+    Args:
+        client (Client): The Kubernetes client.
+        namespace (str): The namespace of the notebook.
+        name (str): The name of the notebook.
+        timeout_seconds (Optional[int]): Timeout in seconds, or None for no timeout.
+        interval_seconds (int): Interval between checks in seconds. Defaults to 10.
+
+    Raises:
+        TimeoutError: If the timeout is reached before the Pods are deleted.
+    """
+    start_time = time.time()
+    while get_notebook_pod(name, namespace, client):
+        if timeout_seconds is not None and time.time() - start_time >= timeout_seconds:
+            raise TimeoutError(
+                f"Timeout waiting for the Pods of notebook {name} in namespace {namespace} to "
+                "be deleted"
+            )
+        time.sleep(interval_seconds)
+    logger.debug(f"The Pods of notebook {name} in namespace {namespace} are deleted")
+
+
+def get_notebook_pod(name: str, namespace: str, lightkube_client: Client) -> Optional[Pod]:
+    """Return the newest Pod of a notebook, or None if it has none."""
+    pods = list(
+        lightkube_client.list(
+            Pod, namespace=namespace, labels={NOTEBOOK_LABEL: name}, chunk_size=LIST_PAGE_SIZE
+        )
+    )
+    return max(pods, key=lambda pod: pod.metadata.creationTimestamp) if pods else None
+
+
 def get_kubeconfig_path(
     env_var: str = KUBECONFIG_ENV_VAR,
     default_kubeconfig_location: Union[Path, str] = KUBECONFIG_DEFAULT,
+    use_current_context: bool = True,
 ) -> Path:
     """
     Returns the path to the kubeconfig used by DSS
 
     This will return:
     * the kubeconfig file at the path specified by the given environment variable, if set
+    * otherwise, the kubeconfig file of the current context, if set with `dss context use` and
+      `use_current_context` is True
     * otherwise, the kubeconfig file at the default path given
 
     Args:
         env_var (str): The name of the environment variable to check for the kubeconfig path.
         default_kubeconfig_location (Path or str): The default path to the kubeconfig file if not
                                                    specified by the environment variable.
+        use_current_context (bool): Whether the current context is resolved. It is not when an
+                                    explicit kubeconfig is stored, so that the kubeconfig of the
+                                    context is never overwritten.
 
     Returns:
         Path: the path to the kubeconfig file
     """
+    if use_current_context and env_var not in os.environ:
+        context = get_current_context()
+        if context != DEFAULT_CONTEXT:
+            return get_context_kubeconfig_path(context)
     # use expanduser() to handle '~' in the path
     return Path(os.environ.get(env_var, default_kubeconfig_location)).expanduser()
 
 
+def get_current_context() -> str:
+    """Returns the name of the cluster context selected with `dss context use`."""
+    try:
+        return CURRENT_CONTEXT_FILE.read_text().strip() or DEFAULT_CONTEXT
+    except FileNotFoundError:
+        return DEFAULT_CONTEXT
+
+
+def get_context_kubeconfig_path(name: str) -> Path:
+    """Returns the path to the kubeconfig of the given cluster context."""
+    if name == DEFAULT_CONTEXT:
+        return KUBECONFIG_DEFAULT
+    return CONTEXTS_DIR / name
+
+
 def get_kubeconfig(
     env_var: str = KUBECONFIG_ENV_VAR,
     default_kubeconfig_location: Union[Path, str] = KUBECONFIG_DEFAULT,
@@ -155,11 +403,12 @@ def save_kubeconfig(
     kubeconfig: str,
     env_var: str = KUBECONFIG_ENV_VAR,
     default_kubeconfig_location: Union[Path, str] = KUBECONFIG_DEFAULT,
-) -> None:
+) -> Path:
     """
     Save the kubeconfig file to the specified location.
 
-    This will create the parent directory if it does not exist.
+    This will create the parent directory if it does not exist. The current context is ignored,
+    the kubeconfig of a context is only written by `dss context add`.
 
     Args:
         kubeconfig (str): The kubeconfig file contents.
@@ -168,9 +417,11 @@ def save_kubeconfig(
                                            specified by the environment variable.
 
     Returns:
-        None
+        Path: the path the kubeconfig was saved to
     """
-    save_location = get_kubeconfig_path(env_var, default_kubeconfig_location)
+    save_location = get_kubeconfig_path(
+        env_var, default_kubeconfig_location, use_current_context=False
+    )
     logger.info(f"Storing provided kubeconfig to {save_location}")
 
     # Create the parent directory, if it does not exist
@@ -178,11 +429,18 @@ def save_kubeconfig(
 
     with open(save_location, "w") as f:
         f.write(kubeconfig)
+    return save_location
 
 
-def get_lightkube_client() -> lightkube.Client:
-    """Returns a lightkube client configured with the kubeconfig used by DSS."""
-    kubeconfig = get_kubeconfig()
+def get_lightkube_client(kubeconfig_path: Optional[Path] = None) -> lightkube.Client:
+    """
+    Returns a lightkube client configured with the kubeconfig used by DSS.
+
+    Args:
+        kubeconfig_path (Optional[Path]): An explicit kubeconfig to use instead of the one of the
+                                          current context.
+    """
+    kubeconfig = KubeConfig.from_file(kubeconfig_path) if kubeconfig_path else get_kubeconfig()
     lightkube_client = Client(config=kubeconfig)
     return lightkube_client
 
@@ -217,8 +475,19 @@ def get_service_url(name: str, namespace: str, lightkube_client: Client) -> str:
         logger.debug(f"Failed to get the URL of notebook {name} with error: {err}")
         return None
 
+    return get_url_from_service(service)
+
+
+def get_url_from_service(service: Service) -> Optional[str]:
+    """
+    Returns the URL of an already retrieved service, assuming it is exposed on its first port.
+    Returns None if the service has no ports, logging the issue as an error.
+    """
     if not service.spec.ports:
-        logger.error(f"No ports defined for the service {name} in namespace {namespace}.")
+        logger.error(
+            f"No ports defined for the service {service.metadata.name} "
+            f"in namespace {service.metadata.namespace}."
+        )
         return None
 
     ip = service.spec.clusterIP
@@ -228,6 +497,52 @@ def get_service_url(name: str, namespace: str, lightkube_client: Client) -> str:
     return f"http://{ip}:{port}"
 
 
+@dataclass
+class NotebookResources:
+    """The Deployment and Service of a notebook, None for the ones that do not exist."""
+
+    deployment: Optional[Deployment] = None
+    service: Optional[Service] = None
+
+    @property
+    def exists(self) -> bool:
+        """True if either the Deployment or the Service of the notebook exists."""
+        return self.deployment is not None or self.service is not None
+
+
+def _get_or_none(lightkube_client: Client, resource, name: str, namespace: str):
+    """Returns the object of the given resource type, or None if it does not exist."""
+    try:
+        return lightkube_client.get(resource, namespace=namespace, name=name)
+    except ApiError as e:
+        if e.response.status_code == 404:
+            return None
+        # Something went wrong
+        raise e
+
+
+def get_notebook_resources(
+    name: str, namespace: str, lightkube_client: Client
+) -> NotebookResources:
+    """
+    Returns the Deployment and Service of a notebook server.
+
+    Both objects are requested concurrently, so the lookup costs a single round trip, and the
+    returned objects can be reused by the caller instead of being requested again.
+
+    Raises:
+        ApiError: If a request fails for a reason other than the object not existing.
+    """
+    with ThreadPoolExecutor(max_workers=len(NOTEBOOK_RESOURCES)) as executor:
+        futures = {
+            resource: executor.submit(_get_or_none, lightkube_client, resource, name, namespace)
+            for resource in NOTEBOOK_RESOURCES
+        }
+        return NotebookResources(
+            deployment=futures[Deployment].result(), service=futures[Service].result()
+        )
+
+
 def does_notebook_exist(name: str, namespace: str, lightkube_client: Client) -> bool:
     """
     Returns True if a notebook server with the given name exists in the given namespace.
@@ -235,30 +550,15 @@ def does_notebook_exist(name: str, namespace: str, lightkube_client: Client) ->
     This function returns true if either a Service or Deployment of the standard naming convention
     exists.
     """
-    for resource in NOTEBOOK_RESOURCES:
-        try:
-            lightkube_client.get(resource, namespace=namespace, name=name)
-            return True
-        except ApiError as e:
-            if e.response.status_code == 404:
-                # Request succeeded but resource does not exist.  Continue searching
-                continue
-            else:
-                # Something went wrong
-                raise e
-
-    # No resources found
-    return False
+    return get_notebook_resources(name, namespace, lightkube_client).exists
 
 
-def does_dss_pvc_exist(lightkube_client: Client) -> bool:
+def does_dss_pvc_exist(lightkube_client: Client, namespace: str = DSS_NAMESPACE) -> bool:
     """
-    Returns True if the Notebooks PVC created during `dss initialize` exists in the DSS namespace.
+    Returns True if the Notebooks PVC created during `dss initialize` exists in the namespace.
     """
     try:
-        lightkube_client.get(
-            PersistentVolumeClaim, namespace=DSS_NAMESPACE, name=NOTEBOOK_PVC_NAME
-        )
+        lightkube_client.get(PersistentVolumeClaim, namespace=namespace, name=NOTEBOOK_PVC_NAME)
         return True
     except ApiError as e:
         if e.response.status_code == 404:
@@ -287,46 +587,154 @@ def does_mlflow_deployment_exist(lightkube_client: Client) -> bool:
 
 
 def intel_is_present_in_node(lightkube_client: Client) -> bool:
-    """Return True if the Node has the intel GPU label, False otherwise.
+    """Return True if a Node has the intel GPU label, False otherwise.
 
     Args:
         lightkube_client (Client): The Kubernetes client.
     """
-    try:
-        node_labels = get_labels_for_node(lightkube_client)
-    except ValueError as e:
-        logger.debug(f"Failed to get labels for nodes: {e}.", exc_info=True)
-        logger.error(f"Failed to retrieve status: {e}.")
-        raise RuntimeError()
-    if "intel.feature.node.kubernetes.io/gpu" in node_labels:
-        return True
-    return False
+    return any(node.intel_enabled for node in get_node_inventory(lightkube_client))
+
+
+def nvidia_is_present_in_node(lightkube_client: Client) -> bool:
+    """Return True if a Node has the labels set by the NVIDIA GPU operator, False otherwise.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+    """
+    return any(node.nvidia_enabled for node in get_node_inventory(lightkube_client))
+
+
+def _get_only_node(lightkube_client: Client) -> NodeInfo:
+    """Return the only node in the cluster, or raise ValueError if there is not exactly one."""
+    nodes = get_node_inventory(lightkube_client)
+    if len(nodes) != 1:
+        raise ValueError("Expected exactly one node in the cluster")
+    return nodes[0]
+
+
+def get_allocatable_for_node(lightkube_client: Client) -> dict:
+    """
+    Get the allocatable resources of the only node in the cluster.
+
+    Use `dss.nodes.get_node_inventory` for clusters with more than one node.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+
+    Returns:
+        dict: A dictionary mapping resource names (e.g. `nvidia.com/gpu`) to quantities.
+    """
+    return _get_only_node(lightkube_client).allocatable
 
 
 def get_labels_for_node(lightkube_client: Client) -> dict:
     """
     Get the labels of the only node in the cluster.
 
+    Use `dss.nodes.get_node_inventory` for clusters with more than one node.
+
     Args:
         lightkube_client (Client): The Kubernetes client.
 
     Returns:
         dict: A dictionary containing labels of the node matching the gpu_type.
     """
-    nodes = list(lightkube_client.list(Node))
-    if len(nodes) != 1:
-        raise ValueError("Expected exactly one node in the cluster")
+    return _get_only_node(lightkube_client).labels
+
 
-    return nodes[0].metadata.labels
+def _send_request(lightkube_client: Client, request: BasicRequest, raise_for_status: bool = True):
+    """
+    Send a request the public `Client` methods cannot make, and return its httpx response.
 
+    The request goes through the client's internal `_client` GenericClient. This relies on the
+    `build_adapter_request`, `send` and `raise_for_status` methods of lightkube 0.15's
+    GenericClient; this is the only place DSS accesses it.
 
-def get_deployment_state(deployment: Deployment, lightkube_client: Client) -> DeploymentState:
+    Raises:
+        ApiError: If `raise_for_status` is True and the request failed.
+    """
+    generic_client = lightkube_client._client
+    response = generic_client.send(generic_client.build_adapter_request(request))
+    if raise_for_status:
+        generic_client.raise_for_status(response)
+    return response
+
+
+def get_previous_pod_logs(
+    lightkube_client: Client,
+    name: str,
+    namespace: str,
+    container: Optional[str] = None,
+    tail_lines: Optional[int] = None,
+    timestamps: bool = False,
+) -> str:
+    """
+    Return the logs of the previous instance of a Pod's container, e.g. before a crash.
+
+    `Client.log` does not expose the `previous` parameter of the logs endpoint, so the request
+    is sent with `_send_request`.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        name (str): The name of the Pod.
+        namespace (str): The namespace of the Pod.
+        container (Optional[str]): The container, required if the Pod has more than one.
+        tail_lines (Optional[int]): Only return this many lines from the end of the logs.
+        timestamps (bool): Whether to prefix each line with its RFC 3339 timestamp.
+
+    Raises:
+        ApiError: If the logs cannot be retrieved, e.g. the container never restarted.
+    """
+    params = {"previous": True, "timestamps": timestamps}
+    if container:
+        params["container"] = container
+    if tail_lines is not None:
+        params["tailLines"] = tail_lines
+    request = BasicRequest(
+        method="GET",
+        url=f"api/v1/namespaces/{namespace}/pods/{name}/log",
+        response_type=None,
+        params=params,
+    )
+    return _send_request(lightkube_client, request).text
+
+
+def get_service_proxy_status(
+    lightkube_client: Client, name: str, namespace: str, port: int, path: str
+) -> int:
+    """
+    Return the HTTP status code of a GET request to a Service, through the service proxy of the
+    API server, so the Service is reachable from outside the cluster.
+
+    `Client` has no method for the proxy subresource, so the request is sent with
+    `_send_request`.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        name (str): The name of the Service.
+        namespace (str): The namespace of the Service.
+        port (int): The port of the Service.
+        path (str): The path requested, e.g. `/health`.
+    """
+    request = BasicRequest(
+        method="GET",
+        url=f"api/v1/namespaces/{namespace}/services/{name}:{port}/proxy{path}",
+        response_type=None,
+    )
+    return _send_request(lightkube_client, request, raise_for_status=False).status_code
+
+
+def get_deployment_state(
+    deployment: Deployment, lightkube_client: Client, pods: Optional[Iterable[Pod]] = None
+) -> DeploymentState:
     """
     Determine the state of a Kubernetes deployment, which is constrained to 0 or 1 replicas.
 
     Args:
         deployment (Deployment): The deployment object.
         lightkube_client (Client): The Kubernetes client.
+        pods (Optional[Iterable[Pod]]): The Pods of the deployment, if already listed. Otherwise
+                                        they are listed with the deployment's selector.
 
     Returns:
         DeploymentState: The state of the deployment as an enumeration.
@@ -340,11 +748,17 @@ def get_deployment_state(deployment: Deployment, lightkube_client: Client) -> De
     if deletion_timestamp:
         return DeploymentState.REMOVING
 
-    # Check pod statuses for image pulling issues and container creation
-    pods = lightkube_client.list(
-        Pod, namespace=deployment.metadata.namespace, labels=deployment.spec.selector.matchLabels
-    )
+    # Check pod statuses for failures and container creation
+    if pods is None:
+        pods = lightkube_client.list(
+            Pod,
+            namespace=deployment.metadata.namespace,
+            labels=deployment.spec.selector.matchLabels,
+        )
     for pod in pods:
+        failure = get_pod_failure(pod)
+        if failure:
+            return POD_FAILURE_STATES.get(failure.reason, DeploymentState.UNKNOWN)
         container_statuses = (
             pod.status.containerStatuses if pod.status.containerStatuses is not None else []
         )
@@ -354,11 +768,6 @@ def get_deployment_state(deployment: Deployment, lightkube_client: Client) -> De
                     "ContainerCreating",
                 ]:
                     return DeploymentState.DOWNLOADING
-                elif container_status.state.waiting.reason in [
-                    "ImagePullBackOff",
-                    "ErrImagePull",
-                ]:
-                    return DeploymentState.ERRIMAGE
 
     # Determine the state based on replica counts
     if desired_replicas == 0:
@@ -423,7 +832,7 @@ def wait_for_namespace_to_be_deleted(
     """
     while True:
         logger.info(f"Waiting for namespace {namespace} to be deleted...")
-        if does_namespace_exist(lightkube_client, DSS_NAMESPACE):
+        if does_namespace_exist(lightkube_client, namespace):
             time.sleep(interval_seconds)
         else:
             break
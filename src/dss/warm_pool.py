@@ -0,0 +1,244 @@
+import copy
+import hashlib
+import json
+import secrets
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from charmed_kubeflow_chisme.kubernetes import KubernetesResourceHandler
+from lightkube import Client
+from lightkube.core.exceptions import ApiError
+from lightkube.models.apps_v1 import ReplicaSetSpec
+from lightkube.models.meta_v1 import LabelSelector, ObjectMeta
+from lightkube.resources.apps_v1 import Deployment, ReplicaSet
+from lightkube.resources.core_v1 import Pod, Service
+from lightkube.types import PatchType
+
+from dss.config import (
+    DSS_CLI_MANAGER_LABELS,
+    FIELD_MANAGER,
+    WARM_POOL_CONFIG_LABEL,
+    WARM_POOL_CONTAINER_NAME,
+    WARM_POOL_LABEL,
+)
+from dss.logger import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+# Label set by the Deployment controller on the Pods of a ReplicaSet
+POD_TEMPLATE_HASH_LABEL = "pod-template-hash"
+# Prefix of the warm pool Deployments, and of the warm pools recorded in the install state
+WARM_POOL_PREFIX = "dss-warm-pool-"
+# Context keys that do not shape the notebook Pod, so warm Pods are shared across them
+WARM_POOL_IGNORED_CONTEXT = ("notebook_name", "preferred_node", "container_name", "replicas")
+
+
+def get_warm_pool_config_hash(context: dict) -> str:
+    """
+    Return a hash identifying the notebook Pods that can be rendered from `context`.
+
+    The notebook name and preferred node are excluded, so a warm Pod can be adopted by a
+    notebook of any name as long as the image, resources and all other settings match.
+    """
+    relevant = {
+        key: value for key, value in context.items() if key not in WARM_POOL_IGNORED_CONTEXT
+    }
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def get_warm_pool_configs(install_state: Optional[dict]) -> Set[str]:
+    """Return the config hashes of the warm pools recorded in the install state."""
+    components = (install_state or {}).get("components", {})
+    return {
+        component["config"]
+        for name, component in components.items()
+        if name.startswith(WARM_POOL_PREFIX) and "config" in component
+    }
+
+
+def _get_notebook_resource_handler(
+    context: dict, manifests_file: Path, lightkube_client: Client
+) -> KubernetesResourceHandler:
+    """
+    Return the handler of the notebook Deployment and Service, named like the warm Pods.
+
+    The container is named WARM_POOL_CONTAINER_NAME instead of after the notebook, as the warm
+    Pods are created before the name of the notebook adopting them is known.
+    """
+    return KubernetesResourceHandler(
+        field_manager=FIELD_MANAGER,
+        labels=DSS_CLI_MANAGER_LABELS,
+        template_files=[manifests_file],
+        context={**context, "container_name": WARM_POOL_CONTAINER_NAME},
+        resource_types={Deployment, Service},
+        lightkube_client=lightkube_client,
+    )
+
+
+def apply_warm_pool(
+    lightkube_client: Client, pool_name: str, count: int, context: dict, manifests_file: Path
+) -> Dict[str, object]:
+    """
+    Keep `count` warm notebook Pods for the given context, with a Deployment.
+
+    The Deployment has the Pod template of the notebooks rendered from `context`, but none of
+    their labels, so it is not listed as a notebook. When a Pod is adopted by a notebook, it no
+    longer matches the Deployment's selector and the ReplicaSet controller replaces it in the
+    background.
+
+    Args:
+        lightkube_client (Client): The Kubernetes client.
+        pool_name (str): The name of the pool, e.g. the image alias.
+        count (int): The number of Pods the pool should have.
+        context (dict): The context used to render the notebook Deployment.
+        manifests_file (Path): The notebook Deployment template.
+
+    Returns:
+        Dict[str, object]: The pool, as recorded in the install state components.
+    """
+    config_hash = get_warm_pool_config_hash(context)
+    name = f"{WARM_POOL_PREFIX}{pool_name}"
+    k8s_resource_handler = _get_notebook_resource_handler(
+        {**context, "notebook_name": name}, manifests_file, lightkube_client
+    )
+    deployment = next(
+        obj for obj in k8s_resource_handler.render_manifests() if isinstance(obj, Deployment)
+    )
+    selector = {"app.kubernetes.io/part-of": "dss", WARM_POOL_LABEL: pool_name}
+    deployment.metadata.labels = {**DSS_CLI_MANAGER_LABELS, **selector}
+    deployment.spec.replicas = count
+    deployment.spec.selector = LabelSelector(matchLabels=selector)
+    # The config hash is only in the template, as a new config rolls the Pods of the same pool
+    deployment.spec.template.metadata.labels = {**selector, WARM_POOL_CONFIG_LABEL: config_hash}
+    lightkube_client.apply(deployment, field_manager=FIELD_MANAGER, force=True)
+    logger.debug(f"Applied warm pool Deployment {name} with {count} Pod(s).")
+    return {"config": config_hash, "count": count, "namespace": context["namespace"]}
+
+
+def _is_pod_ready(pod: Pod) -> bool:
+    """Return True if the Pod is running, ready and not being deleted."""
+    if pod.metadata.deletionTimestamp or not pod.status or pod.status.phase != "Running":
+        return False
+    return any(
+        condition.type == "Ready" and condition.status == "True"
+        for condition in pod.status.conditions or []
+    )
+
+
+def _delete_quietly(lightkube_client: Client, resource, name: str, namespace: str) -> None:
+    """Delete a resource left behind by a failed adoption, only logging failures."""
+    try:
+        lightkube_client.delete(resource, name, namespace=namespace)
+    except ApiError as e:
+        logger.debug(f"Failed to delete {resource.__name__} {name}: {e}.", exc_info=True)
+
+
+def adopt_warm_pod(
+    name: str, context: dict, manifests_file: Path, lightkube_client: Client
+) -> bool:
+    """
+    Create the notebook's resources by adopting a ready Pod from the warm pool, if any.
+
+    A matching warm Pod is relabelled as a Pod of the notebook and released by the pool, then a
+    ReplicaSet with one replica is created for it, so the ReplicaSet adopts the Pod instead of
+    creating one. The notebook Deployment is applied last, with the same Pod template, so the
+    Deployment controller adopts the ReplicaSet as its current one. Its container keeps the name
+    of the warm Pods' container, WARM_POOL_CONTAINER_NAME, rather than the notebook name.
+
+    Args:
+        name (str): The name of the notebook server.
+        context (dict): The context used to render the notebook Deployment and Service.
+        manifests_file (Path): The notebook Deployment template.
+        lightkube_client (Client): The Kubernetes client.
+
+    Returns:
+        bool: True if the notebook's resources were created, False if no warm Pod could be
+              adopted and the caller should create them as usual.
+
+    Raises:
+        ApiError: If the notebook Deployment or Service cannot be applied.
+    """
+    namespace = context["namespace"]
+    try:
+        candidates = [
+            pod
+            for pod in lightkube_client.list(
+                Pod,
+                namespace=namespace,
+                labels={WARM_POOL_CONFIG_LABEL: get_warm_pool_config_hash(context)},
+            )
+            if _is_pod_ready(pod)
+        ]
+    except ApiError as e:
+        logger.debug(f"Failed to list warm notebook Pods: {e}.", exc_info=True)
+        return False
+    if not candidates:
+        return False
+
+    k8s_resource_handler = _get_notebook_resource_handler(
+        context, manifests_file, lightkube_client
+    )
+    deployment = next(
+        obj for obj in k8s_resource_handler.render_manifests() if isinstance(obj, Deployment)
+    )
+    pod_template_hash = secrets.token_hex(5)
+    labels = {
+        **deployment.spec.template.metadata.labels,
+        POD_TEMPLATE_HASH_LABEL: pod_template_hash,
+    }
+
+    adopted = None
+    for pod in candidates:
+        patch = {
+            "metadata": {
+                # Makes the patch fail if another `dss create` adopted the Pod first
+                "resourceVersion": pod.metadata.resourceVersion,
+                "labels": {**labels, WARM_POOL_LABEL: None, WARM_POOL_CONFIG_LABEL: None},
+                "ownerReferences": None,
+            }
+        }
+        try:
+            lightkube_client.patch(
+                Pod, pod.metadata.name, patch, namespace=namespace, patch_type=PatchType.MERGE
+            )
+        except ApiError as e:
+            if e.status.code in (404, 409):
+                continue
+            raise e
+        adopted = pod.metadata.name
+        break
+    if not adopted:
+        return False
+    logger.debug(f"Notebook {name} adopted warm Pod {adopted}.")
+
+    template = copy.deepcopy(deployment.spec.template)
+    template.metadata.labels = labels
+    replica_set = ReplicaSet(
+        metadata=ObjectMeta(
+            name=f"{name}-{pod_template_hash}", namespace=namespace, labels=labels
+        ),
+        spec=ReplicaSetSpec(
+            replicas=1,
+            selector=LabelSelector(
+                matchLabels={
+                    **deployment.spec.selector.matchLabels,
+                    POD_TEMPLATE_HASH_LABEL: pod_template_hash,
+                }
+            ),
+            template=template,
+        ),
+    )
+    try:
+        lightkube_client.create(replica_set, field_manager=FIELD_MANAGER)
+    except ApiError as e:
+        logger.debug(f"Failed to create the ReplicaSet of notebook {name}: {e}.", exc_info=True)
+        _delete_quietly(lightkube_client, Pod, adopted, namespace)
+        return False
+
+    try:
+        k8s_resource_handler.apply()
+    except ApiError as e:
+        _delete_quietly(lightkube_client, ReplicaSet, replica_set.metadata.name, namespace)
+        raise e
+    return True
@@ -0,0 +1,115 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from dss.capacity import (
+    ClusterUsage,
+    get_cluster_usage,
+    get_headroom,
+    get_headroom_table,
+    get_pod_requests,
+    get_profile,
+    get_shortfalls,
+)
+from dss.nodes import NodeInfo
+
+
+def _container(requests: dict = None, limits: dict = None) -> MagicMock:
+    """Return a mock container with the given requests and limits."""
+    return MagicMock(resources=MagicMock(requests=requests, limits=limits))
+
+
+def _pod(
+    node: str = "node",
+    phase: str = "Running",
+    containers: list = None,
+    notebook: str = None,
+) -> MagicMock:
+    """Return a mock Pod scheduled on a node."""
+    pod = MagicMock()
+    pod.metadata.namespace = "dss"
+    pod.metadata.labels = {"canonical.com/dss-notebook": notebook} if notebook else {}
+    pod.spec.nodeName = node
+    pod.spec.containers = containers or [_container({"cpu": "1", "memory": "1Gi"})]
+    pod.spec.initContainers = None
+    pod.status.phase = phase
+    return pod
+
+
+def test_get_pod_requests() -> None:
+    """Test that the requests of the containers are summed, and limits used without requests."""
+    pod = _pod(
+        containers=[
+            _container({"cpu": "500m", "memory": "1Gi"}),
+            _container(limits={"cpu": "1", "nvidia.com/gpu": "1", "ephemeral-storage": "1Gi"}),
+        ]
+    )
+    pod.spec.initContainers = [_container({"cpu": "4"})]
+
+    assert get_pod_requests(pod) == {
+        "cpu": 4,
+        "memory": 2**30,
+        "ephemeral-storage": 2**30,
+        "gpu": 1,
+    }
+
+
+def test_get_cluster_usage() -> None:
+    """Test that only the Pods holding resources on a node are counted."""
+    mock_client = MagicMock()
+    mock_client.list.return_value = [
+        _pod(notebook="nb"),
+        _pod(containers=[_container({"cpu": "250m"})]),
+        _pod(phase="Succeeded"),
+        _pod(node=None, phase="Pending"),
+    ]
+
+    usage = get_cluster_usage(mock_client)
+
+    assert usage.requested["node"]["cpu"] == 1.25
+    assert usage.requested["node"]["memory"] == 2**30
+    assert [(notebook.name, notebook.node) for notebook in usage.notebooks] == [("nb", "node")]
+    assert mock_client.list.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "profile, expected",
+    [
+        (get_profile(), 3),
+        (get_profile("2"), 1),
+        (get_profile(memory="4Gi"), 1),
+        (get_profile(gpu=1), 1),
+        (get_profile(gpu=2), 0),
+    ],
+)
+def test_count_fitting(profile: dict, expected: int) -> None:
+    """Test that the notebooks that fit are limited by the scarcest resource."""
+    node = NodeInfo(name="node", allocatable={"cpu": "4", "memory": "8Gi", "nvidia.com/gpu": "2"})
+    usage = ClusterUsage(
+        requested={"node": {"cpu": 1, "memory": 2 * 2**30, "ephemeral-storage": 0, "gpu": 1}}
+    )
+
+    (headroom,) = get_headroom([node], usage)
+
+    assert headroom.count_fitting(profile) == expected
+
+
+def test_get_headroom_table() -> None:
+    """Test that nodes without Pods show their whole capacity as free."""
+    node = NodeInfo(name="node", allocatable={"cpu": "8", "memory": "16Gi"})
+
+    table = get_headroom_table(get_headroom([node], ClusterUsage()), get_profile())
+
+    row = [cell.strip() for cell in table.get_string().splitlines()[3].split("|")[1:-1]]
+    assert row == ["node", "0/8", "0Gi/16Gi", "0Gi/0Gi", "0/0", "8"]
+
+
+def test_get_shortfalls() -> None:
+    """Test that each resource no node has enough of is reported."""
+    node = NodeInfo(name="node", allocatable={"cpu": "4", "memory": "8Gi"})
+    headroom = get_headroom([node], ClusterUsage())
+
+    assert get_shortfalls(headroom, get_profile("8", "4Gi", gpu=1)) == [
+        "requested 8 CPU, at most 4 free on a node",
+        "requested 1 GPU, at most 0 free on a node",
+    ]
@@ -0,0 +1,111 @@
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from dss.contexts import add_context, get_contexts, run_on_contexts, use_context
+
+KUBECONFIG = """
+apiVersion: v1
+kind: Config
+clusters:
+- cluster: {server: "https://10.0.0.2:16443"}
+  name: microk8s-cluster
+contexts:
+- context: {cluster: microk8s-cluster, user: admin}
+  name: microk8s
+current-context: microk8s
+users:
+- name: admin
+  user: {token: token}
+"""
+
+
+@pytest.fixture(autouse=True)
+def dss_home(tmp_path: Path, monkeypatch) -> Path:
+    """Store the contexts in a temporary directory."""
+    monkeypatch.setattr("dss.contexts.KUBECONFIG_DEFAULT", tmp_path / "config")
+    monkeypatch.setattr("dss.utils.KUBECONFIG_DEFAULT", tmp_path / "config")
+    monkeypatch.setattr("dss.contexts.CONTEXTS_DIR", tmp_path / "contexts")
+    monkeypatch.setattr("dss.utils.CONTEXTS_DIR", tmp_path / "contexts")
+    monkeypatch.setattr("dss.contexts.CURRENT_CONTEXT_FILE", tmp_path / "current-context")
+    monkeypatch.setattr("dss.utils.CURRENT_CONTEXT_FILE", tmp_path / "current-context")
+    return tmp_path
+
+
+def test_add_and_use_context(dss_home: Path):
+    """Test that added contexts are listed after the default one and can be selected."""
+    (dss_home / "config").write_text(KUBECONFIG)
+
+    add_context("workstation-2", KUBECONFIG)
+    use_context("workstation-2")
+
+    assert get_contexts() == {
+        "default": dss_home / "config",
+        "workstation-2": dss_home / "contexts" / "workstation-2",
+    }
+    assert (dss_home / "current-context").read_text() == "workstation-2"
+
+
+@pytest.mark.parametrize(
+    "name, kubeconfig",
+    (
+        ("default", KUBECONFIG),
+        ("Not/Valid", KUBECONFIG),
+        ("workstation-2", "not a kubeconfig"),
+    ),
+)
+def test_add_context_invalid(name: str, kubeconfig: str):
+    """Test that invalid names and kubeconfigs are rejected."""
+    with pytest.raises(ValueError):
+        add_context(name, kubeconfig)
+
+
+def test_use_context_missing():
+    """Test that selecting a context that does not exist fails."""
+    with pytest.raises(ValueError):
+        use_context("missing")
+
+
+@patch("dss.contexts.KubeConfig")
+@patch("dss.contexts.Client")
+def test_run_on_contexts(mock_client: MagicMock, mock_kubeconfig: MagicMock):
+    """Test that results, errors and timeouts are reported for each context."""
+    for name in ("fast", "failing", "slow"):
+        add_context(name, KUBECONFIG)
+    # Make each client the name of its context
+    mock_kubeconfig.from_file.side_effect = lambda path: path.name
+    mock_client.side_effect = lambda config, timeout: config
+
+    def func(client):
+        if client == "failing":
+            raise RuntimeError("unreachable")
+        if client == "slow":
+            time.sleep(1)
+        return "ok"
+
+    results = run_on_contexts(func, timeout_seconds=0.2)
+
+    assert results["fast"] == "ok"
+    assert isinstance(results["failing"], RuntimeError)
+    assert isinstance(results["slow"], TimeoutError)
+
+
+@patch("dss.contexts.KubeConfig")
+@patch("dss.contexts.Client")
+def test_run_on_contexts_single_deadline(mock_client: MagicMock, mock_kubeconfig: MagicMock):
+    """Test that the requests to a cluster share one deadline instead of a timeout each."""
+    add_context("chatty", KUBECONFIG)
+
+    def func(client):
+        # Each request is within the timeout, but all of them are not
+        for _ in range(3):
+            time.sleep(0.15)
+        return "ok"
+
+    start = time.monotonic()
+    results = run_on_contexts(func, timeout_seconds=0.2)
+
+    assert isinstance(results["chatty"], TimeoutError)
+    assert time.monotonic() - start < 0.4
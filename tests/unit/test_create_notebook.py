@@ -3,9 +3,12 @@ from unittest.mock import MagicMock, patch
 import pytest
 from test_utils import FakeApiError
 
+from dss.capacity import ClusterUsage
 from dss.config import DSS_NAMESPACE, NOTEBOOK_PVC_NAME, RECOMMENDED_IMAGES_MESSAGE
 from dss.create_notebook import _get_notebook_config, create_notebook
-from dss.utils import ImagePullBackOffError
+from dss.nodes import NVIDIA_NODE_LABELS, NodeInfo
+from dss.utils import ImagePullBackOffError, NotebookResources, PodFailureError
+from dss.warm_pool import get_warm_pool_config_hash
 
 NOTEBOOK_NAME = "test-notebook"
 NOTEBOOK_IMAGE = "test-image"
@@ -18,6 +21,27 @@ EXPECTED_CONTEXT = {
     "pvc_name": NOTEBOOK_PVC_NAME,
 }
 EXPECTED_CONTEXT_INTEL = {**EXPECTED_CONTEXT, "intel_enabled": True}
+EXPECTED_CONTEXT_NVIDIA = {**EXPECTED_CONTEXT, "nvidia_enabled": True}
+
+
+@pytest.fixture(autouse=True)
+def mock_read_install_state() -> MagicMock:
+    """
+    Fixture to mock the install state, missing by default as for older installations.
+    """
+    with patch("dss.create_notebook.read_install_state", return_value=None) as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_startup_history() -> MagicMock:
+    """
+    Fixture to keep the operation history of the tests out of the user's home.
+    """
+    with patch("dss.create_notebook.estimate_startup_seconds", return_value=None) as mock, patch(
+        "dss.create_notebook.record_operation"
+    ):
+        yield mock
 
 
 @pytest.fixture
@@ -84,7 +108,7 @@ def test_create_notebook_success(
     mock_resource_handler.return_value = mock_resource_handler_instance
 
     with patch("dss.create_notebook.does_dss_pvc_exist", return_value=True), patch(
-        "dss.create_notebook.does_notebook_exist", return_value=False
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
     ), patch("dss.create_notebook.wait_for_deployment_ready") as mock_wait_for_deployment_ready:
         # Call the function to test
         create_notebook(
@@ -102,6 +126,36 @@ def test_create_notebook_success(
         mock_logger.info.assert_called_with(f"Access the notebook at {notebook_url}.")
 
 
+@pytest.mark.parametrize("pooled", [True, False])
+@patch("dss.create_notebook._get_notebook_config", return_value=EXPECTED_CONTEXT)
+def test_create_notebook_warm_pool(
+    _,
+    pooled: bool,
+    mock_read_install_state: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_resource_handler: MagicMock,
+    mock_wait_for_deployment_ready: MagicMock,
+) -> None:
+    """
+    Test that warm Pods are only looked up when a pool of the notebook's config was recorded.
+    """
+    config_hash = get_warm_pool_config_hash(EXPECTED_CONTEXT) if pooled else "other"
+    mock_read_install_state.return_value = {
+        "namespaces": [DSS_NAMESPACE],
+        "components": {"dss-warm-pool-pytorch": {"config": config_hash, "count": 1}},
+    }
+
+    with patch(
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
+    ), patch("dss.create_notebook.warn_on_version_skew"), patch(
+        "dss.create_notebook.adopt_warm_pod", return_value=True
+    ) as mock_adopt_warm_pod:
+        create_notebook(name=NOTEBOOK_NAME, image=NOTEBOOK_IMAGE, lightkube_client=MagicMock())
+
+    assert mock_adopt_warm_pod.called == pooled
+    assert mock_resource_handler.return_value.apply.called != pooled
+
+
 def test_create_notebook_failure_pvc_does_not_exist(
     mock_logger: MagicMock,
 ) -> None:
@@ -115,7 +169,7 @@ def test_create_notebook_failure_pvc_does_not_exist(
     mock_client_instance = MagicMock()
 
     with patch("dss.create_notebook.does_dss_pvc_exist", return_value=False), patch(
-        "dss.create_notebook.does_notebook_exist", return_value=False
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
     ):
         with pytest.raises(RuntimeError):
             # Call the function to test
@@ -149,7 +203,7 @@ def test_create_notebook_failure_mlflow_does_not_exist(
     mock_client_instance = MagicMock()
 
     with patch("dss.create_notebook.does_mlflow_deployment_exist", return_value=False), patch(
-        "dss.create_notebook.does_notebook_exist", return_value=False
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
     ):
         with pytest.raises(RuntimeError):
             # Call the function to test
@@ -171,7 +225,6 @@ def test_create_notebook_failure_mlflow_does_not_exist(
 
 
 def test_create_notebook_failure_notebook_exists(
-    mock_get_service_url: MagicMock,
     mock_logger: MagicMock,
 ) -> None:
     """
@@ -184,10 +237,12 @@ def test_create_notebook_failure_notebook_exists(
     # Mock the behavior of Client
     mock_client_instance = MagicMock()
 
-    mock_get_service_url.return_value = notebook_url
+    existing = NotebookResources(service=MagicMock())
     with patch("dss.create_notebook.does_dss_pvc_exist", return_value=True), patch(
-        "dss.create_notebook.does_notebook_exist", return_value=True
-    ):
+        "dss.create_notebook.get_notebook_resources", return_value=existing
+    ), patch(
+        "dss.create_notebook.get_url_from_service", return_value=notebook_url
+    ) as mock_get_url_from_service:
         with pytest.raises(RuntimeError):
             # Call the function to test
             create_notebook(
@@ -205,6 +260,7 @@ def test_create_notebook_failure_notebook_exists(
         mock_logger.info.assert_called_with(
             f"To connect to the existing notebook, go to {notebook_url}."
         )
+        mock_get_url_from_service.assert_called_once_with(existing.service)
 
 
 @patch("dss.create_notebook._get_notebook_config", return_value=EXPECTED_CONTEXT)
@@ -228,7 +284,7 @@ def test_create_notebook_failure_api(
     mock_wait_for_deployment_ready.side_effect = FakeApiError(error_code)
 
     with patch("dss.create_notebook.does_dss_pvc_exist", return_value=True), patch(
-        "dss.create_notebook.does_notebook_exist", return_value=False
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
     ):
         with pytest.raises(RuntimeError):
             # Call the function to test
@@ -244,7 +300,9 @@ def test_create_notebook_failure_api(
             f"Failed to create Notebook with error code {error_code}."
         )
         mock_logger.info.assert_called_with(" Check the debug logs for more details.")
-        mock_remove_notebook.assert_called_once_with(notebook_name, mock_client_instance)
+        mock_remove_notebook.assert_called_once_with(
+            notebook_name, mock_client_instance, DSS_NAMESPACE
+        )
 
 
 @patch("dss.create_notebook._get_notebook_config", return_value=EXPECTED_CONTEXT)
@@ -268,7 +326,7 @@ def test_create_notebook_failure_image_pull(
     mock_wait_for_deployment_ready.side_effect = ImagePullBackOffError(exception_message)
 
     with patch("dss.create_notebook.does_dss_pvc_exist", return_value=True), patch(
-        "dss.create_notebook.does_notebook_exist", return_value=False
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
     ), patch("dss.create_notebook._get_notebook_image_name", return_value=notebook_image):
         # Call the function to test
         with pytest.raises(RuntimeError):
@@ -290,7 +348,41 @@ def test_create_notebook_failure_image_pull(
             f"{RECOMMENDED_IMAGES_MESSAGE}"
         )
 
-        mock_remove_notebook.assert_called_once_with(notebook_name, mock_client_instance)
+        mock_remove_notebook.assert_called_once_with(
+            notebook_name, mock_client_instance, DSS_NAMESPACE
+        )
+
+
+@patch("dss.create_notebook._get_notebook_config", return_value=EXPECTED_CONTEXT)
+def test_create_notebook_failure_pod(
+    _,
+    mock_logger: MagicMock,
+    mock_wait_for_deployment_ready: MagicMock,
+    mock_remove_notebook: MagicMock,
+) -> None:
+    """
+    Test that a notebook whose Pod fails is removed with the reason and what to do about it.
+    """
+    mock_client_instance = MagicMock()
+    mock_wait_for_deployment_ready.side_effect = PodFailureError(
+        "Failed", "OOMKilled", "container notebook ran out of memory"
+    )
+
+    with patch("dss.create_notebook.does_dss_pvc_exist", return_value=True), patch(
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
+    ):
+        with pytest.raises(RuntimeError):
+            create_notebook(
+                name=NOTEBOOK_NAME, image=NOTEBOOK_IMAGE, lightkube_client=mock_client_instance
+            )
+
+    mock_logger.error.assert_called_with(
+        "The notebook Pod failed with OOMKilled: container notebook ran out of memory."
+    )
+    mock_logger.info.assert_called_with("Request more memory for the notebook with --memory.")
+    mock_remove_notebook.assert_called_once_with(
+        NOTEBOOK_NAME, mock_client_instance, DSS_NAMESPACE
+    )
 
 
 @pytest.fixture()
@@ -299,6 +391,18 @@ def mock_client(mocker):
     yield client
 
 
+def _node(name="node", intel=False, nvidia=False, allocatable=None, images=None) -> NodeInfo:
+    """Return a NodeInfo with the labels of the given GPU vendors."""
+    labels = {}
+    if intel:
+        labels["intel.feature.node.kubernetes.io/gpu"] = "true"
+    if nvidia:
+        labels.update({label: "true" for label in NVIDIA_NODE_LABELS})
+    return NodeInfo(
+        name=name, labels=labels, allocatable=allocatable or {}, images=images or set()
+    )
+
+
 @pytest.mark.parametrize(
     "intel, expected_context", ((False, EXPECTED_CONTEXT), (True, EXPECTED_CONTEXT_INTEL))
 )
@@ -307,6 +411,303 @@ def test_get_notebook_config(_, intel, expected_context, mock_client) -> None:
     """
     Test case to verify behavior when an ImagePullBackOffError is raised.
     """
-    with patch("dss.create_notebook.intel_is_present_in_node", return_value=intel):
+    with patch("dss.create_notebook.get_node_inventory", return_value=[_node(intel=intel)]):
         actual_context = _get_notebook_config(NOTEBOOK_IMAGE, NOTEBOOK_NAME, mock_client)
         assert actual_context == expected_context
+
+
+@pytest.mark.parametrize(
+    "image, intel, nvidia, gpu, expected_context",
+    (
+        # NVIDIA GPUs are only assigned automatically to CUDA images
+        ("test-cuda-image", False, True, None, {**EXPECTED_CONTEXT_NVIDIA}),
+        (NOTEBOOK_IMAGE, False, True, None, {**EXPECTED_CONTEXT}),
+        # Explicit GPU count is rendered for the vendor present in the node
+        (NOTEBOOK_IMAGE, False, True, 2, {**EXPECTED_CONTEXT_NVIDIA, "gpu_count": 2}),
+        (NOTEBOOK_IMAGE, True, False, 1, {**EXPECTED_CONTEXT_INTEL, "gpu_count": 1}),
+        # The image decides the vendor when both are present
+        ("test-intel-image", True, True, 1, {**EXPECTED_CONTEXT_INTEL, "gpu_count": 1}),
+        # gpu=0 disables auto-detection
+        ("test-cuda-image", True, True, 0, {**EXPECTED_CONTEXT}),
+    ),
+)
+@patch("dss.create_notebook.get_mlflow_tracking_uri", return_value=MLFLOW_TRACKING_URI)
+def test_get_notebook_config_gpu(
+    _, image, intel, nvidia, gpu, expected_context, mock_client
+) -> None:
+    """
+    Test case to verify the GPU resources rendered for the different node and image combinations.
+    """
+    allocatable = {"nvidia.com/gpu": "2", "gpu.intel.com/i915": "1"}
+    with patch(
+        "dss.create_notebook.get_node_inventory",
+        return_value=[_node(intel=intel, nvidia=nvidia, allocatable=allocatable)],
+    ):
+        actual_context = _get_notebook_config(image, NOTEBOOK_NAME, mock_client, gpu)
+        assert actual_context == {**expected_context, "notebook_image": image}
+
+
+@pytest.mark.parametrize(
+    "intel, nvidia, allocatable",
+    (
+        # No GPU vendor present in the node
+        (False, False, {}),
+        # Not enough allocatable GPUs
+        (False, True, {"nvidia.com/gpu": "1"}),
+    ),
+)
+@patch("dss.create_notebook.get_mlflow_tracking_uri", return_value=MLFLOW_TRACKING_URI)
+def test_get_notebook_config_gpu_failure(
+    _, intel, nvidia, allocatable, mock_client, mock_logger
+) -> None:
+    """
+    Test case to verify that requesting unavailable GPUs fails fast.
+    """
+    with patch(
+        "dss.create_notebook.get_node_inventory",
+        return_value=[_node(intel=intel, nvidia=nvidia, allocatable=allocatable)],
+    ):
+        with pytest.raises(RuntimeError):
+            _get_notebook_config(NOTEBOOK_IMAGE, NOTEBOOK_NAME, mock_client, 2)
+
+
+@patch("dss.create_notebook.get_mlflow_tracking_uri", return_value=MLFLOW_TRACKING_URI)
+def test_get_notebook_config_multiple_nodes(_, mock_client) -> None:
+    """
+    Test case to verify that GPU notebooks prefer a node that can allocate the GPUs.
+    """
+    nodes = [
+        _node("cpu-node", images={NOTEBOOK_IMAGE}),
+        _node("gpu-node", nvidia=True, allocatable={"nvidia.com/gpu": "2"}),
+    ]
+    with patch("dss.create_notebook.get_node_inventory", return_value=nodes):
+        actual_context = _get_notebook_config(NOTEBOOK_IMAGE, NOTEBOOK_NAME, mock_client, 2)
+        assert actual_context == {
+            **EXPECTED_CONTEXT_NVIDIA,
+            "gpu_count": 2,
+            "preferred_node": "gpu-node",
+        }
+
+
+@pytest.mark.parametrize(
+    "cpu, memory, guaranteed, expected_context",
+    (
+        ("500m", None, False, {**EXPECTED_CONTEXT, "resource_requests": {"cpu": "500m"}}),
+        (
+            "2",
+            "8Gi",
+            True,
+            {
+                **EXPECTED_CONTEXT,
+                "resource_requests": {"cpu": "2", "memory": "8Gi"},
+                "resource_limits": {"cpu": "2", "memory": "8Gi"},
+                "shm_size": "4Gi",
+            },
+        ),
+    ),
+)
+@patch("dss.create_notebook.get_mlflow_tracking_uri", return_value=MLFLOW_TRACKING_URI)
+def test_get_notebook_config_resources(
+    _, cpu, memory, guaranteed, expected_context, mock_client
+) -> None:
+    """
+    Test case to verify that CPU and memory requests and limits are added to the context.
+    """
+    with patch("dss.create_notebook.get_node_inventory", return_value=[_node()]):
+        actual_context = _get_notebook_config(
+            NOTEBOOK_IMAGE,
+            NOTEBOOK_NAME,
+            mock_client,
+            cpu=cpu,
+            memory=memory,
+            guaranteed=guaranteed,
+        )
+        assert actual_context == expected_context
+
+
+@patch("dss.create_notebook.get_mlflow_tracking_uri", return_value=MLFLOW_TRACKING_URI)
+def test_get_notebook_config_resources_invalid(_, mock_client, mock_logger) -> None:
+    """
+    Test case to verify that Guaranteed QoS without integer CPUs fails.
+    """
+    with patch("dss.create_notebook.get_node_inventory", return_value=[_node()]):
+        with pytest.raises(RuntimeError):
+            _get_notebook_config(
+                NOTEBOOK_IMAGE,
+                NOTEBOOK_NAME,
+                mock_client,
+                cpu="500m",
+                memory="1Gi",
+                guaranteed=True,
+            )
+
+
+def test_create_notebook_uses_install_state(
+    mock_read_install_state: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """
+    Test that the recorded install state replaces the PVC and MLflow checks.
+    """
+    install_state = {"version": "0.0", "namespaces": ["dss"]}
+    mock_read_install_state.return_value = install_state
+
+    with patch("dss.create_notebook.does_dss_pvc_exist") as mock_pvc, patch(
+        "dss.create_notebook.warn_on_version_skew"
+    ) as mock_warn_on_version_skew, patch(
+        "dss.create_notebook.get_notebook_resources",
+        return_value=NotebookResources(service=MagicMock()),
+    ), patch(
+        "dss.create_notebook.get_url_from_service", return_value=None
+    ):
+        with pytest.raises(RuntimeError):
+            create_notebook(name=NOTEBOOK_NAME, image=NOTEBOOK_IMAGE, lightkube_client=MagicMock())
+
+    mock_pvc.assert_not_called()
+    # The notebook exists, so the preflight passed
+    mock_logger.error.assert_called_with(
+        f"Failed to create Notebook. Notebook with name '{NOTEBOOK_NAME}' already exists."
+    )
+    mock_warn_on_version_skew.assert_called_once_with(install_state)
+
+
+def test_create_notebook_namespace_not_in_install_state(
+    mock_read_install_state: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """
+    Test that a namespace missing from the install state is reported as not initialized.
+    """
+    mock_read_install_state.return_value = {"namespaces": ["dss"]}
+
+    with patch(
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
+    ), patch("dss.create_notebook.warn_on_version_skew"):
+        with pytest.raises(RuntimeError):
+            create_notebook(
+                name=NOTEBOOK_NAME,
+                image=NOTEBOOK_IMAGE,
+                lightkube_client=MagicMock(),
+                namespace="alice",
+            )
+
+    mock_logger.error.assert_called_with(
+        "Failed to create notebook. DSS was not correctly initialized."
+    )
+
+
+@patch("dss.create_notebook.get_mlflow_tracking_uri", return_value=MLFLOW_TRACKING_URI)
+def test_create_notebook_not_schedulable(
+    _, mock_resource_handler: MagicMock, mock_logger: MagicMock
+) -> None:
+    """
+    Test that a notebook that fits on no node is refused before anything is applied.
+    """
+    nodes = [_node(allocatable={"cpu": "4", "memory": "8Gi"})]
+    usage = ClusterUsage(
+        requested={"node": {"cpu": 2, "memory": 4 * 2**30, "ephemeral-storage": 0, "gpu": 0}}
+    )
+
+    with patch("dss.create_notebook.does_dss_pvc_exist", return_value=True), patch(
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
+    ), patch("dss.create_notebook.get_node_inventory", return_value=nodes), patch(
+        "dss.create_notebook.get_cluster_usage", return_value=usage
+    ):
+        with pytest.raises(RuntimeError):
+            create_notebook(
+                name=NOTEBOOK_NAME,
+                image=NOTEBOOK_IMAGE,
+                lightkube_client=MagicMock(),
+                cpu="1",
+                memory="8Gi",
+            )
+
+    mock_logger.error.assert_any_call(
+        "Failed to create notebook. No node can schedule it (1 CPU, 8Gi memory):"
+    )
+    mock_logger.error.assert_called_with("  requested 8Gi memory, at most 4Gi free on a node")
+    mock_resource_handler.return_value.apply.assert_not_called()
+
+
+@patch("dss.create_notebook.get_mlflow_tracking_uri", return_value=MLFLOW_TRACKING_URI)
+def test_create_notebook_full_node_with_warm_pod(
+    _,
+    mock_read_install_state: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_resource_handler: MagicMock,
+    mock_wait_for_deployment_ready: MagicMock,
+) -> None:
+    """
+    Test that a notebook adopting a warm Pod is created on a node the warm Pod fills.
+    """
+    nodes = [_node(allocatable={"cpu": "1", "memory": "2Gi"})]
+    # The warm Pod requests all the resources of the node
+    usage = ClusterUsage(
+        requested={"node": {"cpu": 1, "memory": 2 * 2**30, "ephemeral-storage": 0, "gpu": 0}}
+    )
+    config = _get_notebook_config(
+        NOTEBOOK_IMAGE, NOTEBOOK_NAME, MagicMock(), None, cpu="1", memory="2Gi", nodes=nodes
+    )
+    mock_read_install_state.return_value = {
+        "namespaces": [DSS_NAMESPACE],
+        "components": {
+            "dss-warm-pool-pytorch": {"config": get_warm_pool_config_hash(config), "count": 1}
+        },
+    }
+
+    with patch(
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
+    ), patch("dss.create_notebook.warn_on_version_skew"), patch(
+        "dss.create_notebook.get_node_inventory", return_value=nodes
+    ), patch(
+        "dss.create_notebook.get_cluster_usage", return_value=usage
+    ) as mock_get_cluster_usage, patch(
+        "dss.create_notebook.adopt_warm_pod", return_value=True
+    ) as mock_adopt_warm_pod:
+        create_notebook(
+            name=NOTEBOOK_NAME,
+            image=NOTEBOOK_IMAGE,
+            lightkube_client=MagicMock(),
+            cpu="1",
+            memory="2Gi",
+        )
+
+    mock_adopt_warm_pod.assert_called_once()
+    mock_get_cluster_usage.assert_not_called()
+    mock_resource_handler.return_value.apply.assert_not_called()
+
+
+@patch("dss.create_notebook.get_mlflow_tracking_uri", return_value=MLFLOW_TRACKING_URI)
+def test_create_notebook_startup_estimate(
+    _,
+    mock_startup_history: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_resource_handler: MagicMock,
+    mock_wait_for_deployment_ready: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """
+    Test that the start time is estimated for the node the notebook prefers.
+    """
+    nodes = [
+        _node("small", allocatable={"cpu": "2", "memory": "4Gi"}, images={NOTEBOOK_IMAGE}),
+        _node("large", allocatable={"cpu": "16", "memory": "64Gi"}),
+    ]
+    mock_startup_history.return_value = 95.4
+
+    with patch("dss.create_notebook.does_dss_pvc_exist", return_value=True), patch(
+        "dss.create_notebook.get_notebook_resources", return_value=NotebookResources()
+    ), patch("dss.create_notebook.get_node_inventory", return_value=nodes), patch(
+        "dss.create_notebook.get_cluster_usage", return_value=ClusterUsage()
+    ):
+        create_notebook(
+            name=NOTEBOOK_NAME, image=NOTEBOOK_IMAGE, lightkube_client=MagicMock(), cpu="4"
+        )
+
+    # The node with the image cached is too small, so the image is pulled on the large node
+    assert mock_resource_handler.call_args.kwargs["context"]["preferred_node"] == "large"
+    mock_startup_history.assert_called_once_with(NOTEBOOK_IMAGE, False)
+    mock_logger.info.assert_any_call(
+        f"Image {NOTEBOOK_IMAGE} is not present on the node and will be pulled."
+    )
+    mock_logger.info.assert_any_call("Estimated start time: 95s.")
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from test_utils import FakeApiError
+
+from dss.config import DSS_NAMESPACE
+from dss.cull import cull_idle_notebooks, get_last_activity
+
+NOTEBOOK_URL = "http://10.0.0.1:80"
+
+
+def _timestamp(minutes_ago: int) -> str:
+    """Return a Jupyter API timestamp for the given number of minutes ago."""
+    value = datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+@pytest.fixture
+def mock_logger() -> MagicMock:
+    """
+    Fixture to mock the logger object.
+    """
+    with patch("dss.cull.logger") as mock_logger:
+        yield mock_logger
+
+
+@pytest.fixture
+def mock_stop_notebook() -> MagicMock:
+    """
+    Fixture to mock the stop_notebook function.
+    """
+    with patch("dss.cull.stop_notebook") as mock_stop_notebook:
+        yield mock_stop_notebook
+
+
+@pytest.fixture
+def mock_get_service_url() -> MagicMock:
+    """
+    Fixture to mock the get_service_url function.
+    """
+    with patch("dss.cull.get_service_url", return_value=NOTEBOOK_URL) as mock_get_service_url:
+        yield mock_get_service_url
+
+
+def _mock_deployment(name: str, replicas: int = 1, available: int = 1) -> MagicMock:
+    deployment = MagicMock()
+    deployment.metadata.name = name
+    deployment.spec.replicas = replicas
+    deployment.status.availableReplicas = available
+    return deployment
+
+
+def test_get_last_activity_uses_latest_timestamp(mock_logger):
+    """Test that the latest of the server and kernel activity is returned."""
+    status = {"last_activity": _timestamp(30)}
+    kernels = [{"execution_state": "idle", "last_activity": _timestamp(10)}]
+    with patch("dss.cull._get_json", side_effect=[status, kernels]):
+        last_activity = get_last_activity(NOTEBOOK_URL)
+
+    idle = datetime.now(timezone.utc) - last_activity
+    assert timedelta(minutes=9) < idle < timedelta(minutes=11)
+
+
+def test_get_last_activity_busy_kernel(mock_logger):
+    """Test that a busy kernel counts as current activity."""
+    status = {"last_activity": _timestamp(120)}
+    kernels = [{"execution_state": "busy", "last_activity": _timestamp(120)}]
+    with patch("dss.cull._get_json", side_effect=[status, kernels]):
+        last_activity = get_last_activity(NOTEBOOK_URL)
+
+    assert datetime.now(timezone.utc) - last_activity < timedelta(minutes=1)
+
+
+def test_get_last_activity_unreachable(mock_logger):
+    """Test that an unreachable server has no known activity."""
+    with patch("dss.cull._get_json", side_effect=OSError("connection refused")):
+        assert get_last_activity(NOTEBOOK_URL) is None
+
+
+def test_cull_idle_notebooks(mock_logger, mock_stop_notebook, mock_get_service_url):
+    """Test that only running notebooks idle for longer than the timeout are stopped."""
+    mock_client = MagicMock()
+    mock_client.list.return_value = [
+        _mock_deployment("idle"),
+        _mock_deployment("active"),
+        _mock_deployment("stopped", replicas=0, available=0),
+        _mock_deployment("unknown"),
+        _mock_deployment("new"),
+    ]
+    # A Deployment just created has no status yet
+    mock_client.list.return_value[-1].status = None
+    activity = {
+        "idle": datetime.now(timezone.utc) - timedelta(hours=2),
+        "active": datetime.now(timezone.utc) - timedelta(minutes=5),
+        "unknown": None,
+    }
+    mock_get_service_url.side_effect = lambda name, *_: name
+
+    with patch("dss.cull.get_last_activity", side_effect=lambda url: activity[url]):
+        culled = cull_idle_notebooks(mock_client, idle_timeout_seconds=3600)
+
+    assert culled == ["idle"]
+    mock_stop_notebook.assert_called_once_with("idle", mock_client, DSS_NAMESPACE, wait=False)
+
+
+def test_cull_idle_notebooks_list_failure(mock_logger, mock_stop_notebook):
+    """Test that a failure to list notebooks raises a RuntimeError."""
+    mock_client = MagicMock()
+    mock_client.list.side_effect = FakeApiError(500)
+
+    with pytest.raises(RuntimeError):
+        cull_idle_notebooks(mock_client, idle_timeout_seconds=3600)
+
+    mock_stop_notebook.assert_not_called()
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from lightkube.resources.core_v1 import Event
+
+from dss.describe import describe_notebook, get_startup_timeline
+from dss.utils import NotebookResources
+
+START = datetime(2024, 5, 1, 10, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def mock_logger() -> MagicMock:
+    """
+    Fixture to mock the logger object.
+    """
+    with patch("dss.describe.logger") as mock_logger:
+        yield mock_logger
+
+
+def _at(seconds: int) -> datetime:
+    """Return the time `seconds` after the creation of the Pod."""
+    return START + timedelta(seconds=seconds)
+
+
+def _pod(scheduled: int = 2, started: int = 40) -> MagicMock:
+    """Return a mock notebook Pod scheduled and started at the given seconds."""
+    pod = MagicMock()
+    pod.metadata.name = "nb-5d8f-x2x"
+    pod.metadata.namespace = "dss"
+    pod.metadata.creationTimestamp = START
+    pod.spec.nodeName = "node"
+    pod.status.conditions = [MagicMock(type="PodScheduled", status="True")]
+    pod.status.conditions[0].lastTransitionTime = _at(scheduled)
+    pod.status.containerStatuses = [MagicMock()]
+    pod.status.containerStatuses[0].state.running.startedAt = _at(started) if started else None
+    return pod
+
+
+def _event(reason: str, first: int, last: int, message: str = "") -> MagicMock:
+    """Return a mock Event of the Pod."""
+    return MagicMock(
+        reason=reason, firstTimestamp=_at(first), lastTimestamp=_at(last), message=message
+    )
+
+
+def test_get_startup_timeline() -> None:
+    """Test that the phases are derived from the conditions, the events and the container."""
+    events = [_event("Scheduled", 2, 2), _event("Pulling", 5, 5), _event("Pulled", 35, 35)]
+
+    phases = get_startup_timeline(_pod(), events, jupyter_ready=_at(50))
+
+    assert [(phase.name, phase.seconds) for phase in phases] == [
+        ("Scheduling", 2),
+        ("Volumes and sandbox", 3),
+        ("Image pull", 30),
+        ("Container start", 5),
+        ("Jupyter boot", 10),
+    ]
+
+
+def test_get_startup_timeline_cached_image() -> None:
+    """Test that there is no image pull phase when the image was cached on the node."""
+    events = [_event("Pulled", 4, 4, "Container image already present on machine")]
+
+    phases = get_startup_timeline(_pod(started=6), events)
+
+    assert [(phase.name, phase.seconds) for phase in phases] == [
+        ("Scheduling", 2),
+        ("Volumes and sandbox", 4),
+    ]
+
+
+def test_get_startup_timeline_pulling() -> None:
+    """Test that the phases that have not ended are left out."""
+    phases = get_startup_timeline(_pod(started=None), [_event("Pulling", 5, 5)])
+
+    assert [phase.name for phase in phases] == ["Scheduling", "Volumes and sandbox"]
+
+
+def test_get_startup_timeline_event_time() -> None:
+    """Test that the event time is used for events without first and last timestamps."""
+    pulled = _event("Pulled", 0, 0)
+    pulled.firstTimestamp = pulled.lastTimestamp = None
+    pulled.eventTime = _at(35)
+    events = [_event("Pulling", 5, 5), pulled]
+
+    phases = get_startup_timeline(_pod(), events)
+
+    assert [(phase.name, phase.seconds) for phase in phases][2] == ("Image pull", 30)
+
+
+@patch("dss.describe.get_deployment_state")
+def test_describe_notebook_timeline(_, mock_logger: MagicMock) -> None:
+    """Test that the timeline of the newest Pod is logged, with the Jupyter boot time."""
+    mock_client = MagicMock()
+    mock_client.list.side_effect = lambda resource, **kwargs: (
+        [_event("Pulling", 5, 5), _event("Pulled", 35, 35)] if resource is Event else [_pod()]
+    )
+    mock_client.log.return_value = iter(
+        [
+            "2024-05-01T10:00:41.5Z [I ServerApp] Extension loaded",
+            "2024-05-01T10:00:50.1Z [I ServerApp] Jupyter Server 2.0 is running at:",
+        ]
+    )
+    resources = NotebookResources(deployment=MagicMock(), service=None)
+
+    with patch("dss.describe.get_notebook_resources", return_value=resources):
+        describe_notebook(mock_client, "nb", timeline=True)
+
+    timeline = mock_logger.info.call_args_list[-1].args[0]
+    assert timeline.startswith("Startup timeline:")
+    assert "| Jupyter boot        | +40s  | 10s      |" in timeline
+    assert mock_client.list.call_args.kwargs["fields"] == {"involvedObject.name": "nb-5d8f-x2x"}
+
+
+def test_describe_notebook_not_found(mock_logger: MagicMock) -> None:
+    """Test that describing a missing notebook fails."""
+    with patch("dss.describe.get_notebook_resources", return_value=NotebookResources()):
+        with pytest.raises(RuntimeError):
+            describe_notebook(MagicMock(), "nb")
+
+    mock_logger.error.assert_called_once_with(
+        "Failed to describe notebook. Notebook nb does not exist."
+    )
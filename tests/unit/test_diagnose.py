@@ -0,0 +1,144 @@
+import json
+import tarfile
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from lightkube.resources.core_v1 import Node, Pod, Service
+
+from dss.diagnose import collect_diagnostics
+
+
+@pytest.fixture(autouse=True)
+def mock_dss_log_tail() -> MagicMock:
+    """
+    Fixture to mock the end of the DSS log file.
+    """
+    with patch("dss.diagnose._get_dss_log_tail", return_value="dss log\n") as mock:
+        yield mock
+
+
+def _pod(name: str, restarts: int) -> MagicMock:
+    """Return a mock Pod with a single container."""
+    pod = MagicMock()
+    pod.metadata.name = name
+    pod.status.containerStatuses = [MagicMock(restartCount=restarts)]
+    pod.status.containerStatuses[0].name = "main"
+    pod.to_dict.return_value = {"metadata": {"name": name}}
+    return pod
+
+
+def _read_bundle(path) -> dict:
+    """Return the content of each file of a bundle, by its name without the bundle directory."""
+    with tarfile.open(path, "r:gz") as bundle:
+        return {
+            member.name.split("/", 1)[1]: bundle.extractfile(member).read().decode()
+            for member in bundle.getmembers()
+        }
+
+
+def test_collect_diagnostics(tmp_path) -> None:
+    """Test that objects, nodes and current and previous logs are collected in the bundle."""
+    node = MagicMock()
+    node.metadata.name = "node"
+    node.metadata.labels = {"nvidia.com/gpu.present": "true"}
+    node.status.capacity = {"cpu": "8"}
+    node.status.allocatable = {"cpu": "7"}
+
+    def list_objects(resource, namespace=None, chunk_size=None):
+        if resource is Pod:
+            return [_pod("nb-1", restarts=0), _pod("nb-2", restarts=2)]
+        if resource is Node:
+            return [node]
+        return []
+
+    mock_client = MagicMock()
+    mock_client.list.side_effect = list_objects
+    mock_client.log.side_effect = lambda name, **kwargs: iter([f"{name} line\n"])
+    mock_client._client.send.return_value.text = "crashed\n"
+
+    output_file = collect_diagnostics(mock_client, "alice", str(tmp_path / "bundle.tar.gz"))
+
+    files = _read_bundle(output_file)
+    assert json.loads(files["alice/pods.json"]) == [
+        {"metadata": {"name": "nb-1"}},
+        {"metadata": {"name": "nb-2"}},
+    ]
+    assert json.loads(files["dss/services.json"]) == []
+    assert json.loads(files["nodes.json"]) == [
+        {
+            "name": "node",
+            "labels": {"nvidia.com/gpu.present": "true"},
+            "capacity": {"cpu": "8"},
+            "allocatable": {"cpu": "7"},
+        }
+    ]
+    assert files["alice/logs/nb-1.main.log"] == "nb-1 line\n"
+    assert files["alice/logs/nb-2.main.previous.log"] == "crashed\n"
+    assert "alice/logs/nb-1.main.previous.log" not in files
+    assert files["dss.log"] == "dss log\n"
+    timings = json.loads(files["timings.json"])
+    assert "duration_ms" in timings["alice/logs/nb-2.main.log"]
+    assert "total" in timings
+
+
+def test_collect_diagnostics_deadline(tmp_path) -> None:
+    """Test that the bundle is written at the deadline, reporting what was not collected."""
+    unblock = threading.Event()
+
+    def list_objects(resource, namespace=None, chunk_size=None):
+        if resource is Service:
+            unblock.wait()
+        return []
+
+    mock_client = MagicMock()
+    mock_client.list.side_effect = list_objects
+
+    try:
+        output_file = collect_diagnostics(
+            mock_client, "dss", str(tmp_path / "bundle.tar.gz"), deadline_seconds=0.2
+        )
+    finally:
+        unblock.set()
+
+    files = _read_bundle(output_file)
+    assert "dss/services.json" not in files
+    assert "dss/pods.json" in files
+    timings = json.loads(files["timings.json"])
+    assert timings["dss/services.json"]["error"] == "not collected within 0.2 seconds"
+
+
+def test_collect_diagnostics_deadline_queued(tmp_path) -> None:
+    """Test that requests still queued at the deadline are reported as not collected."""
+    unblock = threading.Event()
+
+    def list_objects(resource, namespace=None, chunk_size=None):
+        unblock.wait()
+        return []
+
+    mock_client = MagicMock()
+    mock_client.list.side_effect = list_objects
+
+    # The only worker is blocked, so every other request is cancelled at the deadline
+    with patch("dss.diagnose.DIAGNOSE_MAX_WORKERS", 1):
+        try:
+            output_file = collect_diagnostics(
+                mock_client, "dss", str(tmp_path / "bundle.tar.gz"), deadline_seconds=0.2
+            )
+        finally:
+            unblock.set()
+
+    timings = json.loads(_read_bundle(output_file)["timings.json"])
+    assert timings["nodes.json"]["error"] == "not collected within 0.2 seconds"
+    assert timings["dss/events.json"]["error"] == "not collected within 0.2 seconds"
+
+
+def test_collect_diagnostics_failed_request(tmp_path) -> None:
+    """Test that a failed request is reported without failing the whole collection."""
+    mock_client = MagicMock()
+    mock_client.list.side_effect = Exception("forbidden")
+
+    output_file = collect_diagnostics(mock_client, "dss", str(tmp_path / "bundle.tar.gz"))
+
+    timings = json.loads(_read_bundle(output_file)["timings.json"])
+    assert timings["nodes.json"]["error"] == "forbidden"
@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from dss.config import INSTALL_STATE_SCHEMA_VERSION
+from dss.doctor import run_doctor
+
+STATE = {
+    "schema": INSTALL_STATE_SCHEMA_VERSION,
+    "version": "0.1",
+    "components": {"mlflow": {"image": "mlflow:1"}},
+    "manifests": {},
+    "accelerators": {"nvidia": None, "intel": None},
+    "storage_classes": {"standard": True},
+    "namespaces": ["dss"],
+}
+
+
+@pytest.fixture
+def mock_logger() -> MagicMock:
+    """
+    Fixture to mock the logger object.
+    """
+    with patch("dss.doctor.logger") as mock_logger:
+        yield mock_logger
+
+
+@pytest.fixture(autouse=True)
+def mock_get_dss_version() -> MagicMock:
+    """
+    Fixture to mock the version of the CLI.
+    """
+    with patch("dss.doctor.get_dss_version", return_value="0.1") as mock:
+        yield mock
+
+
+def test_run_doctor_no_install_state(mock_logger: MagicMock) -> None:
+    """Test that a missing install state fails the check."""
+    with patch("dss.doctor.read_install_state", return_value=None):
+        with pytest.raises(RuntimeError):
+            run_doctor(MagicMock())
+
+    mock_logger.error.assert_called_with(
+        "No install state found. DSS was not initialized by this CLI."
+    )
+
+
+def test_run_doctor_reads_state_only(mock_logger: MagicMock) -> None:
+    """Test that without --deep only the install state is read."""
+    mock_client = MagicMock()
+    with patch("dss.doctor.read_install_state", return_value=STATE):
+        run_doctor(mock_client)
+
+    mock_client.get.assert_not_called()
+    mock_client.list.assert_not_called()
+    mock_logger.info.assert_called_with("All 2 checks passed.")
+
+
+def test_run_doctor_deep(mock_logger: MagicMock) -> None:
+    """Test that --deep reports the objects that do not match the install state."""
+    mock_client = MagicMock()
+    mock_client.get.return_value.spec.template.spec.containers = [MagicMock(image="mlflow:2")]
+    with patch("dss.doctor.read_install_state", return_value=STATE), patch(
+        "dss.doctor.does_dss_pvc_exist", return_value=True
+    ), patch("dss.doctor.get_accelerators", return_value={"nvidia": None, "intel": None}), patch(
+        "dss.doctor.get_storage_classes", return_value={}
+    ):
+        with pytest.raises(RuntimeError):
+            run_doctor(mock_client, deep=True)
+
+    table = mock_logger.info.call_args_list[0].args[0]
+    rows = {
+        cells[0]: cells[1]
+        for cells in (
+            [cell.strip() for cell in line.strip("|").split("|")]
+            for line in table.splitlines()
+            if line.startswith("|")
+        )
+    }
+    assert rows["Notebooks PVC (dss)"] == "OK"
+    assert rows["Deployment mlflow"] == "FAIL"
+    assert rows["Storage classes"] == "FAIL"
+    assert rows["Manifests"] == "OK"
+    mock_logger.error.assert_called_with("2 of 8 checks failed.")
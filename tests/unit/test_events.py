@@ -0,0 +1,145 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from lightkube.resources.apps_v1 import ReplicaSet
+from lightkube.resources.core_v1 import Event, Pod
+from test_utils import FakeApiError
+
+from dss.events import EventPrinter, NotebookEventFilter, get_events
+
+
+@pytest.fixture
+def mock_logger() -> MagicMock:
+    """
+    Fixture to mock the logger object.
+    """
+    with patch("dss.events.logger") as mock_logger:
+        yield mock_logger
+
+
+def _event(
+    uid: str,
+    kind: str,
+    name: str,
+    reason: str = "Pulling",
+    message: str = "Pulling image",
+    count: int = 1,
+    minute: int = 0,
+) -> MagicMock:
+    """Return a mock Event about an object."""
+    event = MagicMock()
+    event.metadata.uid = uid
+    event.involvedObject.kind = kind
+    event.involvedObject.name = name
+    event.reason = reason
+    event.message = message
+    event.count = count
+    event.type = "Normal"
+    event.lastTimestamp = datetime(2024, 5, 1, 10, minute, tzinfo=timezone.utc)
+    return event
+
+
+def _named(name: str) -> MagicMock:
+    """Return a mock object with the given name."""
+    obj = MagicMock()
+    obj.metadata.name = name
+    return obj
+
+
+def test_notebook_event_filter() -> None:
+    """Test that events about the objects of the notebook are matched, and no others."""
+    mock_client = MagicMock()
+    mock_client.list.side_effect = lambda resource, **kwargs: {
+        ReplicaSet: [_named("nb-5d8f")],
+        Pod: [_named("nb-5d8f-x2x")],
+    }[resource]
+    event_filter = NotebookEventFilter(mock_client, "nb")
+
+    assert event_filter.matches(_event("1", "Deployment", "nb"))
+    assert event_filter.matches(_event("2", "Pod", "nb-5d8f-x2x"))
+    assert not event_filter.matches(_event("3", "Pod", "other-5d8f-x2x"))
+    assert mock_client.list.call_count == 2
+
+
+def test_notebook_event_filter_new_pod() -> None:
+    """Test that a Pod created after the filter is matched after listing the Pods again."""
+    mock_client = MagicMock()
+    mock_client.list.return_value = []
+    event_filter = NotebookEventFilter(mock_client, "nb")
+    mock_client.list.side_effect = lambda resource, **kwargs: (
+        [_named("nb-5d8f-abc")] if resource is Pod else []
+    )
+
+    assert event_filter.matches(_event("1", "Pod", "nb-5d8f-abc"))
+    # A Pod of another notebook whose name starts with the notebook name is checked only once
+    assert not event_filter.matches(_event("2", "Pod", "nb-other-5d8f-abc"))
+    assert not event_filter.matches(_event("3", "Pod", "nb-other-5d8f-abc"))
+    assert mock_client.list.call_count == 6
+
+
+def test_event_printer_dedupes(mock_logger: MagicMock) -> None:
+    """Test that occurrences already shown and repetitions within the interval are skipped."""
+    printer = EventPrinter(repeat_interval_seconds=60)
+
+    assert printer.print_event(_event("1", "Pod", "nb-x", reason="BackOff", message="Back-off"))
+    assert not printer.print_event(
+        _event("1", "Pod", "nb-x", reason="BackOff", message="Back-off")
+    )
+    assert not printer.print_event(
+        _event("1", "Pod", "nb-x", reason="BackOff", message="Back-off", count=2)
+    )
+    mock_logger.info.assert_called_once_with("10:00:00 Normal  Pod/nb-x: BackOff: Back-off")
+
+    printer.repeat_interval_seconds = 0
+    assert printer.print_event(
+        _event("1", "Pod", "nb-x", reason="BackOff", message="Back-off", count=3)
+    )
+    mock_logger.info.assert_called_with("10:00:00 Normal  Pod/nb-x: BackOff: Back-off (x3)")
+
+
+def test_get_events_sorted(mock_logger: MagicMock) -> None:
+    """Test that the events are logged oldest first."""
+    mock_client = MagicMock()
+    mock_client.list.return_value = [
+        _event("1", "Pod", "nb-x", reason="Pulled", minute=5),
+        _event("2", "Pod", "nb-x", reason="Scheduled", minute=1),
+    ]
+
+    get_events(mock_client)
+
+    assert [call.args[0].split(": ")[1] for call in mock_logger.info.call_args_list] == [
+        "Scheduled",
+        "Pulled",
+    ]
+    mock_client.watch.assert_not_called()
+
+
+def test_get_events_follow(mock_logger: MagicMock) -> None:
+    """Test that followed events already listed or deleted are not logged again."""
+    listed = _event("1", "Pod", "nb-x", reason="Scheduled")
+    mock_client = MagicMock()
+    mock_client.list.return_value = [listed]
+    mock_client.watch.return_value = iter(
+        [
+            ("ADDED", listed),
+            ("ADDED", _event("2", "Pod", "nb-x", reason="Pulled")),
+            ("DELETED", _event("3", "Pod", "nb-x", reason="Killing")),
+        ]
+    )
+
+    get_events(mock_client, follow=True)
+
+    assert mock_logger.info.call_count == 2
+    mock_client.watch.assert_called_once_with(Event, namespace="dss")
+
+
+def test_get_events_api_error(mock_logger: MagicMock) -> None:
+    """Test that API errors are reported."""
+    mock_client = MagicMock()
+    mock_client.list.side_effect = FakeApiError(403)
+
+    with pytest.raises(RuntimeError):
+        get_events(mock_client)
+
+    mock_logger.error.assert_called_once()
@@ -0,0 +1,113 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from lightkube.resources.core_v1 import Node
+from lightkube.types import PatchType
+from test_utils import FakeApiError
+
+from dss.config import GPU_SHARING_CONFIG_KEY, GPU_SHARING_CONFIG_NAME
+from dss.gpu_sharing import ClusterPolicy, configure_gpu_sharing, get_gpu_slots, parse_gpu_sharing
+
+
+@pytest.fixture
+def mock_resource_handler() -> MagicMock:
+    """
+    Fixture to mock the KubernetesResourceHandler class.
+    """
+    with patch("dss.gpu_sharing.KubernetesResourceHandler") as mock_handler:
+        yield mock_handler
+
+
+@pytest.fixture
+def mock_logger() -> MagicMock:
+    """
+    Fixture to mock the logger object.
+    """
+    with patch("dss.gpu_sharing.logger") as mock_logger:
+        yield mock_logger
+
+
+@pytest.mark.parametrize(
+    "gpu_sharing, expected",
+    [
+        ("timeslice:4", ("timeslice", "4")),
+        ("mig:all-1g.5gb", ("mig", "all-1g.5gb")),
+    ],
+)
+def test_parse_gpu_sharing(gpu_sharing, expected):
+    """Test that valid GPU sharing specifications are parsed."""
+    assert parse_gpu_sharing(gpu_sharing) == expected
+
+
+@pytest.mark.parametrize(
+    "gpu_sharing", ["timeslice", "timeslice:1", "timeslice:x", "mig:", "mps:2"]
+)
+def test_parse_gpu_sharing_invalid(gpu_sharing):
+    """Test that invalid GPU sharing specifications are rejected."""
+    with pytest.raises(ValueError):
+        parse_gpu_sharing(gpu_sharing)
+
+
+def test_configure_gpu_sharing_timeslice(mock_resource_handler, mock_logger):
+    """Test that time-slicing renders the config and points the ClusterPolicy to it."""
+    mock_client = MagicMock()
+
+    configure_gpu_sharing(mock_client, "timeslice:4")
+
+    context = mock_resource_handler.call_args.kwargs["context"]
+    assert context["replicas"] == "4"
+    assert context["mig_profile"] is None
+    mock_resource_handler.return_value.apply.assert_called_once()
+    mock_client.patch.assert_called_once_with(
+        ClusterPolicy,
+        "cluster-policy",
+        {
+            "spec": {
+                "devicePlugin": {
+                    "config": {"name": GPU_SHARING_CONFIG_NAME, "default": GPU_SHARING_CONFIG_KEY}
+                }
+            }
+        },
+        patch_type=PatchType.MERGE,
+    )
+
+
+def test_configure_gpu_sharing_mig(mock_resource_handler, mock_logger):
+    """Test that MIG labels the GPU nodes with the requested profile."""
+    mock_client = MagicMock()
+    node = MagicMock()
+    node.metadata.name = "gpu-node"
+    mock_client.list.return_value = [node]
+
+    configure_gpu_sharing(mock_client, "mig:all-1g.5gb")
+
+    mock_client.patch.assert_called_with(
+        Node, "gpu-node", {"metadata": {"labels": {"nvidia.com/mig.config": "all-1g.5gb"}}}
+    )
+
+
+def test_configure_gpu_sharing_no_operator(mock_resource_handler, mock_logger):
+    """Test that a missing GPU operator fails before applying anything."""
+    mock_client = MagicMock()
+    mock_client.get.side_effect = FakeApiError(404)
+
+    with pytest.raises(RuntimeError):
+        configure_gpu_sharing(mock_client, "timeslice:2")
+
+    mock_resource_handler.return_value.apply.assert_not_called()
+    mock_logger.error.assert_called_with(
+        "Failed to configure GPU sharing. NVIDIA GPU operator was not found."
+    )
+
+
+@pytest.mark.parametrize(
+    "labels, expected_slots",
+    [
+        ({"nvidia.com/gpu.count": "1"}, 1),
+        ({"nvidia.com/gpu.count": "2", "nvidia.com/gpu.replicas": "4"}, 8),
+        ({}, None),
+    ],
+)
+def test_get_gpu_slots(labels, expected_slots):
+    """Test the number of GPU slots computed from node labels."""
+    assert get_gpu_slots(labels) == expected_slots
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from dss.config import NOTEBOOK_IMAGES_ALIASES
+from dss.describe import TimelinePhase
+from dss.history import (
+    OperationHistory,
+    estimate_startup_seconds,
+    get_stats,
+    get_stats_table,
+    record_operation,
+)
+
+START = datetime(2024, 5, 1, 10, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def mock_logger() -> MagicMock:
+    """
+    Fixture to mock the logger object.
+    """
+    with patch("dss.history.logger") as mock_logger:
+        yield mock_logger
+
+
+def _phases(pull_seconds: int, start_seconds: int) -> list:
+    """Return a startup timeline with the given pull and remaining durations."""
+    pulled = START + timedelta(seconds=pull_seconds)
+    phases = [TimelinePhase("Image pull", START, pulled)] if pull_seconds else []
+    return phases + [
+        TimelinePhase("Container start", pulled, pulled + timedelta(seconds=start_seconds))
+    ]
+
+
+def _get_operations(history_file: Path, **kwargs) -> list:
+    """Return the operations recorded in the history file."""
+    history = OperationHistory(history_file)
+    try:
+        return history.get_operations(**kwargs)
+    finally:
+        history.close()
+
+
+def test_record_operation(tmp_path: Path) -> None:
+    """Test that an operation is recorded with the duration of each phase."""
+    history_file = tmp_path / "history.db"
+
+    record_operation(
+        "create",
+        75.0,
+        image="image",
+        node="node",
+        phases=_phases(60, 10),
+        history_file=history_file,
+    )
+
+    (operation,) = _get_operations(history_file)
+    assert operation[1:] == (
+        "create",
+        "image",
+        "node",
+        "success",
+        75.0,
+        {"Image pull": 60.0, "Container start": 10.0},
+    )
+
+
+def test_get_operations_since(tmp_path: Path) -> None:
+    """Test that only the operations recorded within the window are returned."""
+    history_file = tmp_path / "history.db"
+    record_operation("stop", 1.0, history_file=history_file)
+
+    assert len(_get_operations(history_file, since=datetime.now(timezone.utc) - timedelta(1))) == 1
+    assert _get_operations(history_file, since=datetime.now(timezone.utc) + timedelta(1)) == []
+
+
+def test_estimate_startup_seconds(tmp_path: Path) -> None:
+    """Test that the estimate only includes the pull when the image is not cached."""
+    history_file = tmp_path / "history.db"
+    for pull_seconds, start_seconds in ((60, 10), (0, 20), (80, 12)):
+        record_operation(
+            "create",
+            pull_seconds + start_seconds,
+            image="image",
+            phases=_phases(pull_seconds, start_seconds),
+            history_file=history_file,
+        )
+    record_operation("create", 1.0, "OOMKilled", image="image", history_file=history_file)
+
+    assert estimate_startup_seconds("image", cached=True, history_file=history_file) == 12
+    assert estimate_startup_seconds("image", cached=False, history_file=history_file) == 72
+    assert estimate_startup_seconds("other", cached=True, history_file=history_file) is None
+
+
+def test_estimate_startup_seconds_no_pull(tmp_path: Path) -> None:
+    """Test that there is no estimate for an uncached image that was never pulled."""
+    history_file = tmp_path / "history.db"
+    record_operation(
+        "create", 20.0, image="image", phases=_phases(0, 20), history_file=history_file
+    )
+
+    assert estimate_startup_seconds("image", cached=False, history_file=history_file) is None
+    assert estimate_startup_seconds("image", cached=True, history_file=history_file) == 20
+
+
+def test_get_stats_table(tmp_path: Path) -> None:
+    """Test that the percentiles are reported per image alias, operation and phase."""
+    history_file = tmp_path / "history.db"
+    image = NOTEBOOK_IMAGES_ALIASES["pytorch"]
+    for seconds in range(1, 11):
+        record_operation(
+            "create", seconds, image=image, phases=_phases(seconds, 1), history_file=history_file
+        )
+    record_operation("create", 1.0, "OOMKilled", image=image, history_file=history_file)
+
+    rows = [
+        [cell.strip() for cell in line.split("|")[1:-1]]
+        for line in get_stats_table(_get_operations(history_file)).get_string().splitlines()[3:-1]
+    ]
+
+    assert rows == [
+        ["pytorch", "create", "10", "1", "5.0s", "9.0s", "10.0s"],
+        ["pytorch", "Container start", "10", "", "1.0s", "1.0s", "1.0s"],
+        ["pytorch", "Image pull", "10", "", "5.0s", "9.0s", "10.0s"],
+    ]
+
+
+def test_get_stats_empty(tmp_path: Path, mock_logger: MagicMock) -> None:
+    """Test that an empty history is reported."""
+    get_stats(timedelta(days=7), history_file=tmp_path / "history.db")
+
+    mock_logger.info.assert_called_once_with(
+        "No operations recorded yet. dss create, start and stop record their timings."
+    )
@@ -1,6 +1,9 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
+from lightkube.models.core_v1 import Namespace
+from lightkube.models.meta_v1 import ObjectMeta
+from test_utils import FakeApiError
 
 from dss.config import DEFAULT_NOTEBOOK_IMAGE
 from dss.initialize import initialize
@@ -24,6 +27,15 @@ def mock_resource_handler() -> MagicMock:
         yield mock_handler
 
 
+@pytest.fixture
+def mock_record_install_state() -> MagicMock:
+    """
+    Fixture to mock the record_install_state function.
+    """
+    with patch("dss.initialize.record_install_state") as mock:
+        yield mock
+
+
 @pytest.fixture
 def mock_logger() -> MagicMock:
     """
@@ -36,6 +48,7 @@ def mock_logger() -> MagicMock:
 def test_initialize_success(
     mock_client: MagicMock,
     mock_resource_handler: MagicMock,
+    mock_record_install_state: MagicMock,
     mock_logger: MagicMock,
 ) -> None:
     """
@@ -56,6 +69,7 @@ def test_initialize_success(
 
         # Assertions
         mock_resource_handler_instance.apply.assert_called_once()
+        mock_record_install_state.assert_called_once()
         mock_wait_for_deployment_ready.assert_called_once_with(
             mock_client_instance, namespace="dss", deployment_name="mlflow"
         )
@@ -65,3 +79,74 @@ def test_initialize_success(
             "  dss create my-notebook --image=pytorch\n"
             f"  dss create my-notebook --image={DEFAULT_NOTEBOOK_IMAGE}\n"
         )
+
+
+def test_initialize_tenant_namespace(
+    mock_client: MagicMock,
+    mock_resource_handler: MagicMock,
+    mock_record_install_state: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """
+    Test case to verify that a tenant namespace gets its own PVC and shares MLflow.
+    """
+    mock_client_instance = MagicMock()
+    mock_client_instance.get.side_effect = FakeApiError(404)
+
+    with patch("dss.initialize.wait_for_deployment_ready") as mock_wait_for_deployment_ready:
+        initialize(lightkube_client=mock_client_instance, namespace="alice")
+
+        contexts = [call.kwargs["context"] for call in mock_resource_handler.call_args_list]
+        assert [context["namespace"] for context in contexts] == ["dss", "alice"]
+        template_files = mock_resource_handler.call_args_list[1].kwargs["template_files"]
+        assert [path.name for path in template_files] == ["dss_core.yaml.j2"]
+        assert mock_resource_handler.return_value.apply.call_count == 2
+        assert mock_record_install_state.call_args.args[3] == "alice"
+        mock_wait_for_deployment_ready.assert_called_once_with(
+            mock_client_instance, namespace="dss", deployment_name="mlflow"
+        )
+
+
+@pytest.mark.parametrize("labels", [None, {"app.kubernetes.io/part-of": "other"}])
+def test_initialize_existing_namespace(
+    labels,
+    mock_resource_handler: MagicMock,
+    mock_record_install_state: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """
+    Test case to verify that a namespace not created by DSS is not labelled as part of DSS.
+    """
+    mock_client_instance = MagicMock()
+    mock_client_instance.get.return_value = Namespace(
+        metadata=ObjectMeta(name="default", labels=labels)
+    )
+
+    with pytest.raises(RuntimeError):
+        initialize(lightkube_client=mock_client_instance, namespace="default")
+
+    mock_logger.error.assert_called_with(
+        "Failed to initialize DSS. Namespace default already exists and was not created by DSS."
+    )
+    mock_resource_handler.return_value.apply.assert_not_called()
+    mock_record_install_state.assert_not_called()
+
+
+def test_initialize_namespace_created_by_dss(
+    mock_resource_handler: MagicMock,
+    mock_record_install_state: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """
+    Test case to verify that a tenant namespace created by DSS can be initialized again.
+    """
+    mock_client_instance = MagicMock()
+    mock_client_instance.get.return_value = Namespace(
+        metadata=ObjectMeta(name="alice", labels={"app.kubernetes.io/part-of": "dss"})
+    )
+
+    with patch("dss.initialize.wait_for_deployment_ready"):
+        initialize(lightkube_client=mock_client_instance, namespace="alice")
+
+    assert mock_resource_handler.return_value.apply.call_count == 2
+    mock_record_install_state.assert_called_once()
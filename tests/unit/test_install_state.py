@@ -0,0 +1,123 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from lightkube.resources.core_v1 import ConfigMap
+from test_utils import FakeApiError
+
+from dss.config import (
+    DSS_NAMESPACE,
+    FIELD_MANAGER,
+    INSTALL_STATE_CONFIGMAP_NAME,
+    INSTALL_STATE_KEY,
+    INSTALL_STATE_SCHEMA_VERSION,
+)
+from dss.install_state import (
+    get_storage_classes,
+    read_install_state,
+    record_install_state,
+    warn_on_version_skew,
+)
+from dss.nodes import NVIDIA_NODE_LABELS, NodeInfo
+
+
+def test_read_install_state() -> None:
+    """Test that the install state is read from the ConfigMap with a single request."""
+    mock_client = MagicMock()
+    mock_client.get.return_value.data = {INSTALL_STATE_KEY: json.dumps({"version": "0.1"})}
+
+    assert read_install_state(mock_client) == {"version": "0.1"}
+    mock_client.get.assert_called_once_with(
+        ConfigMap, name=INSTALL_STATE_CONFIGMAP_NAME, namespace=DSS_NAMESPACE
+    )
+
+
+@pytest.mark.parametrize("data", [None, {}, {INSTALL_STATE_KEY: "not json"}])
+def test_read_install_state_invalid(data) -> None:
+    """Test that a ConfigMap without a valid state is ignored."""
+    mock_client = MagicMock()
+    mock_client.get.return_value.data = data
+
+    assert read_install_state(mock_client) is None
+
+
+def test_read_install_state_missing() -> None:
+    """Test that a missing ConfigMap means there is no install state."""
+    mock_client = MagicMock()
+    mock_client.get.side_effect = FakeApiError(404)
+
+    assert read_install_state(mock_client) is None
+
+
+def test_get_storage_classes_forbidden() -> None:
+    """Test that StorageClasses that cannot be listed are not recorded."""
+    mock_client = MagicMock()
+    mock_client.list.side_effect = FakeApiError(403)
+
+    assert get_storage_classes(mock_client) == {}
+
+
+@patch("dss.install_state.get_dss_version", return_value="0.1")
+@patch("dss.install_state.get_storage_classes", return_value={"standard": True})
+def test_record_install_state(_, __, tmp_path) -> None:
+    """Test that the state is written and keeps the namespaces initialized before."""
+    manifest = tmp_path / "dss_core.yaml.j2"
+    manifest.write_text("kind: Namespace")
+    mock_client = MagicMock()
+    nodes = [NodeInfo(name="node", labels={label: "true" for label in NVIDIA_NODE_LABELS})]
+
+    with patch(
+        "dss.install_state.read_install_state", return_value={"namespaces": ["dss", "bob"]}
+    ), patch("dss.install_state.get_node_inventory", return_value=nodes):
+        state = record_install_state(
+            mock_client, [manifest], {"mlflow": {"image": "mlflow:1"}}, "alice"
+        )
+
+    assert state["schema"] == INSTALL_STATE_SCHEMA_VERSION
+    assert state["version"] == "0.1"
+    assert state["namespaces"] == ["alice", "bob", "dss"]
+    assert state["accelerators"] == {"nvidia": "NVIDIA GPU", "intel": None}
+    assert list(state["manifests"]) == ["dss_core.yaml.j2"]
+    config_map = mock_client.apply.call_args.args[0]
+    assert json.loads(config_map.data[INSTALL_STATE_KEY]) == state
+    assert mock_client.apply.call_args.kwargs == {"field_manager": FIELD_MANAGER, "force": True}
+
+
+@pytest.mark.parametrize("installed, warned", [("0.1", False), ("0.0", True)])
+def test_warn_on_version_skew(installed: str, warned: bool) -> None:
+    """Test that a warning is logged only when the versions differ."""
+    with patch("dss.install_state.get_dss_version", return_value="0.1"), patch(
+        "dss.install_state.logger"
+    ) as mock_logger:
+        warn_on_version_skew({"version": installed})
+
+    assert mock_logger.warning.called == warned
+
+
+@patch("dss.install_state.get_dss_version", return_value="0.1")
+@patch("dss.install_state.get_storage_classes", return_value={})
+@patch("dss.install_state.get_node_inventory", return_value=[])
+def test_record_install_state_second_namespace(_, __, ___, tmp_path) -> None:
+    """Test that initializing a second namespace keeps the components recorded before."""
+    manifest = tmp_path / "dss_core.yaml.j2"
+    manifest.write_text("kind: Namespace")
+    previous = {
+        "namespaces": ["dss"],
+        "components": {
+            "mlflow": {"image": "mlflow:1"},
+            "gpu-sharing": {"spec": "timeslice:4"},
+            "dss-warm-pool-pytorch": {"config": "abc", "count": 1, "namespace": "dss"},
+        },
+    }
+
+    with patch("dss.install_state.read_install_state", return_value=previous):
+        state = record_install_state(
+            MagicMock(), [manifest], {"mlflow": {"image": "mlflow:2"}}, "alice"
+        )
+
+    assert state["namespaces"] == ["alice", "dss"]
+    assert state["components"] == {
+        "mlflow": {"image": "mlflow:2"},
+        "gpu-sharing": {"spec": "timeslice:4"},
+        "dss-warm-pool-pytorch": {"config": "abc", "count": 1, "namespace": "dss"},
+    }
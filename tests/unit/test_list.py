@@ -3,9 +3,10 @@ from unittest.mock import MagicMock, patch
 import pytest
 from lightkube import ApiError
 from lightkube.resources.apps_v1 import Deployment
+from lightkube.resources.core_v1 import Pod, Service
 
 from dss.config import NOTEBOOK_LABEL, DeploymentState
-from dss.list import list_notebooks
+from dss.list import TERMINAL_COLUMN_WIDTHS, list_notebooks, list_notebooks_all_contexts
 
 TEST_IMAGE = "deployment_image"
 TEST_DEPLOYMENT_NAME = "notebook_name"
@@ -25,7 +26,10 @@ def mock_deployment() -> MagicMock:
     deployment = MagicMock(spec=Deployment)
     deployment.metadata.name = TEST_DEPLOYMENT_NAME
     deployment.metadata.labels = {NOTEBOOK_LABEL: TEST_DEPLOYMENT_NAME}
-    deployment.spec.template.spec.containers = [MagicMock(image=TEST_IMAGE)]
+    deployment.spec.template.spec.containers = [
+        MagicMock(image=TEST_IMAGE, resources=MagicMock(limits={}))
+    ]
+    deployment.spec.template.spec.volumes = []
     deployment.spec.replicas = 1
     deployment.status.replicas = 1
     deployment.status.availableReplicas = 1
@@ -42,7 +46,7 @@ def mock_get_deployment_state() -> MagicMock:
 @pytest.fixture
 def mock_get_service_url() -> MagicMock:
     """Mock the service URL retrieval function."""
-    with patch("dss.list.get_service_url") as mock:
+    with patch("dss.list.get_url_from_service") as mock:
         yield mock
 
 
@@ -60,6 +64,22 @@ def mock_pretty_table() -> MagicMock:
         yield mock.return_value
 
 
+def _service(deployment: MagicMock) -> MagicMock:
+    """Return a mock Service of the notebook of a Deployment."""
+    service = MagicMock()
+    service.metadata.namespace = deployment.metadata.namespace
+    service.metadata.name = deployment.metadata.name
+    return service
+
+
+def _mock_lists(mock_client: MagicMock, deployments: list, services: list = None) -> None:
+    """Make the client list the Deployments, no Pods and a Service for each notebook."""
+    if services is None:
+        services = [_service(deployment) for deployment in deployments]
+    objects = {Deployment: deployments, Pod: [], Service: services}
+    mock_client.list.side_effect = lambda resource, **kwargs: iter(objects[resource])
+
+
 def test_successful_notebook_listing(
     mock_client: MagicMock,
     mock_deployment: MagicMock,
@@ -68,14 +88,23 @@ def test_successful_notebook_listing(
     mock_pretty_table: MagicMock,
 ) -> None:
     """Test successful listing of notebooks and correct function calls."""
-    mock_client.list.return_value = [mock_deployment]
+    _mock_lists(mock_client, [mock_deployment])
     mock_get_deployment_state.return_value = DeploymentState.ACTIVE
     mock_get_service_url.return_value = TEST_SVC
 
     list_notebooks(mock_client, wide=False)
 
-    mock_get_service_url.assert_called_once_with(TEST_DEPLOYMENT_NAME, "dss", mock_client)
-    mock_pretty_table.add_row.assert_called_once_with([TEST_DEPLOYMENT_NAME, TEST_IMAGE, TEST_SVC])
+    # The Pods and the Service are listed for the page, instead of retrieved per notebook
+    assert [call.args[0] for call in mock_client.list.call_args_list] == [
+        Deployment,
+        Pod,
+        Service,
+    ]
+    assert mock_client.list.call_args.kwargs["namespace"] == "dss"
+    assert mock_get_service_url.call_args.args[0].metadata.name == TEST_DEPLOYMENT_NAME
+    mock_pretty_table.add_row.assert_called_once_with(
+        [TEST_DEPLOYMENT_NAME, TEST_IMAGE, "-", TEST_SVC]
+    )
 
 
 def test_listing_failure_due_to_api_error(mock_client: MagicMock) -> None:
@@ -99,6 +128,60 @@ def test_no_notebooks_found(mock_client: MagicMock, mock_logger: MagicMock) -> N
     mock_logger.info.assert_called_with("No notebooks found.")
 
 
+def test_listing_streams_pages_on_terminal(
+    mock_client: MagicMock,
+    mock_deployment: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_get_deployment_state: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """
+    Test that on a terminal the rows are logged page by page, with the header only once.
+    """
+    _mock_lists(mock_client, [mock_deployment] * 3)
+    mock_get_deployment_state.return_value = DeploymentState.ACTIVE
+    mock_get_service_url.return_value = TEST_SVC
+
+    with patch("dss.list.sys.stdout.isatty", return_value=True), patch(
+        "dss.list.LIST_PAGE_SIZE", 2
+    ):
+        list_notebooks(mock_client, wide=False)
+
+    pages = [call.args[0] for call in mock_logger.info.call_args_list]
+    assert len(pages) == 2
+    assert "Name" in pages[0] and "Name" not in pages[1]
+    assert pages[0].count(TEST_DEPLOYMENT_NAME) == 2
+    assert pages[1].count(TEST_DEPLOYMENT_NAME) == 1
+    # Columns have the same width on every page
+    assert len(pages[0].splitlines()[-1]) == len(pages[1].splitlines()[-1])
+
+
+def test_listing_wraps_cells_on_terminal(
+    mock_client: MagicMock,
+    mock_deployment: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_get_deployment_state: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """
+    Test that on a terminal long cells are wrapped to the fixed width of their column.
+    """
+    mock_deployment.spec.template.spec.containers[0].image = "registry.example.com/" * 3
+    _mock_lists(mock_client, [mock_deployment])
+    mock_get_deployment_state.return_value = DeploymentState.ACTIVE
+    mock_get_service_url.return_value = TEST_SVC
+
+    with patch("dss.list.sys.stdout.isatty", return_value=True):
+        list_notebooks(mock_client, wide=False)
+
+    lines = mock_logger.info.call_args.args[0].strip("\n").splitlines()
+    # Each column is padded by a space on each side
+    width = sum(TERMINAL_COLUMN_WIDTHS[name] + 2 for name in ("Name", "Image", "GPU", "URL"))
+    assert {len(line) for line in lines} == {width}
+    # The image is wrapped over several lines
+    assert len(lines) > 2
+
+
 @pytest.mark.parametrize(
     "state, expected_url",
     [
@@ -119,13 +202,13 @@ def test_non_active_deployment_url_representation(
     mock_pretty_table: MagicMock,
 ) -> None:
     """Ensure that non-active deployment states are correctly shown in the URL field."""
-    mock_client.list.return_value = [mock_deployment]
+    _mock_lists(mock_client, [mock_deployment])
     mock_get_deployment_state.return_value = state
 
     list_notebooks(mock_client, wide=False)
 
     mock_pretty_table.add_row.assert_called_once_with(
-        [TEST_DEPLOYMENT_NAME, TEST_IMAGE, expected_url]
+        [TEST_DEPLOYMENT_NAME, TEST_IMAGE, "-", expected_url]
     )
 
 
@@ -137,12 +220,169 @@ def test_no_service_url_returned(
     mock_pretty_table: MagicMock,
 ) -> None:
     """Test behavior when no service URL is found and a default message is displayed."""
-    mock_client.list.return_value = [mock_deployment]
+    _mock_lists(mock_client, [mock_deployment])
     mock_get_deployment_state.return_value = DeploymentState.ACTIVE
     mock_get_service_url.return_value = None
 
     list_notebooks(mock_client, wide=False)
 
     mock_pretty_table.add_row.assert_called_once_with(
-        [TEST_DEPLOYMENT_NAME, TEST_IMAGE, "(No service)"]
+        [TEST_DEPLOYMENT_NAME, TEST_IMAGE, "-", "(No service)"]
+    )
+
+
+def test_missing_service(
+    mock_client: MagicMock,
+    mock_deployment: MagicMock,
+    mock_get_deployment_state: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_pretty_table: MagicMock,
+) -> None:
+    """Test that an active notebook without a Service is shown without a URL."""
+    _mock_lists(mock_client, [mock_deployment], services=[])
+    mock_get_deployment_state.return_value = DeploymentState.ACTIVE
+
+    list_notebooks(mock_client, wide=False)
+
+    mock_get_service_url.assert_not_called()
+    mock_pretty_table.add_row.assert_called_once_with(
+        [TEST_DEPLOYMENT_NAME, TEST_IMAGE, "-", "(No service)"]
+    )
+
+
+@pytest.mark.parametrize(
+    "limits, expected_gpu",
+    [
+        ({"nvidia.com/gpu": "2"}, "2 (nvidia)"),
+        ({"gpu.intel.com/i915": "1"}, "1 (intel)"),
+        ({"cpu": "1"}, "-"),
+    ],
+)
+def test_gpu_assignment_representation(
+    limits: dict,
+    expected_gpu: str,
+    mock_client: MagicMock,
+    mock_deployment: MagicMock,
+    mock_get_deployment_state: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_pretty_table: MagicMock,
+) -> None:
+    """Ensure that the GPUs assigned to a notebook are shown in the GPU field."""
+    mock_deployment.spec.template.spec.containers[0].resources.limits = limits
+    _mock_lists(mock_client, [mock_deployment])
+    mock_get_deployment_state.return_value = DeploymentState.ACTIVE
+    mock_get_service_url.return_value = TEST_SVC
+
+    list_notebooks(mock_client, wide=False)
+
+    mock_pretty_table.add_row.assert_called_once_with(
+        [TEST_DEPLOYMENT_NAME, TEST_IMAGE, expected_gpu, TEST_SVC]
+    )
+
+
+@pytest.mark.parametrize("size_limit, expected_shm", [("4Gi", "4Gi"), (None, "-")])
+def test_wide_listing_shows_shared_memory(
+    size_limit: str,
+    expected_shm: str,
+    mock_client: MagicMock,
+    mock_deployment: MagicMock,
+    mock_get_deployment_state: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_pretty_table: MagicMock,
+) -> None:
+    """Ensure that the shared memory size limit is shown in wide mode."""
+    dshm = MagicMock(emptyDir=MagicMock(sizeLimit=size_limit))
+    dshm.name = "dshm"
+    mock_deployment.spec.template.spec.volumes = [dshm]
+    _mock_lists(mock_client, [mock_deployment])
+    mock_get_deployment_state.return_value = DeploymentState.ACTIVE
+    mock_get_service_url.return_value = TEST_SVC
+
+    list_notebooks(mock_client, wide=True)
+
+    mock_pretty_table.add_row.assert_called_once_with(
+        [TEST_DEPLOYMENT_NAME, TEST_IMAGE, "-", expected_shm, TEST_SVC]
+    )
+
+
+def test_wide_listing_renders_table(
+    mock_client: MagicMock,
+    mock_deployment: MagicMock,
+    mock_get_deployment_state: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """Ensure that the wide table renders with the shared memory column."""
+    dshm = MagicMock(emptyDir=MagicMock(sizeLimit="4Gi"))
+    dshm.name = "dshm"
+    mock_deployment.spec.template.spec.volumes = [dshm]
+    _mock_lists(mock_client, [mock_deployment])
+    mock_get_deployment_state.return_value = DeploymentState.ACTIVE
+    mock_get_service_url.return_value = TEST_SVC
+
+    list_notebooks(mock_client, wide=True)
+
+    header, row = mock_logger.info.call_args.args[0].strip("\n").splitlines()
+    assert header.split() == ["Name", "Image", "GPU", "Shared", "memory", "URL"]
+    assert row.split() == [TEST_DEPLOYMENT_NAME, TEST_IMAGE, "-", "4Gi", TEST_SVC]
+
+
+def test_list_notebooks_all_contexts(
+    mock_deployment: MagicMock,
+    mock_get_service_url: MagicMock,
+    mock_get_deployment_state: MagicMock,
+    mock_logger: MagicMock,
+) -> None:
+    """Test that the notebooks of every context are merged and unreachable ones are reported."""
+    mock_get_deployment_state.return_value = DeploymentState.ACTIVE
+    mock_get_service_url.return_value = TEST_SVC
+    client = MagicMock()
+    _mock_lists(client, [mock_deployment])
+
+    with patch(
+        "dss.list.run_on_contexts",
+        side_effect=lambda func: {"default": func(client), "offline": TimeoutError("timeout")},
+    ):
+        list_notebooks_all_contexts()
+
+    table = mock_logger.info.call_args.args[0]
+    assert "Cluster" in table and "default" in table and TEST_DEPLOYMENT_NAME in table
+    mock_logger.warning.assert_called_once_with(
+        "Failed to list notebooks in context offline: timeout."
+    )
+
+
+def test_list_notebooks_all_namespaces(
+    mock_client: MagicMock,
+    mock_deployment: MagicMock,
+    mock_get_deployment_state: MagicMock,
+    mock_pretty_table: MagicMock,
+) -> None:
+    """Test that all namespaces are listed with cluster-wide lists instead of one per namespace."""
+    mock_deployment.metadata.namespace = "alice"
+    pod = MagicMock()
+    pod.metadata.namespace = "alice"
+    pod.metadata.labels = {NOTEBOOK_LABEL: TEST_DEPLOYMENT_NAME}
+    service = MagicMock()
+    service.metadata.namespace = "alice"
+    service.metadata.name = TEST_DEPLOYMENT_NAME
+    service.spec.clusterIP = "10.0.0.1"
+    service.spec.ports = [MagicMock(port=80)]
+    mock_client.list.side_effect = [[mock_deployment], [pod], [service]]
+    mock_get_deployment_state.return_value = DeploymentState.ACTIVE
+
+    list_notebooks(mock_client, all_namespaces=True)
+
+    assert [call.kwargs["namespace"] for call in mock_client.list.call_args_list] == ["*"] * 3
+    # Only the Pods and the Services of the notebooks of the page are retrieved
+    _, pods_call, services_call = mock_client.list.call_args_list
+    pod_selector = pods_call.kwargs["labels"][NOTEBOOK_LABEL]
+    assert pod_selector.encode(NOTEBOOK_LABEL) == f"{NOTEBOOK_LABEL} in ({TEST_DEPLOYMENT_NAME})"
+    service_selector = services_call.kwargs["labels"]["app.kubernetes.io/name"]
+    assert service_selector.encode("app.kubernetes.io/name") == (
+        f"app.kubernetes.io/name in ({TEST_DEPLOYMENT_NAME})"
+    )
+    mock_get_deployment_state.assert_called_once_with(mock_deployment, mock_client, [pod])
+    mock_pretty_table.add_row.assert_called_once_with(
+        ["alice", TEST_DEPLOYMENT_NAME, TEST_IMAGE, "-", "http://10.0.0.1:80"]
     )
@@ -0,0 +1,157 @@
+import gzip
+import queue
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from dss.log_archive import (
+    LogArchive,
+    LogEntry,
+    _drain,
+    _follow_pod_logs,
+    _normalize_timestamp,
+    _sync_followers,
+    iter_search_results,
+    parse_duration,
+)
+
+
+@pytest.fixture
+def archive(tmp_path) -> LogArchive:
+    """Fixture of an empty log archive."""
+    archive = LogArchive(tmp_path)
+    yield archive
+    archive.close()
+
+
+def _pod(name: str, phase: str = "Running", restarts: int = 0) -> MagicMock:
+    """Return a mock notebook Pod."""
+    pod = MagicMock()
+    pod.metadata.name = name
+    pod.metadata.namespace = "dss"
+    pod.metadata.labels = {"canonical.com/dss-notebook": "my-notebook"}
+    pod.status.phase = phase
+    pod.status.containerStatuses = [MagicMock(restartCount=restarts)]
+    return pod
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("30s", timedelta(seconds=30)), ("12h", timedelta(hours=12)), ("7d", timedelta(days=7))],
+)
+def test_parse_duration(value: str, expected: timedelta) -> None:
+    """Test that durations are parsed."""
+    assert parse_duration(value) == expected
+
+
+@pytest.mark.parametrize("value", ["7", "d", "7w", "-1d"])
+def test_parse_duration_invalid(value: str) -> None:
+    """Test that invalid durations are rejected."""
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+@pytest.mark.parametrize(
+    "timestamp, expected",
+    [
+        ("2024-05-01T10:00:00Z", "2024-05-01T10:00:00.000000Z"),
+        ("2024-05-01T10:00:00.5Z", "2024-05-01T10:00:00.500000Z"),
+        ("2024-05-01T10:00:00.123456789Z", "2024-05-01T10:00:00.123456Z"),
+    ],
+)
+def test_normalize_timestamp(timestamp: str, expected: str) -> None:
+    """Test that timestamps are converted to a fixed width, so they sort chronologically."""
+    assert _normalize_timestamp(timestamp) == expected
+
+
+def test_archive_add_and_search(archive: LogArchive, tmp_path) -> None:
+    """Test that lines are written to hourly segments and found by phrase across pods."""
+    entries = [
+        LogEntry("2024-05-01T10:00:00.000000Z", "dss", "nb-1", "nb", "Epoch 1"),
+        LogEntry("2024-05-01T11:00:00.000000Z", "dss", "nb-1", "nb", "CUDA out of memory."),
+        LogEntry("2024-05-02T09:00:00.000000Z", "alice", "nb-2", "other", "cuda: Out of memory"),
+        LogEntry("2024-05-02T09:00:01.000000Z", "alice", "nb-2", "other", "out of CUDA memory"),
+    ]
+
+    archive.add(entries)
+
+    assert archive.search("CUDA out of memory") == [entries[1], entries[2]]
+    since = datetime(2024, 5, 2, tzinfo=timezone.utc)
+    assert archive.search("CUDA out of memory", since) == [entries[2]]
+    with gzip.open(tmp_path / "2024-05-01/11/dss.nb-1.log.gz", "rt") as segment:
+        assert segment.read() == "2024-05-01T11:00:00.000000Z CUDA out of memory.\n"
+    assert archive.get_last_timestamp("dss", "nb-1") == "2024-05-01T11:00:00.000000Z"
+    assert archive.get_last_timestamp("dss", "nb-3") is None
+
+
+def test_archive_search_query_syntax(archive: LogArchive) -> None:
+    """Test that punctuation in the searched text is not parsed as query syntax."""
+    entry = LogEntry("2024-05-01T10:00:00.000000Z", "dss", "nb", "nb", 'error: "x" AND y*')
+    archive.add([entry])
+
+    assert archive.search('error: "x" AND') == [entry]
+
+
+def test_iter_search_results_without_archive(tmp_path) -> None:
+    """Test that searching before anything was archived returns nothing."""
+    assert list(iter_search_results("error", archive_dir=tmp_path / "missing")) == []
+
+
+def test_follow_pod_logs_skips_archived_lines() -> None:
+    """Test that a restarted follower resumes after the last archived line."""
+    mock_client = MagicMock()
+    mock_client.log.return_value = iter(
+        ["2024-05-01T10:00:00.1Z old line", "2024-05-01T10:00:00.7Z new line"]
+    )
+    entries = queue.Queue()
+
+    _follow_pod_logs(mock_client, _pod("nb-1"), "2024-05-01T10:00:00.500000Z", entries)
+
+    assert entries.get_nowait() == LogEntry(
+        "2024-05-01T10:00:00.700000Z", "dss", "nb-1", "my-notebook", "new line"
+    )
+    assert entries.empty()
+    kwargs = mock_client.log.call_args.kwargs
+    assert kwargs["follow"] and kwargs["timestamps"] and kwargs["since"] > 0
+
+
+@patch("dss.log_archive.get_previous_pod_logs")
+def test_follow_pod_logs_previous(mock_get_previous_pod_logs: MagicMock) -> None:
+    """Test that the lines of the previous container are archived before the current ones."""
+    mock_client = MagicMock()
+    mock_client.log.return_value = iter(["2024-05-01T10:00:02Z restarted"])
+    mock_get_previous_pod_logs.return_value = (
+        "2024-05-01T10:00:00Z archived\n2024-05-01T10:00:01Z crashed\n"
+    )
+    entries = queue.Queue()
+
+    _follow_pod_logs(
+        mock_client, _pod("nb-1", restarts=1), "2024-05-01T10:00:00.000000Z", entries, True
+    )
+
+    assert [entry.line for entry in _drain(entries)] == ["crashed", "restarted"]
+    mock_get_previous_pod_logs.assert_called_once_with(mock_client, "nb-1", "dss", timestamps=True)
+
+
+def test_sync_followers(archive: LogArchive) -> None:
+    """Test that running and restarted Pods are followed and pending Pods are not."""
+    mock_client = MagicMock()
+    mock_client.list.return_value = [_pod("nb-1"), _pod("nb-2", phase="Pending")]
+    followers = {}
+
+    with patch("dss.log_archive.threading.Thread") as mock_thread:
+        mock_thread.return_value.is_alive.return_value = True
+        _sync_followers(mock_client, archive, followers, queue.Queue())
+        _sync_followers(mock_client, archive, followers, queue.Queue())
+        assert list(followers) == [("dss", "nb-1", 0)]
+        assert mock_thread.call_count == 1
+        assert not mock_thread.call_args.kwargs["args"][-1]
+
+        mock_client.list.return_value = [_pod("nb-1", restarts=1)]
+        _sync_followers(mock_client, archive, followers, queue.Queue())
+
+    assert list(followers) == [("dss", "nb-1", 1)]
+    assert mock_thread.call_count == 2
+    # The logs of the container that stopped are fetched by the new follower
+    assert mock_thread.call_args.kwargs["args"][-1]
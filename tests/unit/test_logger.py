@@ -1,11 +1,21 @@
+import gzip
+import json
 import logging
 import os
 import uuid
-from typing import Generator, Optional
+from typing import Generator
 
 import pytest
 
-from dss.logger import setup_logger  # Adjust with your actual module name
+from dss.logger import (
+    ConcurrentRotatingFileHandler,
+    CustomFormatter,
+    JsonFormatter,
+    flush_logs,
+    get_log_file_path,
+    set_log_context,
+    setup_logger,
+)
 
 
 @pytest.fixture(scope="function")
@@ -40,14 +50,6 @@ def logger_setup(
         os.remove(log_file_path)
 
 
-def get_log_file_path(logger: logging.Logger) -> Optional[str]:
-    """Helper function to get the file path of the log file used by the logger."""
-    for handler in logger.handlers:
-        if isinstance(handler, logging.FileHandler):
-            return handler.baseFilename
-    return None
-
-
 @pytest.mark.parametrize(
     "log_level, log_message, expected_prefix",
     [
@@ -64,6 +66,7 @@ def test_file_logs(
     logger = logger_setup
 
     logger.log(log_level, log_message)
+    flush_logs(logger)
 
     log_file_path = get_log_file_path(logger)
     assert log_file_path is not None, "Log file path could not be determined."
@@ -105,3 +108,99 @@ def test_console_logs(
         assert "[INFO]" not in captured.out  # Ensure no [INFO] prefix
 
     assert log_message in captured.out
+
+
+def test_rotation_compresses_backups(tmp_path) -> None:
+    """Test that the log file is rotated to compressed backups when it is full."""
+    log_file_path = tmp_path / "dss.log"
+    handler = ConcurrentRotatingFileHandler(str(log_file_path), max_bytes=100, backup_count=2)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    for i in range(3):
+        handler.handle(logging.makeLogRecord({"msg": f"{i}" * 60}))
+        handler.flush()
+    handler.close()
+
+    assert log_file_path.read_text() == "2" * 60 + "\n"
+    with gzip.open(f"{log_file_path}.1.gz", "rt") as backup:
+        assert backup.read() == "1" * 60 + "\n"
+    with gzip.open(f"{log_file_path}.2.gz", "rt") as backup:
+        assert backup.read() == "0" * 60 + "\n"
+
+
+def test_reopens_file_rotated_by_another_process(tmp_path) -> None:
+    """Test that records are written to the current log file after another process rotated it."""
+    log_file_path = tmp_path / "dss.log"
+    handler = ConcurrentRotatingFileHandler(str(log_file_path), max_bytes=1024, backup_count=1)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.handle(logging.makeLogRecord({"msg": "before"}))
+    handler.flush()
+
+    # Simulate the rotation by another process
+    os.rename(log_file_path, tmp_path / "dss.log.1")
+    handler.handle(logging.makeLogRecord({"msg": "after"}))
+    handler.flush()
+    handler.close()
+
+    assert log_file_path.read_text() == "after\n"
+    assert (tmp_path / "dss.log.1").read_text() == "before\n"
+
+
+@pytest.mark.parametrize(
+    "log_level, expected",
+    [(logging.INFO, "message"), (logging.WARNING, "[WARNING] message")],
+)
+def test_custom_formatter(log_level: int, expected: str) -> None:
+    """Test that only INFO records are formatted without the level."""
+    record = logging.makeLogRecord({"msg": "message", "levelno": log_level})
+    record.levelname = logging.getLevelName(log_level)
+
+    assert CustomFormatter().format(record) == expected
+
+
+def test_json_formatter() -> None:
+    """Test that records are formatted as JSON lines with the log context and duration."""
+    record = logging.makeLogRecord(
+        {
+            "msg": "Command %s finished.",
+            "args": ("start",),
+            "levelname": "DEBUG",
+            "correlation_id": "1234",
+            "command": "start",
+            "notebook": "my-notebook",
+            "duration_ms": 42,
+        }
+    )
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Command start finished."
+    assert entry["level"] == "DEBUG"
+    assert entry["correlation_id"] == "1234"
+    assert entry["command"] == "start"
+    assert entry["notebook"] == "my-notebook"
+    assert entry["duration_ms"] == 42
+    assert isinstance(entry["elapsed_ms"], int)
+    assert "exception" not in entry
+
+
+def test_json_logs_keep_exception(tmp_path, monkeypatch) -> None:
+    """Test that the exception of a record reaches the JSON log file through the queue."""
+    dss_logger = logging.getLogger("dss.logger")
+    monkeypatch.setattr(dss_logger, "handlers", [])
+    logger = setup_logger(log_file_path=str(tmp_path / "dss.log"), file_log_format="json")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.debug("Failed to %s.", "start", exc_info=True)
+    flush_logs(logger)
+
+    entry = json.loads((tmp_path / "dss.log").read_text().splitlines()[-1])
+    assert entry["message"] == "Failed to start."
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_set_log_context_unknown_field() -> None:
+    """Test that only the known log context fields can be set."""
+    with pytest.raises(ValueError):
+        set_log_context(user="alice")
@@ -1,10 +1,12 @@
+from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
 import pytest
 from lightkube import ApiError
 
 from dss.config import DSS_NAMESPACE
-from dss.logs import get_logs
+from dss.log_archive import LogEntry
+from dss.logs import get_logs, search_logs
 
 
 @pytest.fixture
@@ -132,7 +134,7 @@ def test_get_logs_failure_retrieve_pod(
 
 
 def test_get_logs_success_retrieve_notebook(
-    mock_client: MagicMock, mock_logger: MagicMock
+    mock_client: MagicMock, mock_logger: MagicMock, capsys: pytest.CaptureFixture
 ) -> None:
     """
     Test case to verify successful retrieval of logs for a notebook.
@@ -155,18 +157,19 @@ def test_get_logs_success_retrieve_notebook(
     mock_client_instance.list.side_effect = [[mock_deployment_instance], [mock_pod_instance]]
 
     # Mock the log method of Client
-    mock_client_instance.log.return_value = iter(["Log line 1", "Log line 2"])
+    mock_client_instance.log.return_value = iter(["Log line 1\n", "Log line 2\n"])
 
     # Call the function to test
     get_logs("notebooks", "test_notebook", mock_client_instance)
 
     mock_client_instance.log.assert_called_once_with("test_pod", namespace="dss")
     mock_logger.info.assert_any_call("Logs for test_pod:")
-    mock_logger.info.assert_any_call("Log line 1")
-    mock_logger.info.assert_any_call("Log line 2")
+    assert capsys.readouterr().out == "Log line 1\nLog line 2\n"
 
 
-def test_get_logs_success_retrieve_mlflow(mock_client: MagicMock, mock_logger: MagicMock) -> None:
+def test_get_logs_success_retrieve_mlflow(
+    mock_client: MagicMock, mock_logger: MagicMock, capsys: pytest.CaptureFixture
+) -> None:
     """
     Test case to verify successful retrieval of MLflow logs.
     """
@@ -187,7 +190,7 @@ def test_get_logs_success_retrieve_mlflow(mock_client: MagicMock, mock_logger: M
     mock_client_instance.list.return_value = [mock_pod_instance]
 
     # Mock the log method of Client
-    mock_client_instance.log.return_value = iter(["Log line 1", "Log line 2"])
+    mock_client_instance.log.return_value = iter(["Log line 1\n", "Log line 2\n"])
 
     # Call the function to test
     get_logs("mlflow", None, mock_client_instance)
@@ -195,11 +198,12 @@ def test_get_logs_success_retrieve_mlflow(mock_client: MagicMock, mock_logger: M
     # Assertions
     mock_client_instance.log.assert_called_once_with("mlflow-pod", namespace="dss")
     mock_logger.info.assert_any_call("Logs for mlflow-pod:")
-    mock_logger.info.assert_any_call("Log line 1")
-    mock_logger.info.assert_any_call("Log line 2")
+    assert capsys.readouterr().out == "Log line 1\nLog line 2\n"
 
 
-def test_get_logs_success_retrieve_all(mock_client: MagicMock, mock_logger: MagicMock) -> None:
+def test_get_logs_success_retrieve_all(
+    mock_client: MagicMock, mock_logger: MagicMock, capsys: pytest.CaptureFixture
+) -> None:
     """
     Test case to verify successful retrieval of logs for all deployments.
     """
@@ -234,8 +238,8 @@ def test_get_logs_success_retrieve_all(mock_client: MagicMock, mock_logger: Magi
 
     # Mock the log method of Client
     mock_client_instance.log.side_effect = [
-        iter(["Log line 1 for notebook-pod", "Log line 2 for notebook-pod"]),
-        iter(["Log line 1 for mlflow-pod", "Log line 2 for mlflow-pod"]),
+        iter(["Log line 1 for notebook-pod\n", "Log line 2 for notebook-pod\n"]),
+        iter(["Log line 1 for mlflow-pod\n", "Log line 2 for mlflow-pod\n"]),
     ]
 
     # Call the function to test
@@ -246,11 +250,29 @@ def test_get_logs_success_retrieve_all(mock_client: MagicMock, mock_logger: Magi
     mock_client_instance.log.assert_any_call("notebook-pod", namespace="dss")
     mock_client_instance.log.assert_called_with("mlflow-pod", namespace="dss")
     mock_logger.info.assert_any_call("Logs for notebook-pod:")
-    mock_logger.info.assert_any_call("Log line 1 for notebook-pod")
-    mock_logger.info.assert_any_call("Log line 2 for notebook-pod")
     mock_logger.info.assert_any_call("Logs for mlflow-pod:")
-    mock_logger.info.assert_any_call("Log line 1 for mlflow-pod")
-    mock_logger.info.assert_any_call("Log line 2 for mlflow-pod")
+    assert capsys.readouterr().out == (
+        "Log line 1 for notebook-pod\nLog line 2 for notebook-pod\n"
+        "Log line 1 for mlflow-pod\nLog line 2 for mlflow-pod\n"
+    )
+
+
+def test_get_logs_to_output_file(mock_client: MagicMock, mock_logger: MagicMock, tmp_path) -> None:
+    """
+    Test case to verify that the logs are written to a file, with only a summary logged.
+    """
+    mock_client_instance = MagicMock()
+    mock_pod_instance = MagicMock()
+    mock_pod_instance.metadata.name = "mlflow-pod"
+    mock_client_instance.list.return_value = [mock_pod_instance]
+    mock_client_instance.log.return_value = iter(["Log line 1\n", "Log line 2\n"])
+    output_file = tmp_path / "mlflow.log"
+
+    get_logs("mlflow", None, mock_client_instance, output_file=str(output_file))
+
+    assert output_file.read_text() == "Logs for mlflow-pod:\nLog line 1\nLog line 2\n"
+    mock_logger.info.assert_called_once_with("Logs for mlflow-pod:")
+    mock_logger.debug.assert_called_once_with("Wrote 22 characters of logs for pod mlflow-pod.")
 
 
 def test_get_logs_failure_retrieve_pod_logs(
@@ -292,3 +314,26 @@ def test_get_logs_failure_retrieve_pod_logs(
     mock_logger.error.assert_any_call(
         f"Failed to retrieve logs. There was a problem while getting the logs for {pod_name}"
     )
+
+
+def test_search_logs(mock_logger: MagicMock, capsys: pytest.CaptureFixture) -> None:
+    """
+    Test case to verify that archived matches are printed with their source.
+    """
+    entry = LogEntry("2024-05-01T10:00:00.000000Z", "dss", "nb-1", "nb", "CUDA out of memory")
+    with patch("dss.logs.iter_search_results", return_value=iter([entry])) as mock_search:
+        search_logs("out of memory", timedelta(days=7))
+
+    mock_search.assert_called_once_with("out of memory", timedelta(days=7))
+    assert capsys.readouterr().out == "2024-05-01T10:00:00.000000Z dss/nb: CUDA out of memory\n"
+    mock_logger.info.assert_not_called()
+
+
+def test_search_logs_no_results(mock_logger: MagicMock) -> None:
+    """
+    Test case to verify the message when nothing matches.
+    """
+    with patch("dss.logs.iter_search_results", return_value=iter([])):
+        search_logs("out of memory")
+
+    mock_logger.info.assert_any_call("No archived logs found containing 'out of memory'.")
@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock
+
+import pytest
+from lightkube.resources.core_v1 import Node
+
+from dss.config import LIST_PAGE_SIZE
+from dss.nodes import NVIDIA_NODE_LABELS, NodeInfo, get_node_inventory, select_node
+
+NVIDIA_LABELS = {label: "true" for label in NVIDIA_NODE_LABELS}
+
+
+def test_get_node_inventory():
+    """Test that the labels, allocatable resources and images of every node are returned."""
+    mock_client = MagicMock()
+    node = MagicMock()
+    node.metadata.name = "node-1"
+    node.metadata.labels = NVIDIA_LABELS
+    node.status.allocatable = {"nvidia.com/gpu": "1"}
+    node.status.images = [MagicMock(names=["docker.io/kubeflownotebookswg/jupyter:v1.8.0"])]
+    empty_node = MagicMock(status=None)
+    empty_node.metadata.name = "node-2"
+    empty_node.metadata.labels = None
+    mock_client.list.return_value = [node, empty_node]
+
+    nodes = get_node_inventory(mock_client)
+
+    mock_client.list.assert_called_once_with(Node, chunk_size=LIST_PAGE_SIZE)
+    assert nodes == [
+        NodeInfo(
+            name="node-1",
+            labels=NVIDIA_LABELS,
+            allocatable={"nvidia.com/gpu": "1"},
+            images={"docker.io/kubeflownotebookswg/jupyter:v1.8.0"},
+        ),
+        NodeInfo(name="node-2"),
+    ]
+    assert nodes[0].nvidia_enabled and not nodes[1].nvidia_enabled
+    assert nodes[0].has_image("kubeflownotebookswg/jupyter:v1.8.0")
+    assert not nodes[0].has_image("jupyter:v1.8.0-cuda")
+
+
+@pytest.mark.parametrize(
+    "gpu_resource, gpu_count, expected_node",
+    (
+        # Without GPUs, a node with the image cached is preferred
+        (None, 1, "cpu-node"),
+        # With GPUs, only nodes with enough allocatable GPUs are considered
+        ("nvidia.com/gpu", 1, "big-gpu-node"),
+        ("nvidia.com/gpu", 4, "big-gpu-node"),
+        ("nvidia.com/gpu", 8, None),
+    ),
+)
+def test_select_node(gpu_resource, gpu_count, expected_node):
+    """Test that the node with the image cached and the most free GPUs is selected."""
+    nodes = [
+        NodeInfo(name="cpu-node", allocatable={"memory": "8Gi"}, images={"test-image"}),
+        NodeInfo(name="small-gpu-node", labels=NVIDIA_LABELS, allocatable={"nvidia.com/gpu": "1"}),
+        NodeInfo(name="big-gpu-node", labels=NVIDIA_LABELS, allocatable={"nvidia.com/gpu": "4"}),
+    ]
+
+    node = select_node(nodes, "test-image", gpu_resource, gpu_count)
+
+    assert (node.name if node else None) == expected_node
@@ -0,0 +1,140 @@
+import socket
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from lightkube.models.autoscaling_v1 import ScaleSpec
+from lightkube.models.meta_v1 import ObjectMeta
+from lightkube.resources.apps_v1 import Deployment
+from test_utils import FakeApiError
+
+from dss.config import DSS_NAMESPACE
+from dss.proxy import NotebookProxy, _forward, wait_for_deployment_available
+
+NOTEBOOK_NAME = "test-notebook"
+
+
+@pytest.fixture
+def mock_logger() -> MagicMock:
+    """
+    Fixture to mock the logger object.
+    """
+    with patch("dss.proxy.logger") as mock_logger:
+        yield mock_logger
+
+
+def _mock_deployment(replicas: int, available: int) -> MagicMock:
+    deployment = MagicMock()
+    deployment.spec.replicas = replicas
+    deployment.status.availableReplicas = available
+    return deployment
+
+
+def _mock_service() -> MagicMock:
+    service = MagicMock()
+    service.spec.clusterIP = "10.0.0.1"
+    service.spec.ports = [MagicMock(port=80)]
+    return service
+
+
+def test_activate_running_notebook(mock_logger):
+    """Test that an available notebook is not scaled and its address is returned."""
+    mock_client = MagicMock()
+    mock_client.get.side_effect = [_mock_deployment(1, 1), _mock_service()]
+
+    assert NotebookProxy(NOTEBOOK_NAME, mock_client).activate() == ("10.0.0.1", 80)
+
+    mock_client.replace.assert_not_called()
+
+
+@patch("dss.proxy.time.sleep")
+def test_activate_stopped_notebook(_, mock_logger):
+    """Test that a stopped notebook is scaled up and waited on until it is available."""
+    mock_client = MagicMock()
+    mock_client.get.side_effect = [
+        _mock_deployment(0, 0),
+        _mock_deployment(1, 0),
+        _mock_deployment(1, 1),
+        _mock_service(),
+    ]
+
+    assert NotebookProxy(NOTEBOOK_NAME, mock_client).activate() == ("10.0.0.1", 80)
+
+    mock_client.replace.assert_called_once_with(
+        Deployment.Scale(
+            metadata=ObjectMeta(name=NOTEBOOK_NAME, namespace=DSS_NAMESPACE),
+            spec=ScaleSpec(replicas=1),
+        )
+    )
+
+
+def test_activate_cached(mock_logger):
+    """Test that an activated notebook is not looked up again until it is invalidated."""
+    mock_client = MagicMock()
+    mock_client.get.side_effect = [_mock_deployment(1, 1), _mock_service()] * 2
+    notebook_proxy = NotebookProxy(NOTEBOOK_NAME, mock_client)
+
+    notebook_proxy.activate()
+    notebook_proxy.activate()
+    assert mock_client.get.call_count == 2
+
+    notebook_proxy.invalidate()
+    notebook_proxy.activate()
+    assert mock_client.get.call_count == 4
+
+
+def test_connect_reactivates(mock_logger):
+    """Test that a cached address that refuses connections triggers a new activation."""
+    notebook_proxy = NotebookProxy(NOTEBOOK_NAME, MagicMock())
+    upstream_socket = MagicMock()
+
+    with patch.object(
+        notebook_proxy, "activate", side_effect=[("10.0.0.1", 80), ("10.0.0.2", 80)]
+    ), patch(
+        "dss.proxy.socket.create_connection",
+        side_effect=[ConnectionRefusedError(), upstream_socket],
+    ) as mock_create_connection:
+        assert notebook_proxy.connect() is upstream_socket
+
+    assert mock_create_connection.call_args.args[0] == ("10.0.0.2", 80)
+
+
+def test_activate_missing_notebook(mock_logger):
+    """Test that activating a notebook that does not exist raises a RuntimeError."""
+    mock_client = MagicMock()
+    mock_client.get.side_effect = FakeApiError(404)
+
+    with pytest.raises(RuntimeError):
+        NotebookProxy(NOTEBOOK_NAME, mock_client).activate()
+
+
+def test_wait_for_deployment_available_timeout():
+    """Test that the wait ends at the deadline when the Deployment never becomes available."""
+    mock_client = MagicMock()
+    mock_client.get.return_value = _mock_deployment(1, 0)
+
+    with pytest.raises(TimeoutError):
+        wait_for_deployment_available(
+            mock_client, NOTEBOOK_NAME, DSS_NAMESPACE, timeout_seconds=0.2, interval_seconds=0.05
+        )
+
+    assert mock_client.get.call_count > 1
+
+
+def test_forward():
+    """Test that traffic is forwarded in both directions until a side closes."""
+    client_local, client_remote = socket.socketpair()
+    upstream_local, upstream_remote = socket.socketpair()
+    forwarder = threading.Thread(target=_forward, args=(client_local, upstream_local))
+    forwarder.start()
+
+    client_remote.sendall(b"GET / HTTP/1.1\r\n\r\n")
+    assert upstream_remote.recv(1024) == b"GET / HTTP/1.1\r\n\r\n"
+    upstream_remote.sendall(b"HTTP/1.1 200 OK\r\n\r\n")
+    assert client_remote.recv(1024) == b"HTTP/1.1 200 OK\r\n\r\n"
+
+    client_remote.close()
+    forwarder.join(timeout=5)
+    assert not forwarder.is_alive()
+    for sock in (client_local, upstream_local, upstream_remote):
+        sock.close()
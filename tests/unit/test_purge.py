@@ -103,3 +103,27 @@ def test_purge_failure_not_runtime_error(mock_does_namespace_exist: MagicMock) -
 
     # Assertions
     assert str(exc_info.value) == "400"
+
+
+def test_purge_tenant_namespaces(
+    mock_logger: MagicMock,
+    mock_does_namespace_exist: MagicMock,
+    mock_wait_for_namespace_to_be_deleted: MagicMock,
+) -> None:
+    """
+    Test case to verify that the tenant namespaces are purged with the DSS namespace.
+    """
+    mock_does_namespace_exist.return_value = True
+    mock_client_instance = MagicMock()
+    namespaces = [MagicMock(), MagicMock()]
+    namespaces[0].metadata.name = DSS_NAMESPACE
+    namespaces[1].metadata.name = "alice"
+    mock_client_instance.list.return_value = namespaces
+
+    purge(mock_client_instance)
+
+    assert [call.args[1] for call in mock_client_instance.delete.call_args_list] == [
+        DSS_NAMESPACE,
+        "alice",
+    ]
+    assert mock_wait_for_namespace_to_be_deleted.call_count == 2
@@ -24,15 +24,6 @@ def mock_logger() -> MagicMock:
         yield mock_logger
 
 
-@pytest.fixture
-def mock_does_notebook_exist() -> MagicMock:
-    """
-    Fixture to mock the `does_notebook_exist` function.
-    """
-    with patch("dss.remove_notebook.does_notebook_exist") as mock_does_notebook_exist:
-        yield mock_does_notebook_exist
-
-
 def test_remove_notebook_success(
     mock_client: MagicMock,
     mock_logger: MagicMock,
@@ -52,15 +43,13 @@ def test_remove_notebook_success(
     )
 
 
-def test_remove_notebook_not_found(
-    mock_client: MagicMock, mock_logger: MagicMock, mock_does_notebook_exist: MagicMock
-) -> None:
+def test_remove_notebook_not_found(mock_client: MagicMock, mock_logger: MagicMock) -> None:
     """
     Tests case to verify failed remove call when all Notebook resources don't exist.
     """
     notebook_name = "test-notebook"
 
-    mock_does_notebook_exist.return_value = False
+    mock_client.delete.side_effect = [FakeApiError(404), FakeApiError(404)]
 
     with pytest.raises(RuntimeError):
         remove_notebook(notebook_name, mock_client)
@@ -82,7 +71,6 @@ def test_remove_notebook_not_found(
 def test_remove_notebook_one_resource_not_exist(
     mock_client: MagicMock,
     mock_logger: MagicMock,
-    mock_does_notebook_exist: MagicMock,
     lightkube_client_side_effects,
     missing_resource_type,
 ):
@@ -91,7 +79,6 @@ def test_remove_notebook_one_resource_not_exist(
     """
     notebook_name = "test-notebook"
 
-    mock_does_notebook_exist.return_value = True
     mock_client.delete.side_effect = lightkube_client_side_effects
 
     remove_notebook(notebook_name, mock_client)
@@ -118,7 +105,6 @@ def test_remove_notebook_one_resource_not_exist(
 def test_remove_notebook_unexpected_error(
     mock_client: MagicMock,
     mock_logger: MagicMock,
-    mock_does_notebook_exist: MagicMock,
     lightkube_client_side_effects,
     debug_log_calls,
 ):
@@ -127,7 +113,6 @@ def test_remove_notebook_unexpected_error(
     """
     notebook_name = "test-notebook"
 
-    mock_does_notebook_exist.return_value = True
     mock_client.delete.side_effect = lightkube_client_side_effects
 
     with pytest.raises(RuntimeError):
@@ -0,0 +1,190 @@
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+from lightkube.models.core_v1 import EmptyDirVolumeSource, ResourceRequirements, Volume
+from lightkube.resources.apps_v1 import Deployment
+from lightkube.types import PatchType
+from test_utils import FakeApiError
+
+from dss.config import DSS_NAMESPACE
+from dss.resize import resize_notebook
+
+NOTEBOOK_NAME = "test-notebook"
+
+
+@pytest.fixture
+def mock_logger() -> MagicMock:
+    """
+    Fixture to mock the logger object.
+    """
+    with patch("dss.resize.logger") as mock_logger:
+        yield mock_logger
+
+
+def _mock_client_with_resources(resources) -> MagicMock:
+    """Return a mocked client whose Deployment has the given container resources."""
+    mock_client = MagicMock()
+    deployment = MagicMock()
+    deployment.spec.template.spec.containers = [MagicMock(resources=resources)]
+    deployment.spec.template.spec.volumes = [
+        Volume(name="home-volume"),
+        Volume(name="dshm", emptyDir=EmptyDirVolumeSource(medium="Memory", sizeLimit="4Gi")),
+    ]
+    mock_client.get.return_value = deployment
+    return mock_client
+
+
+@pytest.mark.parametrize(
+    "current, cpu, memory, guaranteed, expected_resources",
+    [
+        # No previous resources
+        (None, "2", None, False, {"requests": {"cpu": "2"}}),
+        # GPU limits are preserved when going Guaranteed
+        (
+            ResourceRequirements(limits={"nvidia.com/gpu": "1"}),
+            "2",
+            "8Gi",
+            True,
+            {
+                "requests": {"cpu": "2", "memory": "8Gi"},
+                "limits": {"nvidia.com/gpu": "1", "cpu": "2", "memory": "8Gi"},
+            },
+        ),
+        # CPU and memory limits are dropped when not Guaranteed, other requests are kept
+        (
+            ResourceRequirements(
+                requests={"cpu": "2", "memory": "8Gi"}, limits={"cpu": "2", "memory": "8Gi"}
+            ),
+            "4",
+            None,
+            False,
+            {"requests": {"cpu": "4", "memory": "8Gi"}},
+        ),
+    ],
+)
+def test_resize_notebook_success(
+    current, cpu, memory, guaranteed, expected_resources, mock_logger
+) -> None:
+    """
+    Test case to verify that resize patches the container resources of the Deployment.
+    """
+    mock_client = _mock_client_with_resources(current)
+
+    resize_notebook(NOTEBOOK_NAME, mock_client, cpu=cpu, memory=memory, guaranteed=guaranteed)
+
+    mock_client.patch.assert_called_once_with(
+        Deployment,
+        NOTEBOOK_NAME,
+        ANY,
+        namespace=DSS_NAMESPACE,
+        patch_type=PatchType.JSON,
+    )
+    assert mock_client.patch.call_args.args[2][0] == {
+        "op": "add",
+        "path": "/spec/template/spec/containers/0/resources",
+        "value": expected_resources,
+    }
+
+
+@pytest.mark.parametrize(
+    "current, memory, shm_size, expected",
+    [
+        # The default size of `dss create`, half of the memory, follows the memory
+        (ResourceRequirements(requests={"memory": "8Gi"}), "16Gi", None, "8Gi"),
+        # A size given with --shm-size at creation is kept
+        (ResourceRequirements(requests={"memory": "16Gi"}), "8Gi", None, None),
+        # A size given to resize is used
+        (ResourceRequirements(requests={"memory": "8Gi"}), None, "6Gi", "6Gi"),
+    ],
+)
+def test_resize_notebook_shm_size(current, memory, shm_size, expected, mock_logger) -> None:
+    """
+    Test case to verify when the shared memory volume of 4Gi is resized.
+    """
+    mock_client = _mock_client_with_resources(current)
+
+    resize_notebook(NOTEBOOK_NAME, mock_client, memory=memory, shm_size=shm_size)
+
+    patch = mock_client.patch.call_args.args[2]
+    if expected is None:
+        assert len(patch) == 1
+    else:
+        assert patch[1] == {
+            "op": "add",
+            "path": "/spec/template/spec/volumes/1/emptyDir/sizeLimit",
+            "value": expected,
+        }
+
+
+def test_resize_notebook_shm_size_larger_than_memory(mock_logger) -> None:
+    """
+    Test case to verify that a kept shared memory size larger than the new memory is refused.
+    """
+    mock_client = _mock_client_with_resources(ResourceRequirements(requests={"memory": "16Gi"}))
+
+    with pytest.raises(RuntimeError):
+        resize_notebook(NOTEBOOK_NAME, mock_client, memory="2Gi")
+
+    mock_logger.error.assert_called_with(
+        f"Failed to resize notebook {NOTEBOOK_NAME}: the shared memory size 4Gi is larger than "
+        "--memory 2Gi, set a smaller one with --shm-size."
+    )
+    mock_client.patch.assert_not_called()
+
+
+def test_resize_notebook_not_found(mock_logger) -> None:
+    """
+    Test case to verify failed resize when the notebook does not exist.
+    """
+    mock_client = MagicMock()
+    mock_client.get.side_effect = FakeApiError(404)
+
+    with pytest.raises(RuntimeError):
+        resize_notebook(NOTEBOOK_NAME, mock_client, cpu="2")
+
+    mock_logger.error.assert_called_with(
+        f"Failed to resize notebook. Notebook {NOTEBOOK_NAME} does not exist."
+    )
+    mock_client.patch.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "cpu, memory, guaranteed, shm_size",
+    [
+        (None, None, False, None),
+        ("2", None, True, None),
+        ("abc", None, False, None),
+        (None, None, False, "abc"),
+        (None, "2Gi", False, "4Gi"),
+    ],
+)
+def test_resize_notebook_invalid_resources(cpu, memory, guaranteed, shm_size, mock_logger) -> None:
+    """
+    Test case to verify that invalid resources fail before any API call.
+    """
+    mock_client = MagicMock()
+
+    with pytest.raises(RuntimeError):
+        resize_notebook(
+            NOTEBOOK_NAME,
+            mock_client,
+            cpu=cpu,
+            memory=memory,
+            guaranteed=guaranteed,
+            shm_size=shm_size,
+        )
+
+    mock_client.get.assert_not_called()
+
+
+def test_resize_notebook_patch_failure(mock_logger) -> None:
+    """
+    Test case to verify behavior when patching the Deployment fails.
+    """
+    mock_client = _mock_client_with_resources(None)
+    mock_client.patch.side_effect = FakeApiError(500)
+
+    with pytest.raises(RuntimeError):
+        resize_notebook(NOTEBOOK_NAME, mock_client, cpu="2")
+
+    mock_logger.error.assert_called_with(f"Failed to resize notebook {NOTEBOOK_NAME}.")
@@ -0,0 +1,107 @@
+import pytest
+
+from dss.resources import (
+    format_memory_quantity,
+    get_resource_requirements,
+    get_shm_size,
+    parse_cpu_quantity,
+    parse_memory_quantity,
+)
+
+
+@pytest.mark.parametrize(
+    "quantity, expected", [("2", 2.0), ("1.5", 1.5), ("500m", 0.5), ("250m", 0.25)]
+)
+def test_parse_cpu_quantity(quantity, expected):
+    """Test parsing of valid CPU quantities."""
+    assert parse_cpu_quantity(quantity) == expected
+
+
+@pytest.mark.parametrize(
+    "quantity, expected",
+    [
+        ("1024", 1024),
+        ("1Ki", 1024),
+        ("8Gi", 8 * 2**30),
+        ("512M", 512 * 10**6),
+        ("1.5Gi", 3 * 2**29),
+    ],
+)
+def test_parse_memory_quantity(quantity, expected):
+    """Test parsing of valid memory quantities."""
+    assert parse_memory_quantity(quantity) == expected
+
+
+@pytest.mark.parametrize("quantity", ["", "two", "2 cores", "-1"])
+def test_parse_cpu_quantity_invalid(quantity):
+    """Test that invalid CPU quantities are rejected."""
+    with pytest.raises(ValueError):
+        parse_cpu_quantity(quantity)
+
+
+@pytest.mark.parametrize("quantity", ["", "8GB", "8gi", "lots"])
+def test_parse_memory_quantity_invalid(quantity):
+    """Test that invalid memory quantities are rejected."""
+    with pytest.raises(ValueError):
+        parse_memory_quantity(quantity)
+
+
+@pytest.mark.parametrize(
+    "cpu, memory, guaranteed, expected",
+    [
+        (None, None, False, ({}, {})),
+        ("500m", None, False, ({"cpu": "500m"}, {})),
+        ("2", "8Gi", False, ({"cpu": "2", "memory": "8Gi"}, {})),
+        ("2", "8Gi", True, ({"cpu": "2", "memory": "8Gi"}, {"cpu": "2", "memory": "8Gi"})),
+    ],
+)
+def test_get_resource_requirements(cpu, memory, guaranteed, expected):
+    """Test the requests and limits computed for the different options."""
+    assert get_resource_requirements(cpu, memory, guaranteed) == expected
+
+
+@pytest.mark.parametrize(
+    "cpu, memory",
+    [
+        # Guaranteed requires both CPU and memory
+        ("2", None),
+        (None, "8Gi"),
+        # Guaranteed requires integer CPUs
+        ("1.5", "8Gi"),
+        ("500m", "8Gi"),
+    ],
+)
+def test_get_resource_requirements_guaranteed_invalid(cpu, memory):
+    """Test that invalid Guaranteed QoS requests are rejected."""
+    with pytest.raises(ValueError):
+        get_resource_requirements(cpu, memory, guaranteed=True)
+
+
+@pytest.mark.parametrize(
+    "size_bytes, expected", [(4 * 2**30, "4Gi"), (1536 * 2**20, "1536Mi"), (1, "1Mi")]
+)
+def test_format_memory_quantity(size_bytes, expected):
+    """Test formatting of byte counts as memory quantities."""
+    assert format_memory_quantity(size_bytes) == expected
+
+
+@pytest.mark.parametrize(
+    "shm_size, memory, expected",
+    [
+        (None, None, None),
+        (None, "8Gi", "4Gi"),
+        (None, "3Gi", "1536Mi"),
+        ("2Gi", None, "2Gi"),
+        ("2Gi", "8Gi", "2Gi"),
+    ],
+)
+def test_get_shm_size(shm_size, memory, expected):
+    """Test the shared memory size limit for the different options."""
+    assert get_shm_size(shm_size, memory) == expected
+
+
+@pytest.mark.parametrize("shm_size, memory", [("16Gi", "8Gi"), ("lots", None)])
+def test_get_shm_size_invalid(shm_size, memory):
+    """Test that invalid shared memory sizes are rejected."""
+    with pytest.raises(ValueError):
+        get_shm_size(shm_size, memory)
@@ -1,13 +1,15 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 from lightkube.models.autoscaling_v1 import ScaleSpec
+from lightkube.models.core_v1 import Container, PodSpec
 from lightkube.models.meta_v1 import ObjectMeta
 from lightkube.resources.apps_v1 import Deployment
+from lightkube.resources.core_v1 import Pod
 from test_utils import FakeApiError
 
 from dss.start import start_notebook
-from dss.utils import DSS_NAMESPACE
+from dss.utils import DSS_NAMESPACE, PodFailureError
 
 
 @pytest.fixture
@@ -19,6 +21,37 @@ def mock_client() -> MagicMock:
         yield mock_client
 
 
+@pytest.fixture(autouse=True)
+def mock_record_operation() -> MagicMock:
+    """
+    Fixture to keep the operation history of the tests out of the user's home.
+    """
+    with patch("dss.start.record_operation") as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_wait() -> MagicMock:
+    """
+    Fixture to mock the wait_for_deployment_ready function.
+    """
+    with patch("dss.start.wait_for_deployment_ready") as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_get_notebook_pod() -> MagicMock:
+    """
+    Fixture to mock the get_notebook_pod function.
+    """
+    with patch("dss.start.get_notebook_pod") as mock:
+        mock.return_value = Pod(
+            metadata=ObjectMeta(name="test-notebook-0"),
+            spec=PodSpec(containers=[Container(name="notebook", image="image")], nodeName="node"),
+        )
+        yield mock
+
+
 @pytest.fixture
 def mock_logger() -> MagicMock:
     """
@@ -31,6 +64,7 @@ def mock_logger() -> MagicMock:
 def test_start_notebook_success(
     mock_client: MagicMock,
     mock_logger: MagicMock,
+    mock_record_operation: MagicMock,
 ) -> None:
     """
     Test case to verify successful start_notebook call.
@@ -46,21 +80,21 @@ def test_start_notebook_success(
 
     # Assertions
     mock_client.replace.assert_called_once_with(expected_deployment_scale)
-    mock_logger.info.assert_called_with(
-        f"Starting the notebook {notebook_name}. Check `dss list` for the status of the notebook."
-    )
+    mock_logger.info.assert_called_with(f"Success: Notebook {notebook_name} started successfully.")
+    mock_record_operation.assert_called_once_with("start", ANY, image="image", node="node")
 
 
 def test_start_notebook_not_found(
     mock_client: MagicMock,
     mock_logger: MagicMock,
+    mock_record_operation: MagicMock,
 ) -> None:
     """
     Tests case to verify failed start call when the notebook does not exist.
     """
     notebook_name = "test-notebook"
 
-    mock_client.get.side_effect = FakeApiError(404)
+    mock_client.replace.side_effect = FakeApiError(404)
 
     # Call the function to test
     with pytest.raises(RuntimeError):
@@ -74,6 +108,7 @@ def test_start_notebook_not_found(
     mock_logger.debug.assert_called_with(
         f"Failed to start notebook {notebook_name}. Notebook {notebook_name} does not exist."
     )
+    mock_record_operation.assert_not_called()
 
 
 def test_start_notebook_unexpected_error(
@@ -95,3 +130,71 @@ def test_start_notebook_unexpected_error(
     # Assert
     mock_logger.error.assert_called_with(f"Failed to start notebook {notebook_name}.")
     mock_logger.debug(f"Failed to scale up Deployment {notebook_name} with error: {mock_error}.")
+
+
+def test_start_notebook_pod_failure(
+    mock_client: MagicMock,
+    mock_logger: MagicMock,
+    mock_wait: MagicMock,
+    mock_record_operation: MagicMock,
+) -> None:
+    """
+    Tests case to verify that a notebook Pod failing to start is reported and recorded.
+    """
+    notebook_name = "test-notebook"
+    mock_wait.side_effect = PodFailureError("Pod failed", "OOMKilled", "out of memory")
+
+    # Call the function to test
+    with pytest.raises(RuntimeError):
+        start_notebook(name=notebook_name, lightkube_client=mock_client)
+
+    # Assert
+    mock_logger.error.assert_called_with("The notebook Pod failed with OOMKilled: out of memory.")
+    mock_record_operation.assert_called_once_with("start", ANY, "OOMKilled")
+
+
+def test_start_notebook_no_wait(
+    mock_client: MagicMock,
+    mock_logger: MagicMock,
+    mock_wait: MagicMock,
+    mock_record_operation: MagicMock,
+) -> None:
+    """
+    Test case to verify that start_notebook returns after scaling up when not waiting.
+    """
+    notebook_name = "test-notebook"
+
+    # Call the function to test
+    start_notebook(notebook_name, mock_client, wait=False)
+
+    # Assertions
+    mock_client.replace.assert_called_once()
+    mock_wait.assert_not_called()
+    mock_record_operation.assert_not_called()
+    mock_logger.info.assert_called_with(
+        f"Starting the notebook {notebook_name}. Check `dss list` for the status of the notebook."
+    )
+
+
+def test_start_notebook_timeout(
+    mock_client: MagicMock,
+    mock_logger: MagicMock,
+    mock_wait: MagicMock,
+    mock_record_operation: MagicMock,
+) -> None:
+    """
+    Tests case to verify that the wait for the notebook is bounded, and a timeout recorded.
+    """
+    notebook_name = "test-notebook"
+    mock_wait.side_effect = TimeoutError()
+
+    # Call the function to test
+    with pytest.raises(RuntimeError):
+        start_notebook(name=notebook_name, lightkube_client=mock_client, timeout_seconds=30)
+
+    # Assert
+    assert mock_wait.call_args.kwargs["timeout_seconds"] == 30
+    mock_logger.error.assert_called_with(
+        f"Timed out while waiting for notebook {notebook_name} to start."
+    )
+    mock_record_operation.assert_called_once_with("start", ANY, "Timeout")
@@ -1,9 +1,22 @@
+import threading
+import time
 from typing import Dict, List
 from unittest.mock import MagicMock
 
 import pytest
 
-from dss.status import get_status
+from dss.capacity import ClusterUsage
+from dss.nodes import NodeInfo
+from dss.status import get_status, get_status_all_contexts, run_probes
+from dss.utils import NotebookResources
+
+
+def _mlflow_resources(available_replicas: int) -> NotebookResources:
+    """Return the MLflow Deployment and Service with the given number of available replicas."""
+    deployment = MagicMock()
+    deployment.spec.replicas = 1
+    deployment.status.availableReplicas = available_replicas
+    return NotebookResources(deployment=deployment, service=MagicMock())
 
 
 @pytest.mark.parametrize(
@@ -25,6 +38,23 @@ from dss.status import get_status
                 "Intel GPU acceleration: Disabled",
             ],
         ),
+        (
+            True,
+            "<Mocked MLflow URL>",
+            {
+                "nvidia.com/gpu.present": "true",
+                "nvidia.com/gpu.deploy.container-toolkit": "true",
+                "nvidia.com/gpu.deploy.device-plugin": "true",
+                "nvidia.com/gpu.product": "Test-GPU-SHARED",
+                "nvidia.com/gpu.count": "1",
+                "nvidia.com/gpu.replicas": "4",
+                "nvidia.com/gpu.sharing-strategy": "time-slicing",
+            },
+            [
+                "NVIDIA GPU acceleration: Enabled (Test-GPU-SHARED)",
+                "NVIDIA GPU slots: 4 (sharing: time-slicing)",
+            ],
+        ),
         (
             True,
             "<Mocked MLflow URL>",
@@ -71,7 +101,7 @@ from dss.status import get_status
             None,
             {},
             [
-                "MLflow deployment: Not ready",
+                "MLflow deployment: Not ready (0/1 available)",
                 "NVIDIA GPU acceleration: Disabled",
                 "Intel GPU acceleration: Disabled",
             ],
@@ -89,10 +119,17 @@ def test_get_status_with_different_scenarios(
     Test case to verify different scenarios of MLflow deployment and GPU acceleration status.
     """
     # Mock the functions
-    mocker.patch("dss.status.does_mlflow_deployment_exist", return_value=mlflow_exist)
-    mocker.patch("dss.status.get_service_url", return_value=mlflow_url)
-    mocker.patch("dss.status.get_labels_for_node", return_value=gpu_labels)
-    mocker.patch("dss.utils.get_labels_for_node", return_value=gpu_labels)
+    mocker.patch("dss.status.read_install_state", return_value=None)
+    mocker.patch(
+        "dss.status.get_notebook_resources",
+        return_value=_mlflow_resources(available_replicas=1 if mlflow_exist else 0),
+    )
+    mocker.patch("dss.status.get_url_from_service", return_value=mlflow_url)
+    mocker.patch("dss.status.get_mlflow_health", return_value=200)
+    mocker.patch("dss.status.get_cluster_usage", return_value=ClusterUsage())
+    mocker.patch(
+        "dss.status.get_node_inventory", return_value=[NodeInfo(name="node", labels=gpu_labels)]
+    )
 
     # Mock the logger
     mock_logger = mocker.patch("dss.status.logger")
@@ -103,3 +140,135 @@ def test_get_status_with_different_scenarios(
     # Assertions
     for log_message in expected_logs:
         mock_logger.info.assert_any_call(log_message)
+
+
+def test_get_status_multiple_nodes(mocker: MagicMock):
+    """
+    Test case to verify that GPU slots are summed and a table is logged for multiple nodes.
+    """
+    gpu_labels = {
+        "nvidia.com/gpu.present": "true",
+        "nvidia.com/gpu.deploy.container-toolkit": "true",
+        "nvidia.com/gpu.deploy.device-plugin": "true",
+        "nvidia.com/gpu.product": "Test-GPU",
+        "nvidia.com/gpu.count": "1",
+        "nvidia.com/gpu.replicas": "2",
+    }
+    nodes = [
+        NodeInfo(name="cpu-node", allocatable={"cpu": "8", "memory": "16Gi"}),
+        NodeInfo(
+            name="gpu-node-1",
+            labels=gpu_labels,
+            allocatable={"cpu": "16", "memory": "64Gi", "nvidia.com/gpu": "2"},
+        ),
+        NodeInfo(name="gpu-node-2", labels=gpu_labels, allocatable={"nvidia.com/gpu": "2"}),
+    ]
+    mocker.patch("dss.status.read_install_state", return_value=None)
+    mocker.patch("dss.status.get_notebook_resources", return_value=NotebookResources())
+    mocker.patch("dss.status.get_mlflow_health", return_value=503)
+    mocker.patch("dss.status.get_cluster_usage", return_value=ClusterUsage())
+    mocker.patch("dss.status.get_node_inventory", return_value=nodes)
+    mock_logger = mocker.patch("dss.status.logger")
+
+    get_status(None)
+
+    mock_logger.info.assert_any_call("NVIDIA GPU acceleration: Enabled (Test-GPU)")
+    mock_logger.info.assert_any_call("NVIDIA GPU slots: 4 (sharing: none)")
+    mock_logger.info.assert_any_call("MLflow deployment: Not found")
+    mock_logger.info.assert_any_call("MLflow health: Failing (HTTP 503)")
+    mock_logger.info.assert_any_call("Notebooks that still fit (1 CPU, 2Gi memory): 24")
+    table = next(
+        call.args[0]
+        for call in mock_logger.info.call_args_list
+        if call.args[0].startswith("Nodes:")
+    )
+    assert "gpu-node-1" in table and "64Gi" in table and "2 (nvidia)" in table
+
+
+def test_get_status_all_contexts(mocker: MagicMock):
+    """
+    Test case to verify that the free GPUs of every context are shown in a single table.
+    """
+    gpu_labels = {
+        "nvidia.com/gpu.present": "true",
+        "nvidia.com/gpu.deploy.container-toolkit": "true",
+        "nvidia.com/gpu.deploy.device-plugin": "true",
+        "nvidia.com/gpu.product": "Test-GPU",
+    }
+    running = MagicMock()
+    running.spec.replicas = 1
+    running.spec.template.spec.containers = [
+        MagicMock(resources=MagicMock(limits={"nvidia.com/gpu": "1"}))
+    ]
+    stopped = MagicMock()
+    stopped.spec.replicas = 0
+    client = MagicMock()
+    client.list.return_value = [running, stopped]
+    mocker.patch(
+        "dss.status.get_notebook_resources", return_value=_mlflow_resources(available_replicas=1)
+    )
+    mocker.patch(
+        "dss.status.get_node_inventory",
+        return_value=[
+            NodeInfo(name="node", labels=gpu_labels, allocatable={"nvidia.com/gpu": "2"})
+        ],
+    )
+    mocker.patch(
+        "dss.status.run_on_contexts",
+        side_effect=lambda func: {"default": func(client), "offline": TimeoutError()},
+    )
+    mock_logger = mocker.patch("dss.status.logger")
+
+    get_status_all_contexts()
+
+    table = mock_logger.info.call_args.args[0]
+    rows = [[cell.strip() for cell in line.split("|")[1:-1]] for line in table.splitlines()]
+    assert ["default", "Ready", "Test-GPU", "-", "1"] in rows
+    assert ["offline", "Unreachable", "-", "-", "-"] in rows
+
+
+def test_get_status_failed_probe(mocker: MagicMock):
+    """
+    Test case to verify that the other probes are reported when one fails, with their latency.
+    """
+    mocker.patch("dss.status.read_install_state", return_value=None)
+    mocker.patch("dss.status.get_notebook_resources", side_effect=Exception("forbidden"))
+    mocker.patch("dss.status.get_mlflow_health", return_value=200)
+    mocker.patch("dss.status.get_cluster_usage", return_value=ClusterUsage())
+    mocker.patch("dss.status.get_node_inventory", return_value=[NodeInfo(name="node")])
+    mock_logger = mocker.patch("dss.status.logger")
+
+    with pytest.raises(RuntimeError):
+        get_status(None)
+
+    mock_logger.info.assert_any_call("MLflow deployment: Unknown")
+    mock_logger.info.assert_any_call("MLflow health: OK")
+    mock_logger.info.assert_any_call("NVIDIA GPU acceleration: Disabled")
+    latency = mock_logger.info.call_args.args[0]
+    assert latency.startswith("Probe latency: install state ")
+    assert "MLflow deployment " in latency and "ms (failed)" in latency
+    mock_logger.error.assert_called_once_with(
+        "Failed to check the MLflow deployment. Check the debug logs for details."
+    )
+
+
+def test_run_probes_deadline():
+    """
+    Test case to verify that the probes are run concurrently and slow probes time out.
+    """
+    unblock = threading.Event()
+
+    start = time.monotonic()
+    try:
+        results = run_probes(
+            {"fast": lambda: time.sleep(0.1) or 1, "also fast": lambda: 2, "slow": unblock.wait},
+            deadline_seconds=0.3,
+        )
+    finally:
+        unblock.set()
+
+    assert time.monotonic() - start < 0.5
+    assert results["fast"].value == 1 and results["fast"].seconds >= 0.1
+    assert results["also fast"].value == 2
+    assert isinstance(results["slow"].error, TimeoutError)
+    assert results["slow"].seconds is None
@@ -1,9 +1,11 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 from lightkube.models.autoscaling_v1 import ScaleSpec
+from lightkube.models.core_v1 import Container, PodSpec
 from lightkube.models.meta_v1 import ObjectMeta
 from lightkube.resources.apps_v1 import Deployment
+from lightkube.resources.core_v1 import Pod
 from test_utils import FakeApiError
 
 from dss.stop import stop_notebook
@@ -19,6 +21,37 @@ def mock_client() -> MagicMock:
         yield mock_client
 
 
+@pytest.fixture(autouse=True)
+def mock_record_operation() -> MagicMock:
+    """
+    Fixture to keep the operation history of the tests out of the user's home.
+    """
+    with patch("dss.stop.record_operation") as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_wait() -> MagicMock:
+    """
+    Fixture to mock the wait_for_notebook_pod_deleted function.
+    """
+    with patch("dss.stop.wait_for_notebook_pod_deleted") as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_get_notebook_pod() -> MagicMock:
+    """
+    Fixture to mock the get_notebook_pod function.
+    """
+    with patch("dss.stop.get_notebook_pod") as mock:
+        mock.return_value = Pod(
+            metadata=ObjectMeta(name="test-notebook-0"),
+            spec=PodSpec(containers=[Container(name="notebook", image="image")], nodeName="node"),
+        )
+        yield mock
+
+
 @pytest.fixture
 def mock_logger() -> MagicMock:
     """
@@ -31,6 +64,7 @@ def mock_logger() -> MagicMock:
 def test_stop_notebook_success(
     mock_client: MagicMock,
     mock_logger: MagicMock,
+    mock_record_operation: MagicMock,
 ) -> None:
     """
     Test case to verify successful stop_notebook call.
@@ -46,21 +80,21 @@ def test_stop_notebook_success(
 
     # Assertions
     mock_client.replace.assert_called_once_with(expected_deployment_scale)
-    mock_logger.info.assert_called_with(
-        f"Stopping the notebook {notebook_name}. Check `dss list` for the status of the notebook."
-    )
+    mock_logger.info.assert_called_with(f"Success: Notebook {notebook_name} stopped successfully.")
+    mock_record_operation.assert_called_once_with("stop", ANY, image="image", node="node")
 
 
 def test_stop_notebook_not_found(
     mock_client: MagicMock,
     mock_logger: MagicMock,
+    mock_record_operation: MagicMock,
 ) -> None:
     """
     Tests case to verify failed stop call when the notebook does not exist.
     """
     notebook_name = "test-notebook"
 
-    mock_client.get.side_effect = FakeApiError(404)
+    mock_client.replace.side_effect = FakeApiError(404)
 
     # Call the function to test
     with pytest.raises(RuntimeError):
@@ -74,6 +108,7 @@ def test_stop_notebook_not_found(
         f"Failed to stop Notebook. Notebook {notebook_name} does not exist."
     )
     mock_logger.info.assert_called_with("Run 'dss list' to check all notebooks.")
+    mock_record_operation.assert_not_called()
 
 
 def test_stop_notebook_unexpected_error(
@@ -97,3 +132,51 @@ def test_stop_notebook_unexpected_error(
         f"Failed to scale down Deployment {notebook_name}: {mock_error}", exc_info=True
     )
     mock_logger.error.assert_called_with(f"Failed to stop notebook {notebook_name}.")
+
+
+def test_stop_notebook_no_wait(
+    mock_client: MagicMock,
+    mock_logger: MagicMock,
+    mock_wait: MagicMock,
+    mock_record_operation: MagicMock,
+) -> None:
+    """
+    Test case to verify that stop_notebook returns after scaling down when not waiting.
+    """
+    notebook_name = "test-notebook"
+
+    # Call the function to test
+    stop_notebook(notebook_name, mock_client, wait=False)
+
+    # Assertions
+    mock_client.replace.assert_called_once()
+    mock_wait.assert_not_called()
+    mock_record_operation.assert_not_called()
+    mock_logger.info.assert_called_with(
+        f"Stopping the notebook {notebook_name}. Check `dss list` for the status of the notebook."
+    )
+
+
+def test_stop_notebook_timeout(
+    mock_client: MagicMock,
+    mock_logger: MagicMock,
+    mock_wait: MagicMock,
+    mock_record_operation: MagicMock,
+) -> None:
+    """
+    Tests case to verify that a notebook not stopping in time is reported and recorded.
+    """
+    notebook_name = "test-notebook"
+    mock_wait.side_effect = TimeoutError()
+
+    # Call the function to test
+    with pytest.raises(RuntimeError):
+        stop_notebook(name=notebook_name, lightkube_client=mock_client)
+
+    # Assert
+    mock_logger.error.assert_called_with(
+        f"Timed out while waiting for notebook {notebook_name} to stop."
+    )
+    mock_record_operation.assert_called_once_with(
+        "stop", ANY, "Timeout", image="image", node="node"
+    )
@@ -1,16 +1,32 @@
+import threading
 from contextlib import nullcontext as does_not_raise
 from pathlib import Path
 from unittest.mock import MagicMock, mock_open, patch
 
 import pytest
 from lightkube import ApiError
-from lightkube.models.core_v1 import Service, ServicePort, ServiceSpec
+from lightkube.models.core_v1 import (
+    ContainerState,
+    ContainerStateTerminated,
+    ContainerStateWaiting,
+    ContainerStatus,
+    PodCondition,
+    PodStatus,
+    Service,
+    ServicePort,
+    ServiceSpec,
+)
+from lightkube.models.meta_v1 import ObjectMeta
 from lightkube.resources.apps_v1 import Deployment
 from lightkube.resources.core_v1 import Node, Pod
 
-from dss.config import DSS_NAMESPACE, MLFLOW_DEPLOYMENT_NAME, DeploymentState
+from dss.config import DSS_NAMESPACE, LIST_PAGE_SIZE, MLFLOW_DEPLOYMENT_NAME, DeploymentState
+from dss.nodes import NVIDIA_NODE_LABELS
 from dss.utils import (
+    DaemonExecutor,
     ImagePullBackOffError,
+    PodFailure,
+    PodFailureError,
     does_dss_pvc_exist,
     does_namespace_exist,
     does_notebook_exist,
@@ -20,10 +36,17 @@ from dss.utils import (
     get_labels_for_node,
     get_lightkube_client,
     get_mlflow_tracking_uri,
+    get_notebook_resources,
+    get_pod_failure,
+    get_previous_pod_logs,
+    get_service_proxy_status,
     get_service_url,
+    intel_is_present_in_node,
+    nvidia_is_present_in_node,
     save_kubeconfig,
     wait_for_deployment_ready,
     wait_for_namespace_to_be_deleted,
+    wait_for_notebook_pod_deleted,
 )
 
 
@@ -162,6 +185,36 @@ def test_get_kubeconfig_path(
     assert actual == expected_kubeconfig_path_used
 
 
+def test_get_kubeconfig_path_current_context(tmp_path: Path, monkeypatch):
+    """Test that get_kubeconfig_path returns the kubeconfig of the context set as current."""
+    current_context_file = tmp_path / "current-context"
+    current_context_file.write_text("workstation-2")
+    monkeypatch.setattr("dss.utils.CURRENT_CONTEXT_FILE", current_context_file)
+    monkeypatch.setattr("dss.utils.CONTEXTS_DIR", tmp_path / "contexts")
+    monkeypatch.delenv("test-env-var", raising=False)
+
+    actual = get_kubeconfig_path(env_var="test-env-var", default_kubeconfig_location="default")
+
+    assert actual == tmp_path / "contexts" / "workstation-2"
+
+
+def test_save_kubeconfig_ignores_current_context(tmp_path: Path, monkeypatch):
+    """Test that an explicit kubeconfig never overwrites the kubeconfig of the current context."""
+    current_context_file = tmp_path / "current-context"
+    current_context_file.write_text("workstation-2")
+    monkeypatch.setattr("dss.utils.CURRENT_CONTEXT_FILE", current_context_file)
+    monkeypatch.setattr("dss.utils.CONTEXTS_DIR", tmp_path / "contexts")
+    monkeypatch.delenv("test-env-var", raising=False)
+
+    saved = save_kubeconfig(
+        "kubeconfig-text", env_var="test-env-var", default_kubeconfig_location=tmp_path / "config"
+    )
+
+    assert saved == tmp_path / "config"
+    assert saved.read_text() == "kubeconfig-text"
+    assert not (tmp_path / "contexts").exists()
+
+
 @patch("dss.utils.get_kubeconfig_path")
 def test_save_kubeconfig(
     mock_get_kubeconfig_path: MagicMock,
@@ -266,6 +319,7 @@ def test_wait_for_deployment_ready_image_pull_backoff(
 
     # Mock the behavior of the client.list method to return a pod with `ImagePullBackOff` reason
     pod = MagicMock()
+    pod.status.containerStatuses = [MagicMock()]
     pod.status.containerStatuses[0].state.waiting.reason = "ImagePullBackOff"
     mock_client_instance.list.return_value = iter([pod])
 
@@ -290,12 +344,12 @@ def test_wait_for_deployment_ready_image_pull_backoff(
     [
         # A resource is found (lightkube_client.get() does not fail)
         (None, does_not_raise(), True),
-        # The first resource is missing (ApiError with 404 status code), but the second is found
-        ([FakeApiError(404), None], does_not_raise(), True),
+        # One resource is missing (ApiError with 404 status code), but the other is found
+        ([FakeApiError(404), MagicMock()], does_not_raise(), True),
         # No resources are found
         ([FakeApiError(404), FakeApiError(404)], does_not_raise(), False),
         # Some other ApiError is raised, which we don't know how to handle
-        ([FakeApiError(999)], pytest.raises(ApiError), None),
+        ([FakeApiError(999), FakeApiError(999)], pytest.raises(ApiError), None),
     ],
 )
 def test_does_notebook_exist(lightkube_client_side_effect, context_raised, expected_return):
@@ -307,6 +361,25 @@ def test_does_notebook_exist(lightkube_client_side_effect, context_raised, expec
         assert does_notebook_exist("notebook", "namespace", mock_client) == expected_return
 
 
+def test_get_notebook_resources():
+    """Test that the Deployment and Service of a notebook are returned by type."""
+    mock_client = MagicMock()
+    deployment = MagicMock()
+
+    def get(resource, namespace, name):
+        if resource is Deployment:
+            return deployment
+        raise FakeApiError(404)
+
+    mock_client.get.side_effect = get
+
+    resources = get_notebook_resources("notebook", "namespace", mock_client)
+
+    assert resources.deployment is deployment
+    assert resources.service is None
+    assert resources.exists
+
+
 @pytest.mark.parametrize(
     "lightkube_client_side_effect, context_raised, expected_return",
     [
@@ -327,6 +400,34 @@ def test_does_dss_pvc_exist(lightkube_client_side_effect, context_raised, expect
         assert does_dss_pvc_exist(mock_client) == expected_return
 
 
+def test_get_previous_pod_logs(mock_client: MagicMock) -> None:
+    """Test that the previous logs are requested through the client's GenericClient."""
+    generic_client = mock_client._client
+    generic_client.send.return_value.text = "line\n"
+
+    logs = get_previous_pod_logs(mock_client, "nb-1", DSS_NAMESPACE, tail_lines=10)
+
+    assert logs == "line\n"
+    request = generic_client.build_adapter_request.call_args.args[0]
+    assert request.url == f"api/v1/namespaces/{DSS_NAMESPACE}/pods/nb-1/log"
+    assert request.params == {"previous": True, "timestamps": False, "tailLines": 10}
+    generic_client.raise_for_status.assert_called_once_with(generic_client.send.return_value)
+
+
+def test_get_service_proxy_status(mock_client: MagicMock) -> None:
+    """Test that a Service is requested through the service proxy of the API server."""
+    generic_client = mock_client._client
+    generic_client.send.return_value.status_code = 200
+
+    status_code = get_service_proxy_status(mock_client, "mlflow", DSS_NAMESPACE, 5000, "/health")
+
+    assert status_code == 200
+    generic_client.raise_for_status.assert_not_called()
+    request = generic_client.build_adapter_request.call_args.args[0]
+    assert request.method == "GET"
+    assert request.url == f"api/v1/namespaces/{DSS_NAMESPACE}/services/mlflow:5000/proxy/health"
+
+
 def test_get_labels_for_node_with_single_node(mock_client: MagicMock):
     """
     Test to verify the behavior of get_labels_for_node when there is only one node in the cluster.
@@ -339,7 +440,7 @@ def test_get_labels_for_node_with_single_node(mock_client: MagicMock):
 
     # Assertions
     assert labels == {"gpu_type": "NVIDIA"}
-    mock_client.list.assert_called_once_with(Node)
+    mock_client.list.assert_called_once_with(Node, chunk_size=LIST_PAGE_SIZE)
 
 
 def test_get_labels_for_node_with_multiple_nodes(mock_client: MagicMock):
@@ -354,7 +455,21 @@ def test_get_labels_for_node_with_multiple_nodes(mock_client: MagicMock):
         get_labels_for_node(mock_client)
 
     # Verify that lightkube_client.list was called once with Node
-    mock_client.list.assert_called_once_with(Node)
+    mock_client.list.assert_called_once_with(Node, chunk_size=LIST_PAGE_SIZE)
+
+
+def test_nvidia_is_present_in_node_any_node(mock_client: MagicMock):
+    """
+    Test that the NVIDIA GPU operator labels are looked up on every node of the cluster.
+    """
+    gpu_labels = dict.fromkeys(NVIDIA_NODE_LABELS, "true")
+    mock_client.list.return_value = [
+        MagicMock(metadata=MagicMock(labels={})),
+        MagicMock(metadata=MagicMock(labels=gpu_labels)),
+    ]
+
+    assert nvidia_is_present_in_node(mock_client)
+    assert not intel_is_present_in_node(mock_client)
 
 
 @pytest.mark.parametrize(
@@ -403,6 +518,150 @@ def test_get_deployment_state(
     assert state == expected_state, f"Expected {expected_state}, but got {state}"
 
 
+def _pod_with_status(
+    waiting: str = None, terminated: str = None, last_terminated: str = None, scheduled=True
+) -> Pod:
+    """Return a Pod with a container in the given states."""
+    last_state = (
+        ContainerState(terminated=ContainerStateTerminated(exitCode=1, reason=last_terminated))
+        if last_terminated
+        else None
+    )
+    state = ContainerState(
+        waiting=ContainerStateWaiting(reason=waiting, message="details") if waiting else None,
+        terminated=(
+            ContainerStateTerminated(exitCode=137, reason=terminated) if terminated else None
+        ),
+    )
+    conditions = (
+        []
+        if scheduled
+        else [
+            PodCondition(
+                type="PodScheduled",
+                status="False",
+                reason="Unschedulable",
+                message="0/1 nodes are available: 1 Insufficient memory.",
+            )
+        ]
+    )
+    container_status = ContainerStatus(
+        name="notebook",
+        image="image",
+        imageID="",
+        ready=False,
+        restartCount=3 if last_terminated else 0,
+        state=state,
+        lastState=last_state,
+    )
+    return Pod(
+        metadata=ObjectMeta(name="notebook-0"),
+        status=PodStatus(
+            conditions=conditions, containerStatuses=[] if not scheduled else [container_status]
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "pod, expected_failure",
+    [
+        (_pod_with_status(), None),
+        (_pod_with_status(waiting="ContainerCreating"), None),
+        (_pod_with_status(waiting="ErrImagePull"), PodFailure("ErrImagePull", "details")),
+        (
+            _pod_with_status(waiting="CrashLoopBackOff", last_terminated="Error"),
+            PodFailure("CrashLoopBackOff", "container notebook keeps exiting with code 1"),
+        ),
+        (
+            _pod_with_status(waiting="CrashLoopBackOff", last_terminated="OOMKilled"),
+            PodFailure("OOMKilled", "container notebook ran out of memory"),
+        ),
+        (
+            _pod_with_status(terminated="OOMKilled"),
+            PodFailure("OOMKilled", "container notebook ran out of memory"),
+        ),
+        (
+            _pod_with_status(waiting="CreateContainerConfigError"),
+            PodFailure("CreateContainerConfigError", "details"),
+        ),
+        (
+            _pod_with_status(scheduled=False),
+            PodFailure("Unschedulable", "0/1 nodes are available: 1 Insufficient memory."),
+        ),
+    ],
+)
+def test_get_pod_failure(pod: Pod, expected_failure: PodFailure) -> None:
+    """Test that the Pods that will not become ready are classified by reason."""
+    assert get_pod_failure(pod) == expected_failure
+
+
+def test_wait_for_deployment_ready_crash_loop(mock_logger: MagicMock) -> None:
+    """Test that a crash loop aborts a wait without timeout instead of waiting forever."""
+    mock_client_instance = MagicMock()
+    mock_client_instance.get.return_value = MagicMock(
+        spec=Deployment, status=MagicMock(availableReplicas=0), spec_replicas=1
+    )
+    mock_client_instance.list.return_value = [
+        _pod_with_status(waiting="CrashLoopBackOff", last_terminated="OOMKilled")
+    ]
+
+    with pytest.raises(PodFailureError) as exc_info:
+        wait_for_deployment_ready(
+            mock_client_instance,
+            namespace="test-namespace",
+            deployment_name="test-deployment",
+            timeout_seconds=None,
+        )
+
+    assert exc_info.value.reason == "OOMKilled"
+    assert not isinstance(exc_info.value, ImagePullBackOffError)
+
+
+def test_wait_for_deployment_ready_transient_failure(mock_logger: MagicMock) -> None:
+    """Test that a Pod that cannot be scheduled only aborts the wait after the grace period."""
+    mock_client_instance = MagicMock()
+    mock_client_instance.get.return_value = MagicMock(
+        spec=Deployment, status=MagicMock(availableReplicas=0), spec_replicas=1
+    )
+    mock_client_instance.list.return_value = [_pod_with_status(scheduled=False)]
+    clock = [0]
+
+    with patch("dss.utils.time") as mock_time:
+        mock_time.time.side_effect = lambda: clock[0]
+        mock_time.sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+        with pytest.raises(PodFailureError) as exc_info:
+            wait_for_deployment_ready(
+                mock_client_instance,
+                namespace="test-namespace",
+                deployment_name="test-deployment",
+                timeout_seconds=None,
+                interval_seconds=10,
+                grace_seconds=30,
+            )
+
+    assert exc_info.value.reason == "Unschedulable"
+    assert clock[0] == 30
+
+
+@pytest.mark.parametrize(
+    "pod, expected_state",
+    [
+        (
+            _pod_with_status(waiting="CrashLoopBackOff", last_terminated="Error"),
+            DeploymentState.CRASHLOOP,
+        ),
+        (_pod_with_status(terminated="OOMKilled"), DeploymentState.OOMKILLED),
+        (_pod_with_status(scheduled=False), DeploymentState.UNSCHEDULABLE),
+        (_pod_with_status(waiting="RunContainerError"), DeploymentState.ERRCONTAINER),
+    ],
+)
+def test_get_deployment_state_failure(mock_deployment, pod: Pod, expected_state) -> None:
+    """Test that the state of a notebook with a failed Pod shows why it failed."""
+    mock_deployment.metadata.deletionTimestamp = None
+
+    assert get_deployment_state(mock_deployment, MagicMock(), [pod]) == expected_state
+
+
 @pytest.mark.parametrize(
     "lightkube_client_side_effect, context_raised, expected_return",
     [
@@ -462,3 +721,59 @@ def test_wait_for_namespace_to_be_deleted(
     assert mock_logger.info.call_count == logger_info_call_count
     if error_message:
         assert str(exc_info.value) == error_message
+
+
+def test_daemon_executor() -> None:
+    """Test that the calls run on daemon threads and the queued ones are cancelled on shutdown."""
+    started, unblock = threading.Event(), threading.Event()
+    executor = DaemonExecutor(max_workers=1)
+
+    def blocked() -> bool:
+        started.set()
+        unblock.wait()
+        return threading.current_thread().daemon
+
+    running = executor.submit(blocked)
+    queued = executor.submit(lambda: "never run")
+    started.wait(timeout=5)
+    executor.shutdown()
+    unblock.set()
+
+    assert running.result(timeout=5) is True
+    assert queued.cancelled()
+    with pytest.raises(RuntimeError):
+        executor.submit(lambda: None)
+
+
+def test_daemon_executor_exception() -> None:
+    """Test that the exception raised by a call is set on its Future."""
+    executor = DaemonExecutor(max_workers=2)
+
+    future = executor.submit(int, "not a number")
+
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
+    executor.shutdown()
+
+
+def test_wait_for_notebook_pod_deleted() -> None:
+    """Test that the wait lasts until the terminating notebook Pod is gone."""
+    terminating = Pod(metadata=ObjectMeta(name="nb-1", creationTimestamp="2024-05-01T10:00:00Z"))
+    mock_client = MagicMock()
+    mock_client.list.side_effect = [[terminating], [terminating], []]
+
+    with patch("dss.utils.time.sleep") as mock_sleep:
+        wait_for_notebook_pod_deleted(mock_client, DSS_NAMESPACE, "nb", interval_seconds=1)
+
+    assert mock_client.list.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+def test_wait_for_notebook_pod_deleted_timeout() -> None:
+    """Test that a notebook Pod that is never deleted times out."""
+    pod = Pod(metadata=ObjectMeta(name="nb-1", creationTimestamp="2024-05-01T10:00:00Z"))
+    mock_client = MagicMock()
+    mock_client.list.return_value = [pod]
+
+    with patch("dss.utils.time.sleep"), pytest.raises(TimeoutError):
+        wait_for_notebook_pod_deleted(mock_client, DSS_NAMESPACE, "nb", timeout_seconds=0)
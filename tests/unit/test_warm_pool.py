@@ -0,0 +1,163 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from lightkube.resources.apps_v1 import Deployment, ReplicaSet
+from lightkube.resources.core_v1 import Pod, Service
+from lightkube.types import PatchType
+from test_utils import FakeApiError
+
+import dss
+from dss.config import (
+    DSS_NAMESPACE,
+    MANIFEST_TEMPLATES_LOCATION,
+    NOTEBOOK_LABEL,
+    WARM_POOL_CONFIG_LABEL,
+    WARM_POOL_CONTAINER_NAME,
+    WARM_POOL_LABEL,
+)
+from dss.warm_pool import (
+    adopt_warm_pod,
+    apply_warm_pool,
+    get_warm_pool_config_hash,
+    get_warm_pool_configs,
+)
+
+NOTEBOOK_NAME = "test-notebook"
+MANIFESTS_FILE = Path(
+    Path(dss.__file__).parent, MANIFEST_TEMPLATES_LOCATION, "notebook_deployment.yaml.j2"
+)
+CONTEXT = {
+    "mlflow_tracking_uri": "http://mlflow.dss.svc.cluster.local:5000",
+    "notebook_name": NOTEBOOK_NAME,
+    "namespace": DSS_NAMESPACE,
+    "notebook_image": "test-image",
+    "pvc_name": "notebooks",
+}
+
+
+def _mock_warm_pod(name: str, ready: bool = True) -> MagicMock:
+    pod = MagicMock()
+    pod.metadata.name = name
+    pod.metadata.deletionTimestamp = None
+    pod.metadata.resourceVersion = "42"
+    pod.metadata.labels = {WARM_POOL_LABEL: "pytorch"}
+    pod.status.phase = "Running"
+    pod.status.conditions = [MagicMock(type="Ready", status="True" if ready else "False")]
+    return pod
+
+
+def _applied(mock_client: MagicMock, resource) -> list:
+    """Return the objects of a resource type applied by the KubernetesResourceHandler."""
+    return [
+        call.kwargs["obj"]
+        for call in mock_client.apply.call_args_list
+        if isinstance(call.kwargs["obj"], resource)
+    ]
+
+
+def test_get_warm_pool_config_hash_ignores_name():
+    """Test that the config hash only depends on the settings that shape the Pod."""
+    renamed = {**CONTEXT, "notebook_name": "other", "container_name": "other"}
+    resized = {**CONTEXT, "resource_requests": {"cpu": "2"}}
+
+    assert get_warm_pool_config_hash(CONTEXT) == get_warm_pool_config_hash(renamed)
+    assert get_warm_pool_config_hash(CONTEXT) != get_warm_pool_config_hash(resized)
+
+
+def test_get_warm_pool_configs():
+    """Test that only the warm pools are read from the install state components."""
+    state = {
+        "components": {
+            "mlflow-deployment": {"image": "mlflow"},
+            "dss-warm-pool-pytorch": {"config": "abc", "count": 2},
+        }
+    }
+
+    assert get_warm_pool_configs(state) == {"abc"}
+    assert get_warm_pool_configs(None) == set()
+
+
+def test_apply_warm_pool():
+    """Test that the pool is a Deployment of notebook Pods that are not listed as notebooks."""
+    mock_client = MagicMock()
+
+    pool = apply_warm_pool(mock_client, "pytorch", 3, CONTEXT, MANIFESTS_FILE)
+
+    config_hash = get_warm_pool_config_hash(CONTEXT)
+    assert pool == {"config": config_hash, "count": 3, "namespace": DSS_NAMESPACE}
+    mock_client.apply.assert_called_once()
+    deployment = mock_client.apply.call_args.args[0]
+    assert isinstance(deployment, Deployment)
+    assert deployment.metadata.name == "dss-warm-pool-pytorch"
+    assert deployment.spec.replicas == 3
+    assert NOTEBOOK_LABEL not in deployment.metadata.labels
+    assert deployment.spec.selector.matchLabels == {
+        "app.kubernetes.io/part-of": "dss",
+        WARM_POOL_LABEL: "pytorch",
+    }
+    template = deployment.spec.template
+    assert template.metadata.labels[WARM_POOL_CONFIG_LABEL] == config_hash
+    assert NOTEBOOK_LABEL not in template.metadata.labels
+    assert template.spec.containers[0].name == WARM_POOL_CONTAINER_NAME
+    assert template.spec.containers[0].image == "test-image"
+
+
+def test_adopt_warm_pod_no_candidates():
+    """Test that nothing is created when no ready warm Pod matches."""
+    mock_client = MagicMock()
+    mock_client.list.return_value = [_mock_warm_pod("warm-pytorch-1", ready=False)]
+
+    assert not adopt_warm_pod(NOTEBOOK_NAME, CONTEXT, MANIFESTS_FILE, mock_client)
+
+    mock_client.patch.assert_not_called()
+    mock_client.create.assert_not_called()
+    mock_client.apply.assert_not_called()
+
+
+def test_adopt_warm_pod():
+    """Test that a warm Pod is released by the pool before its ReplicaSet and Deployment exist."""
+    mock_client = MagicMock()
+    mock_client.list.return_value = [
+        _mock_warm_pod("warm-pytorch-1"),
+        _mock_warm_pod("warm-pytorch-2"),
+    ]
+    # The first Pod was adopted concurrently by another notebook
+    mock_client.patch.side_effect = [FakeApiError(409), None]
+
+    assert adopt_warm_pod(NOTEBOOK_NAME, CONTEXT, MANIFESTS_FILE, mock_client)
+
+    patch = mock_client.patch.call_args.args[2]
+    assert mock_client.patch.call_args.args[:2] == (Pod, "warm-pytorch-2")
+    assert mock_client.patch.call_args.kwargs["patch_type"] == PatchType.MERGE
+    labels = patch["metadata"]["labels"]
+    pod_template_hash = labels["pod-template-hash"]
+    assert patch["metadata"]["resourceVersion"] == "42"
+    assert patch["metadata"]["ownerReferences"] is None
+    assert labels[NOTEBOOK_LABEL] == NOTEBOOK_NAME
+    assert labels[WARM_POOL_LABEL] is None
+    assert labels[WARM_POOL_CONFIG_LABEL] is None
+
+    replica_set = mock_client.create.call_args.args[0]
+    assert isinstance(replica_set, ReplicaSet)
+    assert replica_set.metadata.name == f"{NOTEBOOK_NAME}-{pod_template_hash}"
+    assert replica_set.spec.replicas == 1
+    assert replica_set.spec.selector.matchLabels["pod-template-hash"] == pod_template_hash
+    assert replica_set.spec.template.metadata.labels["pod-template-hash"] == pod_template_hash
+
+    (deployment,) = _applied(mock_client, Deployment)
+    assert len(_applied(mock_client, Service)) == 1
+    assert deployment.spec.replicas == 1
+    assert deployment.spec.template.spec.containers[0].name == WARM_POOL_CONTAINER_NAME
+    assert replica_set.spec.template.spec == deployment.spec.template.spec
+
+
+def test_adopt_warm_pod_replica_set_failure():
+    """Test that the adopted Pod is deleted and the notebook created as usual on failure."""
+    mock_client = MagicMock()
+    mock_client.list.return_value = [_mock_warm_pod("warm-pytorch-1")]
+    mock_client.create.side_effect = FakeApiError(403)
+
+    assert not adopt_warm_pod(NOTEBOOK_NAME, CONTEXT, MANIFESTS_FILE, mock_client)
+
+    mock_client.delete.assert_called_once_with(Pod, "warm-pytorch-1", namespace=DSS_NAMESPACE)
+    mock_client.apply.assert_not_called()